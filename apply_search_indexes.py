@@ -0,0 +1,51 @@
+"""
+Создание триграммных индексов для поиска по подстроке.
+
+Поиск на вкладках выполняется условиями вида ``столбец ILIKE '%текст%'``.
+Обычный B-tree индекс для них не подходит, поэтому без дополнительных
+индексов каждый поиск — последовательное чтение таблицы. Скрипт включает
+расширение pg_trgm и создает GIN-индексы с классом операторов
+gin_trgm_ops, которые планировщик использует для LIKE/ILIKE с шаблоном
+из трех и более символов.
+
+Индексы описаны в миграции migrations/0002_search_trgm_indexes.sql
+и создаются через CREATE INDEX CONCURRENTLY, поэтому скрипт можно
+запускать на работающей базе без блокировки записи в таблицы. Скрипт
+оставлен для совместимости и применяет миграции до этой версии
+(см. migrate.py).
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import sys
+import psycopg2
+
+from migrate import logger, load_config, migrate
+
+# Версия миграции с триграммными индексами
+SEARCH_INDEXES_MIGRATION = 2
+
+
+def main():
+    """
+    Подключение к базе данных из config.ini и создание индексов.
+    """
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    try:
+        logger.info("Подключение к базе данных успешно")
+        migrate(conn, SEARCH_INDEXES_MIGRATION)
+        print("Триграммные индексы для поиска успешно созданы!")
+    finally:
+        conn.close()
+        logger.info("Соединение с базой данных закрыто")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Ошибка: {str(e)}")
+        print(f"Произошла ошибка: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,150 @@
+"""
+Сравнение способов записи многих строк: построчно, executemany и пакетами.
+
+Скрипт создает в отдельной схеме bench_batch таблицу, похожую на
+order_items, и записывает в нее одни и те же строки:
+
+- execute_query для каждой строки (команда и COMMIT на строку, как при
+  вызове Database.execute_query в цикле);
+- cursor.executemany в одной транзакции (так создавались позиции заказа
+  в OrdersTab.create_purchase_order) — psycopg2 выполняет его как
+  отдельную команду на каждую строку;
+- Transaction.execute_batch и Transaction.execute_many_values с разным
+  размером страницы.
+
+Для каждого способа печатаются обращения к серверу и время на 1 000 строк.
+Обращения считаются для executemany и построчной записи по одному на
+строку (плюс COMMIT), для пакетных методов — счетчиком Transaction.
+Задержка сети между приложением и сервером умножается на количество
+обращений, поэтому на удаленной базе разница больше, чем на локальной.
+
+Рабочие таблицы приложения не затрагиваются; схема удаляется по
+завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/batch_writes.py --rows 5000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database
+
+# Схема для таблицы измерения
+SCHEMA = "bench_batch"
+# Команда вставки одной строки
+INSERT_ROW = (
+    f"INSERT INTO {SCHEMA}.order_items (order_id, product_id, quantity, unit_price, total_price) "
+    f"VALUES (%s, %s, %s, %s, %s)"
+)
+# Команда вставки списка строк
+INSERT_VALUES = (
+    f"INSERT INTO {SCHEMA}.order_items (order_id, product_id, quantity, unit_price, total_price) VALUES %s"
+)
+
+
+def create_table(db):
+    """
+    Создание схемы и таблицы позиций заказа.
+
+    :param db: Объект базы данных
+    :type db: Database
+    """
+    with db.transaction() as tx:
+        tx.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        tx.execute(f"CREATE SCHEMA {SCHEMA}")
+        tx.execute(f"""
+            CREATE TABLE {SCHEMA}.order_items (
+                order_item_id serial PRIMARY KEY,
+                order_id integer NOT NULL,
+                product_id integer NOT NULL,
+                quantity integer NOT NULL,
+                unit_price numeric NOT NULL,
+                total_price numeric NOT NULL
+            )
+        """)
+
+
+def measure(db, title, rows, func):
+    """
+    Выполнение и печать одного измерения на пустой таблице.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param title: Название способа
+    :type title: str
+    :param rows: Строки для записи
+    :type rows: list
+    :param func: Функция записи, возвращающая количество обращений к серверу
+    :type func: callable
+    """
+    db.execute_query(f"TRUNCATE {SCHEMA}.order_items")
+    start = time.perf_counter()
+    round_trips = func(rows)
+    elapsed = time.perf_counter() - start
+    per_thousand = 1000 / len(rows)
+    print(f"{title:<32} обращений на 1000 строк {round_trips * per_thousand:>8.1f}  "
+          f"время на 1000 строк {elapsed * per_thousand * 1000:>9.1f} мс")
+
+
+def main():
+    """
+    Генерация строк и сравнение способов записи.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение построчной и пакетной записи")
+    parser.add_argument("--rows", type=int, default=5000, help="количество строк")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему после измерений")
+    args = parser.parse_args()
+
+    rows = [(i // 20 + 1, i % 500 + 1, i % 40 + 1, i % 1000 + 0.99, (i % 1000 + 0.99) * (i % 40 + 1))
+            for i in range(args.rows)]
+    db = Database()
+    create_table(db)
+    try:
+        def row_by_row(rows):
+            for row in rows:
+                db.execute_query(INSERT_ROW, row)
+            # Команда и COMMIT на каждую строку
+            return 2 * len(rows)
+
+        def executemany(rows):
+            with db.transaction() as tx:
+                tx.cursor.executemany(INSERT_ROW, rows)
+            # Команда на каждую строку и COMMIT
+            return len(rows) + 1
+
+        def batch(page_size):
+            def run(rows):
+                with db.transaction() as tx:
+                    tx.execute_batch(INSERT_ROW, rows, page_size)
+                return tx.round_trips + 1
+            return run
+
+        def values(page_size):
+            def run(rows):
+                with db.transaction() as tx:
+                    tx.execute_many_values(INSERT_VALUES, rows, page_size=page_size)
+                return tx.round_trips + 1
+            return run
+
+        measure(db, "execute_query на строку", rows[:min(len(rows), 1000)], row_by_row)
+        measure(db, "executemany", rows, executemany)
+        for page_size in (100, 500):
+            measure(db, f"execute_batch, страница {page_size}", rows, batch(page_size))
+        for page_size in (100, 500, 1000):
+            measure(db, f"execute_many_values, страница {page_size}", rows, values(page_size))
+    finally:
+        if not args.keep:
+            db.execute_query(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
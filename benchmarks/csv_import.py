@@ -0,0 +1,163 @@
+"""
+Сравнение построчного импорта CSV с импортом через COPY.
+
+Скрипт создает в отдельной схеме bench_import таблицу products с теми же
+ограничениями, что и в рабочей базе, генерирует CSV файл с товарами
+(небольшая доля строк содержит ошибки) и измеряет:
+
+- прежний способ — INSERT и COMMIT для каждой строки (на части файла,
+  иначе измерение заняло бы минуты);
+- массовый импорт bulk_import.import_csv_with_connection.
+
+Рабочие таблицы приложения не затрагиваются; схема и файлы удаляются
+по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/csv_import.py --rows 100000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import psycopg2
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from db_config import load_config
+from bulk_import import PRODUCT_CATEGORIES, import_csv_with_connection, rejected_report_path
+
+# Схема для таблиц измерения
+SCHEMA = "bench_import"
+# Каждая такая по счету строка файла содержит ошибку
+BAD_ROW_EVERY = 1000
+
+
+def create_table(cursor):
+    """
+    Создание схемы и таблицы products.
+
+    :param cursor: Курсор базы данных
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path = {SCHEMA}, public")
+    categories = ", ".join(f"'{category}'" for category in PRODUCT_CATEGORIES)
+    cursor.execute(f"""
+        CREATE TABLE products (
+            product_id serial PRIMARY KEY,
+            product_name text NOT NULL,
+            product_description text,
+            category text,
+            unit_price numeric NOT NULL,
+            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT products_category_check CHECK (category = ANY (ARRAY[{categories}])),
+            CONSTRAINT products_unit_price_check CHECK (unit_price > 0)
+        )
+    """)
+
+
+def generate_file(path, rows):
+    """
+    Генерация CSV файла с товарами.
+
+    :param path: Имя файла
+    :type path: str
+    :param rows: Количество строк данных
+    :type rows: int
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Название", "Описание", "Категория", "Цена"])
+        for i in range(1, rows + 1):
+            price = "-1" if i % BAD_ROW_EVERY == 0 else f"{i % 1000 + 0.99:.2f}"
+            writer.writerow([
+                f"Товар {i}",
+                f"Описание товара {i}",
+                PRODUCT_CATEGORIES[i % len(PRODUCT_CATEGORIES)],
+                price,
+            ])
+
+
+def row_by_row(conn, path, limit):
+    """
+    Прежний способ импорта: INSERT и COMMIT для каждой строки.
+
+    :returns: Количество обработанных строк и время (с)
+    :rtype: tuple[int, float]
+    """
+    query = """
+        INSERT INTO products (product_name, product_description, category, unit_price)
+        VALUES (%s, %s, %s, %s)
+    """
+    count = 0
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f, conn.cursor() as cursor:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if count >= limit:
+                break
+            count += 1
+            try:
+                cursor.execute(query, row)
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+    return count, time.perf_counter() - start
+
+
+def main():
+    """
+    Генерация файла и сравнение способов импорта.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение способов импорта CSV")
+    parser.add_argument("--rows", type=int, default=100000, help="количество строк файла")
+    parser.add_argument("--row-by-row", type=int, default=5000,
+                        help="количество строк для построчного импорта")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему и файлы после измерений")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "bench_import_products.csv")
+    generate_file(path, args.rows)
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    try:
+        with conn.cursor() as cursor:
+            create_table(cursor)
+        conn.commit()
+
+        count, elapsed = row_by_row(conn, path, args.row_by_row)
+        old_rate = count / elapsed
+        print(f"Построчно:  {count:>8} строк за {elapsed:>7.2f} с  {old_rate:>10.0f} строк/с")
+
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE products")
+        conn.commit()
+
+        result = import_csv_with_connection(conn, "products", path)
+        new_rate = result.total / result.elapsed
+        print(f"COPY:       {result.total:>8} строк за {result.elapsed:>7.2f} с  {new_rate:>10.0f} строк/с")
+        print(f"Добавлено {result.imported}, отклонено {result.rejected} (отчет: {result.report_path})")
+        print(f"Ускорение: x{new_rate / old_rate:.1f}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+            for name in (path, rejected_report_path(path)):
+                if os.path.exists(name):
+                    os.remove(name)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Сравнение триггера пересчета остатков до и после перевода на одну команду.
+
+Скрипт создает в отдельной схеме bench_trigger таблицы warehouses,
+products, stock, orders и order_items, устанавливает триггер
+after_order_delivered из миграции 0001 (цикл по позициям заказа) и
+измеряет время перевода заказа в статус 'доставлен' для заказов разного
+размера. Затем применяет миграцию 0005 (одна команда INSERT ... ON
+CONFLICT) и повторяет измерения. Каждое измерение выполняется в
+транзакции, которая затем откатывается, поэтому все прогоны работают
+с одинаковыми данными. Рабочие таблицы приложения не затрагиваются;
+схема удаляется по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/delivery_trigger.py --lines 50 500 5000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+import psycopg2
+
+# Подключение модулей приложения и модуля миграций
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+from db_config import load_config
+from migrate import discover_migrations, apply_sql
+
+# Схема для сгенерированных данных
+SCHEMA = "bench_trigger"
+# Миграции со старым и новым триггером
+OLD_TRIGGER_MIGRATION = 1
+NEW_TRIGGER_MIGRATION = 5
+# Повторов каждого измерения (берется лучшее время)
+REPEATS = 5
+
+
+def generate_data(cursor, warehouses, products, lines):
+    """
+    Создание схемы и заполнение таблиц сгенерированными данными.
+
+    Для каждого размера заказа создается отдельный заказ в статусе
+    'в обработке'. Половина товаров заказа уже есть на складе приемки,
+    остальные при доставке добавляются новыми записями.
+
+    :param cursor: Курсор базы данных
+    :param warehouses: Количество складов
+    :type warehouses: int
+    :param products: Количество товаров
+    :type products: int
+    :param lines: Размеры заказов (количество позиций)
+    :type lines: list[int]
+    :returns: Словарь {количество позиций: ID заказа}
+    :rtype: dict[int, int]
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path = {SCHEMA}, public")
+
+    cursor.execute("""
+        CREATE TABLE warehouses (
+            warehouse_id serial PRIMARY KEY,
+            warehouse_name varchar(255) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO warehouses (warehouse_name)
+        SELECT 'Склад ' || i FROM generate_series(1, %s) AS i
+    """, (warehouses,))
+
+    cursor.execute("""
+        CREATE TABLE products (
+            product_id serial PRIMARY KEY,
+            product_name varchar(255) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO products (product_name)
+        SELECT 'Товар ' || md5(i::text) FROM generate_series(1, %s) AS i
+    """, (products,))
+
+    cursor.execute("""
+        CREATE TABLE stock (
+            stock_id serial PRIMARY KEY,
+            product_id integer REFERENCES products(product_id),
+            warehouse_id integer REFERENCES warehouses(warehouse_id),
+            quantity integer NOT NULL CHECK (quantity >= 0),
+            last_restocked date,
+            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT unique_product_warehouse UNIQUE (product_id, warehouse_id)
+        )
+    """)
+    # Четные товары лежат на первом складе
+    cursor.execute("""
+        INSERT INTO stock (product_id, warehouse_id, quantity, last_restocked)
+        SELECT i, 1, 100, CURRENT_DATE FROM generate_series(2, %s, 2) AS i
+    """, (products,))
+
+    cursor.execute("""
+        CREATE TABLE orders (
+            order_id serial PRIMARY KEY,
+            order_date date NOT NULL DEFAULT CURRENT_DATE,
+            supplier_id integer,
+            total_amount numeric(12, 2) NOT NULL DEFAULT 0,
+            status varchar(50) NOT NULL,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE order_items (
+            order_item_id serial PRIMARY KEY,
+            order_id integer REFERENCES orders(order_id),
+            product_id integer REFERENCES products(product_id),
+            quantity integer NOT NULL,
+            unit_price numeric(10, 2) NOT NULL,
+            total_price numeric(12, 2) NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX ON order_items (order_id)")
+
+    orders = {}
+    for count in lines:
+        cursor.execute("INSERT INTO orders (status) VALUES ('в обработке') RETURNING order_id")
+        order_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
+            SELECT %s, 1 + (i - 1) %% %s, 5, 10.00, 50.00 FROM generate_series(1, %s) AS i
+        """, (order_id, products, count))
+        orders[count] = order_id
+    cursor.execute("ANALYZE")
+    return orders
+
+
+def install_trigger(conn, version):
+    """
+    Установка триггера из миграции в схему bench_trigger.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param version: Версия миграции
+    :type version: int
+    """
+    migration = next(m for m in discover_migrations() if m.version == version)
+    apply_sql(conn, migration)
+    conn.commit()
+    conn.autocommit = True
+
+
+def measure(conn, order_id):
+    """
+    Измерение времени перевода заказа в статус 'доставлен'.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param order_id: ID заказа
+    :type order_id: int
+    :returns: Лучшее время выполнения (мс)
+    :rtype: float
+    """
+    conn.autocommit = False
+    best = None
+    with conn.cursor() as cursor:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            cursor.execute("UPDATE orders SET status = 'доставлен' WHERE order_id = %s", (order_id,))
+            elapsed = (time.perf_counter() - start) * 1000
+            conn.rollback()
+            best = elapsed if best is None else min(best, elapsed)
+    conn.autocommit = True
+    return best
+
+
+def run(conn, title, orders):
+    """
+    Измерение для всех размеров заказа и печать результатов.
+
+    :returns: Время для каждого размера заказа (мс)
+    :rtype: list[float]
+    """
+    print(f"\n{title}")
+    times = []
+    for count, order_id in orders.items():
+        elapsed = measure(conn, order_id)
+        times.append(elapsed)
+        print(f"  {count:>8} позиций  {elapsed:>10.2f} мс")
+    return times
+
+
+def main():
+    """
+    Генерация данных и сравнение триггеров.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение триггера пересчета остатков")
+    parser.add_argument("--lines", type=int, nargs="+", default=[50, 500, 5000],
+                        help="размеры заказов (количество позиций)")
+    parser.add_argument("--warehouses", type=int, default=20, help="количество складов")
+    parser.add_argument("--products", type=int, default=20000, help="количество товаров")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему после измерений")
+    args = parser.parse_args()
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        print(f"Генерация данных: {args.products} товаров, {args.warehouses} складов, заказы {args.lines}")
+        orders = generate_data(cursor, args.warehouses, args.products, args.lines)
+
+        # Функция и триггер создаются в схеме bench_trigger (search_path задан выше)
+        install_trigger(conn, OLD_TRIGGER_MIGRATION)
+        before = run(conn, "Цикл по позициям (миграция 0001)", orders)
+        install_trigger(conn, NEW_TRIGGER_MIGRATION)
+        after = run(conn, "Одна команда INSERT ... ON CONFLICT (миграция 0005)", orders)
+
+        print("\nУскорение:")
+        for count, old, new in zip(orders, before, after):
+            print(f"  {count:>8} позиций  x{old / max(new, 0.001):.1f}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Сравнение прежнего экспорта в Excel через pandas с потоковой записью.
+
+Скрипт создает в отдельной схеме bench_excel таблицу со строками,
+похожими на выгрузку запасов (товар, склад, количество, дата, категория,
+цена), и измеряет время и пиковый объем памяти процесса для:
+
+- прежнего способа — fetch_all, DataFrame и DataFrame.to_excel;
+- потоковой записи — Database.iter_batches и excel_export.write_xlsx.
+
+Каждый способ выполняется в отдельном процессе, чтобы пиковый объем
+памяти (ru_maxrss) не зависел от предыдущего измерения. Прежний способ
+не умеет разбивать выгрузку на листы, поэтому измеряется на не более чем
+1 000 000 строк. Рабочие таблицы приложения не затрагиваются; схема
+и файлы удаляются по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/excel_export.py --rows 1100000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import psycopg2
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database, load_config
+from excel_export import write_xlsx
+
+# Схема для таблицы измерения
+SCHEMA = "bench_excel"
+# Заголовки выгрузки
+HEADERS = ["Товар", "Склад", "Количество", "Последнее пополнение", "Категория", "Цена за ед."]
+# Строк на порцию серверного курсора
+BATCH_ROWS = 5000
+
+
+def create_table(cursor, rows):
+    """
+    Создание схемы и заполнение таблицы сгенерированными строками.
+
+    :param cursor: Курсор базы данных
+    :param rows: Количество строк
+    :type rows: int
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"""
+        CREATE TABLE {SCHEMA}.export_rows AS
+        SELECT 'Товар ' || i AS product_name,
+               'Склад ' || (i % 20 + 1) AS warehouse_name,
+               i % 500 AS quantity,
+               DATE '2024-01-01' + i % 365 AS last_restocked,
+               'электроника'::text AS category,
+               (i % 1000 + 0.99)::numeric(10, 2) AS unit_price
+        FROM generate_series(1, %s) AS i
+    """, (rows,))
+
+
+def query(limit):
+    """
+    Запрос выгрузки.
+
+    :param limit: Количество строк
+    :type limit: int
+    :returns: Текст запроса
+    :rtype: str
+    """
+    return f"SELECT * FROM {SCHEMA}.export_rows ORDER BY product_name LIMIT {int(limit)}"
+
+
+def peak_memory_mb():
+    """
+    Пиковый объем памяти текущего процесса.
+
+    :returns: Объем памяти (МБ) или None, если модуль resource недоступен
+    :rtype: float или None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS — байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_pandas(path, rows):
+    """
+    Прежний способ: все строки в памяти, затем DataFrame.to_excel.
+
+    :returns: Количество строк
+    :rtype: int
+    """
+    import pandas as pd
+    data = Database().fetch_all(query(rows))
+    df = pd.DataFrame(data)
+    df.columns = HEADERS
+    df.to_excel(path, sheet_name="Запасы", index=False)
+    return len(data)
+
+
+def run_stream(path, rows):
+    """
+    Потоковая запись из серверного курсора.
+
+    :returns: Количество строк
+    :rtype: int
+    """
+    batches = Database().iter_batches(query(rows), batch_size=BATCH_ROWS)
+    return write_xlsx(batches, path, "Запасы", HEADERS)
+
+
+def child(method, path, rows):
+    """
+    Выполнение одного измерения в дочернем процессе и печать результата в JSON.
+    """
+    start = time.perf_counter()
+    count = (run_pandas if method == "pandas" else run_stream)(path, rows)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "rows": count,
+        "elapsed": elapsed,
+        "memory": peak_memory_mb(),
+        "size": os.path.getsize(path),
+    }))
+
+
+def measure(method, path, rows):
+    """
+    Запуск измерения в отдельном процессе.
+
+    :returns: Результат измерения
+    :rtype: dict
+    """
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", method, "--path", path, "--rows", str(rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(title, result):
+    """
+    Печать результата измерения.
+    """
+    memory = f"{result['memory']:>8.0f} МБ" if result["memory"] is not None else "       н/д"
+    rate = result["rows"] / result["elapsed"]
+    print(f"{title:<10} {result['rows']:>9} строк  {result['elapsed']:>8.1f} с  "
+          f"{rate:>8.0f} строк/с  память {memory}  файл {result['size'] / 1048576:.0f} МБ")
+
+
+def main():
+    """
+    Генерация данных и сравнение способов экспорта.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение способов экспорта в Excel")
+    parser.add_argument("--rows", type=int, default=1100000, help="количество строк выгрузки")
+    parser.add_argument("--pandas-rows", type=int, default=1000000,
+                        help="количество строк для прежнего способа (0 — не измерять)")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему и файлы после измерений")
+    parser.add_argument("--child", choices=["pandas", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.path, args.rows)
+        return
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    paths = {
+        "pandas": os.path.join(tempfile.gettempdir(), "bench_excel_pandas.xlsx"),
+        "stream": os.path.join(tempfile.gettempdir(), "bench_excel_stream.xlsx"),
+    }
+    try:
+        print(f"Генерация {args.rows} строк")
+        with conn.cursor() as cursor:
+            create_table(cursor, args.rows)
+
+        pandas_rows = min(args.pandas_rows, args.rows)
+        if pandas_rows:
+            report("pandas", measure("pandas", paths["pandas"], pandas_rows))
+            if pandas_rows < args.rows:
+                # Та же выгрузка для сравнения при равном объеме
+                report("потоково", measure("stream", paths["stream"], pandas_rows))
+        result = measure("stream", paths["stream"], args.rows)
+        report("потоково", result)
+        sheets = -(-result["rows"] // (1048576 - 1))
+        print(f"Листов в книге: {sheets}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            for path in paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Сравнение построчного импорта Excel с потоковым импортом порциями.
+
+Скрипт создает в отдельной схеме bench_excel_import таблицу products
+с теми же ограничениями, что и в рабочей базе, генерирует книгу Excel
+с товарами (небольшая доля строк содержит ошибки) и измеряет:
+
+- прежний способ — pandas.read_excel, затем df.iterrows() и INSERT
+  с COMMIT для каждой строки (на части файла, иначе измерение заняло бы
+  минуты);
+- потоковый импорт excel_import.import_excel_with_connection: чтение
+  листа в режиме read-only, векторная проверка и INSERT на порцию.
+
+Рабочие таблицы приложения не затрагиваются; схема и файлы удаляются
+по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/excel_import.py --rows 100000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import psycopg2
+import pandas as pd
+from openpyxl import Workbook
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from db_config import load_config
+from bulk_import import PRODUCT_CATEGORIES, rejected_report_path
+from excel_import import import_excel_with_connection
+
+# Схема для таблиц измерения
+SCHEMA = "bench_excel_import"
+# Каждая такая по счету строка файла содержит ошибку
+BAD_ROW_EVERY = 1000
+
+
+def create_table(cursor):
+    """
+    Создание схемы и таблицы products.
+
+    :param cursor: Курсор базы данных
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path = {SCHEMA}, public")
+    categories = ", ".join(f"'{category}'" for category in PRODUCT_CATEGORIES)
+    cursor.execute(f"""
+        CREATE TABLE products (
+            product_id serial PRIMARY KEY,
+            product_name text NOT NULL,
+            product_description text,
+            category text,
+            unit_price numeric NOT NULL,
+            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT products_category_check CHECK (category = ANY (ARRAY[{categories}])),
+            CONSTRAINT products_unit_price_check CHECK (unit_price > 0)
+        )
+    """)
+
+
+def generate_file(path, rows):
+    """
+    Генерация книги Excel с товарами.
+
+    :param path: Имя файла
+    :type path: str
+    :param rows: Количество строк данных
+    :type rows: int
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Товары")
+    sheet.append(["Название", "Описание", "Категория", "Цена"])
+    for i in range(1, rows + 1):
+        sheet.append([
+            f"Товар {i}",
+            f"Описание товара {i}",
+            PRODUCT_CATEGORIES[i % len(PRODUCT_CATEGORIES)],
+            -1 if i % BAD_ROW_EVERY == 0 else i % 1000 + 0.99,
+        ])
+    workbook.save(path)
+
+
+def row_by_row(conn, path, limit):
+    """
+    Прежний способ импорта: весь лист в DataFrame, INSERT и COMMIT для каждой строки.
+
+    :returns: Количество обработанных строк и время (с)
+    :rtype: tuple[int, float]
+    """
+    query = """
+        INSERT INTO products (product_name, product_description, category, unit_price)
+        VALUES (%s, %s, %s, %s)
+    """
+    count = 0
+    start = time.perf_counter()
+    df = pd.read_excel(path, nrows=limit)
+    with conn.cursor() as cursor:
+        for _, row in df.iterrows():
+            count += 1
+            try:
+                cursor.execute(query, row.tolist())
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+    return count, time.perf_counter() - start
+
+
+def main():
+    """
+    Генерация файла и сравнение способов импорта.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение способов импорта Excel")
+    parser.add_argument("--rows", type=int, default=100000, help="количество строк файла")
+    parser.add_argument("--row-by-row", type=int, default=5000,
+                        help="количество строк для построчного импорта")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему и файлы после измерений")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "bench_import_products.xlsx")
+    generate_file(path, args.rows)
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    try:
+        with conn.cursor() as cursor:
+            create_table(cursor)
+        conn.commit()
+
+        count, elapsed = row_by_row(conn, path, args.row_by_row)
+        old_rate = count / elapsed
+        print(f"Построчно:  {count:>8} строк за {elapsed:>7.2f} с  {old_rate:>10.0f} строк/с")
+
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE products")
+        conn.commit()
+
+        result = import_excel_with_connection(conn, "products", path)
+        new_rate = result.total / result.elapsed
+        print(f"Порциями:   {result.total:>8} строк за {result.elapsed:>7.2f} с  {new_rate:>10.0f} строк/с")
+        print(f"Добавлено {result.imported}, отклонено {result.rejected} (отчет: {result.report_path})")
+        print(f"Ускорение: x{new_rate / old_rate:.1f}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+            for name in (path, rejected_report_path(path)):
+                if os.path.exists(name):
+                    os.remove(name)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
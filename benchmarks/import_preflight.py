@@ -0,0 +1,100 @@
+"""
+Измерение скорости предварительной проверки файла импорта.
+
+Скрипт генерирует CSV файл с запасами (stock) заданного размера, где
+небольшая доля строк нарушает разные правила (неизвестный товар,
+отрицательное количество, неверный формат, повтор ключа), и проверяет
+его функцией import_preflight.preflight_csv на рабочей базе данных.
+Проверка только читает идентификаторы товаров, складов и ключи запасов
+и ничего не записывает. Печатаются время проверки и сводка по правилам
+(если строк больше, чем сочетаний товаров и складов в базе, в сводке
+будут и повторы пары (product_id, warehouse_id)).
+Файл удаляется по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/import_preflight.py --rows 1000000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import csv
+import argparse
+import tempfile
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database
+from import_preflight import preflight_csv
+
+# Каждая такая по счету строка файла содержит ошибку
+BAD_ROW_EVERY = 1000
+
+
+def generate_file(path, rows, product_ids, warehouse_ids):
+    """
+    Генерация CSV файла с запасами.
+
+    :param path: Имя файла
+    :type path: str
+    :param rows: Количество строк данных
+    :type rows: int
+    :param product_ids: Существующие идентификаторы товаров
+    :type product_ids: list[int]
+    :param warehouse_ids: Существующие идентификаторы складов
+    :type warehouse_ids: list[int]
+    """
+    errors = ["product", "quantity", "format", "duplicate"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Товар", "Склад", "Количество"])
+        for i in range(1, rows + 1):
+            # Идентификаторы за пределами существующих, чтобы не совпадать с таблицей
+            row = [10 ** 9 + i, product_ids[i % len(product_ids)],
+                   warehouse_ids[(i // len(product_ids)) % len(warehouse_ids)], i % 500]
+            if i % BAD_ROW_EVERY == 0:
+                error = errors[(i // BAD_ROW_EVERY) % len(errors)]
+                if error == "product":
+                    row[1] = 0
+                elif error == "quantity":
+                    row[3] = -1
+                elif error == "format":
+                    row[3] = "много"
+                else:
+                    row[0] = 10 ** 9 + 1
+            writer.writerow(row)
+
+
+def main():
+    """
+    Генерация файла и проверка без импорта.
+    """
+    parser = argparse.ArgumentParser(description="Скорость предварительной проверки импорта")
+    parser.add_argument("--rows", type=int, default=1000000, help="количество строк файла")
+    parser.add_argument("--keep", action="store_true", help="не удалять файл после измерения")
+    args = parser.parse_args()
+
+    db = Database()
+    product_ids = [row[0] for row in db.fetch_rows("SELECT product_id FROM products ORDER BY 1")]
+    warehouse_ids = [row[0] for row in db.fetch_rows("SELECT warehouse_id FROM warehouses ORDER BY 1")]
+    if not product_ids or not warehouse_ids:
+        print("Для измерения нужны товары и склады в базе данных")
+        return
+
+    path = os.path.join(tempfile.gettempdir(), "bench_preflight_stock.csv")
+    try:
+        print(f"Генерация {args.rows} строк")
+        generate_file(path, args.rows, product_ids, warehouse_ids)
+        report = preflight_csv(db, "stock", path, samples=3)
+        print(f"{report.total / report.elapsed:.0f} строк/с")
+        print(report.summary())
+    finally:
+        if not args.keep and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Измерение затрат вызова журнала в потоке интерфейса.
+
+Скрипт записывает заданное количество сообщений (как logging.info во
+вкладках) и печатает время одного вызова в вызывающем потоке:
+
+- прежняя настройка — logging.basicConfig(filename=...): запись в файл
+  в вызывающем потоке;
+- logging_setup.setup_logging: запись помещается в очередь, файл
+  (JSON строки с ротацией) пишет фоновый поток;
+- отфильтрованный по уровню вызов (logging.debug при уровне INFO).
+
+Параметр --disk-delay-ms добавляет задержку к каждой записи на диск,
+чтобы воспроизвести медленный сетевой домашний каталог. Для очереди
+дополнительно печатается время, за которое фоновый поток записал все
+сообщения. Файлы журнала создаются во временном каталоге и удаляются.
+
+Запуск::
+
+    python benchmarks/logging_overhead.py --messages 20000 --disk-delay-ms 0.2
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from logging_setup import setup_logging, shutdown_logging
+
+
+def slow_disk(delay):
+    """
+    Добавление задержки к записи каждого сообщения в файл.
+
+    :param delay: Задержка (сек)
+    :type delay: float
+    """
+    flush = logging.StreamHandler.flush
+
+    def delayed_flush(self):
+        time.sleep(delay)
+        flush(self)
+
+    if delay > 0:
+        logging.StreamHandler.flush = delayed_flush
+
+
+def reset_root():
+    """
+    Удаление обработчиков корневого журнала.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(title, messages, log=logging.info):
+    """
+    Время одного вызова журнала в вызывающем потоке.
+
+    :param title: Название измерения
+    :type title: str
+    :param messages: Количество сообщений
+    :type messages: int
+    :param log: Функция журнала
+    :type log: callable
+    :returns: Общее время вызовов (сек)
+    :rtype: float
+    """
+    start = time.perf_counter()
+    for i in range(messages):
+        log(f"Загружено {i} записей о запасах на складе {i % 7}")
+    elapsed = time.perf_counter() - start
+    print(f"{title:<36} {elapsed / messages * 1e6:>9.1f} мкс на вызов")
+    return elapsed
+
+
+def main():
+    """
+    Сравнение синхронной записи журнала и записи через очередь.
+    """
+    parser = argparse.ArgumentParser(description="Затраты вызова журнала в потоке интерфейса")
+    parser.add_argument("--messages", type=int, default=20000, help="количество сообщений")
+    parser.add_argument("--disk-delay-ms", type=float, default=0.0,
+                        help="задержка записи каждого сообщения на диск (мс)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_logging_")
+    slow_disk(args.disk_delay_ms / 1000)
+    try:
+        # Прежняя настройка: запись в файл в вызывающем потоке
+        reset_root()
+        logging.basicConfig(filename=os.path.join(directory, "sync.log"), level=logging.DEBUG,
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+        measure("basicConfig (синхронно)", args.messages)
+        reset_root()
+
+        # Запись через очередь фоновым потоком
+        setup_logging(os.path.join(directory, "async.log"), level="INFO", levels={})
+        calls = measure("setup_logging (очередь)", args.messages)
+        measure("setup_logging, debug ниже уровня", args.messages, logging.debug)
+        start = time.perf_counter()
+        shutdown_logging()
+        print(f"{'Запись очереди на диск завершена через':<36} {time.perf_counter() - start + calls:>9.2f} с")
+    finally:
+        reset_root()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Сравнение полной перезагрузки каталога с импортом с обновлением.
+
+Скрипт создает в отдельной схеме bench_merge таблицу products с теми же
+ограничениями и уникальным индексом по названию товара, что и в рабочей
+базе (миграция 0006), загружает каталог из CSV файла и измеряет
+повторную загрузку того же каталога, в котором изменилась небольшая
+доля цен:
+
+- прежний способ — TRUNCATE и импорт всего файла заново;
+- импорт с обновлением bulk_import.import_csv_with_connection(merge=True):
+  обновляются только измененные строки, остальные пропускаются.
+
+Для каждого способа печатается время и объем записанного журнала WAL
+(разница pg_current_wal_lsn до и после загрузки) — его получают
+реплики, а перезаписанные строки затем обрабатывает autovacuum.
+
+Рабочие таблицы приложения не затрагиваются; схема и файлы удаляются
+по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/merge_import.py --rows 200000 --changed 0.01
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import psycopg2
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from db_config import load_config
+from bulk_import import PRODUCT_CATEGORIES, import_csv_with_connection
+
+# Схема для таблиц измерения
+SCHEMA = "bench_merge"
+
+
+def create_table(cursor):
+    """
+    Создание схемы и таблицы products с уникальным названием товара.
+
+    :param cursor: Курсор базы данных
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path = {SCHEMA}, public")
+    categories = ", ".join(f"'{category}'" for category in PRODUCT_CATEGORIES)
+    cursor.execute(f"""
+        CREATE TABLE products (
+            product_id serial PRIMARY KEY,
+            product_name text NOT NULL,
+            product_description text,
+            category text,
+            unit_price numeric NOT NULL,
+            created_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT products_category_check CHECK (category = ANY (ARRAY[{categories}])),
+            CONSTRAINT products_unit_price_check CHECK (unit_price > 0)
+        )
+    """)
+    cursor.execute("CREATE UNIQUE INDEX idx_products_product_name ON products (product_name)")
+
+
+def generate_file(path, rows, changed_every=0):
+    """
+    Генерация CSV файла каталога.
+
+    :param path: Имя файла
+    :type path: str
+    :param rows: Количество строк данных
+    :type rows: int
+    :param changed_every: Каждая такая по счету строка получает новую цену (0 — без изменений)
+    :type changed_every: int
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Название", "Описание", "Категория", "Цена"])
+        for i in range(1, rows + 1):
+            price = i % 1000 + 0.99
+            if changed_every and i % changed_every == 0:
+                price += 10
+            writer.writerow([
+                f"Товар {i}",
+                f"Описание товара {i}",
+                PRODUCT_CATEGORIES[i % len(PRODUCT_CATEGORIES)],
+                f"{price:.2f}",
+            ])
+
+
+def wal_position(conn):
+    """
+    Текущая позиция журнала WAL.
+
+    :param conn: Соединение с базой данных
+    :rtype: str
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_current_wal_lsn()")
+        return cursor.fetchone()[0]
+
+
+def measure(conn, title, func):
+    """
+    Выполнение одной загрузки и печать измерения.
+
+    :param conn: Соединение с базой данных
+    :param title: Название измерения
+    :type title: str
+    :param func: Функция загрузки без параметров
+    :type func: callable
+    """
+    position = wal_position(conn)
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (position,))
+        wal = float(cursor.fetchone()[0]) / 1048576
+    conn.commit()
+    print(f"{title:<22} {elapsed:>7.2f} с  WAL {wal:>8.1f} МБ  "
+          f"добавлено {result.imported}, обновлено {result.updated}, без изменений {result.unchanged}")
+
+
+def main():
+    """
+    Генерация каталога и сравнение способов повторной загрузки.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение перезагрузки каталога и импорта с обновлением")
+    parser.add_argument("--rows", type=int, default=200000, help="количество товаров в каталоге")
+    parser.add_argument("--changed", type=float, default=0.01, help="доля товаров с новой ценой")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему и файлы после измерений")
+    args = parser.parse_args()
+
+    paths = {
+        "base": os.path.join(tempfile.gettempdir(), "bench_merge_catalog.csv"),
+        "update": os.path.join(tempfile.gettempdir(), "bench_merge_catalog_update.csv"),
+    }
+    generate_file(paths["base"], args.rows)
+    generate_file(paths["update"], args.rows, int(1 / args.changed) if args.changed else 0)
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    try:
+        with conn.cursor() as cursor:
+            create_table(cursor)
+        conn.commit()
+
+        def reload(filename):
+            with conn.cursor() as cursor:
+                cursor.execute("TRUNCATE products RESTART IDENTITY")
+            return import_csv_with_connection(conn, "products", filename)
+
+        reload(paths["base"])
+        measure(conn, "TRUNCATE и загрузка", lambda: reload(paths["update"]))
+        # Исходный каталог перед измерением импорта с обновлением
+        reload(paths["base"])
+        merge = lambda: import_csv_with_connection(conn, "products", paths["update"], merge=True)
+        measure(conn, "С обновлением", merge)
+        measure(conn, "Повтор без изменений", merge)
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+            for path in paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
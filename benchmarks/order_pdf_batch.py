@@ -0,0 +1,99 @@
+"""
+Измерение скорости пакетного формирования PDF документов заказов.
+
+Скрипт генерирует заказы с позициями (без обращения к базе данных, так
+как измеряется построение документов) и формирует для них PDF в ZIP
+архив функцией order_pdf_batch.export_orders_pdf с разным количеством
+процессов: 1 (в текущем процессе, как при поштучном экспорте), 2, 4 ...
+до числа ядер процессора. Для каждого варианта печатается время и
+количество документов в секунду. Архивы удаляются по завершении (если
+не указан --keep).
+
+Запуск::
+
+    python benchmarks/order_pdf_batch.py --orders 3000 --items 15
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import argparse
+import datetime
+import tempfile
+from decimal import Decimal
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from order_pdf_batch import OrderDocument, export_orders_pdf
+
+
+def generate_orders(count, items):
+    """
+    Генерация заказов в формате fetch_orders.
+
+    :param count: Количество заказов
+    :type count: int
+    :param items: Позиций в заказе
+    :type items: int
+    :rtype: list[OrderDocument]
+    """
+    now = datetime.datetime(2025, 1, 31, 18, 0)
+    orders = []
+    for order_id in range(1, count + 1):
+        lines = []
+        for line in range(1, items + 1):
+            price = Decimal(f"{(order_id * line) % 900 + 10}.50")
+            quantity = (order_id + line) % 40 + 1
+            lines.append((line, f"Товар {order_id % 500}-{line}", quantity, price, price * quantity))
+        total = sum(line[4] for line in lines)
+        details = (order_id, now.date(), f"Поставщик {order_id % 50}", total, "доставлен", now, now)
+        orders.append(OrderDocument(order_id, details, lines))
+    return orders
+
+
+def worker_counts():
+    """
+    Варианты количества процессов: 1, 2, 4 ... и число ядер.
+
+    :rtype: list[int]
+    """
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    if cores > 1:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    """
+    Генерация заказов и измерение для разного количества процессов.
+    """
+    parser = argparse.ArgumentParser(description="Скорость пакетного формирования PDF заказов")
+    parser.add_argument("--orders", type=int, default=3000, help="количество заказов")
+    parser.add_argument("--items", type=int, default=15, help="позиций в заказе")
+    parser.add_argument("--workers", type=int, nargs="+", help="варианты количества процессов")
+    parser.add_argument("--keep", action="store_true", help="не удалять архивы после измерений")
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders, args.items)
+    print(f"Заказов: {args.orders}, позиций в заказе: {args.items}, ядер: {os.cpu_count()}")
+
+    base = None
+    for workers in args.workers or worker_counts():
+        path = os.path.join(tempfile.gettempdir(), f"bench_orders_{workers}.zip")
+        result = export_orders_pdf(orders, path, as_zip=True, workers=workers)
+        rate = result.orders / result.elapsed
+        base = base or rate
+        size = os.path.getsize(path) / 1048576
+        print(f"  процессов {result.workers:>3}  {result.elapsed:>8.1f} с  {rate:>8.1f} док/с  "
+              f"x{rate / base:.1f}  архив {size:.1f} МБ")
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
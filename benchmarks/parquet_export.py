@@ -0,0 +1,187 @@
+"""
+Сравнение выгрузки снимка таблицы в CSV и в столбцовые форматы.
+
+Скрипт создает в отдельной схеме bench_parquet таблицу со строками,
+похожими на позиции заказов (целые, numeric, date, timestamp, текст),
+и для каждого формата измеряет:
+
+- выгрузку — data_export.write_csv (COPY TO STDOUT) и
+  data_export.write_parquet (серверный курсор и пакеты записей Arrow)
+  в файлы .parquet и .arrow;
+- чтение выгрузки в DataFrame, как это делают аналитики: pandas.read_csv
+  с разбором дат и чисел против чтения Parquet/Arrow, где типы уже
+  записаны в файле.
+
+Печатаются время, скорость, размер файла и типы столбцов после чтения.
+Рабочие таблицы приложения не затрагиваются; схема и файлы удаляются по
+завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/parquet_export.py --rows 2000000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import psycopg2
+import pandas as pd
+import pyarrow.parquet as pq
+import pyarrow.ipc as pa_ipc
+import pyarrow as pa
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database, load_config
+from data_export import write_csv, write_parquet
+
+# Схема для таблицы измерения
+SCHEMA = "bench_parquet"
+# Запрос выгрузки
+QUERY = f"SELECT * FROM {SCHEMA}.order_items ORDER BY order_item_id"
+# Столбцы с датами для pandas.read_csv
+DATE_COLUMNS = ["order_date", "created_at"]
+
+
+class Progress:
+    """
+    Ход выполнения без окна задач: методы ExportProgress, не выполняющие действий.
+    """
+
+    def attach(self, conn):
+        pass
+
+    def detach(self):
+        pass
+
+    def report(self, rows=None, pages=None, force=False):
+        pass
+
+    def check(self):
+        pass
+
+
+def create_table(cursor, rows):
+    """
+    Создание схемы и заполнение таблицы сгенерированными строками.
+
+    :param cursor: Курсор базы данных
+    :param rows: Количество строк
+    :type rows: int
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"""
+        CREATE TABLE {SCHEMA}.order_items AS
+        SELECT i AS order_item_id,
+               i / 10 + 1 AS order_id,
+               i % 5000 + 1 AS product_id,
+               'Товар ' || (i % 5000 + 1) AS product_name,
+               i % 40 + 1 AS quantity,
+               (i % 1000 + 0.99)::numeric AS unit_price,
+               ((i % 1000 + 0.99) * (i % 40 + 1))::numeric AS total_price,
+               DATE '2024-01-01' + i % 365 AS order_date,
+               TIMESTAMP '2024-01-01 08:00' + i * INTERVAL '1 minute' AS created_at
+        FROM generate_series(1, %s) AS i
+    """, (rows,))
+
+
+def measure(title, rows, path, func):
+    """
+    Выполнение и печать одного измерения.
+
+    :param title: Название измерения
+    :type title: str
+    :param rows: Количество строк (для скорости)
+    :type rows: int
+    :param path: Имя файла выгрузки (для размера)
+    :type path: str
+    :param func: Функция без параметров
+    :type func: callable
+    :returns: Время выполнения (с) и результат функции
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path) / 1048576
+    print(f"  {title:<22} {elapsed:>8.2f} с  {rows / elapsed:>10.0f} строк/с  файл {size:>7.1f} МБ")
+    return elapsed, result
+
+
+def read_ipc(path):
+    """
+    Чтение файла Arrow IPC в DataFrame.
+
+    :param path: Имя файла
+    :type path: str
+    :rtype: pandas.DataFrame
+    """
+    with pa.memory_map(path) as source:
+        return pa_ipc.open_file(source).read_all().to_pandas()
+
+
+def main():
+    """
+    Генерация данных и сравнение форматов выгрузки.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение выгрузки в CSV и Parquet/Arrow")
+    parser.add_argument("--rows", type=int, default=2000000, help="количество строк выгрузки")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему и файлы после измерений")
+    args = parser.parse_args()
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    paths = {
+        "csv": os.path.join(tempfile.gettempdir(), "bench_snapshot.csv"),
+        "parquet": os.path.join(tempfile.gettempdir(), "bench_snapshot.parquet"),
+        "arrow": os.path.join(tempfile.gettempdir(), "bench_snapshot.arrow"),
+    }
+    db = Database()
+    progress = Progress()
+    try:
+        print(f"Генерация {args.rows} строк")
+        with conn.cursor() as cursor:
+            create_table(cursor, args.rows)
+            cursor.execute(f"SELECT * FROM {SCHEMA}.order_items LIMIT 0")
+            headers = [column.name for column in cursor.description]
+
+        print("Выгрузка:")
+        measure("csv", args.rows, paths["csv"],
+                lambda: write_csv(db, QUERY, None, paths["csv"], headers, progress))
+        for name in ("parquet", "arrow"):
+            measure(name, args.rows, paths[name],
+                    lambda: write_parquet(db, QUERY, None, paths[name], None, progress))
+
+        print("Чтение в DataFrame:")
+        base, frame = measure("csv (pandas.read_csv)", args.rows, paths["csv"],
+                              lambda: pd.read_csv(paths["csv"], parse_dates=DATE_COLUMNS))
+        dtypes = {"csv": frame.dtypes}
+        for name, reader in (("parquet", lambda path: pq.read_table(path).to_pandas()),
+                             ("arrow", read_ipc)):
+            elapsed, frame = measure(name, args.rows, paths[name], lambda: reader(paths[name]))
+            dtypes[name] = frame.dtypes
+            print(f"  {'':<22} быстрее CSV в {base / elapsed:.1f} раза")
+
+        print("Типы столбцов после чтения:")
+        for name in ("csv", "parquet"):
+            columns = ", ".join(f"{column}:{dtype}" for column, dtype in dtypes[name].items())
+            print(f"  {name:<8} {columns}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            for path in paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
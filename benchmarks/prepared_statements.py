@@ -0,0 +1,95 @@
+"""
+Измерение подготовленных запросов Database.
+
+Скрипт выполняет часто повторяемые запросы приложения с параметрами —
+позиции заказа (OrdersTab.load_order_items) и проверку записи запаса
+(AddStockDialog.accept) — заданное количество раз без подготовки и
+с подготовкой (PREPARE/EXECUTE), и печатает среднее время запроса и
+оценку сэкономленного времени из Database.prepared_stats().
+
+Запросы только читают данные.
+
+Запуск::
+
+    python benchmarks/prepared_statements.py --repeat 2000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database
+
+# Позиции заказа с названиями товаров
+ORDER_ITEMS_QUERY = """
+    SELECT oi.order_item_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.product_id
+    WHERE oi.order_id = %s
+    ORDER BY oi.order_item_id
+"""
+# Проверка наличия записи запаса
+STOCK_CHECK_QUERY = "SELECT stock_id FROM stock WHERE product_id = %s AND warehouse_id = %s"
+
+
+def measure(db, title, repeat, order_ids, stock_keys):
+    """
+    Выполнение и печать одного измерения.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param title: Название измерения
+    :type title: str
+    :param repeat: Количество выполнений каждого запроса
+    :type repeat: int
+    :param order_ids: Идентификаторы заказов
+    :type order_ids: list
+    :param stock_keys: Пары (product_id, warehouse_id)
+    :type stock_keys: list
+    """
+    start = time.perf_counter()
+    for i in range(repeat):
+        db.fetch_rows(ORDER_ITEMS_QUERY, (order_ids[i % len(order_ids)],))
+        db.fetch_one(STOCK_CHECK_QUERY, stock_keys[i % len(stock_keys)])
+    elapsed = time.perf_counter() - start
+    print(f"{title:<20} {elapsed / (2 * repeat) * 1000:>8.3f} мс на запрос")
+
+
+def main():
+    """
+    Сравнение выполнения запросов без подготовки и с подготовкой.
+    """
+    parser = argparse.ArgumentParser(description="Измерение подготовленных запросов")
+    parser.add_argument("--repeat", type=int, default=2000, help="количество выполнений каждого запроса")
+    args = parser.parse_args()
+
+    db = Database()
+    order_ids = [row[0] for row in db.fetch_rows("SELECT order_id FROM orders ORDER BY 1 LIMIT 100")]
+    stock_keys = db.fetch_rows("SELECT product_id, warehouse_id FROM stock ORDER BY 1, 2 LIMIT 100")
+    if not order_ids or not stock_keys:
+        print("Для измерения нужны заказы и запасы в базе данных")
+        return
+
+    max_statements = db.prepared.max_statements
+    db.prepared.max_statements = 0
+    measure(db, "Без подготовки", args.repeat, order_ids, stock_keys)
+    db.prepared.max_statements = max_statements or 100
+    measure(db, "С подготовкой", args.repeat, order_ids, stock_keys)
+
+    stats = db.prepared_stats()
+    print(f"Подготовлено запросов: {stats['prepares']}, без подготовки: {stats['fallbacks']}, "
+          f"сбросов: {stats['resets']}")
+    print(f"Оценка сэкономленного времени: {stats['saved_ms']:.1f} мс")
+    for statement in stats["statements"]:
+        print(f"  {statement['plain_avg_ms']:.3f} -> {statement['prepared_avg_ms']:.3f} мс  "
+              f"{statement['query'][:70]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Измерение кэша справочных запросов Database.
+
+Скрипт выполняет справочные запросы, которые вкладки и диалоги повторяют
+при каждом открытии (списки складов, категорий, товаров, поставщиков),
+заданное количество раз без кэша и с кэшем (fetch_all(cache=True)), а
+затем повторяет чтение с кэшем, чередуя его с изменениями склада через
+execute_query, чтобы показать цену сброса записей. Печатаются время на
+один запрос и счетчики кэша (Database.cache_stats).
+
+Изменение выполняется командой, которая не меняет данные (UPDATE без
+подходящих строк), поэтому рабочие таблицы не затрагиваются.
+
+Запуск::
+
+    python benchmarks/query_cache.py --repeat 200
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database, get_query_cache
+
+# Справочные запросы вкладок и диалогов
+QUERIES = [
+    "SELECT warehouse_id, warehouse_name FROM warehouses ORDER BY warehouse_name",
+    "SELECT DISTINCT category FROM products ORDER BY category",
+    "SELECT product_id, product_name FROM products ORDER BY product_name",
+    "SELECT supplier_id, supplier_name FROM suppliers ORDER BY supplier_name",
+]
+# Изменение склада, которое сбрасывает записи кэша, но не меняет строк
+WRITE_QUERY = "UPDATE warehouses SET warehouse_name = warehouse_name WHERE warehouse_id < 0"
+
+
+def measure(title, repeat, func):
+    """
+    Выполнение и печать одного измерения.
+
+    :param title: Название измерения
+    :type title: str
+    :param repeat: Количество повторов набора запросов
+    :type repeat: int
+    :param func: Функция, выполняющая набор запросов один раз
+    :type func: callable
+    """
+    cache = get_query_cache()
+    cache.invalidate()
+    cache.reset_stats()
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+    print(f"{title:<34} {elapsed / (repeat * len(QUERIES)) * 1000:>8.3f} мс на запрос  "
+          f"попаданий {stats['hits']}, промахов {stats['misses']}, "
+          f"доля попаданий {stats['hit_ratio']:.0%}")
+
+
+def main():
+    """
+    Сравнение справочных запросов без кэша и с кэшем.
+    """
+    parser = argparse.ArgumentParser(description="Измерение кэша справочных запросов")
+    parser.add_argument("--repeat", type=int, default=200, help="количество повторов набора запросов")
+    parser.add_argument("--write-every", type=int, default=10,
+                        help="изменение складов после каждого такого по счету набора")
+    args = parser.parse_args()
+
+    db = Database()
+
+    def without_cache(i):
+        for query in QUERIES:
+            db.fetch_rows(query)
+
+    def with_cache(i):
+        for query in QUERIES:
+            db.fetch_rows(query, cache=True)
+
+    def with_writes(i):
+        if i % args.write_every == 0:
+            db.execute_query(WRITE_QUERY)
+        with_cache(i)
+
+    measure("Без кэша", args.repeat, without_cache)
+    measure("С кэшем", args.repeat, with_cache)
+    measure(f"С кэшем, запись каждые {args.write_every}", args.repeat, with_writes)
+
+
+if __name__ == "__main__":
+    main()
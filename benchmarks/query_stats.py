@@ -0,0 +1,78 @@
+"""
+Измерение накладных расходов статистики запросов Database.
+
+Скрипт выполняет короткий запрос (SELECT 1) и справочный запрос с
+параметром заданное количество раз с выключенной и включенной
+статистикой (Database.stats.enabled) и печатает среднее время запроса
+и разницу. Порог медленного запроса на время измерения поднимается,
+чтобы планы не строились.
+
+Запуск::
+
+    python benchmarks/query_stats.py --repeat 5000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import time
+import argparse
+
+# Подключение модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from database import Database
+
+# Запросы измерения
+QUERIES = [
+    ("SELECT 1", None),
+    ("SELECT warehouse_id, warehouse_name FROM warehouses WHERE warehouse_id > %s ORDER BY warehouse_name", (0,)),
+]
+
+
+def measure(db, repeat):
+    """
+    Среднее время одного запроса.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param repeat: Количество выполнений каждого запроса
+    :type repeat: int
+    :returns: Время (мс)
+    :rtype: float
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query, params in QUERIES:
+            db.fetch_rows(query, params)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+
+def main():
+    """
+    Сравнение времени запросов с выключенной и включенной статистикой.
+    """
+    parser = argparse.ArgumentParser(description="Накладные расходы статистики запросов")
+    parser.add_argument("--repeat", type=int, default=5000, help="количество выполнений каждого запроса")
+    args = parser.parse_args()
+
+    db = Database()
+    db.stats.slow_ms = 10 ** 9
+    # Прогрев соединений и подготовленных запросов
+    db.stats.enabled = False
+    measure(db, 100)
+
+    results = {}
+    # Чередование, чтобы фоновая нагрузка одинаково влияла на оба режима
+    for _ in range(3):
+        for enabled in (False, True):
+            db.stats.enabled = enabled
+            results.setdefault(enabled, []).append(measure(db, args.repeat))
+    off, on = min(results[False]), min(results[True])
+    print(f"Статистика выключена {off:.4f} мс на запрос")
+    print(f"Статистика включена  {on:.4f} мс на запрос  (+{(on - off) * 1000:.1f} мкс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Сравнение планов поисковых запросов до и после триграммных индексов.
+
+Скрипт создает в отдельной схеме bench_search сгенерированные таблицы
+products, suppliers и orders, выполняет поисковые запросы вкладок через
+EXPLAIN (ANALYZE, BUFFERS) без индексов, затем создает индексы миграцией
+migrations/0002_search_trgm_indexes.sql и повторяет измерения для старых и новых условий
+поиска. Рабочие таблицы приложения не затрагиваются; схема удаляется
+по завершении (если не указан --keep).
+
+Запуск::
+
+    python benchmarks/search_indexes.py --products 500000 --orders 1000000
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import sys
+import json
+import argparse
+import psycopg2
+
+# Подключение модулей приложения и модуля миграций
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+from db_config import load_config
+from migrate import discover_migrations, apply_sql
+
+# Схема для сгенерированных данных
+SCHEMA = "bench_search"
+# Версия миграции с триграммными индексами
+SEARCH_INDEXES_MIGRATION = 2
+# Повторов каждого запроса (берется лучшее время)
+REPEATS = 3
+
+# Поисковые запросы: (название, SQL, параметры)
+OLD_QUERIES = [
+    ("Товары: ILIKE по 3 столбцам", """
+        SELECT product_id, product_name, category, product_description
+        FROM products
+        WHERE product_name ILIKE %s OR category ILIKE %s OR product_description ILIKE %s
+        ORDER BY product_name
+    """, ("%a1b2%", "%a1b2%", "%a1b2%")),
+    ("Заказы: номер как текст", """
+        SELECT o.order_id, o.order_date, s.supplier_name
+        FROM orders o JOIN suppliers s ON o.supplier_id = s.supplier_id
+        WHERE (o.order_id::text LIKE %s OR s.supplier_name ILIKE %s)
+        ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200
+    """, ("%123457%", "%123457%")),
+    ("Заказы: поставщик", """
+        SELECT o.order_id, o.order_date, s.supplier_name
+        FROM orders o JOIN suppliers s ON o.supplier_id = s.supplier_id
+        WHERE (o.order_id::text LIKE %s OR s.supplier_name ILIKE %s)
+        ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200
+    """, ("%c0ffe%", "%c0ffe%")),
+]
+
+NEW_QUERIES = [
+    OLD_QUERIES[0],
+    ("Заказы: номер как текст", """
+        SELECT o.order_id, o.order_date, s.supplier_name
+        FROM orders o JOIN suppliers s ON o.supplier_id = s.supplier_id
+        WHERE o.order_id = %s
+        ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200
+    """, (123457,)),
+    ("Заказы: поставщик", """
+        SELECT o.order_id, o.order_date, s.supplier_name
+        FROM orders o JOIN suppliers s ON o.supplier_id = s.supplier_id
+        WHERE s.supplier_name ILIKE %s
+        ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200
+    """, ("%c0ffe%",)),
+]
+
+
+def generate_data(cursor, products, suppliers, orders):
+    """
+    Создание схемы и заполнение таблиц сгенерированными данными.
+
+    :param cursor: Курсор базы данных
+    :param products: Количество товаров
+    :type products: int
+    :param suppliers: Количество поставщиков
+    :type suppliers: int
+    :param orders: Количество заказов
+    :type orders: int
+    """
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    # Функции pg_trgm находятся в схеме public
+    cursor.execute(f"SET search_path = {SCHEMA}, public")
+
+    cursor.execute("""
+        CREATE TABLE suppliers (
+            supplier_id serial PRIMARY KEY,
+            supplier_name varchar(255) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO suppliers (supplier_name)
+        SELECT 'Поставщик ' || md5(i::text) FROM generate_series(1, %s) AS i
+    """, (suppliers,))
+
+    cursor.execute("""
+        CREATE TABLE products (
+            product_id serial PRIMARY KEY,
+            product_name varchar(255) NOT NULL,
+            category varchar(100) NOT NULL,
+            product_description text,
+            unit_price numeric(10, 2) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO products (product_name, category, product_description, unit_price)
+        SELECT 'Товар ' || md5(i::text),
+               (ARRAY['Электроника', 'Одежда', 'Продукты', 'Мебель', 'Инструменты'])[1 + i %% 5],
+               'Описание ' || md5((i * 7)::text),
+               (i %% 1000) + 0.99
+        FROM generate_series(1, %s) AS i
+    """, (products,))
+
+    cursor.execute("""
+        CREATE TABLE orders (
+            order_id serial PRIMARY KEY,
+            order_date date NOT NULL,
+            supplier_id integer NOT NULL REFERENCES suppliers(supplier_id),
+            total_amount numeric(12, 2) NOT NULL,
+            status varchar(50) NOT NULL,
+            updated_at timestamp DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO orders (order_date, supplier_id, total_amount, status)
+        SELECT DATE '2015-01-01' + (i %% 3650),
+               1 + i %% %s,
+               (i %% 10000) + 0.5,
+               (ARRAY['в обработке', 'доставлен', 'отменен'])[1 + i %% 3]
+        FROM generate_series(1, %s) AS i
+    """, (suppliers, orders))
+    cursor.execute("ANALYZE")
+
+
+def explain(cursor, query, params):
+    """
+    Выполнение запроса через EXPLAIN (ANALYZE, BUFFERS).
+
+    :returns: Лучшее время выполнения (мс), верхние узлы плана, прочитанные блоки
+    :rtype: tuple[float, str, int]
+    """
+    best = None
+    for _ in range(REPEATS):
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        if best is None or plan["Execution Time"] < best["Execution Time"]:
+            best = plan
+    return best["Execution Time"], describe_plan(best["Plan"]), buffers(best["Plan"])
+
+
+def describe_plan(node):
+    """
+    Краткое описание способов доступа к таблицам в плане.
+
+    :param node: Узел плана
+    :type node: dict
+    :rtype: str
+    """
+    scans = []
+
+    def walk(item):
+        if "Relation Name" in item:
+            scans.append(f"{item['Node Type']}({item['Relation Name']})")
+        for child in item.get("Plans", []):
+            walk(child)
+
+    walk(node)
+    return ", ".join(scans)
+
+
+def buffers(node):
+    """
+    Количество прочитанных блоков (из кэша и с диска) корневого узла.
+
+    :rtype: int
+    """
+    return node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+
+
+def run(cursor, title, queries):
+    """
+    Выполнение набора запросов и печать результатов.
+
+    :returns: Время выполнения каждого запроса (мс)
+    :rtype: list[float]
+    """
+    print(f"\n{title}")
+    times = []
+    for name, query, params in queries:
+        elapsed, scans, blocks = explain(cursor, query, params)
+        times.append(elapsed)
+        print(f"  {name:<32} {elapsed:>10.2f} мс  {blocks:>8} блоков  {scans}")
+    return times
+
+
+def main():
+    """
+    Генерация данных и сравнение планов.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение поиска до и после триграммных индексов")
+    parser.add_argument("--products", type=int, default=500000, help="количество товаров")
+    parser.add_argument("--suppliers", type=int, default=5000, help="количество поставщиков")
+    parser.add_argument("--orders", type=int, default=1000000, help="количество заказов")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему после измерений")
+    args = parser.parse_args()
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    # CREATE INDEX CONCURRENTLY требует режима autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        print(f"Генерация данных: {args.products} товаров, {args.suppliers} поставщиков, {args.orders} заказов")
+        generate_data(cursor, args.products, args.suppliers, args.orders)
+
+        before = run(cursor, "Без индексов, старые условия", OLD_QUERIES)
+        migration = next(m for m in discover_migrations() if m.version == SEARCH_INDEXES_MIGRATION)
+        apply_sql(conn, migration)
+        # Индексы создаются в схеме bench_search (search_path задан выше)
+        run(cursor, "С индексами, старые условия", OLD_QUERIES)
+        after = run(cursor, "С индексами, новые условия", NEW_QUERIES)
+
+        print("\nУскорение (без индексов / с индексами и новыми условиями):")
+        for (name, _, _), old, new in zip(OLD_QUERIES, before, after):
+            print(f"  {name:<32} x{old / max(new, 0.001):.1f}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+Применение версионных миграций базы данных.
+
+Миграции — SQL-файлы вида ``NNNN_описание.sql`` в каталоге migrations.
+Примененные версии и контрольные суммы файлов хранятся в таблице
+schema_migrations, поэтому каждая миграция выполняется один раз.
+
+Обычная миграция выполняется целиком в одной транзакции вместе с записью
+в schema_migrations. Миграция, первая строка которой
+``-- migrate: no-transaction``, выполняется по одной команде в режиме
+autocommit — это нужно для CREATE INDEX CONCURRENTLY, который строит
+индекс без блокировки записи в таблицу. Команды таких миграций должны
+быть идемпотентными (IF NOT EXISTS), чтобы после сбоя миграцию можно было
+запустить повторно; недостроенные индексы из файла перед повтором удаляются.
+
+Одновременный запуск нескольких экземпляров исключается advisory-блокировкой.
+
+Запуск::
+
+    python migrate.py                 # применить все новые миграции
+    python migrate.py --status        # показать состояние миграций
+    python migrate.py --target 2      # применить миграции до версии 2
+    python migrate.py --check-plans   # проверить планы основных запросов
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from collections import namedtuple
+import psycopg2
+
+# Подключение модулей приложения для чтения параметров подключения
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from db_config import load_config
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Каталог с файлами миграций
+MIGRATIONS_DIR = os.path.join(ROOT, "migrations")
+# Отметка миграции, выполняемой вне транзакции
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+# Ключ advisory-блокировки, исключающей одновременный запуск миграций
+LOCK_KEY = 77730001
+# Шаблон имени файла миграции
+FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+# Имена индексов, создаваемых в миграции через CONCURRENTLY
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+
+# Описание файла миграции
+Migration = namedtuple("Migration", "version name path sql checksum transactional")
+
+# Проверка планов основных запросов: (название, запрос, ожидаемый индекс)
+PLAN_CHECKS = [
+    ("Позиции заказа (load_order_items)",
+     "SELECT oi.order_item_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price "
+     "FROM order_items oi JOIN products p ON oi.product_id = p.product_id "
+     "WHERE oi.order_id = (SELECT max(order_id) FROM orders) ORDER BY oi.order_item_id",
+     "idx_order_items_order_id"),
+    ("Первая страница заказов (load_orders)",
+     "SELECT o.order_id, o.order_date, s.supplier_name, o.total_amount, o.status, o.updated_at "
+     "FROM orders o JOIN suppliers s ON o.supplier_id = s.supplier_id "
+     "ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200",
+     "idx_orders_date_id"),
+    ("Фильтр заказов по статусу (apply_filters)",
+     "SELECT o.order_id FROM orders o WHERE o.status = 'отменен' "
+     "ORDER BY o.order_date DESC, o.order_id DESC LIMIT 200",
+     "idx_orders_status"),
+    ("Топ товаров (show_top_products)",
+     "SELECT p.product_name, SUM(oi.quantity) FROM products p "
+     "JOIN order_items oi ON p.product_id = oi.product_id "
+     "WHERE p.product_id = (SELECT min(product_id) FROM products) GROUP BY p.product_name",
+     "idx_order_items_product_id"),
+    ("Запас товара на складе",
+     "SELECT stock_id FROM stock WHERE product_id = (SELECT min(product_id) FROM products) "
+     "AND warehouse_id = (SELECT min(warehouse_id) FROM warehouses)",
+     "unique_product_warehouse"),
+    ("Поиск товаров (ProductsTab)",
+     "SELECT product_id FROM products WHERE product_name ILIKE '%абв%' "
+     "OR category ILIKE '%абв%' OR product_description ILIKE '%абв%'",
+     "idx_products_name_trgm"),
+]
+# Размер таблицы, ниже которого последовательное чтение считается нормой
+SMALL_TABLE_ROWS = 1000
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """
+    Поиск файлов миграций.
+
+    :param directory: Каталог с миграциями
+    :type directory: str
+    :returns: Миграции в порядке возрастания версии
+    :rtype: list[Migration]
+    :raises: ValueError при повторяющихся номерах версий
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Повторяющийся номер миграции {version}: {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        migrations[version] = Migration(
+            version=version,
+            name=match.group(2),
+            path=path,
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            transactional=not sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    """
+    Разбиение SQL-скрипта на отдельные команды.
+
+    Учитывает строки в одинарных и двойных кавычках и тела функций
+    в долларовых кавычках ($$ ... $$), внутри которых точка с запятой
+    не завершает команду. Однострочные комментарии отбрасываются.
+
+    :param sql: Текст скрипта
+    :type sql: str
+    :returns: Список команд без завершающей точки с запятой
+    :rtype: list[str]
+    """
+    statements = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote is None:
+            if sql.startswith("--", i):
+                # Пропуск комментария до конца строки
+                end = sql.find("\n", i)
+                i = len(sql) if end == -1 else end
+                continue
+            if ch in ("'", '"'):
+                quote = ch
+            elif ch == "$":
+                match = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+                if match:
+                    quote = match.group(0)
+                    current.append(quote)
+                    i += len(quote)
+                    continue
+            elif ch == ";":
+                statement = "".join(current).strip()
+                if statement:
+                    statements.append(statement)
+                current = []
+                i += 1
+                continue
+        elif len(quote) > 1:
+            # Конец тела в долларовых кавычках
+            if sql.startswith(quote, i):
+                current.append(quote)
+                i += len(quote)
+                quote = None
+                continue
+        elif ch == quote:
+            quote = None
+        current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def ensure_history_table(cursor):
+    """
+    Создание таблицы истории миграций.
+
+    :param cursor: Курсор базы данных
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            name varchar(255) NOT NULL,
+            checksum char(64) NOT NULL,
+            applied_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_migrations(cursor):
+    """
+    Получение примененных миграций.
+
+    :param cursor: Курсор базы данных
+    :returns: Словарь {версия: контрольная сумма}
+    :rtype: dict[int, str]
+    """
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def drop_invalid_indexes(cursor, migration):
+    """
+    Удаление недостроенных индексов миграции.
+
+    Прерванный CREATE INDEX CONCURRENTLY оставляет индекс с признаком
+    invalid, а IF NOT EXISTS при повторе его пропустил бы.
+
+    :param cursor: Курсор базы данных (autocommit)
+    :param migration: Миграция
+    :type migration: Migration
+    """
+    names = CONCURRENT_INDEX_PATTERN.findall(migration.sql)
+    if not names:
+        return
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+          AND pg_catalog.pg_table_is_visible(c.oid)
+    """, (names,))
+    for (index_name,) in cursor.fetchall():
+        logger.warning(f"Индекс {index_name} недостроен, пересоздание")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+def apply_sql(conn, migration):
+    """
+    Выполнение команд миграции без записи в историю.
+
+    Используется также для применения отдельного файла миграции
+    к другой схеме (например, в benchmarks).
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param migration: Миграция
+    :type migration: Migration
+    """
+    if migration.transactional:
+        conn.autocommit = False
+        with conn.cursor() as cursor:
+            cursor.execute(migration.sql)
+        return
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        drop_invalid_indexes(cursor, migration)
+        for statement in split_statements(migration.sql):
+            logger.info(f"  {statement.splitlines()[0]}")
+            cursor.execute(statement)
+
+
+def apply_migration(conn, migration):
+    """
+    Применение миграции с записью в историю.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param migration: Миграция
+    :type migration: Migration
+    """
+    logger.info(f"Применение миграции {migration.version:04d}_{migration.name}")
+    try:
+        apply_sql(conn, migration)
+        # Для транзакционной миграции запись попадает в ту же транзакцию
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum)
+            )
+        if not conn.autocommit:
+            conn.commit()
+    except Exception:
+        if not conn.autocommit:
+            conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+def migrate(conn, target=None):
+    """
+    Применение всех новых миграций (до версии target включительно).
+
+    :param conn: Соединение с базой данных (autocommit)
+    :type conn: psycopg2.extensions.connection
+    :param target: Последняя применяемая версия (None — все)
+    :type target: int или None
+    :returns: Количество примененных миграций
+    :rtype: int
+    """
+    migrations = discover_migrations()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+    try:
+        with conn.cursor() as cursor:
+            ensure_history_table(cursor)
+            applied = applied_migrations(cursor)
+
+        count = 0
+        for migration in migrations:
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied:
+                if applied[migration.version] != migration.checksum:
+                    logger.warning(
+                        f"Файл миграции {migration.version:04d}_{migration.name} "
+                        f"изменен после применения"
+                    )
+                continue
+            apply_migration(conn, migration)
+            count += 1
+        return count
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+
+
+def print_status(conn):
+    """
+    Вывод состояния миграций.
+
+    :param conn: Соединение с базой данных (autocommit)
+    :type conn: psycopg2.extensions.connection
+    """
+    with conn.cursor() as cursor:
+        ensure_history_table(cursor)
+        applied = applied_migrations(cursor)
+    for migration in discover_migrations():
+        if migration.version not in applied:
+            state = "не применена"
+        elif applied[migration.version] != migration.checksum:
+            state = "применена, файл изменен"
+        else:
+            state = "применена"
+        mode = "" if migration.transactional else " (вне транзакции)"
+        print(f"{migration.version:04d}_{migration.name}{mode}: {state}")
+
+
+def check_plans(conn):
+    """
+    Проверка планов основных запросов приложения.
+
+    Для каждого запроса выполняется EXPLAIN (без выполнения самого
+    запроса) и проверяется, использует ли план ожидаемый индекс.
+
+    :param conn: Соединение с базой данных (autocommit)
+    :type conn: psycopg2.extensions.connection
+    :returns: True, если все планы используют ожидаемые индексы
+        (или таблицы слишком малы, чтобы индекс был выгоден)
+    :rtype: bool
+    """
+    ok = True
+    with conn.cursor() as cursor:
+        for name, query, expected_index in PLAN_CHECKS:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            indexes, seq_scans = set(), []
+
+            def walk(node):
+                if "Index Name" in node:
+                    indexes.add(node["Index Name"])
+                if node["Node Type"] == "Seq Scan":
+                    seq_scans.append((node["Relation Name"], node.get("Plan Rows", 0)))
+                for child in node.get("Plans", []):
+                    walk(child)
+
+            walk(plan[0]["Plan"])
+            if expected_index in indexes:
+                print(f"[OK]   {name}: используется {expected_index}")
+                continue
+
+            # Для маленьких таблиц последовательное чтение дешевле индекса
+            large = [(table, rows) for table, rows in seq_scans if rows >= SMALL_TABLE_ROWS]
+            if seq_scans and not large:
+                print(f"[OK]   {name}: таблицы малы, последовательное чтение ожидаемо")
+                continue
+            ok = False
+            scans = ", ".join(f"{table} (~{rows} строк)" for table, rows in seq_scans) or "нет"
+            print(f"[WARN] {name}: индекс {expected_index} не используется; "
+                  f"последовательное чтение: {scans}")
+    return ok
+
+
+def main():
+    """
+    Разбор аргументов командной строки и выполнение команды.
+    """
+    parser = argparse.ArgumentParser(description="Миграции базы данных системы складского учета")
+    parser.add_argument("--target", type=int, help="применить миграции до указанной версии")
+    parser.add_argument("--status", action="store_true", help="показать состояние миграций")
+    parser.add_argument("--check-plans", action="store_true", help="проверить планы основных запросов")
+    args = parser.parse_args()
+
+    db_params, _ = load_config()
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    try:
+        logger.info("Подключение к базе данных успешно")
+        if args.status:
+            print_status(conn)
+            return 0
+        if args.check_plans:
+            return 0 if check_plans(conn) else 1
+        count = migrate(conn, args.target)
+        print(f"Применено миграций: {count}")
+        return 0
+    finally:
+        conn.close()
+        logger.info("Соединение с базой данных закрыто")
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        logger.error(f"Ошибка: {str(e)}")
+        print(f"Произошла ошибка: {str(e)}")
+        sys.exit(1)
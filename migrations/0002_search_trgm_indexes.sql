@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- Триграммные индексы для поиска по подстроке (ILIKE '%текст%')
+-- (ранее применялось скриптом apply_search_indexes.py)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_name_trgm
+    ON products USING gin (product_name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_category_trgm
+    ON products USING gin (category gin_trgm_ops);
+
+-- Описание входит в условие поиска товаров через OR: без индекса на нем
+-- планировщик выбрал бы последовательное чтение для всего условия
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_description_trgm
+    ON products USING gin (product_description gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_suppliers_name_trgm
+    ON suppliers USING gin (supplier_name gin_trgm_ops);
+
+ANALYZE products;
+ANALYZE suppliers;
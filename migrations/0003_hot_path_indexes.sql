@@ -0,0 +1,57 @@
+-- migrate: no-transaction
+-- Индексы для частых запросов к заказам, позициям заказов и запасам
+
+-- Позиции заказа: OrdersTab.load_order_items, view_order_details,
+-- триггер обновления остатков при доставке
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_order_id
+    ON order_items (order_id);
+
+-- Позиции по товару: графики продаж (OrdersReportDialog)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_product_id
+    ON order_items (product_id);
+
+-- Список заказов: постраничная загрузка по (order_date, order_id) DESC
+-- и группировка по месяцам (show_sales_by_month)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_date_id
+    ON orders (order_date DESC, order_id DESC);
+
+-- Фильтр по статусу (OrdersTab.apply_filters, отчеты по доставленным заказам)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_status
+    ON orders (status);
+
+-- Уникальность товара на складе. Дубликаты нужно предварительно удалить
+-- (src/db_duplicate_cleanup.py), иначе построение индекса завершится ошибкой
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM stock
+        GROUP BY product_id, warehouse_id
+        HAVING COUNT(*) > 1
+    ) THEN
+        RAISE EXCEPTION 'В таблице stock есть дубликаты (product_id, warehouse_id)'
+            USING HINT = 'Удалите дубликаты с помощью src/db_duplicate_cleanup.py и повторите миграцию';
+    END IF;
+END
+$$;
+
+-- Имя совпадает с ограничением, которое создает db_duplicate_cleanup.py:
+-- если ограничение уже есть, индекс с этим именем тоже существует
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_product_warehouse
+    ON stock (product_id, warehouse_id);
+
+-- Оформление индекса как ограничения UNIQUE (как в db_duplicate_cleanup.py)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'unique_product_warehouse' AND conrelid = 'stock'::regclass
+    ) THEN
+        ALTER TABLE stock ADD CONSTRAINT unique_product_warehouse
+            UNIQUE USING INDEX unique_product_warehouse;
+    END IF;
+END
+$$;
+
+ANALYZE order_items;
+ANALYZE orders;
+ANALYZE stock;
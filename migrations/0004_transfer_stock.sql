@@ -0,0 +1,101 @@
+-- Перемещение запаса между складами одной командой.
+--
+-- transfer_stock уменьшает остаток исходной записи и увеличивает (или
+-- создает через INSERT ... ON CONFLICT) запись того же товара на целевом
+-- складе в одной транзакции. Обе записи блокируются в порядке stock_id,
+-- поэтому встречные перемещения не приводят к взаимной блокировке, а
+-- остаток проверяется после блокировки и не может уйти в минус.
+--
+-- transfer_stock_batch выполняет набор перемещений в одной транзакции:
+-- при ошибке в любой строке не применяется ни одно перемещение.
+
+CREATE OR REPLACE FUNCTION transfer_stock(
+    p_stock_id integer,
+    p_target_warehouse_id integer,
+    p_quantity integer
+) RETURNS integer AS $$
+DECLARE
+    v_product_id integer;
+    v_source_warehouse_id integer;
+    v_available integer;
+    v_target_stock_id integer;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RAISE EXCEPTION 'Количество для перемещения должно быть больше нуля'
+            USING ERRCODE = 'check_violation';
+    END IF;
+
+    SELECT product_id, warehouse_id INTO v_product_id, v_source_warehouse_id
+    FROM stock WHERE stock_id = p_stock_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Запись запаса % не найдена', p_stock_id
+            USING ERRCODE = 'no_data_found';
+    END IF;
+    IF v_source_warehouse_id = p_target_warehouse_id THEN
+        RAISE EXCEPTION 'Исходный и целевой склады совпадают'
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    -- Блокировка исходной и существующей целевой записи в порядке stock_id
+    PERFORM 1 FROM stock
+    WHERE product_id = v_product_id
+      AND warehouse_id IN (v_source_warehouse_id, p_target_warehouse_id)
+    ORDER BY stock_id
+    FOR UPDATE;
+
+    -- Остаток читается после блокировки
+    SELECT quantity INTO v_available FROM stock WHERE stock_id = p_stock_id;
+    IF v_available < p_quantity THEN
+        RAISE EXCEPTION 'Недостаточно товара на складе: доступно %, требуется %', v_available, p_quantity
+            USING ERRCODE = 'check_violation';
+    END IF;
+
+    UPDATE stock
+    SET quantity = quantity - p_quantity,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE stock_id = p_stock_id;
+
+    INSERT INTO stock (product_id, warehouse_id, quantity, last_restocked)
+    VALUES (v_product_id, p_target_warehouse_id, p_quantity, CURRENT_DATE)
+    ON CONFLICT (product_id, warehouse_id) DO UPDATE
+    SET quantity = stock.quantity + EXCLUDED.quantity,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING stock_id INTO v_target_stock_id;
+
+    RETURN v_target_stock_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION transfer_stock_batch(
+    p_stock_ids integer[],
+    p_target_warehouse_ids integer[],
+    p_quantities integer[]
+) RETURNS integer AS $$
+DECLARE
+    v_count integer := coalesce(array_length(p_stock_ids, 1), 0);
+BEGIN
+    IF v_count <> coalesce(array_length(p_target_warehouse_ids, 1), 0)
+       OR v_count <> coalesce(array_length(p_quantities, 1), 0) THEN
+        RAISE EXCEPTION 'Массивы перемещений имеют разную длину'
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    -- Блокировка всех затрагиваемых записей заранее в порядке stock_id,
+    -- чтобы пакеты с пересекающимися записями не блокировали друг друга
+    PERFORM 1 FROM stock s
+    WHERE s.stock_id = ANY(p_stock_ids)
+       OR (s.product_id, s.warehouse_id) IN (
+           SELECT src.product_id, m.target_warehouse_id
+           FROM unnest(p_stock_ids, p_target_warehouse_ids) AS m(stock_id, target_warehouse_id)
+           JOIN stock src ON src.stock_id = m.stock_id
+       )
+    ORDER BY s.stock_id
+    FOR UPDATE;
+
+    FOR i IN 1 .. v_count LOOP
+        PERFORM transfer_stock(p_stock_ids[i], p_target_warehouse_ids[i], p_quantities[i]);
+    END LOOP;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
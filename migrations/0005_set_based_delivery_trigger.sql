@@ -0,0 +1,38 @@
+-- Склад приемки заказа и пересчет остатков одной командой.
+--
+-- Заказ хранит склад, на который поступает товар. При переводе заказа
+-- в статус 'доставлен' все позиции заказа зачисляются на этот склад одной
+-- командой INSERT ... ON CONFLICT DO UPDATE вместо цикла по позициям
+-- с подзапросом для каждой. Для заказов без склада приемки (созданных до
+-- этой миграции) используется склад с наименьшим warehouse_id.
+
+ALTER TABLE orders
+    ADD COLUMN IF NOT EXISTS warehouse_id integer
+    REFERENCES warehouses(warehouse_id) ON DELETE SET NULL;
+
+CREATE OR REPLACE FUNCTION update_stock_quantity()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_warehouse_id integer := NEW.warehouse_id;
+BEGIN
+    IF v_warehouse_id IS NULL THEN
+        SELECT warehouse_id INTO v_warehouse_id FROM warehouses ORDER BY warehouse_id LIMIT 1;
+        IF v_warehouse_id IS NULL THEN
+            RAISE EXCEPTION 'Нет склада для приемки заказа %', NEW.order_id;
+        END IF;
+    END IF;
+
+    -- Позиции одного товара суммируются: ON CONFLICT не может изменить строку дважды
+    INSERT INTO stock (product_id, warehouse_id, quantity, last_restocked)
+    SELECT oi.product_id, v_warehouse_id, SUM(oi.quantity), CURRENT_DATE
+    FROM order_items oi
+    WHERE oi.order_id = NEW.order_id
+    GROUP BY oi.product_id
+    ON CONFLICT (product_id, warehouse_id) DO UPDATE
+    SET quantity = stock.quantity + EXCLUDED.quantity,
+        last_restocked = CURRENT_DATE,
+        updated_at = CURRENT_TIMESTAMP;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
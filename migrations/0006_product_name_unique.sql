@@ -0,0 +1,21 @@
+-- migrate: no-transaction
+-- Уникальность названия товара: естественный ключ импорта с обновлением
+-- (bulk_import.MERGE_KEYS, INSERT ... ON CONFLICT (product_name))
+
+-- Товары с одинаковыми названиями нужно предварительно объединить или
+-- переименовать, иначе построение индекса завершится ошибкой
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM products
+        GROUP BY product_name
+        HAVING COUNT(*) > 1
+    ) THEN
+        RAISE EXCEPTION 'В таблице products есть товары с одинаковыми названиями'
+            USING HINT = 'Переименуйте или объедините такие товары и повторите миграцию';
+    END IF;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_products_product_name
+    ON products (product_name);
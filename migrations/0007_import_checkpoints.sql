@@ -0,0 +1,25 @@
+-- Контрольные точки импорта больших файлов по частям (src/resumable_import.py).
+--
+-- После каждой части файла в той же транзакции, что и строки части,
+-- записывается позиция в файле и номер части. Прерванный импорт того же
+-- файла продолжается с последней зафиксированной части; после успешного
+-- завершения запись удаляется. Размер и время изменения файла позволяют
+-- не продолжать импорт файла, который был заменен.
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    table_name text NOT NULL,
+    file_name text NOT NULL,
+    file_size bigint NOT NULL,
+    file_mtime bigint NOT NULL,
+    byte_offset bigint NOT NULL,
+    batch_no integer NOT NULL,
+    line_no bigint NOT NULL,
+    total_rows bigint NOT NULL DEFAULT 0,
+    imported_rows bigint NOT NULL DEFAULT 0,
+    updated_rows bigint NOT NULL DEFAULT 0,
+    unchanged_rows bigint NOT NULL DEFAULT 0,
+    rejected_rows bigint NOT NULL DEFAULT 0,
+    report_size bigint NOT NULL DEFAULT 0,
+    updated_at timestamp DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, file_name)
+);
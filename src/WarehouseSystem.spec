@@ -11,6 +11,7 @@ a = Analysis(
     'login_window',
     'auth_service',
     'database',
+    'db_config',
     'styles',
     'dialogs',
     'visualization',
@@ -0,0 +1,347 @@
+"""
+Модуль записи и чтения столбцовых форматов Parquet и Arrow IPC.
+
+Строки результата запроса (порции серверного курсора, см.
+Database.iter_batches) преобразуются в пакеты записей Arrow
+(RecordBatch) и сразу записываются в файл, поэтому в памяти находится
+только текущая порция. Схема файла строится по описанию столбцов
+курсора с сохранением типов PostgreSQL: целые и вещественные числа,
+numeric (decimal128), date, timestamp, time и boolean. Прочие типы
+записываются строками.
+
+Формат определяется расширением файла: ``.parquet`` — Parquet (сжатие
+zstd, по группе строк на порцию), ``.arrow`` и ``.feather`` — файл
+Arrow IPC.
+
+Для импорта пакеты записей файла передаются в COPY в виде CSV
+(см. ArrowCopySource и bulk_import.import_arrow), а проверка
+и перенос строк выполняются так же, как при импорте CSV.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для работы с буферами в памяти
+import io
+# Импорт десятичных чисел
+from decimal import Decimal
+# Импорт библиотеки Apache Arrow
+import pyarrow as pa
+# Импорт записи CSV из таблиц Arrow
+import pyarrow.csv as pa_csv
+# Импорт формата Arrow IPC
+import pyarrow.ipc as pa_ipc
+# Импорт формата Parquet
+import pyarrow.parquet as pq
+
+# Строк в одном пакете записей (и в одной группе строк Parquet)
+ARROW_BATCH_ROWS = 50000
+# Сжатие Parquet файлов
+PARQUET_COMPRESSION = "zstd"
+# Расширения файлов Parquet
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+# Расширения файлов Arrow IPC
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+# Точность и масштаб для numeric без ограничений (numeric без (p, s))
+NUMERIC_PRECISION = 38
+NUMERIC_SCALE = 6
+
+# Типы Arrow по OID типов PostgreSQL (numeric обрабатывается отдельно)
+PG_ARROW_TYPES = {
+    16: pa.bool_(),                     # boolean
+    20: pa.int64(),                     # bigint
+    21: pa.int16(),                     # smallint
+    23: pa.int32(),                     # integer
+    25: pa.string(),                    # text
+    700: pa.float32(),                  # real
+    701: pa.float64(),                  # double precision
+    1042: pa.string(),                  # char(n)
+    1043: pa.string(),                  # varchar(n)
+    1082: pa.date32(),                  # date
+    1083: pa.time64("us"),              # time
+    1114: pa.timestamp("us"),           # timestamp without time zone
+    1184: pa.timestamp("us", tz="UTC"), # timestamp with time zone
+}
+# OID типа numeric
+NUMERIC_OID = 1700
+
+
+def is_parquet(filename):
+    """
+    Признак файла Parquet (по расширению).
+
+    :param filename: Имя файла
+    :type filename: str
+    :rtype: bool
+    """
+    return os.path.splitext(filename)[1].lower() in PARQUET_EXTENSIONS
+
+
+def check_format(filename):
+    """
+    Проверка расширения файла столбцового формата.
+
+    :param filename: Имя файла
+    :type filename: str
+    :raises: ValueError для неподдерживаемого расширения
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in PARQUET_EXTENSIONS + ARROW_EXTENSIONS:
+        raise ValueError(f"Неподдерживаемый формат файла {extension or filename}: "
+                         f"ожидается .parquet, .arrow или .feather")
+
+
+def arrow_type(column):
+    """
+    Тип Arrow для столбца результата запроса.
+
+    :param column: Описание столбца курсора (элемент cursor.description)
+    :type column: psycopg2.extensions.Column
+    :rtype: pyarrow.DataType
+    """
+    if column.type_code == NUMERIC_OID:
+        # psycopg2 сообщает точность и масштаб только для numeric(p, s)
+        if column.precision and column.precision <= NUMERIC_PRECISION:
+            return pa.decimal128(column.precision, column.scale or 0)
+        return pa.decimal128(NUMERIC_PRECISION, NUMERIC_SCALE)
+    return PG_ARROW_TYPES.get(column.type_code, pa.string())
+
+
+def arrow_schema(description, names=None):
+    """
+    Схема Arrow по описанию столбцов курсора.
+
+    :param description: Описание столбцов (cursor.description)
+    :type description: list
+    :param names: Имена столбцов файла (если None — имена столбцов запроса)
+    :type names: list[str] или None
+    :rtype: pyarrow.Schema
+    :raises: ValueError, если количество имен не совпадает с количеством столбцов
+    """
+    if names and len(names) != len(description):
+        raise ValueError(f"Заголовков: {len(names)}, столбцов в запросе: {len(description)}")
+    names = names or [column.name for column in description]
+    return pa.schema([pa.field(name, arrow_type(column)) for name, column in zip(names, description)])
+
+
+def _to_array(values, arrow_type):
+    """
+    Преобразование значений одного столбца в массив Arrow.
+
+    :param values: Значения столбца
+    :type values: tuple
+    :param arrow_type: Тип столбца
+    :type arrow_type: pyarrow.DataType
+    :rtype: pyarrow.Array
+    """
+    if pa.types.is_string(arrow_type):
+        # Типы без соответствия в Arrow (json, interval, uuid и т. п.) записываются строками
+        values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        return pa.array(values, arrow_type)
+    try:
+        return pa.array(values, arrow_type)
+    except pa.ArrowInvalid:
+        if not pa.types.is_decimal(arrow_type):
+            raise
+        # Значение numeric без ограничений длиннее NUMERIC_SCALE знаков после запятой
+        step = Decimal(1).scaleb(-arrow_type.scale)
+        return pa.array([v if v is None else v.quantize(step) for v in values], arrow_type)
+
+
+def rows_to_batch(rows, schema):
+    """
+    Преобразование порции строк в пакет записей Arrow.
+
+    :param rows: Строки (кортежи значений в порядке столбцов схемы)
+    :type rows: list[tuple]
+    :param schema: Схема файла
+    :type schema: pyarrow.Schema
+    :rtype: pyarrow.RecordBatch
+    """
+    columns = zip(*rows)
+    arrays = [_to_array(values, field.type) for values, field in zip(columns, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _open_writer(filename, schema):
+    """
+    Открытие записи файла в формате, соответствующем расширению.
+
+    :param filename: Имя файла
+    :type filename: str
+    :param schema: Схема файла
+    :type schema: pyarrow.Schema
+    :returns: Объект с методами write_batch и close
+    """
+    if is_parquet(filename):
+        return pq.ParquetWriter(filename, schema, compression=PARQUET_COMPRESSION)
+    return pa_ipc.new_file(filename, schema)
+
+
+def write_columnar(batches, filename, description, names=None, progress=None):
+    """
+    Потоковая запись порций строк в файл Parquet или Arrow IPC.
+
+    Описание столбцов заполняется источником порций при первом чтении
+    (см. параметр on_description метода Database.iter_batches), поэтому
+    схема строится после получения первой порции.
+
+    :param batches: Итератор порций строк (списков кортежей)
+    :type batches: iterable
+    :param filename: Имя файла
+    :type filename: str
+    :param description: Описание столбцов (cursor.description), заполняемое источником
+    :type description: list
+    :param names: Имена столбцов файла (если None — имена столбцов запроса)
+    :type names: list[str] или None
+    :param progress: Ход выполнения задачи экспорта (методы report и check)
+    :type progress: ExportProgress или None
+    :returns: Количество записанных строк
+    :rtype: int
+    :raises: ValueError для неподдерживаемого расширения файла
+    """
+    check_format(filename)
+    writer = None
+    total = 0
+    try:
+        for rows in batches:
+            if writer is None:
+                schema = arrow_schema(description, names)
+                writer = _open_writer(filename, schema)
+            writer.write_batch(rows_to_batch(rows, schema))
+            total += len(rows)
+            if progress is not None:
+                progress.report(rows=total)
+                progress.check()
+        # Пустой результат: файл содержит только схему
+        if writer is None:
+            writer = _open_writer(filename, arrow_schema(description, names))
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def file_columns(filename):
+    """
+    Имена столбцов файла Parquet или Arrow IPC.
+
+    :param filename: Имя файла
+    :type filename: str
+    :rtype: list[str]
+    """
+    check_format(filename)
+    if is_parquet(filename):
+        return pq.read_schema(filename).names
+    with pa.memory_map(filename) as source:
+        return pa_ipc.open_file(source).schema.names
+
+
+def read_batches(filename, columns=None, batch_size=ARROW_BATCH_ROWS):
+    """
+    Последовательное чтение пакетов записей файла Parquet или Arrow IPC.
+
+    :param filename: Имя файла
+    :type filename: str
+    :param columns: Читаемые столбцы (если None — все)
+    :type columns: list[str] или None
+    :param batch_size: Строк в пакете (для Parquet)
+    :type batch_size: int
+    :returns: Генератор пакетов записей
+    :rtype: generator
+    """
+    check_format(filename)
+    if is_parquet(filename):
+        # Читаются только нужные столбцы, по одной порции за раз
+        yield from pq.ParquetFile(filename).iter_batches(batch_size=batch_size, columns=columns)
+        return
+    # Файл IPC отображается в память, пакеты читаются без копирования
+    with pa.memory_map(filename) as source:
+        reader = pa_ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index)
+            yield batch.select(columns) if columns is not None else batch
+
+
+class ArrowCopySource:
+    """
+    Файлоподобный объект для передачи пакетов записей Arrow в COPY.
+
+    Столбцы файла сопоставляются со столбцами импорта по имени (лишние
+    столбцы не читаются, отсутствующие необязательные передаются как
+    NULL). Каждый пакет приводится к тексту, дополняется номером строки
+    файла и записывается в CSV средствами pyarrow, поэтому строки не
+    преобразуются в объекты Python. Интерфейс совпадает
+    с bulk_import.CsvCopySource.
+    """
+
+    def __init__(self, filename, columns, batch_size):
+        """
+        Инициализация источника.
+
+        :param filename: Имя файла Parquet или Arrow IPC
+        :type filename: str
+        :param columns: Столбцы импорта
+        :type columns: list[ImportColumn]
+        :param batch_size: Строк в пакете
+        :type batch_size: int
+        :raises: ValueError, если в файле нет обязательного столбца
+        """
+        present = set(file_columns(filename))
+        missing = [column.name for column in columns if column.required and column.name not in present]
+        if missing:
+            raise ValueError(f"В файле нет обязательных столбцов: {', '.join(missing)}")
+        self.names = [column.name for column in columns]
+        self.batches = read_batches(
+            filename, [name for name in self.names if name in present], batch_size
+        )
+        # Отклоненные до загрузки строки (у файлов с типизированной схемой их нет)
+        self.rejected = []
+        # Количество прочитанных строк данных
+        self.rows = 0
+        self._buffer = ""
+        self._done = False
+
+    def _fill(self):
+        """
+        Чтение очередного пакета записей в буфер.
+        """
+        batch = next(self.batches, None)
+        if batch is None:
+            self._done = True
+            return
+        count = batch.num_rows
+        # Номер строки файла (начиная с 1) для отчета об отклоненных строках
+        arrays = [pa.array(range(self.rows + 1, self.rows + count + 1), pa.int64())]
+        for name in self.names:
+            index = batch.schema.get_field_index(name)
+            if index < 0:
+                arrays.append(pa.nulls(count, pa.string()))
+            else:
+                arrays.append(batch.column(index).cast(pa.string()))
+        self.rows += count
+        out = io.BytesIO()
+        pa_csv.write_csv(
+            pa.Table.from_arrays(arrays, names=["line_no"] + self.names), out,
+            pa_csv.WriteOptions(include_header=False)
+        )
+        self._buffer += out.getvalue().decode("utf-8")
+
+    def read(self, size=-1):
+        """
+        Чтение данных для COPY.
+
+        :param size: Желаемый размер порции (символов)
+        :type size: int
+        :rtype: str
+        """
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
@@ -0,0 +1,398 @@
+"""
+Модуль асинхронного выполнения запросов к базе данных.
+
+Этот модуль предоставляет класс AsyncQueryRunner, который выполняет
+SQL-запросы в пуле потоков Qt (QThreadPool) и возвращает результаты
+в поток интерфейса через сигналы. Устаревшие запросы отменяются на
+сервере с помощью pg_cancel_backend, а их результаты отбрасываются.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с потоками
+import threading
+# Импорт исключения отмены запроса
+from psycopg2.extensions import QueryCanceledError
+# Импорт необходимых классов из PyQt6
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+# Отдельный пул потоков для отправки отмен (создается при первом обращении)
+_cancel_pool = None
+
+
+class _WorkerSignals(QObject):
+    """
+    Сигналы фонового запроса.
+
+    QRunnable не является QObject, поэтому сигналы вынесены в отдельный объект.
+    Объект создается в потоке интерфейса, поэтому сигналы, испускаемые из
+    рабочего потока, доставляются в поток интерфейса через очередь событий.
+    """
+    # Запрос выполнен: идентификатор запроса, список строк
+    finished = pyqtSignal(int, object)
+    # Ошибка выполнения: идентификатор запроса, текст ошибки
+    failed = pyqtSignal(int, str)
+    # Запрос отменен: идентификатор запроса
+    cancelled = pyqtSignal(int)
+
+
+class QueryWorker(QRunnable):
+    """
+    Фоновое выполнение одного SELECT-запроса.
+
+    Пока запрос выполняется, хранит идентификатор серверного процесса
+    (backend pid) соединения, чтобы запрос можно было отменить.
+    """
+
+    def __init__(self, db, request_id, query, params=None):
+        """
+        Инициализация фонового запроса.
+
+        :param db: Объект базы данных
+        :type db: Database
+        :param request_id: Идентификатор запроса
+        :type request_id: int
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или list или None
+        """
+        super().__init__()
+        # Сохранение параметров запроса
+        self.db = db
+        self.request_id = request_id
+        self.query = query
+        self.params = params
+        # Место вызова для статистики запросов (в рабочем потоке стек его не содержит)
+        self.caller = db.stats.caller() if db.stats.enabled else None
+        # Объект с сигналами для передачи результата
+        self.signals = _WorkerSignals()
+        # Блокировка для согласования выполнения и отмены
+        self._lock = threading.Lock()
+        # Идентификатор серверного процесса во время выполнения запроса
+        self._backend_pid = None
+        # Признак отмены запроса
+        self._cancelled = False
+
+    def attach(self, conn):
+        """
+        Регистрация соединения, на котором выполняется запрос.
+
+        Вызывается методом Database.fetch_rows перед выполнением запроса.
+
+        :param conn: Соединение с базой данных
+        :type conn: psycopg2.extensions.connection
+        """
+        with self._lock:
+            self._backend_pid = conn.get_backend_pid()
+
+    def detach(self):
+        """
+        Снятие регистрации соединения после выполнения запроса.
+
+        Ожидает завершения отправки отмены, если она уже началась, чтобы
+        отмена не попала в следующий запрос на том же соединении из пула.
+        """
+        with self._lock:
+            self._backend_pid = None
+
+    def cancel(self):
+        """
+        Отмена запроса.
+
+        Если запрос еще не начал выполняться, он будет пропущен. Если
+        выполняется — серверу отправляется pg_cancel_backend.
+        Отправка выполняется под блокировкой, поэтому вызывать метод
+        следует из фонового потока (см. send_cancel).
+        """
+        with self._lock:
+            self._cancelled = True
+            if self._backend_pid is None:
+                return
+            # Отмена запроса на сервере через отдельное соединение из пула
+            self.db.fetch_one("SELECT pg_cancel_backend(%s)", (self._backend_pid,))
+            logging.debug(f"Отправлена отмена запроса {self.request_id} (pid {self._backend_pid})")
+
+    @property
+    def is_cancelled(self):
+        """
+        Признак отмены запроса.
+
+        :rtype: bool
+        """
+        return self._cancelled
+
+    def run(self):
+        """
+        Выполнение запроса в рабочем потоке.
+
+        Результат, ошибка или факт отмены передаются сигналами.
+        """
+        # Запрос отменен до начала выполнения
+        if self._cancelled:
+            self.signals.cancelled.emit(self.request_id)
+            return
+
+        try:
+            # Выполнение запроса с регистрацией соединения для отмены
+            with self.db.stats.calling(self.caller):
+                rows = self.db.fetch_rows(self.query, self.params, tracker=self)
+        except QueryCanceledError:
+            self.signals.cancelled.emit(self.request_id)
+        except Exception as e:
+            # Логирование ошибки выполнения запроса
+            logging.error(f"Ошибка фонового запроса: {str(e)}")
+            self.signals.failed.emit(self.request_id, str(e))
+        else:
+            if self._cancelled:
+                self.signals.cancelled.emit(self.request_id)
+            else:
+                self.signals.finished.emit(self.request_id, rows)
+
+
+class CancelWorker(QRunnable):
+    """
+    Фоновая отправка отмены запроса, чтобы не блокировать поток интерфейса.
+
+    Принимает любой объект с методом cancel() (QueryWorker, ExportProgress).
+    """
+
+    def __init__(self, worker):
+        """
+        :param worker: Отменяемый запрос
+        :type worker: QueryWorker или ExportProgress
+        """
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        """
+        Отправка отмены запроса.
+        """
+        try:
+            self.worker.cancel()
+        except Exception as e:
+            # Логирование ошибки отмены запроса
+            logging.error(f"Ошибка отмены запроса: {str(e)}")
+
+
+def get_cancel_pool():
+    """
+    Получение пула потоков для отправки отмен запросов.
+
+    Отмены выполняются в отдельном пуле из одного потока: в общем пуле
+    они ждали бы в очереди за теми самыми запросами, которые отменяют.
+
+    :returns: Пул потоков отмены
+    :rtype: QThreadPool
+    """
+    global _cancel_pool
+    if _cancel_pool is None:
+        _cancel_pool = QThreadPool()
+        _cancel_pool.setMaxThreadCount(1)
+    return _cancel_pool
+
+
+def send_cancel(worker):
+    """
+    Отправка отмены запроса в фоновом потоке.
+
+    :param worker: Отменяемый запрос
+    :type worker: QueryWorker или ExportProgress
+    """
+    get_cancel_pool().start(CancelWorker(worker))
+
+
+class AsyncQueryRunner(QObject):
+    """
+    Асинхронный исполнитель запросов для вкладок и диалогов.
+
+    Запросы группируются по ключу (например, "stock" или "chart"):
+    новый запрос с тем же ключом отменяет предыдущий, а результат
+    отмененного или устаревшего запроса не передается в обработчик.
+    Сигнал loading_changed позволяет показать состояние загрузки.
+    """
+    # Изменение состояния загрузки: True — есть выполняющиеся запросы
+    loading_changed = pyqtSignal(bool)
+
+    # Общий счетчик идентификаторов запросов
+    _next_request_id = 0
+
+    def __init__(self, db, parent=None, thread_pool=None):
+        """
+        Инициализация исполнителя запросов.
+
+        :param db: Объект базы данных
+        :type db: Database
+        :param parent: Родительский объект Qt
+        :type parent: QObject или None
+        :param thread_pool: Пул потоков (по умолчанию глобальный пул Qt)
+        :type thread_pool: QThreadPool или None
+        """
+        super().__init__(parent)
+        # Сохранение объекта базы данных и пула потоков
+        self.db = db
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        # Активные запросы: ключ -> (запрос, обработчик результата, обработчик ошибки)
+        self._active = {}
+
+    def submit(self, key, query, params=None, on_result=None, on_error=None):
+        """
+        Запуск запроса в фоновом потоке.
+
+        Выполняющийся запрос с тем же ключом отменяется.
+
+        :param key: Ключ группы запросов
+        :type key: str
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или list или None
+        :param on_result: Обработчик результата, принимает список строк
+        :type on_result: callable или None
+        :param on_error: Обработчик ошибки, принимает текст ошибки
+        :type on_error: callable или None
+        :returns: Идентификатор запроса
+        :rtype: int
+        """
+        was_loading = self.is_loading()
+        # Отмена предыдущего запроса с тем же ключом
+        self._cancel_key(key)
+
+        # Создание фонового запроса
+        AsyncQueryRunner._next_request_id += 1
+        request_id = AsyncQueryRunner._next_request_id
+        worker = QueryWorker(self.db, request_id, query, params)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        worker.signals.cancelled.connect(self._on_cancelled)
+        self._active[key] = (worker, on_result, on_error)
+
+        # Запуск запроса в пуле потоков
+        self.thread_pool.start(worker)
+
+        if not was_loading:
+            self.loading_changed.emit(True)
+        return request_id
+
+    def cancel(self, key):
+        """
+        Отмена запроса с указанным ключом.
+
+        :param key: Ключ группы запросов
+        :type key: str
+        """
+        was_loading = self.is_loading()
+        self._cancel_key(key)
+        if was_loading and not self.is_loading():
+            self.loading_changed.emit(False)
+
+    def cancel_all(self):
+        """
+        Отмена всех выполняющихся запросов.
+
+        Вызывается при закрытии вкладки или диалога.
+        """
+        for key in list(self._active):
+            self.cancel(key)
+
+    def is_loading(self, key=None):
+        """
+        Проверка наличия выполняющихся запросов.
+
+        :param key: Ключ группы запросов (если None — любые запросы)
+        :type key: str или None
+        :rtype: bool
+        """
+        if key is None:
+            return bool(self._active)
+        return key in self._active
+
+    def _cancel_key(self, key):
+        """
+        Отмена запроса с указанным ключом без оповещения о состоянии загрузки.
+
+        :param key: Ключ группы запросов
+        :type key: str
+        """
+        entry = self._active.pop(key, None)
+        if entry is None:
+            return
+        worker = entry[0]
+        # Отправка отмены в отдельном пуле, не занятом запросами
+        send_cancel(worker)
+
+    def _take(self, request_id):
+        """
+        Извлечение активного запроса по идентификатору.
+
+        :param request_id: Идентификатор запроса
+        :type request_id: int
+        :returns: Запись активного запроса или None для устаревшего запроса
+        :rtype: tuple или None
+        """
+        for key, entry in self._active.items():
+            if entry[0].request_id == request_id:
+                del self._active[key]
+                if not self._active:
+                    self.loading_changed.emit(False)
+                return entry
+        return None
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, request_id, rows):
+        """
+        Передача результата запроса обработчику.
+
+        Результаты устаревших запросов отбрасываются.
+        """
+        entry = self._take(request_id)
+        if entry is None:
+            return
+        _, on_result, _ = entry
+        if on_result:
+            try:
+                on_result(rows)
+            except Exception as e:
+                # Необработанное исключение в слоте PyQt6 завершает приложение
+                logging.error(f"Ошибка обработки результата запроса: {str(e)}")
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, request_id, error):
+        """
+        Передача ошибки запроса обработчику.
+        """
+        entry = self._take(request_id)
+        if entry is None:
+            return
+        _, _, on_error = entry
+        if on_error:
+            try:
+                on_error(error)
+            except Exception as e:
+                # Логирование ошибки обработчика
+                logging.error(f"Ошибка обработки ошибки запроса: {str(e)}")
+
+    @pyqtSlot(int)
+    def _on_cancelled(self, request_id):
+        """
+        Обработка отмены запроса.
+
+        Запросы, отмененные пользователем или новым запросом с тем же
+        ключом, уже удалены из активных в _cancel_key, и их отмена
+        отбрасывается. Если запрос еще активен, его отменил сервер
+        (например, по statement_timeout) — это передается обработчику ошибки.
+        """
+        entry = self._take(request_id)
+        if entry is None:
+            return
+        _, _, on_error = entry
+        logging.warning(f"Запрос {request_id} отменен сервером")
+        if on_error:
+            try:
+                on_error("Запрос отменен сервером (превышено время ожидания или отмена администратором)")
+            except Exception as e:
+                # Логирование ошибки обработчика
+                logging.error(f"Ошибка обработки ошибки запроса: {str(e)}")
@@ -41,12 +41,10 @@ class AuthService:
             # Создание подключения к базе данных
             db = Database()
             # SQL-запрос для получения данных пользователя
-            db.cursor.execute(
+            result = db.fetch_one(
                 "SELECT password_hash, full_name, is_admin FROM users WHERE username = %s",
                 (username,)
             )
-            # Получение результата запроса
-            result = db.cursor.fetchone()
 
             if result:
                 # Распаковка данных пользователя
@@ -82,12 +80,12 @@ class AuthService:
             db = Database()
             
             # Проверка текущего пароля
-            db.cursor.execute(
+            result = db.fetch_one(
                 "SELECT 1 FROM users WHERE username = %s AND password_hash = %s",
                 (username, current_password)
             )
             # Если текущий пароль неверный
-            if not db.cursor.fetchone():
+            if not result:
                 return False
 
             # Обновление пароля в базе данных
@@ -0,0 +1,895 @@
+"""
+Модуль массового импорта данных через промежуточную таблицу.
+
+Файл передается в базу данных командой ``COPY ... FROM STDIN`` во
+временную таблицу, все значения которой хранятся как текст. Проверка
+выполняется над всей таблицей несколькими командами UPDATE (по одной
+на правило), каждая из которых помечает строки причиной отклонения.
+Прошедшие проверку строки переносятся в целевую таблицу одной командой
+INSERT ... SELECT. Все шаги выполняются в одной транзакции: импорт либо
+применяется целиком, либо не применяется вовсе.
+
+Отклоненные строки с номером строки файла и причиной сохраняются
+в отчет рядом с исходным файлом.
+
+В режиме обновления (merge=True) строки сопоставляются с записями
+таблицы по естественному ключу (MERGE_KEYS) и переносятся командой
+INSERT ... ON CONFLICT DO UPDATE: новые строки добавляются, измененные
+обновляются, а строки, совпадающие с записью таблицы, пропускаются и
+не изменяют таблицу. Совпадение определяется сравнением строк
+``ROW(...) IS DISTINCT FROM ROW(...)`` по обновляемым столбцам вместо
+сравнения хешей строк: PostgreSQL сравнивает значения без вычисления
+и хранения хеша, а NULL считается равным NULL. Суррогатный первичный
+ключ, не входящий в естественный ключ (stock_id), в режиме обновления
+не переносится: новым записям его назначает последовательность
+(см. import_columns).
+
+Кроме CSV поддерживаются файлы Parquet и Arrow IPC: их пакеты записей
+передаются в COPY тем же способом (см. arrow_io.ArrowCopySource).
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с CSV файлами
+import csv
+# Импорт модуля для работы с буферами в памяти
+import io
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для измерения времени
+import time
+# Импорт модуля для логирования
+import logging
+# Импорт именованных кортежей
+from collections import namedtuple
+# Импорт источника COPY для файлов Parquet и Arrow IPC
+from arrow_io import ArrowCopySource
+# Импорт транзакции на соединении
+from database import transaction
+
+# Описание столбца импорта: имя, тип PostgreSQL, обязательность
+ImportColumn = namedtuple("ImportColumn", "name type required")
+
+# Допустимые категории товаров (ограничение products_category_check)
+PRODUCT_CATEGORIES = [
+    "электроника", "одежда", "обувь", "мебель", "товары для спорта",
+    "инструменты", "бытовая техника", "здоровье", "товары для дома", "продукты",
+]
+# Допустимые статусы заказов (ограничение orders_status_check)
+ORDER_STATUSES = ["в обработке", "доставлен", "отменен"]
+
+# Столбцы файла импорта для каждой таблицы (в порядке столбцов файла)
+IMPORT_COLUMNS = {
+    "products": [
+        ImportColumn("product_name", "text", True),
+        ImportColumn("product_description", "text", False),
+        ImportColumn("category", "text", False),
+        ImportColumn("unit_price", "numeric", True),
+    ],
+    "stock": [
+        # Необязателен в режиме обновления (см. import_columns)
+        ImportColumn("stock_id", "integer", True),
+        ImportColumn("product_id", "integer", True),
+        ImportColumn("warehouse_id", "integer", True),
+        ImportColumn("quantity", "integer", True),
+    ],
+    "orders": [
+        ImportColumn("order_id", "integer", True),
+        ImportColumn("order_date", "date", True),
+        ImportColumn("supplier_id", "integer", True),
+        ImportColumn("total_amount", "numeric", True),
+        ImportColumn("status", "text", False),
+    ],
+    "suppliers": [
+        ImportColumn("supplier_id", "integer", True),
+        ImportColumn("supplier_name", "text", True),
+        ImportColumn("contact_person", "text", False),
+        ImportColumn("phone_number", "text", True),
+        ImportColumn("email", "text", False),
+    ],
+    "warehouses": [
+        ImportColumn("warehouse_id", "integer", True),
+        ImportColumn("warehouse_name", "text", True),
+        ImportColumn("location", "text", True),
+        ImportColumn("capacity", "integer", True),
+    ],
+}
+
+# Первичные ключи таблиц
+PRIMARY_KEYS = {
+    "products": "product_id",
+    "stock": "stock_id",
+    "orders": "order_id",
+    "suppliers": "supplier_id",
+    "warehouses": "warehouse_id",
+}
+
+# Внешние ключи: таблица -> [(столбец, таблица ссылки, столбец ссылки)]
+FOREIGN_KEYS = {
+    "stock": [("product_id", "products", "product_id"), ("warehouse_id", "warehouses", "warehouse_id")],
+    "orders": [("supplier_id", "suppliers", "supplier_id")],
+}
+
+# Уникальные сочетания столбцов (кроме первичного ключа)
+UNIQUE_KEYS = {
+    "stock": [("product_id", "warehouse_id")],
+}
+
+# Естественные ключи для импорта с обновлением: таблица -> столбцы.
+# Для каждого ключа в базе данных должен быть уникальный индекс
+# (products.product_name — миграция 0006, stock — миграция 0003)
+MERGE_KEYS = {
+    "products": ("product_name",),
+    "stock": ("product_id", "warehouse_id"),
+    "orders": ("order_id",),
+    "suppliers": ("supplier_id",),
+    "warehouses": ("warehouse_id",),
+}
+
+# Проверки значений, повторяющие ограничения CHECK: таблица -> [(столбец, условие, причина)]
+# Условие записывается для приведенного к типу значения, обозначенного {value}
+CHECK_RULES = {
+    "products": [
+        ("unit_price", "{value} > 0", "Цена должна быть больше нуля"),
+        ("category", "{value} = ANY(%(categories)s)", "Недопустимая категория"),
+    ],
+    "stock": [
+        ("quantity", "{value} >= 0", "Количество не может быть отрицательным"),
+    ],
+    "orders": [
+        ("total_amount", "{value} > 0", "Сумма заказа должна быть больше нуля"),
+        ("status", "{value} = ANY(%(statuses)s)", "Недопустимый статус заказа"),
+    ],
+    "suppliers": [
+        ("phone_number", r"{value} ~ '^\d{{11}}$'", "Номер телефона должен содержать 11 цифр"),
+        ("email", r"{value} ~ '^[a-zA-Z0-9._%%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{{2,}}$'", "Неверный формат email"),
+    ],
+    "warehouses": [
+        ("capacity", "{value} > 0", "Вместимость должна быть больше нуля"),
+    ],
+}
+
+# Проверка формата текстового значения для каждого типа
+TYPE_PATTERNS = {
+    "integer": r"^[+-]?\d{1,10}$",
+    "numeric": r"^[+-]?(\d+([.,]\d*)?|[.,]\d+)$",
+    "date": r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$",
+}
+# Описание формата для сообщений об ошибке
+TYPE_NAMES = {
+    "integer": "целое число",
+    "numeric": "число",
+    "date": "дата ГГГГ-ММ-ДД",
+}
+
+# Количество строк файла, передаваемых в COPY за одно чтение
+COPY_BATCH_ROWS = 5000
+# Имя временной таблицы импорта
+STAGING_TABLE = "import_staging"
+
+# Результат импорта (updated и unchanged заполняются в режиме обновления)
+ImportResult = namedtuple(
+    "ImportResult", "total imported rejected report_path elapsed updated unchanged", defaults=(0, 0)
+)
+
+
+def cast_expression(column, table=None):
+    """
+    SQL-выражение приведения текстового значения столбца к его типу.
+
+    Допускается десятичная запятая в числах. Внутри подзапросов к целевой
+    таблице имя столбца нужно уточнять именем промежуточной таблицы:
+    без него PostgreSQL найдет одноименный столбец подзапроса.
+
+    :param column: Столбец импорта
+    :type column: ImportColumn
+    :param table: Имя или псевдоним таблицы для уточнения имени столбца
+    :type table: str
+    :rtype: str
+    """
+    name = f"{table}.{column.name}" if table else column.name
+    if column.type == "numeric":
+        return f"replace({name}, ',', '.')::numeric"
+    if column.type == "text":
+        return name
+    return f"{name}::{column.type}"
+
+
+def valid_expression(column):
+    """
+    SQL-условие, при котором значение столбца можно безопасно привести к типу.
+
+    :param column: Столбец импорта
+    :type column: ImportColumn
+    :rtype: str
+    """
+    name = column.name
+    if column.type == "text":
+        return f"{name} IS NOT NULL"
+    condition = f"{name} ~ '{TYPE_PATTERNS[column.type]}'"
+    # Порядок вычисления условий AND не гарантирован, поэтому приведение
+    # выполняется только внутри CASE после проверки формата
+    if column.type == "integer":
+        return f"CASE WHEN {condition} THEN {name}::bigint BETWEEN -2147483648 AND 2147483647 ELSE FALSE END"
+    if column.type == "date":
+        # Существование дня в месяце: первое число месяца плюс (день - 1) дней
+        return (
+            f"CASE WHEN {condition} THEN extract(month FROM (left({name}, 8) || '01')::date"
+            f" + (right({name}, 2)::int - 1)) = substr({name}, 6, 2)::int ELSE FALSE END"
+        )
+    return f"COALESCE({condition}, FALSE)"
+
+
+def generated_key(table_name, merge=False):
+    """
+    Первичный ключ, значения которого назначает последовательность.
+
+    В режиме обновления записи сопоставляются по естественному ключу,
+    поэтому суррогатный первичный ключ, не входящий в него, из файла не
+    переносится: существующие записи сохраняют свой ключ, новые получают
+    следующее значение последовательности.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления
+    :type merge: bool
+    :returns: Имя столбца или None, если ключ переносится из файла
+    :rtype: str или None
+    """
+    primary_key = PRIMARY_KEYS[table_name]
+    if merge and primary_key not in MERGE_KEYS[table_name]:
+        return primary_key
+    return None
+
+
+def import_columns(table_name, merge=False):
+    """
+    Столбцы файла, проверяемые и переносимые в целевую таблицу.
+
+    Столбец generated_key остается в файле и промежуточной таблице,
+    но его значения не проверяются и пропускаются.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления
+    :type merge: bool
+    :rtype: list[ImportColumn]
+    """
+    skipped = generated_key(table_name, merge)
+    return [column for column in IMPORT_COLUMNS[table_name] if column.name != skipped]
+
+
+def validation_rules(table_name, merge=False):
+    """
+    Правила проверки строк промежуточной таблицы.
+
+    Каждое правило — пара (причина, условие отклонения строки). Условия,
+    использующие приведенное значение, защищены конструкцией CASE, чтобы
+    приведение не выполнялось для значений неверного формата.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления (см. import_columns)
+    :type merge: bool
+    :rtype: list[tuple[str, str]]
+    """
+    columns = import_columns(table_name, merge)
+    by_name = {column.name: column for column in columns}
+    rules = []
+
+    # Обязательные поля и формат значений
+    for column in columns:
+        if column.required:
+            rules.append((f"Не заполнено поле {column.name}", f"{column.name} IS NULL"))
+        if column.type != "text":
+            rules.append((
+                f"Поле {column.name}: ожидается {TYPE_NAMES[column.type]}",
+                f"{column.name} IS NOT NULL AND NOT ({valid_expression(column)})"
+            ))
+
+    # Ограничения CHECK (NULL, как и в PostgreSQL, проходит проверку)
+    for name, condition, reason in CHECK_RULES.get(table_name, []):
+        column = by_name[name]
+        check = condition.format(value=cast_expression(column))
+        rules.append((
+            f"Поле {name}: {reason}",
+            f"CASE WHEN {valid_expression(column)} THEN NOT ({check}) ELSE FALSE END"
+        ))
+
+    # Внешние ключи
+    for name, ref_table, ref_column in FOREIGN_KEYS.get(table_name, []):
+        column = by_name[name]
+        rules.append((
+            f"Поле {name}: нет записи в таблице {ref_table}",
+            f"CASE WHEN {valid_expression(column)} THEN NOT EXISTS ("
+            f"SELECT 1 FROM {ref_table} r WHERE r.{ref_column} = {cast_expression(column, STAGING_TABLE)}"
+            f") ELSE FALSE END"
+        ))
+    return rules
+
+
+def unique_keys(table_name, merge=False):
+    """
+    Ключи уникальности, значения которых входят в столбцы импорта.
+
+    В режиме обновления к ним добавляется естественный ключ таблицы.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления
+    :type merge: bool
+    :rtype: list[tuple[str]]
+    """
+    names = {column.name for column in import_columns(table_name, merge)}
+    keys = [(PRIMARY_KEYS[table_name],)] if PRIMARY_KEYS[table_name] in names else []
+    keys.extend(UNIQUE_KEYS.get(table_name, []))
+    if merge and MERGE_KEYS[table_name] not in keys:
+        keys.append(MERGE_KEYS[table_name])
+    return keys
+
+
+def update_columns(table_name):
+    """
+    Столбцы, обновляемые при импорте с обновлением.
+
+    Естественный и первичный ключи существующей записи не изменяются.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :rtype: list[ImportColumn]
+    """
+    keys = set(MERGE_KEYS[table_name]) | {PRIMARY_KEYS[table_name]}
+    return [column for column in IMPORT_COLUMNS[table_name] if column.name not in keys]
+
+
+def upsert_clause(table_name):
+    """
+    Условие ON CONFLICT для импорта с обновлением.
+
+    Целевая таблица в команде INSERT должна иметь псевдоним t. Запись
+    обновляется, только если хотя бы одно значение изменилось. Вместо
+    хеша строки значения сравниваются напрямую конструкцией
+    ROW(...) IS DISTINCT FROM ROW(...), которая считает NULL равными.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :rtype: str
+    """
+    key = ", ".join(MERGE_KEYS[table_name])
+    names = [column.name for column in update_columns(table_name)]
+    if not names:
+        return f"ON CONFLICT ({key}) DO NOTHING"
+    assignments = ", ".join(f"{name} = EXCLUDED.{name}" for name in names)
+    current = ", ".join(f"t.{name}" for name in names)
+    excluded = ", ".join(f"EXCLUDED.{name}" for name in names)
+    return (
+        f"ON CONFLICT ({key}) DO UPDATE SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+        f"WHERE ROW({current}) IS DISTINCT FROM ROW({excluded})"
+    )
+
+
+def key_rules(table_name, merge=False):
+    """
+    Правила уникальности: значение ключа уже есть в таблице или повторяется в файле.
+
+    Из повторяющихся в файле строк принимается первая. Выполняются после
+    validation_rules, поэтому значения ключей уже проверены на формат.
+
+    В режиме обновления наличие естественного ключа в таблице не ошибка
+    (запись обновляется), а значение другого ключа отклоняется, только
+    если оно принадлежит записи с другим естественным ключом.
+
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления
+    :type merge: bool
+    :rtype: list[tuple[str, str]]
+    """
+    by_name = {column.name: column for column in IMPORT_COLUMNS[table_name]}
+    merge_key = MERGE_KEYS[table_name] if merge else None
+
+    def match(key):
+        return " AND ".join(f"t.{name} = {cast_expression(by_name[name], STAGING_TABLE)}" for name in key)
+
+    rules = []
+    for key in unique_keys(table_name, merge):
+        names = ", ".join(key)
+        if key != merge_key:
+            condition = match(key)
+            columns = key
+            if merge_key:
+                condition += f" AND NOT ({match(merge_key)})"
+                columns = key + tuple(name for name in merge_key if name not in key)
+            valid = " AND ".join(f"({valid_expression(by_name[name])})" for name in columns)
+            rules.append((
+                f"Значение ({names}) уже есть в таблице {table_name}",
+                f"CASE WHEN {valid} THEN EXISTS (SELECT 1 FROM {table_name} t WHERE {condition}) ELSE FALSE END"
+            ))
+        partition = ", ".join(cast_expression(by_name[name]) for name in key)
+        rules.append((
+            f"Значение ({names}) повторяется в файле",
+            f"line_no IN (SELECT line_no FROM (SELECT line_no, row_number() OVER "
+            f"(PARTITION BY {partition} ORDER BY line_no) AS n FROM {STAGING_TABLE} "
+            f"WHERE reject_reason IS NULL) d WHERE d.n > 1)"
+        ))
+    return rules
+
+
+class CsvCopySource:
+    """
+    Файлоподобный объект для передачи строк CSV в COPY.
+
+    Читает исходный файл через csv.reader, добавляет к каждой строке номер
+    строки файла и отдает данные порциями по COPY_BATCH_ROWS строк, поэтому
+    файл любого размера не загружается в память целиком. Строки
+    с неверным количеством полей в COPY не передаются и запоминаются
+    как отклоненные.
+    """
+
+    def __init__(self, csvfile, delimiter, columns_count, skip_header=True, first_line=0, max_rows=None):
+        """
+        Инициализация источника.
+
+        :param csvfile: Открытый файл CSV (или итератор строк файла)
+        :param delimiter: Разделитель в CSV файле
+        :type delimiter: str
+        :param columns_count: Ожидаемое количество полей в строке
+        :type columns_count: int
+        :param skip_header: Пропустить первую строку (заголовки)
+        :type skip_header: bool
+        :param first_line: Количество строк файла, прочитанных до начала источника
+            (при чтении файла по частям)
+        :type first_line: int
+        :param max_rows: Прекратить чтение после указанного количества строк данных
+        :type max_rows: int или None
+        """
+        self.reader = csv.reader(csvfile, delimiter=delimiter)
+        if skip_header:
+            next(self.reader, None)
+        self.columns_count = columns_count
+        self.first_line = first_line
+        self.max_rows = max_rows
+        # Отклоненные строки: (номер строки, причина, поля)
+        self.rejected = []
+        # Количество прочитанных строк данных
+        self.rows = 0
+        # Файл прочитан до конца
+        self.exhausted = False
+        self._buffer = ""
+        self._done = False
+
+    @property
+    def line_num(self):
+        """
+        Номер последней прочитанной строки файла.
+
+        :rtype: int
+        """
+        return self.first_line + self.reader.line_num
+
+    def _fill(self):
+        """
+        Чтение очередной порции строк файла в буфер.
+        """
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for _ in range(COPY_BATCH_ROWS):
+            if self.max_rows is not None and self.rows >= self.max_rows:
+                self._done = True
+                break
+            row = next(self.reader, None)
+            if row is None:
+                self._done = True
+                self.exhausted = True
+                break
+            # Пустые строки файла пропускаются
+            if not row or row == [""]:
+                continue
+            self.rows += 1
+            line_no = self.line_num
+            if len(row) != self.columns_count:
+                self.rejected.append((
+                    line_no,
+                    f"Ожидается полей: {self.columns_count}, в строке: {len(row)}",
+                    row
+                ))
+                continue
+            writer.writerow([line_no] + row)
+        self._buffer += out.getvalue()
+
+    def read(self, size=-1):
+        """
+        Чтение данных для COPY.
+
+        :param size: Желаемый размер порции (символов)
+        :type size: int
+        :rtype: str
+        """
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+
+def rejected_report_path(filename):
+    """
+    Имя файла отчета об отклоненных строках.
+
+    :param filename: Имя импортируемого файла
+    :type filename: str
+    :rtype: str
+    """
+    base, _ = os.path.splitext(filename)
+    return f"{base}_rejected.csv"
+
+
+def write_rejected_report(path, columns, rejected):
+    """
+    Запись отчета об отклоненных строках.
+
+    :param path: Имя файла отчета
+    :type path: str
+    :param columns: Столбцы импорта
+    :type columns: list[ImportColumn]
+    :param rejected: Отклоненные строки (номер строки, причина, поля)
+    :type rejected: list[tuple]
+    """
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Строка", "Причина"] + [column.name for column in columns])
+        for line_no, reason, values in sorted(rejected, key=lambda item: item[0]):
+            writer.writerow([line_no, reason] + ["" if v is None else v for v in values])
+
+
+def append_rejected_report(path, columns, rejected):
+    """
+    Дополнение отчета об отклоненных строках (импорт по частям).
+
+    Строка заголовков записывается, если отчет еще не создан.
+
+    :param path: Имя файла отчета
+    :type path: str
+    :param columns: Столбцы импорта
+    :type columns: list[ImportColumn]
+    :param rejected: Отклоненные строки (номер строки, причина, поля)
+    :type rejected: list[tuple]
+    :returns: Размер отчета в байтах после записи
+    :rtype: int
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        write_rejected_report(path, columns, rejected)
+        return os.path.getsize(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        for line_no, reason, values in sorted(rejected, key=lambda item: item[0]):
+            writer.writerow([line_no, reason] + ["" if v is None else v for v in values])
+    return os.path.getsize(path)
+
+
+def create_staging_table(cursor, columns):
+    """
+    Создание временной промежуточной таблицы (удаляется при завершении транзакции).
+
+    :param cursor: Курсор базы данных
+    :param columns: Столбцы импорта
+    :type columns: list[ImportColumn]
+    """
+    definitions = ", ".join(f"{column.name} text" for column in columns)
+    cursor.execute(
+        f"CREATE TEMP TABLE {STAGING_TABLE} (line_no integer PRIMARY KEY, {definitions}, "
+        f"reject_reason text) ON COMMIT DROP"
+    )
+
+
+def validate_staging(cursor, table_name, merge=False):
+    """
+    Проверка строк промежуточной таблицы.
+
+    Значения очищаются от пробелов по краям, пустые строки заменяются
+    на NULL, затем правила применяются по очереди; строка получает
+    причину первого нарушенного правила.
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления (см. key_rules)
+    :type merge: bool
+    """
+    columns = IMPORT_COLUMNS[table_name]
+    assignments = ", ".join(f"{column.name} = NULLIF(btrim({column.name}), '')" for column in columns)
+    cursor.execute(f"UPDATE {STAGING_TABLE} SET {assignments}")
+
+    params = {"categories": PRODUCT_CATEGORIES, "statuses": ORDER_STATUSES}
+    for reason, condition in validation_rules(table_name, merge) + key_rules(table_name, merge):
+        cursor.execute(
+            f"UPDATE {STAGING_TABLE} SET reject_reason = %(reason)s "
+            f"WHERE reject_reason IS NULL AND ({condition})",
+            dict(params, reason=reason)
+        )
+
+
+def merge_staging(cursor, table_name):
+    """
+    Перенос прошедших проверку строк в целевую таблицу.
+
+    Если импортируется первичный ключ, последовательность ключа
+    сдвигается за максимальное значение (см. sync_sequence).
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :returns: Количество добавленных строк
+    :rtype: int
+    """
+    columns = IMPORT_COLUMNS[table_name]
+    names = ", ".join(column.name for column in columns)
+    values = ", ".join(cast_expression(column) for column in columns)
+    cursor.execute(
+        f"INSERT INTO {table_name} ({names}) SELECT {values} FROM {STAGING_TABLE} "
+        f"WHERE reject_reason IS NULL ORDER BY line_no"
+    )
+    imported = cursor.rowcount
+    if imported:
+        sync_sequence(cursor, table_name)
+    return imported
+
+
+def upsert_staging(cursor, table_name):
+    """
+    Перенос прошедших проверку строк в целевую таблицу с обновлением.
+
+    Строки, совпадающие с записью таблицы с тем же естественным ключом
+    по всем обновляемым столбцам, исключаются до вставки, поэтому
+    повторный импорт неизмененного каталога не блокирует и не изменяет
+    записи. Остальные строки добавляются или обновляют запись командой
+    INSERT ... ON CONFLICT DO UPDATE. Суррогатный первичный ключ
+    новых записей назначает последовательность (см. generated_key).
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :returns: Количество добавленных, обновленных и неизмененных строк
+    :rtype: tuple[int, int, int]
+    """
+    columns = import_columns(table_name, merge=True)
+    by_name = {column.name: column for column in columns}
+    names = ", ".join(column.name for column in columns)
+    values = ", ".join(cast_expression(column, STAGING_TABLE) for column in columns)
+    match = " AND ".join(
+        f"t.{name} = {cast_expression(by_name[name], STAGING_TABLE)}" for name in MERGE_KEYS[table_name]
+    )
+    changed = update_columns(table_name)
+    if changed:
+        current = ", ".join(f"t.{column.name}" for column in changed)
+        staged = ", ".join(cast_expression(column, STAGING_TABLE) for column in changed)
+        match += f" AND ROW({current}) IS NOT DISTINCT FROM ROW({staged})"
+
+    cursor.execute(f"SELECT count(*) FROM {STAGING_TABLE} WHERE reject_reason IS NULL")
+    accepted = cursor.fetchone()[0]
+    # xmax новой версии строки равен нулю для добавленных и не равен для обновленных строк
+    cursor.execute(
+        f"WITH merged AS ("
+        f"INSERT INTO {table_name} AS t ({names}) SELECT {values} FROM {STAGING_TABLE} "
+        f"WHERE {STAGING_TABLE}.reject_reason IS NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {table_name} t WHERE {match}) "
+        f"ORDER BY {STAGING_TABLE}.line_no {upsert_clause(table_name)} "
+        f"RETURNING xmax = 0 AS inserted) "
+        f"SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+    )
+    imported, updated = cursor.fetchone()
+    if imported:
+        sync_sequence(cursor, table_name)
+    return imported, updated, accepted - imported - updated
+
+
+def sync_sequence(cursor, table_name):
+    """
+    Сдвиг последовательности первичного ключа за максимальное значение.
+
+    Выполняется после импорта, если первичный ключ входит в столбцы
+    импорта, чтобы следующие записи, созданные в приложении, не получили
+    занятый ключ.
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    """
+    primary_key = PRIMARY_KEYS[table_name]
+    if any(column.name == primary_key for column in IMPORT_COLUMNS[table_name]):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+            f"(SELECT max({primary_key}) FROM {table_name})) "
+            f"WHERE pg_get_serial_sequence(%s, %s) IS NOT NULL",
+            (table_name, primary_key, table_name, primary_key)
+        )
+
+
+def load_source(cursor, table_name, source, merge=False):
+    """
+    Загрузка строк источника в таблицу в текущей транзакции.
+
+    Строки передаются командой COPY в промежуточную таблицу, проверяются
+    и переносятся в целевую таблицу. Транзакция не фиксируется;
+    промежуточная таблица удаляется при ее завершении.
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param source: Источник строк (CsvCopySource или arrow_io.ArrowCopySource)
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Количество добавленных, обновленных и неизмененных строк
+        и отклоненные строки (номер строки, причина, поля)
+    :rtype: tuple[int, int, int, list]
+    """
+    columns = IMPORT_COLUMNS[table_name]
+    names = ", ".join(column.name for column in columns)
+    create_staging_table(cursor, columns)
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} (line_no, {names}) FROM STDIN WITH (FORMAT csv)",
+        source
+    )
+    validate_staging(cursor, table_name, merge)
+    if merge:
+        imported, updated, unchanged = upsert_staging(cursor, table_name)
+    else:
+        imported, updated, unchanged = merge_staging(cursor, table_name), 0, 0
+    cursor.execute(
+        f"SELECT line_no, reject_reason, {names} FROM {STAGING_TABLE} "
+        f"WHERE reject_reason IS NOT NULL"
+    )
+    rejected = source.rejected + [
+        (row[0], row[1], list(row[2:])) for row in cursor.fetchall()
+    ]
+    return imported, updated, unchanged, rejected
+
+
+def import_source_with_connection(conn, table_name, source, filename, merge=False):
+    """
+    Загрузка строк источника в таблицу через промежуточную таблицу.
+
+    Источник передает в COPY строки CSV с номером строки файла в первом
+    поле и значениями в порядке IMPORT_COLUMNS. Транзакция соединения
+    фиксируется при успехе и откатывается при ошибке.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param source: Источник строк (CsvCopySource или arrow_io.ArrowCopySource)
+    :param filename: Имя импортируемого файла (для отчета и журнала)
+    :type filename: str
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    :raises: psycopg2.Error при ошибке базы данных
+    """
+    columns = IMPORT_COLUMNS[table_name]
+    start = time.perf_counter()
+
+    # Импорт фиксируется одной транзакцией и откатывается целиком при ошибке
+    with transaction(conn) as tx:
+        imported, updated, unchanged, rejected = load_source(tx.cursor, table_name, source, merge)
+        # Сброс записей кэша запросов, прочитанных из таблицы, после фиксации
+        tx.touch(table_name)
+
+    report_path = None
+    if rejected:
+        report_path = rejected_report_path(filename)
+        write_rejected_report(report_path, columns, rejected)
+
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"Импорт {filename} в {table_name}: строк {source.rows}, добавлено {imported}, "
+        f"обновлено {updated}, без изменений {unchanged}, отклонено {len(rejected)}, {elapsed:.2f} с"
+    )
+    return ImportResult(source.rows, imported, len(rejected), report_path, elapsed, updated, unchanged)
+
+
+def import_csv_with_connection(conn, table_name, filename, delimiter=",", merge=False):
+    """
+    Массовый импорт CSV файла в таблицу через указанное соединение.
+
+    Первая строка файла считается строкой заголовков и пропускается;
+    порядок столбцов задается IMPORT_COLUMNS. Транзакция соединения
+    фиксируется при успехе и откатывается при ошибке.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла CSV
+    :type filename: str
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    :raises: ValueError для неподдерживаемой таблицы, psycopg2.Error при ошибке базы данных
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+
+    with open(filename, "r", encoding="utf-8-sig", newline="") as csvfile:
+        source = CsvCopySource(csvfile, delimiter, len(IMPORT_COLUMNS[table_name]))
+        return import_source_with_connection(conn, table_name, source, filename, merge)
+
+
+def import_arrow_with_connection(conn, table_name, filename, merge=False):
+    """
+    Массовый импорт файла Parquet или Arrow IPC в таблицу через указанное соединение.
+
+    Столбцы файла сопоставляются со столбцами IMPORT_COLUMNS по имени,
+    поэтому порядок столбцов в файле не важен, а лишние столбцы
+    (например, столбцы снимка таблицы, созданного экспортом в Parquet)
+    пропускаются.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла Parquet или Arrow IPC
+    :type filename: str
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    :raises: ValueError для неподдерживаемой таблицы или файла без обязательных столбцов,
+        psycopg2.Error при ошибке базы данных
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+    # Столбец, значения которого назначает последовательность, в файле может отсутствовать
+    skipped = generated_key(table_name, merge)
+    columns = [
+        column._replace(required=False) if column.name == skipped else column
+        for column in IMPORT_COLUMNS[table_name]
+    ]
+    source = ArrowCopySource(filename, columns, COPY_BATCH_ROWS)
+    return import_source_with_connection(conn, table_name, source, filename, merge)
+
+
+def import_csv(db, table_name, filename, delimiter=",", merge=False):
+    """
+    Массовый импорт CSV файла в таблицу через соединение из пула.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла CSV
+    :type filename: str
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    """
+    with db.pool.connection() as conn:
+        return import_csv_with_connection(conn, table_name, filename, delimiter, merge)
+
+
+def import_arrow(db, table_name, filename, merge=False):
+    """
+    Массовый импорт файла Parquet или Arrow IPC в таблицу через соединение из пула.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла Parquet или Arrow IPC
+    :type filename: str
+    :param merge: Обновлять записи с тем же естественным ключом (MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    """
+    with db.pool.connection() as conn:
+        return import_arrow_with_connection(conn, table_name, filename, merge)
@@ -0,0 +1,378 @@
+"""
+Модуль пула соединений с базой данных PostgreSQL.
+
+Этот модуль предоставляет класс ConnectionPool — общий для всего процесса
+пул соединений с ограничением минимального и максимального размера,
+закрытием простаивающих соединений и обнаружением утечек (соединений,
+которые были выданы и слишком долго не возвращаются в пул).
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с PostgreSQL
+import psycopg2
+# Импорт исключения пула соединений
+from psycopg2.pool import PoolError
+# Импорт констант состояния транзакции
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, QueryCanceledError
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для работы со временем
+import time
+# Импорт модуля для получения стека вызовов
+import traceback
+# Импорт модуля для работы с путями
+import os
+# Импорт декоратора для создания контекстных менеджеров
+from contextlib import contextmanager
+
+# Модули, кадры которых пропускаются при определении владельца соединения
+_INTERNAL_MODULES = {"connection_pool.py", "database.py", "contextlib.py"}
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений с PostgreSQL.
+
+    Хранит свободные соединения и выдает их по запросу. При исчерпании
+    пула ожидает возврата соединения не дольше checkout_timeout секунд.
+    Фоновый поток обслуживания закрывает соединения, простаивающие дольше
+    idle_timeout (не опускаясь ниже minconn), и сообщает в лог о соединениях,
+    удерживаемых дольше leak_timeout.
+    """
+
+    def __init__(self, minconn, maxconn, idle_timeout=300, leak_timeout=120,
+                 checkout_timeout=30, maintenance_interval=30, **conn_params):
+        """
+        Инициализация пула соединений.
+
+        Сразу открывает minconn соединений, поэтому ошибка подключения
+        к базе данных обнаруживается при создании пула.
+
+        :param minconn: Минимальное количество соединений в пуле
+        :type minconn: int
+        :param maxconn: Максимальное количество соединений в пуле
+        :type maxconn: int
+        :param idle_timeout: Время простоя (сек), после которого соединение закрывается
+        :type idle_timeout: float
+        :param leak_timeout: Время удержания (сек), после которого соединение считается утечкой
+        :type leak_timeout: float
+        :param checkout_timeout: Максимальное время ожидания свободного соединения (сек)
+        :type checkout_timeout: float
+        :param maintenance_interval: Период работы потока обслуживания (сек)
+        :type maintenance_interval: float
+        :param conn_params: Параметры подключения для psycopg2.connect
+        :raises: ValueError при некорректных размерах пула
+        :raises: psycopg2.Error при ошибке подключения к базе данных
+        """
+        # Проверка корректности размеров пула
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Некорректные размеры пула: minconn={minconn}, maxconn={maxconn}")
+
+        # Сохранение параметров пула
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.leak_timeout = leak_timeout
+        self.checkout_timeout = checkout_timeout
+        self.maintenance_interval = maintenance_interval
+        self._conn_params = conn_params
+
+        # Свободные соединения: список пар (соединение, время последнего использования)
+        self._idle = []
+        # Выданные соединения: id(соединения) -> (соединение, время выдачи, место вызова)
+        self._in_use = {}
+        # Идентификаторы соединений, о чьей утечке уже сообщено
+        self._reported_leaks = set()
+        # Условная переменная для ожидания освобождения соединения
+        self._cond = threading.Condition()
+        # Признак закрытия пула
+        self._closed = False
+
+        # Счетчики для статистики
+        self._created = 0
+        self._reaped = 0
+        self._checkouts = 0
+        self._waits = 0
+
+        # Открытие минимального количества соединений
+        with self._cond:
+            for _ in range(minconn):
+                self._idle.append((self._connect(), time.monotonic()))
+
+        # Запуск фонового потока обслуживания
+        self._stop_event = threading.Event()
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop,
+            name="db-pool-maintenance",
+            daemon=True
+        )
+        self._maintenance_thread.start()
+
+        # Логирование создания пула
+        logging.info(f"Создан пул соединений с базой данных (min={minconn}, max={maxconn})")
+
+    def _connect(self):
+        """
+        Открытие нового соединения с базой данных.
+
+        Вызывается под блокировкой пула.
+
+        :returns: Новое соединение
+        :rtype: psycopg2.extensions.connection
+        """
+        conn = psycopg2.connect(**self._conn_params)
+        self._created += 1
+        return conn
+
+    def _total(self):
+        """
+        Общее количество открытых соединений (свободных и выданных).
+
+        :rtype: int
+        """
+        return len(self._idle) + len(self._in_use)
+
+    def getconn(self, timeout=None):
+        """
+        Получение соединения из пула.
+
+        Возвращает свободное соединение, открывает новое, если лимит
+        не достигнут, или ожидает возврата соединения другим потоком.
+
+        :param timeout: Время ожидания (сек); по умолчанию checkout_timeout
+        :type timeout: float или None
+        :returns: Соединение с базой данных
+        :rtype: psycopg2.extensions.connection
+        :raises: PoolError если пул закрыт или свободное соединение не появилось за отведенное время
+        """
+        # Определение крайнего срока ожидания
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Пул соединений закрыт")
+
+                # Выдача свободного соединения (последнее возвращенное — самое "теплое")
+                while self._idle:
+                    conn, _ = self._idle.pop()
+                    if conn.closed:
+                        # Соединение было разорвано, пока простаивало
+                        continue
+                    return self._checkout(conn)
+
+                # Открытие нового соединения, если лимит не достигнут
+                if self._total() < self.maxconn:
+                    return self._checkout(self._connect())
+
+                # Ожидание возврата соединения
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(
+                        f"Нет свободных соединений в пуле за {timeout} сек. "
+                        f"(выдано {len(self._in_use)} из {self.maxconn})"
+                    )
+                self._waits += 1
+                self._cond.wait(remaining)
+
+    def _checkout(self, conn):
+        """
+        Регистрация соединения как выданного.
+
+        Запоминает время выдачи и место вызова для обнаружения утечек.
+        Вызывается под блокировкой пула.
+
+        :param conn: Выдаваемое соединение
+        :type conn: psycopg2.extensions.connection
+        :returns: То же соединение
+        :rtype: psycopg2.extensions.connection
+        """
+        # Место вызова за пределами пула, класса Database и contextlib
+        stack = [
+            frame for frame in traceback.extract_stack(limit=12)
+            if os.path.basename(frame.filename) not in _INTERNAL_MODULES
+        ]
+        owner = " <- ".join(f"{frame.name} ({os.path.basename(frame.filename)}:{frame.lineno})"
+                            for frame in reversed(stack[-3:]))
+        self._in_use[id(conn)] = (conn, time.monotonic(), owner)
+        self._checkouts += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        """
+        Возврат соединения в пул.
+
+        Незавершенная транзакция откатывается, чтобы следующий владелец
+        получил соединение в чистом состоянии. Разорванные соединения
+        и соединения сверх максимума закрываются.
+
+        :param conn: Возвращаемое соединение
+        :type conn: psycopg2.extensions.connection
+        :param close: Закрыть соединение вместо возврата в пул
+        :type close: bool
+        :raises: PoolError если соединение не было выдано этим пулом
+        """
+        with self._cond:
+            if self._in_use.pop(id(conn), None) is None:
+                raise PoolError("Попытка вернуть соединение, не выданное этим пулом")
+            self._reported_leaks.discard(id(conn))
+
+            if not close and not conn.closed:
+                try:
+                    # Откат незавершенной транзакции
+                    if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error as e:
+                    logging.warning(f"Не удалось сбросить соединение при возврате в пул: {str(e)}")
+                    close = True
+
+            if close or conn.closed or self._closed:
+                # Закрытие соединения вместо возврата в пул
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+
+            # Оповещение ожидающих потоков
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Контекстный менеджер для временного получения соединения.
+
+        Соединение возвращается в пул при выходе из блока. Если в блоке
+        возникла ошибка связи с сервером, соединение закрывается
+        (отмена запроса ошибкой связи не считается).
+
+        :returns: Соединение с базой данных
+        :rtype: psycopg2.extensions.connection
+        """
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            # Соединение могло быть разорвано — не возвращаем его в пул
+            broken = not isinstance(e, QueryCanceledError)
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    def reap_idle(self):
+        """
+        Закрытие соединений, простаивающих дольше idle_timeout.
+
+        Количество открытых соединений не опускается ниже minconn.
+
+        :returns: Количество закрытых соединений
+        :rtype: int
+        """
+        now = time.monotonic()
+        reaped = 0
+        with self._cond:
+            keep = []
+            # Сначала проверяются самые старые соединения
+            for conn, last_used in self._idle:
+                expired = now - last_used > self.idle_timeout
+                if conn.closed or (expired and self._total() - reaped > self.minconn):
+                    self._close_quietly(conn)
+                    reaped += 1
+                else:
+                    keep.append((conn, last_used))
+            self._idle = keep
+            self._reaped += reaped
+
+        if reaped:
+            logging.debug(f"Закрыто простаивающих соединений: {reaped}")
+        return reaped
+
+    def check_leaks(self):
+        """
+        Поиск соединений, удерживаемых дольше leak_timeout.
+
+        О каждой утечке в лог пишется одно предупреждение с местом,
+        где соединение было получено.
+
+        :returns: Список пар (время удержания в секундах, место вызова)
+        :rtype: list[tuple[float, str]]
+        """
+        now = time.monotonic()
+        leaks = []
+        with self._cond:
+            for key, (_, checkout_time, owner) in self._in_use.items():
+                held = now - checkout_time
+                if held > self.leak_timeout:
+                    leaks.append((held, owner))
+                    if key not in self._reported_leaks:
+                        self._reported_leaks.add(key)
+                        logging.warning(
+                            f"Возможная утечка соединения: удерживается {held:.0f} сек., получено в {owner}"
+                        )
+        return leaks
+
+    def stats(self):
+        """
+        Получение статистики пула.
+
+        :returns: Словарь со счетчиками пула
+        :rtype: dict
+        """
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min": self.minconn,
+                "max": self.maxconn,
+                "created": self._created,
+                "reaped": self._reaped,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+            }
+
+    def closeall(self):
+        """
+        Закрытие пула и всех свободных соединений.
+
+        Выданные соединения закрываются при возврате в пул.
+        """
+        # Остановка потока обслуживания
+        self._stop_event.set()
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+            # Пробуждение ожидающих потоков, чтобы они получили ошибку
+            self._cond.notify_all()
+        logging.info("Пул соединений с базой данных закрыт")
+
+    def _maintenance_loop(self):
+        """
+        Цикл фонового обслуживания пула.
+
+        Периодически закрывает простаивающие соединения и проверяет утечки.
+        """
+        while not self._stop_event.wait(self.maintenance_interval):
+            try:
+                self.reap_idle()
+                self.check_leaks()
+            except Exception as e:
+                # Ошибки обслуживания не должны останавливать поток
+                logging.error(f"Ошибка обслуживания пула соединений: {str(e)}")
+
+    @staticmethod
+    def _close_quietly(conn):
+        """
+        Закрытие соединения без выброса исключений.
+
+        :param conn: Закрываемое соединение
+        :type conn: psycopg2.extensions.connection
+        """
+        try:
+            conn.close()
+        except Exception:
+            pass
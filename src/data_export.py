@@ -1,34 +1,256 @@
 # Импорт модуля для работы с CSV файлами
 import csv
+# Импорт модуля для работы с потоками ввода-вывода
+import io
 # Импорт модуля для работы с JSON
 import json
-# Импорт библиотеки для работы с данными
-import pandas as pd
 # Импорт модуля для работы с операционной системой
 import os
 # Импорт необходимых виджетов из PyQt6
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
+from PyQt6.QtWidgets import QApplication, QFileDialog, QMessageBox
 # Импорт класса для работы с базой данных
 from database import Database
+# Импорт функций массового импорта CSV, Parquet и Arrow IPC
+from bulk_import import import_csv, import_arrow
+# Импорт потоковой записи Excel
+from excel_export import write_xlsx
+# Импорт потокового импорта Excel
+from excel_import import import_excel
+# Импорт предварительной проверки файлов импорта
+from import_preflight import preflight_csv, preflight_excel
+# Импорт больших CSV файлов по частям с контрольными точками
+from resumable_import import RESUMABLE_MIN_BYTES, find_checkpoint, clear_checkpoint, import_csv_resumable
+# Импорт потоковой записи Parquet и Arrow IPC
+from arrow_io import ARROW_BATCH_ROWS, check_format, write_columnar
+# Импорт менеджера фоновых задач экспорта
+from export_jobs import get_export_manager
 # Импорт модуля для логирования
 import logging
 # Импорт модуля для работы с датами
 import datetime
-# Импорт модулей для работы с PDF
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-# Импорт для поддержки кириллицы
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+# Импорт построения PDF отчетов
+from pdf_report import build_table_pdf, build_order_pdf
+# Импорт пакетного формирования PDF документов заказов
+from order_pdf_batch import fetch_orders, export_orders_pdf
+
+# Количество строк, получаемых с сервера за один раз при экспорте в Excel и PDF
+EXPORT_BATCH_ROWS = 5000
+
+
+class _ProgressWriter(io.TextIOBase):
+    """
+    Обертка файла, считающая записанные строки CSV.
+
+    Используется при выгрузке командой COPY: psycopg2 передает данные
+    порциями в метод write, а количество переводов строк дает (при
+    отсутствии переводов строк внутри значений) число выгруженных строк.
+    Точное количество возвращает Database.copy_to по завершении.
+    """
+
+    def __init__(self, file, progress):
+        """
+        Инициализация обертки файла.
+
+        :param file: Файл для записи
+        :param progress: Ход выполнения задачи экспорта
+        :type progress: ExportProgress
+        """
+        super().__init__()
+        self.file = file
+        self.progress = progress
+        # Записано строк CSV
+        self.lines = 0
+
+    def writable(self):
+        """
+        Признак доступности файла для записи.
+
+        :rtype: bool
+        """
+        return True
+
+    def write(self, data):
+        """
+        Запись порции данных и сообщение о ходе выполнения.
+
+        :param data: Порция данных COPY
+        :type data: str
+        :returns: Количество записанных символов
+        :rtype: int
+        """
+        self.file.write(data)
+        self.lines += data.count("\n")
+        self.progress.report(rows=self.lines)
+        return len(data)
+
+
+def write_csv(db, query, params, filename, headers, progress):
+    """
+    Выгрузка результата запроса в CSV файл командой COPY (запрос) TO STDOUT.
+
+    Строки записываются на диск по мере получения от сервера, поэтому
+    расход памяти не зависит от объема выгрузки.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param query: SQL запрос
+    :type query: str
+    :param params: Параметры запроса
+    :type params: tuple или None
+    :param filename: Имя файла
+    :type filename: str
+    :param headers: Заголовки столбцов (если None, строка заголовков не записывается)
+    :type headers: list или None
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Количество выгруженных строк
+    :rtype: int
+    """
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        # Запись заголовков, если они указаны
+        if headers:
+            csv.writer(csvfile, lineterminator='\n').writerow(headers)
+            csvfile.flush()
+        # Потоковая запись строк результата запроса
+        return db.copy_to(query, params, _ProgressWriter(csvfile, progress), tracker=progress)
+
+
+def write_excel(db, query, params, filename, sheet_name, headers, progress):
+    """
+    Выгрузка результата запроса в Excel файл.
+
+    Строки читаются серверным курсором и сразу записываются в книгу
+    в режиме write-only (см. excel_export.write_xlsx), поэтому расход памяти
+    не зависит от объема выгрузки. Выгрузка длиннее одного листа Excel
+    продолжается на следующих листах.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param query: SQL запрос
+    :type query: str
+    :param params: Параметры запроса
+    :type params: tuple или None
+    :param filename: Имя файла
+    :type filename: str
+    :param sheet_name: Имя листа
+    :type sheet_name: str
+    :param headers: Заголовки столбцов (если None, строка заголовков не записывается)
+    :type headers: list или None
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Количество выгруженных строк
+    :rtype: int
+    """
+    batches = db.iter_batches(query, params, EXPORT_BATCH_ROWS, tracker=progress)
+    return write_xlsx(batches, filename, sheet_name, headers, progress)
+
+
+def write_parquet(db, query, params, filename, headers, progress):
+    """
+    Выгрузка результата запроса в файл Parquet или Arrow IPC.
+
+    Строки читаются серверным курсором порциями по ARROW_BATCH_ROWS
+    и записываются пакетами записей Arrow с типами столбцов запроса
+    (см. arrow_io.write_columnar), поэтому расход памяти не зависит
+    от объема выгрузки.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param query: SQL запрос
+    :type query: str
+    :param params: Параметры запроса
+    :type params: tuple или None
+    :param filename: Имя файла (.parquet, .arrow или .feather)
+    :type filename: str
+    :param headers: Имена столбцов файла (если None — имена столбцов запроса)
+    :type headers: list или None
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Количество выгруженных строк
+    :rtype: int
+    """
+    description = []
+    batches = db.iter_batches(query, params, ARROW_BATCH_ROWS, tracker=progress,
+                              on_description=description.extend)
+    return write_columnar(batches, filename, description, headers, progress)
+
+
+def write_pdf(db, query, params, filename, headers, title, progress):
+    """
+    Выгрузка результата запроса в PDF файл с таблицей.
+
+    Строки читаются серверным курсором и размещаются на страницах по мере
+    получения (см. pdf_report.TablePdfReport), поэтому расход памяти не
+    зависит от объема выгрузки. О ходе формирования документа сообщается
+    после каждой порции строк и каждой страницы; отмена проверяется там же.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param query: SQL запрос
+    :type query: str
+    :param params: Параметры запроса
+    :type params: tuple или None
+    :param filename: Имя файла
+    :type filename: str
+    :param headers: Заголовки столбцов
+    :type headers: list или None
+    :param title: Заголовок документа
+    :type title: str
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Количество выгруженных строк
+    :rtype: int
+    """
+    batches = db.iter_batches(query, params, EXPORT_BATCH_ROWS, tracker=progress)
+    return build_table_pdf(filename, title, headers, batches, progress)
+
+
+def write_order_details_pdf(order_id, order_details, order_items, filename, progress):
+    """
+    Формирование PDF файла с деталями заказа.
+
+    :param order_id: Идентификатор заказа
+    :type order_id: int
+    :param order_details: Детали заказа (кортеж с информацией о заказе)
+    :type order_details: tuple
+    :param order_items: Позиции заказа (список кортежей с позициями заказа)
+    :type order_items: list[tuple]
+    :param filename: Имя файла
+    :type filename: str
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Количество позиций заказа (не меньше 1, так как документ формируется всегда)
+    :rtype: int
+    """
+    progress.report(rows=len(order_items))
+    build_order_pdf(filename, order_id, order_details, order_items, on_page=_page_callback(progress))
+    return max(len(order_items), 1)
+
+
+def _page_callback(progress):
+    """
+    Обработчик завершения страницы PDF для SimpleDocTemplate.build.
+
+    :param progress: Ход выполнения задачи экспорта
+    :type progress: ExportProgress
+    :returns: Функция (canvas, doc)
+    :rtype: callable
+    """
+    def on_page(canvas, doc):
+        progress.report(pages=doc.page)
+        progress.check()
+    return on_page
+
 
 class DataExporter:
     """
     Класс для экспорта данных из приложения в различные форматы.
     
-    Поддерживает экспорт данных в форматы CSV, Excel и PDF.
+    Поддерживает экспорт данных в форматы CSV, Excel, PDF, Parquet и Arrow
+    IPC. Файл формируется фоновой задачей (см. export_jobs): методы экспорта
+    запрашивают имя файла, ставят задачу в очередь и сразу возвращают
+    управление. Ход выполнения и отмена доступны в окне задач экспорта,
+    итог выводится сообщением по завершении задачи.
     """
     
     def __init__(self, parent_widget=None):
@@ -42,80 +264,97 @@ class DataExporter:
         self.db = Database()
         # Сохранение ссылки на родительский виджет
         self.parent = parent_widget
+
+    def ask_filename(self, caption, default_name, file_filter):
+        """
+        Запрос имени файла для экспорта через диалог сохранения.
+
+        :param caption: Заголовок диалога
+        :type caption: str
+        :param default_name: Имя файла по умолчанию
+        :type default_name: str
+        :param file_filter: Фильтр типов файлов
+        :type file_filter: str
+        :returns: Имя файла или пустая строка, если пользователь отменил диалог
+        :rtype: str
+        """
+        filename, _ = QFileDialog.getSaveFileName(self.parent, caption, default_name, file_filter)
+        return filename
+
+    def submit(self, title, filename, task, done_message=None):
+        """
+        Постановка задачи экспорта в очередь.
+
+        :param title: Описание задачи для окна задач
+        :type title: str
+        :param filename: Имя создаваемого файла
+        :type filename: str
+        :param task: Функция task(progress), возвращающая количество строк
+        :type task: callable
+        :param done_message: Сообщение об успешном экспорте (если None — стандартное)
+            или функция, формирующая его по количеству строк
+        :type done_message: str, callable или None
+        :returns: Успешность постановки задачи в очередь
+        :rtype: bool
+        """
+        message = done_message or f"Данные успешно экспортированы в файл {filename}"
+
+        def on_done(rows):
+            # Показать сообщение об успешном экспорте
+            text = message(rows) if callable(message) else message
+            QMessageBox.information(QApplication.activeWindow(), "Экспорт данных", text)
+
+        try:
+            get_export_manager().submit(self.db, title, filename, task, on_done, self.parent)
+            return True
+        except Exception as e:
+            # Логирование ошибки постановки задачи
+            error_msg = f"Не удалось запустить экспорт: {str(e)}"
+            logging.error(error_msg)
+            QMessageBox.critical(self.parent, "Ошибка экспорта", error_msg)
+            return False
     
     def export_to_csv(self, query, params=None, filename=None, headers=None):
         """
         Экспорт данных в CSV файл.
         
+        Данные выгружаются потоково командой COPY (запрос) TO STDOUT
+        в фоновой задаче (см. write_csv).
+        
         :param query: SQL запрос для получения данных
         :type query: str
         :param params: Параметры запроса
         :type params: tuple или None
         :param filename: Имя файла для экспорта (если None, будет показан диалог)
         :type filename: str или None
-        :param headers: Заголовки столбцов (если None, будут использованы имена полей)
+        :param headers: Заголовки столбцов (если None, строка заголовков не записывается)
         :type headers: list или None
         
-        :returns: Успешность экспорта
+        :returns: Успешность постановки экспорта в очередь
         :rtype: bool
         """
-        try:
-            # Получение данных из базы данных
-            data = self.db.fetch_all(query, params, self.parent)
-            # Проверка наличия данных для экспорта
-            if not data:
-                # Показать предупреждение, если данных нет
-                QMessageBox.warning(self.parent, "Экспорт данных", "Нет данных для экспорта")
-                return False
-            
-            # Если имя файла не указано, запрашиваем его через диалог
+        # Если имя файла не указано, запрашиваем его через диалог
+        if not filename:
+            # Формирование имени файла по умолчанию с текущей датой и временем
+            default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = self.ask_filename("Экспорт данных в CSV", default_name, "CSV Files (*.csv)")
+            # Проверка, не отменил ли пользователь диалог
             if not filename:
-                # Формирование имени файла по умолчанию с текущей датой и временем
-                default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                # Отображение диалога сохранения файла
-                filename, _ = QFileDialog.getSaveFileName(
-                    self.parent,
-                    "Экспорт данных в CSV",
-                    default_name,
-                    "CSV Files (*.csv)"
-                )
-                # Проверка, не отменил ли пользователь диалог
-                if not filename:
-                    return False
-            
-            # Открытие файла для записи
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                # Создание объекта для записи в CSV
-                writer = csv.writer(csvfile)
-                
-                # Запись заголовков, если они указаны
-                if headers:
-                    writer.writerow(headers)
-                
-                # Запись данных построчно
-                for row in data:
-                    writer.writerow(row)
-            
-            # Показать сообщение об успешном экспорте
-            QMessageBox.information(
-                self.parent, 
-                "Экспорт данных", 
-                f"Данные успешно экспортированы в файл {filename}"
-            )
-            return True
-            
-        except Exception as e:
-            # Логирование ошибки экспорта
-            error_msg = f"Ошибка при экспорте данных в CSV: {str(e)}"
-            logging.error(error_msg)
-            # Показать сообщение об ошибке
-            QMessageBox.critical(self.parent, "Ошибка экспорта", error_msg)
-            return False
+                return False
+
+        db = self.db
+        return self.submit(
+            "Экспорт в CSV", filename,
+            lambda progress: write_csv(db, query, params, filename, headers, progress)
+        )
     
     def export_to_excel(self, query, params=None, filename=None, sheet_name="Data", headers=None):
         """
         Экспорт данных в Excel файл.
         
+        Строки записываются в книгу потоково в фоновой задаче (см. write_excel);
+        выгрузка длиннее 1 048 576 строк разбивается на несколько листов.
+        
         :param query: SQL запрос для получения данных
         :type query: str
         :param params: Параметры запроса
@@ -124,66 +363,80 @@ class DataExporter:
         :type filename: str или None
         :param sheet_name: Имя листа в Excel файле
         :type sheet_name: str
-        :param headers: Заголовки столбцов (если None, будут использованы имена полей)
+        :param headers: Заголовки столбцов (если None, строка заголовков не записывается)
         :type headers: list или None
         
-        :returns: Успешность экспорта
+        :returns: Успешность постановки экспорта в очередь
         :rtype: bool
         """
-        try:
-            # Получение данных из базы данных
-            data = self.db.fetch_all(query, params, self.parent)
-            # Проверка наличия данных для экспорта
-            if not data:
-                # Показать предупреждение, если данных нет
-                QMessageBox.warning(self.parent, "Экспорт данных", "Нет данных для экспорта")
-                return False
-            
-            # Если имя файла не указано, запрашиваем его через диалог
+        # Если имя файла не указано, запрашиваем его через диалог
+        if not filename:
+            # Формирование имени файла по умолчанию с текущей датой и временем
+            default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            filename = self.ask_filename("Экспорт данных в Excel", default_name, "Excel Files (*.xlsx)")
+            # Проверка, не отменил ли пользователь диалог
             if not filename:
-                # Формирование имени файла по умолчанию с текущей датой и временем
-                default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                # Отображение диалога сохранения файла
-                filename, _ = QFileDialog.getSaveFileName(
-                    self.parent,
-                    "Экспорт данных в Excel",
-                    default_name,
-                    "Excel Files (*.xlsx)"
-                )
-                # Проверка, не отменил ли пользователь диалог
-                if not filename:
-                    return False
-            
-            # Создание DataFrame из полученных данных
-            df = pd.DataFrame(data)
-            
-            # Установка заголовков, если они указаны
-            if headers:
-                df.columns = headers
-            
-            # Сохранение данных в Excel файл
-            df.to_excel(filename, sheet_name=sheet_name, index=False)
-            
-            # Показать сообщение об успешном экспорте
-            QMessageBox.information(
-                self.parent, 
-                "Экспорт данных", 
-                f"Данные успешно экспортированы в файл {filename}"
+                return False
+
+        db = self.db
+        return self.submit(
+            f"Экспорт в Excel ({sheet_name})", filename,
+            lambda progress: write_excel(db, query, params, filename, sheet_name, headers, progress)
+        )
+
+    def export_to_parquet(self, query, params=None, filename=None, headers=None):
+        """
+        Экспорт данных в файл Parquet или Arrow IPC.
+        
+        Столбцовый двоичный формат сохраняет типы столбцов запроса (numeric,
+        date, timestamp) и читается без разбора текста. Строки записываются
+        потоково в фоновой задаче (см. write_parquet); формат определяется
+        расширением файла.
+        
+        :param query: SQL запрос для получения данных
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :param filename: Имя файла для экспорта (если None, будет показан диалог)
+        :type filename: str или None
+        :param headers: Имена столбцов файла (если None — имена столбцов запроса)
+        :type headers: list или None
+        
+        :returns: Успешность постановки экспорта в очередь
+        :rtype: bool
+        """
+        # Если имя файла не указано, запрашиваем его через диалог
+        if not filename:
+            # Формирование имени файла по умолчанию с текущей датой и временем
+            default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+            filename = self.ask_filename(
+                "Экспорт данных в Parquet", default_name,
+                "Parquet Files (*.parquet);;Arrow IPC Files (*.arrow *.feather)"
             )
-            return True
-            
-        except Exception as e:
-            # Логирование ошибки экспорта
-            error_msg = f"Ошибка при экспорте данных в Excel: {str(e)}"
-            logging.error(error_msg)
-            # Показать сообщение об ошибке
-            QMessageBox.critical(self.parent, "Ошибка экспорта", error_msg)
+            # Проверка, не отменил ли пользователь диалог
+            if not filename:
+                return False
+
+        try:
+            # Неподдерживаемое расширение сообщается до постановки задачи
+            check_format(filename)
+        except ValueError as e:
+            QMessageBox.warning(self.parent, "Экспорт данных", str(e))
             return False
 
+        db = self.db
+        return self.submit(
+            "Экспорт в Parquet", filename,
+            lambda progress: write_parquet(db, query, params, filename, headers, progress)
+        )
+
     def export_to_pdf(self, query, params=None, filename=None, headers=None, title="Отчет"):
         """
         Экспорт данных в PDF файл.
         
+        Документ формируется в фоновой задаче по мере получения строк
+        (см. write_pdf и pdf_report).
+        
         :param query: SQL запрос для получения данных
         :type query: str
         :param params: Параметры запроса
@@ -195,208 +448,30 @@ class DataExporter:
         :param title: Заголовок документа
         :type title: str
         
-        :returns: Успешность экспорта
+        :returns: Успешность постановки экспорта в очередь
         :rtype: bool
         """
-        try:
-            # Получение данных из базы данных
-            data = self.db.fetch_all(query, params, self.parent)
-            # Проверка наличия данных для экспорта
-            if not data:
-                # Показать предупреждение, если данных нет
-                QMessageBox.warning(self.parent, "Экспорт данных", "Нет данных для экспорта")
-                return False
-            
-            # Если имя файла не указано, запрашиваем его через диалог
+        # Если имя файла не указано, запрашиваем его через диалог
+        if not filename:
+            # Формирование имени файла по умолчанию с текущей датой и временем
+            default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            filename = self.ask_filename("Экспорт данных в PDF", default_name, "PDF Files (*.pdf)")
+            # Проверка, не отменил ли пользователь диалог
             if not filename:
-                # Формирование имени файла по умолчанию с текущей датой и временем
-                default_name = f"export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                # Отображение диалога сохранения файла
-                filename, _ = QFileDialog.getSaveFileName(
-                    self.parent,
-                    "Экспорт данных в PDF",
-                    default_name,
-                    "PDF Files (*.pdf)"
-                )
-                # Проверка, не отменил ли пользователь диалог
-                if not filename:
-                    return False
-            
-            # 1. Регистрация шрифтов (пробуем разные варианты для поддержки кириллицы)
-            try:
-                font_paths = [
-                    os.path.join('src', 'fonts', 'DejaVuSans.ttf'),  # Ищем в папке src/fonts
-                    'DejaVuSans.ttf',                               # Ищем в корне проекта
-                    os.path.join(os.path.dirname(__file__), 'fonts', 'DejaVuSans.ttf'),  # Ищем относительно текущего файла
-                ]
-                
-                font_registered = False
-                font_name = 'Helvetica'  # Шрифт по умолчанию (без кириллицы)
-                
-                for font_path in font_paths:
-                    if os.path.exists(font_path):
-                        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                        font_name = 'DejaVuSans'
-                        font_registered = True
-                        break
-                
-                if not font_registered:
-                    try:
-                        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
-                        font_name = 'Arial'
-                    except:
-                        QMessageBox.warning(self.parent, "Предупреждение",
-                                           "Не найден шрифт с поддержкой кириллицы. Возможны проблемы с отображением русских символов.")
-            except Exception as e:
-                logging.error(f"Ошибка при регистрации шрифта: {str(e)}")
-                QMessageBox.warning(self.parent, "Предупреждение",
-                                   "Не удалось зарегистрировать шрифт с поддержкой кириллицы. Возможны проблемы с отображением русских символов.")
-            
-            # Создание PDF документа с отступами
-            page_width, page_height = A4
-            margin = 2 * cm  # Отступ 2 см со всех сторон
-            doc = SimpleDocTemplate(
-                filename, 
-                pagesize=A4, 
-                leftMargin=margin,
-                rightMargin=margin,
-                topMargin=margin,
-                bottomMargin=margin
-            )
-            
-            # Элементы, которые будут добавлены в документ
-            elements = []
-            
-            # Создание стилей с указанием нужных шрифтов
-            styles = getSampleStyleSheet()
-            # Переопределение стилей для использования шрифта с поддержкой кириллицы
-            heading_style = styles['Heading1']
-            heading_style.fontName = font_name
-            
-            # Создание стиля для текста в ячейках таблицы
-            cell_style = ParagraphStyle(
-                'CellStyle',
-                fontName=font_name,
-                fontSize=9,
-                leading=12,  # Межстрочный интервал
-                spaceAfter=6
-            )
-            
-            # Добавление заголовка документа
-            elements.append(Paragraph(title, heading_style))
-            # Добавление отступа после заголовка
-            elements.append(Spacer(1, 0.5 * cm))
-            
-            # Функция форматирования текста для ячеек
-            def format_text(text, is_header=False):
-                """
-                Форматирование текста для ячеек таблицы.
-                
-                :param text: Текст для форматирования
-                :type text: str
-                :param is_header: Является ли текст заголовком
-                :type is_header: bool
-                
-                :returns: Отформатированный параграф
-                :rtype: Paragraph
-                """
-                if is_header:
-                    return Paragraph(f"<b>{text}</b>", cell_style)
-                # Для обычного текста - просто создаем Paragraph для автопереноса
-                return Paragraph(text, cell_style)
-            
-            # Подготовка данных для таблицы
-            table_data = []
-            
-            # Добавление заголовков с форматированием
-            if headers:
-                formatted_headers = [format_text(header, True) for header in headers]
-                table_data.append(formatted_headers)
-            
-            # Добавление данных с форматированием
-            for row in data:
-                formatted_row = []
-                for item in row:
-                    # Преобразование в строку и форматирование
-                    item_str = str(item) if item is not None else ""
-                    formatted_row.append(format_text(item_str))
-                table_data.append(formatted_row)
-            
-            # Определение ширины страницы с учетом отступов
-            available_width = page_width - (2 * margin)
-            
-            # Настройка ширины столбцов в зависимости от типа данных
-            num_columns = len(table_data[0]) if table_data else 0
-            
-            if num_columns > 0:
-                # Проверка, является ли это таблицей товаров
-                is_products_table = False
-                if headers and num_columns == 4:
-                    product_headers = ["Название", "Описание", "Категория", "Цена"]
-                    if all(h in headers for h in product_headers):
-                        is_products_table = True
-                
-                if is_products_table:
-                    # Оптимальное распределение для товаров: 25% для названия, 45% для описания, 15% для категории, 15% для цены
-                    col_widths = [
-                        available_width * 0.25,  # Название
-                        available_width * 0.45,  # Описание
-                        available_width * 0.15,  # Категория
-                        available_width * 0.15   # Цена
-                    ]
-                else:
-                    # Равномерное распределение для других таблиц
-                    col_widths = [available_width / num_columns] * num_columns
-                
-                # Создание таблицы с заданной шириной столбцов и повторением заголовков
-                table = Table(table_data, colWidths=col_widths, repeatRows=1)
-                
-                # Настройка стиля таблицы
-                style = TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), font_name),  # Шрифт для заголовков
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),       # Отступ сверху в ячейках
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),    # Отступ снизу в ячейках
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),       # Выравнивание по верхнему краю
-                    ('FONTNAME', (0, 1), (-1, -1), font_name), # Шрифт для данных
-                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 6),      # Отступ слева в ячейках
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 6),     # Отступ справа в ячейках
-                ])
-                
-                # Применение стиля к таблице
-                table.setStyle(style)
-                
-                # Добавление таблицы в документ
-                elements.append(table)
-            
-            # Создание документа
-            doc.build(elements)
-            
-            # Показать сообщение об успешном экспорте
-            QMessageBox.information(
-                self.parent, 
-                "Экспорт данных", 
-                f"Данные успешно экспортированы в файл {filename}"
-            )
-            return True
-            
-        except Exception as e:
-            # Логирование ошибки экспорта
-            error_msg = f"Ошибка при экспорте данных в PDF: {str(e)}"
-            logging.error(error_msg)
-            # Показать сообщение об ошибке
-            QMessageBox.critical(self.parent, "Ошибка экспорта", error_msg)
-            return False
+                return False
+
+        db = self.db
+        return self.submit(
+            f"Экспорт в PDF ({title})", filename,
+            lambda progress: write_pdf(db, query, params, filename, headers, title, progress)
+        )
 
     def export_order_details_to_pdf(self, order_id, order_details, order_items, filename=None):
         """
         Экспорт деталей заказа в PDF файл.
         
+        Документ формируется в фоновой задаче (см. write_order_details_pdf).
+        
         :param order_id: Идентификатор заказа
         :type order_id: int
         :param order_details: Детали заказа (кортеж с информацией о заказе)
@@ -406,150 +481,76 @@ class DataExporter:
         :param filename: Имя файла для экспорта (если None, будет показан диалог)
         :type filename: str или None
         
-        :returns: Успешность экспорта
+        :returns: Успешность постановки экспорта в очередь
         :rtype: bool
         """
-        try:
-            # Если имя файла не указано, запрашиваем его через диалог
+        # Если имя файла не указано, запрашиваем его через диалог
+        if not filename:
+            # Формирование имени файла по умолчанию с текущей датой и временем
+            default_name = f"Заказ_{order_id}_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            filename = self.ask_filename("Сохранить детали заказа как PDF", default_name, "PDF Files (*.pdf)")
+            # Проверка, не отменил ли пользователь диалог
             if not filename:
-                # Формирование имени файла по умолчанию с текущей датой и временем
-                default_name = f"Заказ_{order_id}_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-                # Отображение диалога сохранения файла
-                filename, _ = QFileDialog.getSaveFileName(
-                    self.parent,
-                    "Сохранить детали заказа как PDF",
-                    default_name,
-                    "PDF Files (*.pdf)"
-                )
-                # Проверка, не отменил ли пользователь диалог
-                if not filename:
-                    return False
-            
-            # Регистрация шрифта с поддержкой кириллицы (используем существующую логику из класса)
-            font_name = 'Helvetica'  # Шрифт по умолчанию (без кириллицы)
-            try:
-                font_paths = [
-                    os.path.join('src', 'fonts', 'DejaVuSans.ttf'),  # Ищем в папке src/fonts
-                    'DejaVuSans.ttf',                               # Ищем в корне проекта
-                    os.path.join(os.path.dirname(__file__), 'fonts', 'DejaVuSans.ttf'),  # Ищем относительно текущего файла
-                ]
-                
-                font_registered = False
-                
-                for font_path in font_paths:
-                    if os.path.exists(font_path):
-                        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                        font_name = 'DejaVuSans'
-                        font_registered = True
-                        break
-                
-                if not font_registered:
-                    try:
-                        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
-                        font_name = 'Arial'
-                    except:
-                        QMessageBox.warning(self.parent, "Предупреждение",
-                                           "Не найден шрифт с поддержкой кириллицы. Возможны проблемы с отображением русских символов.")
-            except Exception as e:
-                logging.error(f"Ошибка при регистрации шрифта: {str(e)}")
-                QMessageBox.warning(self.parent, "Предупреждение",
-                                   "Не удалось зарегистрировать шрифт с поддержкой кириллицы. Возможны проблемы с отображением русских символов.")
-            
-            # Создаем PDF документ с отступами
-            doc = SimpleDocTemplate(
-                filename, 
-                pagesize=A4, 
-                leftMargin=2*cm,
-                rightMargin=2*cm,
-                topMargin=2*cm,
-                bottomMargin=2*cm
-            )
-            
-            # Создаем элементы документа
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # Настраиваем стили с указанием шрифта с поддержкой кириллицы
-            title_style = styles['Heading1']
-            title_style.fontName = font_name
-            normal_style = styles['Normal']
-            normal_style.fontName = font_name
-            heading2_style = styles['Heading2']
-            heading2_style.fontName = font_name
-            
-            # Добавляем заголовок
-            elements.append(Paragraph(f"Заказ №{order_id}", title_style))
-            elements.append(Spacer(1, 0.5*cm))
-            
-            # Информация о заказе
-            elements.append(Paragraph(f"<b>Дата заказа:</b> {order_details[1]}", normal_style))
-            elements.append(Paragraph(f"<b>Поставщик:</b> {order_details[2]}", normal_style))
-            elements.append(Paragraph(f"<b>Статус:</b> {order_details[4]}", normal_style))
-            elements.append(Paragraph(f"<b>Общая сумма:</b> {order_details[3]}", normal_style))
-            elements.append(Spacer(1, 0.3*cm))
-            elements.append(Paragraph(f"<i>Создан: {order_details[5]} | Обновлен: {order_details[6]}</i>", normal_style))
-            elements.append(Spacer(1, 0.5*cm))
-            
-            # Заголовок таблицы
-            elements.append(Paragraph("Позиции заказа:", heading2_style))
-            elements.append(Spacer(1, 0.3*cm))
-            
-            # Определяем заголовки для таблицы позиций
-            headers = ["ID", "Товар", "Количество", "Цена за ед.", "Итого"]
-            
-            # Создаем таблицу с позициями заказа
-            table_data = [headers]
-            for item in order_items:
-                table_data.append([str(x) for x in item])
-            
-            # Настраиваем ширину столбцов
-            col_widths = [1*cm, 8*cm, 2*cm, 3*cm, 3*cm]
-            table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            
-            # Определяем стиль таблицы
-            table_style = TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), font_name),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ALIGN', (2, 1), (4, -1), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ])
-            
-            # Применяем стиль к таблице
-            table.setStyle(table_style)
-            elements.append(table)
-            
-            # Генерируем PDF файл
-            doc.build(elements)
-            
-            # Показать сообщение об успешном экспорте
-            QMessageBox.information(
-                self.parent, 
-                "Экспорт данных", 
-                f"Детали заказа №{order_id} экспортированы в PDF успешно"
-            )
-            
-            return True
-            
-        except Exception as e:
-            # Логирование ошибки экспорта
-            error_msg = f"Ошибка при экспорте деталей заказа в PDF: {str(e)}"
-            logging.error(error_msg)
-            # Показать сообщение об ошибке
-            QMessageBox.critical(self.parent, "Ошибка экспорта", error_msg)
-            return False
+                return False
+
+        # Копии данных: виджет с деталями заказа может быть закрыт до завершения задачи
+        order_details = tuple(order_details)
+        order_items = [tuple(item) for item in order_items]
+        return self.submit(
+            f"Заказ №{order_id} в PDF", filename,
+            lambda progress: write_order_details_pdf(order_id, order_details, order_items, filename, progress),
+            f"Детали заказа №{order_id} экспортированы в PDF успешно"
+        )
+
+    def export_orders_to_pdf(self, target, as_zip=False, order_ids=None, condition="", params=()):
+        """
+        Пакетный экспорт PDF документов заказов в папку или ZIP архив.
+
+        Заказы и их позиции получаются двумя запросами на весь набор,
+        документы строятся параллельно в пуле процессов (см. order_pdf_batch).
+        По завершении выводится скорость формирования документов.
+
+        :param target: Папка для документов или имя ZIP архива
+        :type target: str
+        :param as_zip: Записывать документы в ZIP архив
+        :type as_zip: bool
+        :param order_ids: Идентификаторы заказов (если None — по условию condition)
+        :type order_ids: list[int] или None
+        :param condition: SQL-фрагмент условия по таблицам orders o и suppliers s
+        :type condition: str
+        :param params: Параметры условия
+        :type params: tuple или list
+        :returns: Успешность постановки экспорта в очередь
+        :rtype: bool
+        """
+        db = self.db
+        result = {}
+
+        def task(progress):
+            orders = fetch_orders(db, order_ids, condition, params, tracker=progress)
+            progress.check()
+            if not orders:
+                return 0
+            result["batch"] = export_orders_pdf(orders, target, as_zip, progress=progress)
+            return result["batch"].orders
+
+        def done_message(rows):
+            batch = result["batch"]
+            return (f"Сформировано PDF документов: {batch.orders} за {batch.elapsed:.1f} с "
+                    f"({batch.orders / max(batch.elapsed, 0.001):.1f} в секунду, "
+                    f"процессов: {batch.workers})\n{target}")
+
+        return self.submit("PDF документы заказов", target, task, done_message)
 
 
 class DataImporter:
     """
     Класс для импорта данных в приложение из различных форматов.
     
-    Поддерживает импорт данных из форматов CSV и Excel в различные таблицы базы данных.
+    Поддерживает импорт данных из форматов CSV, Excel, Parquet и Arrow IPC
+    в различные таблицы базы данных. Большие CSV файлы загружаются
+    фоновой задачей (см. submit_resumable); предварительная проверка
+    файла также выполняется фоновой задачей (см. submit_preflight).
     """
     
     def __init__(self, parent_widget=None):
@@ -564,18 +565,122 @@ class DataImporter:
         # Сохранение ссылки на родительский виджет
         self.parent = parent_widget
     
-    def import_from_csv(self, table_name, filename=None, delimiter=','):
+    def show_result(self, result):
+        """
+        Сообщение о результате массового импорта.
+
+        :param result: Результат импорта
+        :type result: ImportResult
+        """
+        # Формирование сообщения о результате импорта
+        rate = result.total / result.elapsed if result.elapsed else 0
+        message = (
+            f"Импортировано строк: {result.imported} из {result.total} "
+            f"за {result.elapsed:.1f} с ({rate:.0f} строк/с)"
+        )
+        if result.updated or result.unchanged:
+            # Импорт с обновлением: обновленные и пропущенные без изменений строки
+            message += f"\nОбновлено: {result.updated}, без изменений: {result.unchanged}"
+        if result.rejected:
+            # Часть строк отклонена — показать путь к отчету
+            message += f"\n\nОтклонено строк: {result.rejected}\nОтчет: {result.report_path}"
+            QMessageBox.warning(self.parent, "Импорт данных", message)
+        else:
+            # Показать сообщение об успешном импорте
+            QMessageBox.information(self.parent, "Импорт данных", message)
+    
+    def confirm_import(self, report):
+        """
+        Показ сводки предварительной проверки и запрос подтверждения импорта.
+
+        В сообщении выводится количество ошибок по каждому правилу, первые
+        строки с ошибками доступны в подробностях сообщения.
+
+        :param report: Сводка проверки
+        :type report: PreflightReport
+        :returns: Пользователь подтвердил импорт
+        :rtype: bool
+        """
+        box = QMessageBox(self.parent)
+        box.setWindowTitle("Проверка файла импорта")
+        box.setText(report.summary(samples=0))
+        if report.rejected:
+            box.setIcon(QMessageBox.Icon.Warning)
+            box.setDetailedText(report.summary())
+        else:
+            box.setIcon(QMessageBox.Icon.Information)
+        if not report.valid:
+            # Импортировать нечего
+            box.setStandardButtons(QMessageBox.StandardButton.Ok)
+            box.exec()
+            return False
+        box.setInformativeText(f"Импортировать строки без ошибок ({report.valid})?")
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        return box.exec() == QMessageBox.StandardButton.Yes
+    
+    def resume_import(self, table_name, filename):
+        """
+        Проверка прерванного импорта файла и запрос на его продолжение.
+
+        Если пользователь отказывается продолжать, контрольная точка
+        удаляется и импорт начнется с начала файла.
+
+        :param table_name: Имя таблицы для импорта
+        :type table_name: str
+        :param filename: Имя файла
+        :type filename: str
+        :returns: Импорт будет продолжен с контрольной точки
+        :rtype: bool
+        """
+        checkpoint = find_checkpoint(self.db, table_name, filename)
+        if checkpoint is None:
+            return False
+        answer = QMessageBox.question(
+            self.parent,
+            "Импорт данных",
+            f"Импорт этого файла был прерван: загружено строк {checkpoint.total} "
+            f"(до строки файла {checkpoint.line_no}).\n\n"
+            f"Продолжить импорт с этого места? При отказе импорт начнется сначала, "
+            f"а уже загруженные строки останутся в таблице.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if answer == QMessageBox.StandardButton.Yes:
+            return True
+        clear_checkpoint(self.db, table_name, filename)
+        return False
+    
+    def import_from_csv(self, table_name, filename=None, delimiter=',', dry_run=False, merge=False,
+                        on_done=None):
         """
         Импорт данных из CSV файла.
         
+        Файл загружается командой COPY в промежуточную таблицу, проверяется
+        и переносится в целевую таблицу одной транзакцией (см. bulk_import).
+        Файлы от RESUMABLE_MIN_BYTES загружаются частями с контрольными
+        точками (см. resumable_import) фоновой задачей: метод сразу
+        возвращает управление, ход выполнения и отмена доступны в окне
+        фоновых задач, итог выводится по завершении. Прерванный импорт
+        такого файла продолжается с последней зафиксированной части.
+        Отклоненные строки сохраняются в отчет рядом с файлом.
+        
         :param table_name: Имя таблицы для импорта
         :type table_name: str
         :param filename: Имя файла для импорта (если None, будет показан диалог)
         :type filename: str или None
         :param delimiter: Разделитель в CSV файле
         :type delimiter: str
+        :param dry_run: Сначала проверить файл без записи фоновой задачей
+            (см. submit_preflight) и выполнить импорт только после подтверждения
+        :type dry_run: bool
+        :param merge: Обновлять записи с тем же естественным ключом
+            (bulk_import.MERGE_KEYS) вместо отклонения строк
+        :type merge: bool
+        :param on_done: Обработчик завершения импорта, выполненного после
+            фоновой задачи (большой файл или пробный запуск), например
+            обновление вкладки
+        :type on_done: callable или None
         
-        :returns: Успешность импорта
+        :returns: Успешность импорта (для фоновой задачи — ее запуска)
         :rtype: bool
         """
         try:
@@ -592,41 +697,61 @@ class DataImporter:
                 if not filename:
                     return False
             
-            # Открытие файла для чтения
-            with open(filename, 'r', encoding='utf-8') as csvfile:
-                # Создание объекта для чтения CSV
-                csv_reader = csv.reader(csvfile, delimiter=delimiter)
-                # Чтение заголовков
-                headers = next(csv_reader)
-
-                # Определение заголовков в зависимости от таблицы
-                if table_name == "products":  # Товары
-                    headers = ["product_name", "product_description", "category", "unit_price"]
-                elif table_name == "stock":  # Запасы
-                    headers = ["stock_id", "product_id", "warehouse_id", "quantity"]
-                elif table_name == "orders":  # Заказы
-                    headers = ["order_id", "order_date", "supplier_id", "total_amount", "status"]
-                elif table_name == "suppliers":  # Поставщики
-                    headers = ["supplier_id", "supplier_name", "contact_person", "phone_number", "email"]
-                elif table_name == "warehouses":  # Склады
-                    headers = ["warehouse_id", "warehouse_name", "location", "capacity"]
-                
-                # Формирование SQL-запроса для вставки данных
-                placeholders = ', '.join(['%s'] * len(headers))
-                columns = ', '.join(headers)
-                query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-                
-                # Импорт данных построчно
-                for row in csv_reader:
-                    values = row
-                    self.db.execute_query(query, values, self.parent)
+            # Большой файл загружается по частям; прерванный импорт можно продолжить
+            resumable = os.path.getsize(filename) >= RESUMABLE_MIN_BYTES
+            resume = resumable and self.resume_import(table_name, filename)
             
-            # Показать сообщение об успешном импорте
-            QMessageBox.information(
-                self.parent, 
-                "Импорт данных", 
-                f"Данные успешно импортированы из файла {filename}"
-            )
+            # Пробный запуск: сводка ошибок до начала импорта (не при продолжении)
+            if dry_run and not resume:
+                def check(progress):
+                    return preflight_csv(self.db, table_name, filename, delimiter, merge=merge,
+                                         progress=progress)
+
+                def proceed():
+                    started = self.start_csv_import(table_name, filename, delimiter, merge, resumable, on_done)
+                    # Фоновый импорт большого файла вызывает on_done сам по завершении
+                    if started and not resumable and on_done:
+                        on_done()
+
+                return self.submit_preflight(table_name, filename, check, proceed)
+            
+            return self.start_csv_import(table_name, filename, delimiter, merge, resumable, on_done)
+            
+        except Exception as e:
+            # Логирование ошибки импорта
+            error_msg = f"Ошибка при импорте данных из CSV: {str(e)}"
+            logging.error(error_msg)
+            # Показать сообщение об ошибке
+            QMessageBox.critical(self.parent, "Ошибка импорта", error_msg)
+            return False
+    
+    def start_csv_import(self, table_name, filename, delimiter, merge, resumable, on_done=None):
+        """
+        Загрузка выбранного и, при необходимости, проверенного CSV файла.
+
+        :param table_name: Имя таблицы для импорта
+        :type table_name: str
+        :param filename: Имя файла CSV
+        :type filename: str
+        :param delimiter: Разделитель в CSV файле
+        :type delimiter: str
+        :param merge: Обновлять записи с тем же естественным ключом
+        :type merge: bool
+        :param resumable: Загружать файл частями фоновой задачей
+        :type resumable: bool
+        :param on_done: Обработчик завершения фонового импорта
+        :type on_done: callable или None
+        :returns: Успешность импорта (для большого файла — запуска фоновой задачи)
+        :rtype: bool
+        """
+        try:
+            if resumable:
+                # Части файла фиксируются отдельно вместе с контрольной точкой
+                # в фоновой задаче, чтобы интерфейс не блокировался
+                return self.submit_resumable(table_name, filename, delimiter, merge, on_done)
+            # Загрузка файла через COPY, проверка и перенос одной транзакцией
+            result = import_csv(self.db, table_name, filename, delimiter, merge)
+            self.show_result(result)
             return True
             
         except Exception as e:
@@ -637,16 +762,117 @@ class DataImporter:
             QMessageBox.critical(self.parent, "Ошибка импорта", error_msg)
             return False
     
-    def import_from_excel(self, table_name, filename=None, sheet_name=0):
+    def submit_preflight(self, table_name, filename, check, proceed):
         """
-        Импорт данных из Excel файла.
+        Запуск предварительной проверки файла фоновой задачей.
+
+        Проверка выполняется менеджером фоновых задач (см. export_jobs),
+        поэтому разбор большого файла не блокирует интерфейс и может быть
+        отменен между порциями. По завершении показывается сводка
+        (см. confirm_import), и после подтверждения вызывается proceed.
+
+        :param table_name: Имя таблицы для импорта
+        :type table_name: str
+        :param filename: Имя проверяемого файла
+        :type filename: str
+        :param check: Функция check(progress), возвращающая сводку проверки
+        :type check: callable
+        :param proceed: Запуск импорта после подтверждения
+        :type proceed: callable
+        :returns: Успешность постановки задачи в очередь
+        :rtype: bool
+        """
+        # Сводка проверки передается из рабочего потока в обработчик завершения
+        reports = []
+
+        def task(progress):
+            report = check(progress)
+            reports.append(report)
+            return report.total
+
+        def done(rows):
+            # Импорт выполняется только после подтверждения сводки
+            if self.confirm_import(reports[-1]):
+                proceed()
+
+        try:
+            get_export_manager().submit(
+                self.db, f"Проверка файла для {table_name}", filename, task, done, self.parent,
+                keep_file=True
+            )
+            return True
+        except Exception as e:
+            # Логирование ошибки постановки задачи
+            error_msg = f"Не удалось запустить проверку файла: {str(e)}"
+            logging.error(error_msg)
+            QMessageBox.critical(self.parent, "Ошибка импорта", error_msg)
+            return False
+    
+    def submit_resumable(self, table_name, filename, delimiter, merge, on_done=None):
+        """
+        Запуск импорта большого CSV файла по частям фоновой задачей.
+
+        Задача выполняется менеджером фоновых задач (см. export_jobs):
+        между частями проверяется отмена, а пауза перед повторной попыткой
+        после обрыва связи не блокирует интерфейс. Отмененный импорт можно
+        продолжить с контрольной точки.
+
+        :param table_name: Имя таблицы для импорта
+        :type table_name: str
+        :param filename: Имя файла CSV
+        :type filename: str
+        :param delimiter: Разделитель в CSV файле
+        :type delimiter: str
+        :param merge: Обновлять записи с тем же естественным ключом
+        :type merge: bool
+        :param on_done: Обработчик успешного завершения импорта
+        :type on_done: callable или None
+        :returns: Успешность постановки задачи в очередь
+        :rtype: bool
+        """
+        # Результат импорта передается из рабочего потока в обработчик завершения
+        results = []
+
+        def task(progress):
+            result = import_csv_resumable(self.db, table_name, filename, delimiter, merge,
+                                          progress=progress)
+            results.append(result)
+            return result.total
+
+        def done(rows):
+            # Показать итог импорта и обновить данные
+            self.show_result(results[-1])
+            if on_done:
+                on_done()
+
+        try:
+            get_export_manager().submit(
+                self.db, f"Импорт в {table_name}", filename, task, done, self.parent, keep_file=True
+            )
+            return True
+        except Exception as e:
+            # Логирование ошибки постановки задачи
+            error_msg = f"Не удалось запустить импорт: {str(e)}"
+            logging.error(error_msg)
+            QMessageBox.critical(self.parent, "Ошибка импорта", error_msg)
+            return False
+    
+    def import_from_parquet(self, table_name, filename=None, merge=False):
+        """
+        Импорт данных из файла Parquet или Arrow IPC.
+        
+        Столбцы файла сопоставляются со столбцами таблицы по имени; пакеты
+        записей передаются командой COPY в промежуточную таблицу, проверяются
+        и переносятся в целевую таблицу одной транзакцией, как при импорте
+        CSV (см. bulk_import.import_arrow).
         
         :param table_name: Имя таблицы для импорта
         :type table_name: str
         :param filename: Имя файла для импорта (если None, будет показан диалог)
         :type filename: str или None
-        :param sheet_name: Имя или индекс листа в Excel файле
-        :type sheet_name: str или int
+        :param merge: Обновлять записи с тем же естественным ключом
+            (bulk_import.MERGE_KEYS) вместо отклонения строк
+        :type merge: bool
         
         :returns: Успешность импорта
         :rtype: bool
@@ -657,45 +883,85 @@ class DataImporter:
                 # Отображение диалога выбора файла
                 filename, _ = QFileDialog.getOpenFileName(
                     self.parent,
-                    "Импорт данных из Excel",
+                    "Импорт данных из Parquet",
                     "",
-                    "Excel Files (*.xlsx *.xls)"
+                    "Parquet / Arrow Files (*.parquet *.arrow *.feather)"
                 )
                 # Проверка, не отменил ли пользователь диалог
                 if not filename:
                     return False
             
-            # Чтение данных из Excel файла
-            df = pd.read_excel(filename, sheet_name=sheet_name)
+            # Загрузка пакетов записей через COPY, проверка и перенос одной транзакцией
+            result = import_arrow(self.db, table_name, filename, merge)
+            self.show_result(result)
+            return True
             
-            # Определение заголовков в зависимости от таблицы
-            if table_name == "products":  # Товары
-                headers = ["product_name", "product_description", "category", "unit_price"]
-            elif table_name == "stock":  # Запасы
-                headers = ["stock_id", "product_id", "warehouse_id", "quantity"]
-            elif table_name == "orders":  # Заказы
-                headers = ["order_id", "order_date", "supplier_id", "total_amount", "status"]
-            elif table_name == "suppliers":  # Поставщики
-                headers = ["supplier_id", "supplier_name", "contact_person", "phone_number", "email"]
-            elif table_name == "warehouses":  # Склады
-                headers = ["warehouse_id", "warehouse_name", "location", "capacity"]
-
-            # Формирование SQL-запроса для вставки данных
-            placeholders = ', '.join(['%s'] * len(headers))
-            columns = ', '.join(headers)
-            query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        except Exception as e:
+            # Логирование ошибки импорта
+            error_msg = f"Ошибка при импорте данных из Parquet: {str(e)}"
+            logging.error(error_msg)
+            # Показать сообщение об ошибке
+            QMessageBox.critical(self.parent, "Ошибка импорта", error_msg)
+            return False
+    
+    def import_from_excel(self, table_name, filename=None, sheet_name=0, dry_run=False, merge=False,
+                          on_done=None):
+        """
+        Импорт данных из Excel файла.
+        
+        Лист читается в режиме read-only порциями; каждая порция проверяется
+        векторно (формат, ограничения CHECK, правила Validator, ключи)
+        и добавляется одной командой INSERT (см. excel_import). Отклоненные
+        строки сохраняются в отчет рядом с файлом.
+        
+        :param table_name: Имя таблицы для импорта
+        :type table_name: str
+        :param filename: Имя файла для импорта (если None, будет показан диалог)
+        :type filename: str или None
+        :param sheet_name: Имя или индекс листа в Excel файле (None — все листы)
+        :type sheet_name: str, int или None
+        :param dry_run: Сначала проверить файл без записи фоновой задачей
+            (см. submit_preflight) и выполнить импорт только после подтверждения
+        :type dry_run: bool
+        :param merge: Обновлять записи с тем же естественным ключом
+            (bulk_import.MERGE_KEYS) вместо отклонения строк
+        :type merge: bool
+        :param on_done: Обработчик завершения импорта после пробного запуска
+            (например, обновление вкладки)
+        :type on_done: callable или None
+        
+        :returns: Успешность импорта (при пробном запуске — запуска проверки)
+        :rtype: bool
+        """
+        try:
+            # Если имя файла не указано, запрашиваем его через диалог
+            if not filename:
+                # Отображение диалога выбора файла
+                filename, _ = QFileDialog.getOpenFileName(
+                    self.parent,
+                    "Импорт данных из Excel",
+                    "",
+                    "Excel Files (*.xlsx *.xls)"
+                )
+                # Проверка, не отменил ли пользователь диалог
+                if not filename:
+                    return False
             
-            # Импорт данных построчно
-            for _, row in df.iterrows():
-                values = row.tolist()
-                self.db.execute_query(query, values, self.parent)
+            # Пробный запуск: сводка ошибок до начала импорта
+            if dry_run:
+                def check(progress):
+                    return preflight_excel(self.db, table_name, filename, sheet_name, merge=merge,
+                                           progress=progress)
+
+                def proceed():
+                    if self.import_from_excel(table_name, filename, sheet_name, merge=merge) and on_done:
+                        on_done()
+
+                return self.submit_preflight(table_name, filename, check, proceed)
             
-            # Показать сообщение об успешном импорте
-            QMessageBox.information(
-                self.parent, 
-                "Импорт данных", 
-                f"Данные успешно импортированы из файла {filename}"
-            )
+            # Потоковое чтение листа порциями, проверка и вставка порций одной транзакцией
+            result = import_excel(self.db, table_name, filename, sheet_name, merge)
+            self.show_result(result)
             return True
             
         except Exception as e:
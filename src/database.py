@@ -3,55 +3,372 @@
 
 Этот модуль предоставляет класс Database для подключения к базе данных PostgreSQL
 и выполнения запросов к ней в контексте приложения для управления складом.
+Все экземпляры Database используют общий для процесса пул соединений,
+параметры которого задаются в файле config.ini (см. db_config).
 
 :author: Игорь Валуйсков
 :version: 1.0
 """
-# Импорт модуля для работы с PostgreSQL
-import psycopg2
 # Импорт модуля для логирования
 import logging
 # Импорт необходимых виджетов из PyQt6
 from PyQt6.QtWidgets import QMessageBox
-# Импорт для работы с конфигурационным файлом
-import configparser
-import os
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для генерации имен серверных курсоров
+import uuid
+# Импорт модуля для измерения времени запросов
+import time
+# Импорт декоратора контекстных менеджеров
+from contextlib import contextmanager
+# Импорт пакетного выполнения команд psycopg2
+from psycopg2.extras import execute_values, execute_batch
+# Импорт пула соединений
+from connection_pool import ConnectionPool
+# Импорт чтения параметров из config.ini (функции доступны и через этот модуль)
+from db_config import (
+    DEFAULT_DB_PARAMS, DEFAULT_POOL_PARAMS, DEFAULT_CACHE_PARAMS, DEFAULT_PREPARE_PARAMS,
+    DEFAULT_STATS_PARAMS, load_config, load_cache_config, load_prepare_config, load_stats_config,
+)
+# Импорт кэша результатов запросов
+from query_cache import QueryCache, read_tables, written_tables
+# Импорт подготовленных запросов
+from prepared_statements import PreparedStatements, to_server_placeholders
+# Импорт статистики выполнения запросов
+from query_stats import QueryStats
+
+# Имя подготовленного запроса для плана медленного запроса с параметрами
+EXPLAIN_STATEMENT = "slow_query_explain"
+# Строк, передаваемых на сервер одной командой при пакетной записи
+BATCH_PAGE_SIZE = 500
+
+# Общий для процесса пул соединений и блокировка для его создания
+_pool = None
+_pool_lock = threading.Lock()
+# Общий для процесса кэш запросов
+_query_cache = None
+# Общий для процесса учет подготовленных запросов
+_prepared_statements = None
+# Общая для процесса статистика запросов
+_query_stats = None
+
+
+def get_query_stats():
+    """
+    Получение общей статистики запросов.
+
+    Создается при первом обращении с параметрами из config.ini.
+
+    :returns: Статистика запросов
+    :rtype: QueryStats
+    """
+    global _query_stats
+    with _pool_lock:
+        if _query_stats is None:
+            _query_stats = QueryStats(**load_stats_config())
+        return _query_stats
+
+
+def get_prepared_statements():
+    """
+    Получение общего учета подготовленных запросов.
+
+    Создается при первом обращении с параметрами из config.ini.
+
+    :returns: Подготовленные запросы соединений пула
+    :rtype: PreparedStatements
+    """
+    global _prepared_statements
+    with _pool_lock:
+        if _prepared_statements is None:
+            _prepared_statements = PreparedStatements(**load_prepare_config())
+        return _prepared_statements
+
+
+def get_query_cache():
+    """
+    Получение общего кэша запросов.
+
+    Кэш создается при первом обращении с параметрами из config.ini.
+    Общий кэш нужен, чтобы изменения через любой объект Database
+    сбрасывали записи, прочитанные через другие объекты.
+
+    :returns: Кэш запросов
+    :rtype: QueryCache
+    """
+    global _query_cache
+    with _pool_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache(**load_cache_config())
+        return _query_cache
+
+
+def invalidate_tables(tables):
+    """
+    Сброс записей кэша запросов, прочитанных из указанных таблиц.
+
+    Вызывается после фиксации изменений. Изменения, выполненные другими
+    приложениями, кэш не видит: такие записи устаревают через ttl секунд.
+
+    :param tables: Имена таблиц или None для сброса всего кэша
+    :type tables: iterable или None
+    """
+    if _query_cache is not None:
+        _query_cache.invalidate(tables)
+
+
+def get_pool():
+    """
+    Получение общего пула соединений.
+
+    Пул создается при первом обращении с параметрами из config.ini.
+
+    :returns: Пул соединений
+    :rtype: ConnectionPool
+    :raises: Exception при ошибке подключения к базе данных
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            db_params, pool_params = load_config()
+            _pool = ConnectionPool(**pool_params, **db_params)
+        return _pool
+
+
+def close_pool():
+    """
+    Закрытие общего пула соединений.
+
+    Вызывается при завершении приложения.
+
+    :returns: None
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+class Transaction:
+    """
+    Команды одной транзакции (см. transaction и Database.transaction).
+
+    Оборачивает курсор соединения и считает обращения к серверу, чтобы
+    вызывающий код и измерения видели цену пакетной записи: execute_values
+    и execute_batch передают на сервер page_size строк за одно обращение,
+    тогда как cursor.executemany выполняет по обращению на строку.
+    """
+
+    def __init__(self, conn, cursor):
+        """
+        Инициализация транзакции.
+
+        :param conn: Соединение с базой данных
+        :type conn: psycopg2.extensions.connection
+        :param cursor: Курсор соединения
+        :type cursor: psycopg2.extensions.cursor
+        """
+        self.conn = conn
+        self.cursor = cursor
+        # Количество обращений к серверу в транзакции
+        self.round_trips = 0
+        # Таблицы, измененные в транзакции (None — неизвестные таблицы)
+        self.written = set()
+
+    def touch(self, *tables):
+        """
+        Отметка таблиц, измененных командами через cursor напрямую.
+
+        После фиксации транзакции записи кэша запросов, прочитанные из
+        этих таблиц, сбрасываются. Без аргументов отмечает, что изменены
+        неизвестные таблицы (сбрасывается весь кэш).
+
+        :param tables: Имена таблиц
+        :type tables: str
+        """
+        if not tables:
+            self.written = None
+        elif self.written is not None:
+            self.written.update(tables)
+
+    def _track(self, query):
+        """
+        Учет таблиц, которые изменяет запрос.
+
+        :param query: SQL-запрос
+        :type query: str
+        """
+        if self.written is not None:
+            tables = written_tables(query)
+            if tables is None:
+                self.written = None
+            else:
+                self.written.update(tables)
+
+    def execute(self, query, params=None):
+        """
+        Выполнение SQL-запроса.
+
+        :param query: SQL-запрос для выполнения
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :returns: Количество затронутых строк
+        :rtype: int
+        """
+        self.cursor.execute(query, params or ())
+        self.round_trips += 1
+        self._track(query)
+        return self.cursor.rowcount
+
+    def fetch_one(self, query, params=None):
+        """
+        Выполнение SQL-запроса и получение первой строки результата.
+
+        :param query: SQL-запрос для выполнения
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :rtype: tuple или None
+        """
+        self.execute(query, params)
+        return self.cursor.fetchone()
+
+    def fetch_all(self, query, params=None):
+        """
+        Выполнение SQL-запроса и получение всех строк результата.
+
+        :param query: SQL-запрос для выполнения
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :rtype: list
+        """
+        self.execute(query, params)
+        return self.cursor.fetchall()
+
+    def execute_many_values(self, query, rows, template=None, page_size=BATCH_PAGE_SIZE, fetch=False):
+        """
+        Пакетная вставка строк командой с одним списком VALUES на страницу.
+
+        Запрос содержит один заполнитель ``VALUES %s``, вместо которого
+        подставляется до page_size строк (psycopg2.extras.execute_values).
+
+        :param query: SQL-запрос с ``VALUES %s``
+        :type query: str
+        :param rows: Строки (последовательности значений)
+        :type rows: list
+        :param template: Шаблон одной строки, например ``(%s, %s, 'новый')``
+        :type template: str или None
+        :param page_size: Строк в одной команде
+        :type page_size: int
+        :param fetch: Вернуть результат RETURNING всех страниц
+        :type fetch: bool
+        :returns: Строки RETURNING (если fetch) или количество строк
+        :rtype: list или int
+        """
+        rows = list(rows)
+        if not rows:
+            return [] if fetch else 0
+        result = execute_values(self.cursor, query, rows, template=template, page_size=page_size, fetch=fetch)
+        self.round_trips += -(-len(rows) // page_size)
+        self._track(query)
+        return result if fetch else len(rows)
+
+    def execute_batch(self, query, rows, page_size=BATCH_PAGE_SIZE):
+        """
+        Пакетное выполнение команды для каждой строки параметров.
+
+        Команды объединяются по page_size в одну передачу на сервер
+        (psycopg2.extras.execute_batch). Подходит для UPDATE и DELETE,
+        которые нельзя записать через один список VALUES.
+
+        :param query: SQL-запрос с параметрами одной строки
+        :type query: str
+        :param rows: Параметры для каждого выполнения
+        :type rows: list
+        :param page_size: Команд в одной передаче
+        :type page_size: int
+        :returns: Количество строк параметров
+        :rtype: int
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        execute_batch(self.cursor, query, rows, page_size=page_size)
+        self.round_trips += -(-len(rows) // page_size)
+        self._track(query)
+        return len(rows)
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Транзакция на указанном соединении.
+
+    Изменения фиксируются при выходе из блока и откатываются, если в блоке
+    возникло исключение (исключение пробрасывается дальше). После фиксации
+    сбрасываются записи кэша запросов, прочитанные из измененных таблиц.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :returns: Команды транзакции
+    :rtype: Transaction
+    """
+    try:
+        with conn.cursor() as cursor:
+            tx = Transaction(conn, cursor)
+            yield tx
+        # Фиксация изменений в базе данных
+        conn.commit()
+    except BaseException:
+        # Откат изменений в случае ошибки
+        if not conn.closed:
+            conn.rollback()
+        raise
+    # Сброс записей кэша, прочитанных из измененных таблиц
+    if tx.written is None or tx.written:
+        invalidate_tables(tx.written)
+
 
 class Database:
     """
     Класс для работы с базой данных PostgreSQL.
     
     Обеспечивает соединение с базой данных и предоставляет методы
-    для выполнения запросов и получения результатов.
+    для выполнения запросов и получения результатов. Методы execute_query,
+    fetch_all и fetch_one берут соединение из общего пула только на время
+    выполнения запроса, поэтому экземпляры Database дешевы и не удерживают
+    соединения.
+
+    Часто повторяемые запросы с параметрами в execute_query, fetch_rows
+    и fetch_one выполняются как подготовленные (см. prepared_statements).
+    Время их выполнения учитывается в общей статистике запросов, если
+    она включена (см. query_stats).
+
+    Результаты справочных запросов можно кэшировать, передав cache=True
+    в fetch_all, fetch_rows или fetch_one (см. query_cache). Изменения через
+    execute_query, execute_returning и transaction сбрасывают записи,
+    прочитанные из затронутых таблиц.
     """
     
     def __init__(self):
         """
-        Инициализация соединения с базой данных.
+        Инициализация объекта базы данных.
         
-        Создает соединение с базой данных PostgreSQL используя
-        параметры подключения из конфигурационного файла.
+        Подключается к общему пулу соединений (создавая его при первом
+        вызове) с параметрами из конфигурационного файла.
         
         :raises: Exception при ошибке подключения к базе данных
         """
         try:
-            # Загрузка параметров из config.ini
-            config = configparser.ConfigParser()
-            config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
-            config.read(config_path)
-            
-            # Установка соединения с базой данных PostgreSQL
-            self.conn = psycopg2.connect(
-                dbname="test_db",  # Имя базы данных
-                user="postgres",        # Имя пользователя
-                password="7773",        # Пароль
-                host="localhost",       # Хост
-                port="5432"             # Порт
-            )
-            # Создание курсора для выполнения запросов
-            self.cursor = self.conn.cursor()
-            # Логирование успешного подключения
-            logging.info("Успешное подключение к базе данных")
+            # Получение общего пула соединений
+            self.pool = get_pool()
+            # Подготовленные запросы соединений пула
+            self.prepared = get_prepared_statements()
+            # Статистика выполнения запросов
+            self.stats = get_query_stats()
         except Exception as e:
             # Логирование ошибки подключения
             logging.error(f"Ошибка подключения к базе данных: {str(e)}")
@@ -71,19 +388,35 @@ class Database:
         :returns: Результат успешности выполнения запроса
         :rtype: bool
         """
+        # Начало измерения (только при включенной статистике)
+        start = time.perf_counter() if self.stats.enabled else None
         try:
-            # Выполнение SQL-запроса с параметрами
-            self.cursor.execute(query, params or ())
-            # Фиксация изменений в базе данных
-            self.conn.commit()
+            # Получение соединения из пула на время запроса
+            with self.pool.connection() as conn:
+                try:
+                    with conn.cursor() as cursor:
+                        # Выполнение SQL-запроса с параметрами
+                        self.prepared.execute(conn, cursor, query, params)
+                        rowcount = cursor.rowcount
+                    # Фиксация изменений в базе данных
+                    conn.commit()
+                except Exception:
+                    # Откат изменений в случае ошибки
+                    if not conn.closed:
+                        conn.rollback()
+                    raise
+            # Сброс записей кэша, прочитанных из измененных таблиц
+            tables = written_tables(query)
+            if tables is None or tables:
+                invalidate_tables(tables)
+            if start is not None:
+                self.stats.record(query, params, time.perf_counter() - start, rowcount, self._explain)
             return True
         except Exception as e:
             # Формирование сообщения об ошибке
             error_msg = f"Ошибка базы данных: {str(e)}"
             # Логирование ошибки
             logging.error(error_msg)
-            # Откат изменений в случае ошибки
-            self.conn.rollback()
             
             # Отображение сообщения об ошибке, если указан родительский виджет
             if parent_widget:
@@ -94,7 +427,7 @@ class Database:
                 )
             return False
             
-    def fetch_all(self, query, params=None, parent_widget=None):
+    def fetch_all(self, query, params=None, parent_widget=None, cache=False):
         """
         Получение всех результатов SQL-запроса.
         
@@ -104,15 +437,15 @@ class Database:
         :type params: tuple или None
         :param parent_widget: Родительский виджет для отображения ошибок
         :type parent_widget: QWidget или None
+        :param cache: Брать результат из кэша запросов (для справочных запросов)
+        :type cache: bool
             
         :returns: Список результатов запроса или пустой список в случае ошибки
         :rtype: list
         """
         try:
-            # Выполнение SQL-запроса с параметрами
-            self.cursor.execute(query, params or ())
-            # Получение всех результатов
-            return self.cursor.fetchall()
+            # Выполнение запроса и получение всех результатов
+            return self.fetch_rows(query, params, cache=cache)
         except Exception as e:
             # Формирование сообщения об ошибке
             error_msg = f"Ошибка получения данных: {str(e)}"
@@ -128,7 +461,230 @@ class Database:
                 )
             return []
             
-    def fetch_one(self, query, params=None, parent_widget=None):
+    def fetch_rows(self, query, params=None, tracker=None, cache=False):
+        """
+        Получение всех результатов SQL-запроса без перехвата ошибок.
+        
+        В отличие от fetch_all не показывает диалогов и пробрасывает
+        исключения, поэтому подходит для вызова из фоновых потоков.
+        
+        :param query: SQL-запрос для выполнения
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :param tracker: Объект с методами attach(conn) и detach(), которому
+            сообщается соединение на время выполнения запроса (для отмены)
+        :type tracker: object или None
+        :param cache: Брать результат из кэша запросов (для справочных запросов)
+        :type cache: bool
+            
+        :returns: Список результатов запроса
+        :rtype: list
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        if cache:
+            return list(self._cached("all", query, params, lambda: self.fetch_rows(query, params, tracker)))
+        # Начало измерения (только при включенной статистике)
+        start = time.perf_counter() if self.stats.enabled else None
+        # Получение соединения из пула на время запроса
+        with self.pool.connection() as conn:
+            if tracker is not None:
+                tracker.attach(conn)
+            try:
+                with conn.cursor() as cursor:
+                    # Выполнение SQL-запроса с параметрами
+                    self.prepared.execute(conn, cursor, query, params)
+                    # Получение всех результатов
+                    rows = cursor.fetchall()
+            finally:
+                if tracker is not None:
+                    tracker.detach()
+        if start is not None:
+            self.stats.record(query, params, time.perf_counter() - start, len(rows), self._explain)
+        return rows
+            
+    def iter_batches(self, query, params=None, batch_size=2000, tracker=None, on_description=None):
+        """
+        Постраничное чтение результата запроса через именованный (серверный) курсор.
+
+        Строки передаются с сервера порциями по batch_size, поэтому в памяти
+        находится только текущая порция. Соединение удерживается, пока
+        генератор не исчерпан или не закрыт. Ошибки не перехватываются.
+
+        :param query: SQL-запрос (SELECT)
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple, list или None
+        :param batch_size: Количество строк в порции
+        :type batch_size: int
+        :param tracker: Объект с методами attach(conn) и detach() (для отмены)
+        :type tracker: object или None
+        :param on_description: Функция, получающая cursor.description после
+            первого чтения (до первой порции, в том числе для пустого результата)
+        :type on_description: callable или None
+
+        :returns: Генератор списков строк
+        :rtype: generator
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        # Получение соединения из пула на время чтения
+        with self.pool.connection() as conn:
+            if tracker is not None:
+                tracker.attach(conn)
+            try:
+                # Именованный курсор создается на сервере в рамках транзакции
+                with conn.cursor(name=f"batches_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(query, params or ())
+                    rows = cursor.fetchmany(batch_size)
+                    # Описание столбцов серверного курсора известно после первого чтения
+                    if on_description is not None:
+                        on_description(cursor.description)
+                    while rows:
+                        yield rows
+                        rows = cursor.fetchmany(batch_size)
+            finally:
+                if tracker is not None:
+                    tracker.detach()
+
+    def copy_to(self, query, params, file, tracker=None):
+        """
+        Потоковая выгрузка результата запроса в CSV через COPY ... TO STDOUT.
+
+        Сервер передает строки по мере выполнения запроса, а psycopg2
+        записывает их в файл небольшими порциями, поэтому результат не
+        накапливается в памяти и первые строки попадают на диск сразу.
+        Ошибки не перехватываются.
+
+        :param query: SQL-запрос (SELECT) для выгрузки
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple, list или None
+        :param file: Открытый для записи файл (текстовый или двоичный)
+        :param tracker: Объект с методами attach(conn) и detach() (для отмены)
+        :type tracker: object или None
+
+        :returns: Количество выгруженных строк
+        :rtype: int
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        # Получение соединения из пула на время выгрузки
+        with self.pool.connection() as conn:
+            if tracker is not None:
+                tracker.attach(conn)
+            try:
+                with conn.cursor() as cursor:
+                    # Подстановка параметров: COPY не поддерживает параметры запроса
+                    select = cursor.mogrify(query.strip().rstrip(";"), params or None)
+                    cursor.copy_expert(b"COPY (" + select + b") TO STDOUT WITH (FORMAT csv)", file)
+                    return cursor.rowcount
+            finally:
+                if tracker is not None:
+                    tracker.detach()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Транзакция на соединении из пула для нескольких изменяющих команд.
+
+        Соединение удерживается до выхода из блока; изменения фиксируются
+        одной транзакцией при успехе и откатываются при исключении,
+        которое пробрасывается дальше. Пример::
+
+            with db.transaction() as tx:
+                order_id = tx.fetch_one("INSERT ... RETURNING order_id", params)[0]
+                tx.execute_many_values("INSERT INTO order_items (...) VALUES %s", rows)
+
+        :returns: Команды транзакции
+        :rtype: Transaction
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        # Получение соединения из пула на время транзакции
+        with self.pool.connection() as conn, transaction(conn) as tx:
+            yield tx
+
+    def execute_many_values(self, query, rows, template=None, page_size=BATCH_PAGE_SIZE):
+        """
+        Пакетная вставка строк в отдельной транзакции без перехвата ошибок.
+
+        См. Transaction.execute_many_values.
+
+        :param query: SQL-запрос с ``VALUES %s``
+        :type query: str
+        :param rows: Строки (последовательности значений)
+        :type rows: list
+        :param template: Шаблон одной строки
+        :type template: str или None
+        :param page_size: Строк в одной команде
+        :type page_size: int
+        :returns: Количество строк
+        :rtype: int
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        with self.transaction() as tx:
+            return tx.execute_many_values(query, rows, template, page_size)
+
+    def execute_batch(self, query, rows, page_size=BATCH_PAGE_SIZE):
+        """
+        Пакетное выполнение команды в отдельной транзакции без перехвата ошибок.
+
+        См. Transaction.execute_batch.
+
+        :param query: SQL-запрос с параметрами одной строки
+        :type query: str
+        :param rows: Параметры для каждого выполнения
+        :type rows: list
+        :param page_size: Команд в одной передаче
+        :type page_size: int
+        :returns: Количество строк параметров
+        :rtype: int
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        with self.transaction() as tx:
+            return tx.execute_batch(query, rows, page_size)
+
+    def execute_returning(self, query, params=None):
+        """
+        Выполнение изменяющего запроса с получением результата без перехвата ошибок.
+
+        Подходит для вызова серверных функций и команд с RETURNING:
+        результат читается и изменения фиксируются в одной транзакции.
+        При ошибке транзакция откатывается, а исключение пробрасывается.
+
+        :param query: SQL-запрос для выполнения
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+
+        :returns: Список результатов запроса
+        :rtype: list
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        # Начало измерения (только при включенной статистике)
+        start = time.perf_counter() if self.stats.enabled else None
+        # Получение соединения из пула на время запроса
+        with self.pool.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    # Выполнение SQL-запроса с параметрами
+                    cursor.execute(query, params or ())
+                    # Получение результатов до фиксации
+                    rows = cursor.fetchall() if cursor.description else []
+                    rowcount = cursor.rowcount
+                # Фиксация изменений в базе данных
+                conn.commit()
+            except Exception:
+                # Откат изменений в случае ошибки
+                if not conn.closed:
+                    conn.rollback()
+                raise
+        # Сброс записей кэша: вызов серверной функции может изменить любые таблицы
+        invalidate_tables(written_tables(query) or None)
+        if start is not None:
+            self.stats.record(query, params, time.perf_counter() - start, rowcount, self._explain)
+        return rows
+
+    def fetch_one(self, query, params=None, parent_widget=None, cache=False):
         """
         Получение одного результата SQL-запроса.
         
@@ -138,15 +694,29 @@ class Database:
         :type params: tuple или None
         :param parent_widget: Родительский виджет для отображения ошибок
         :type parent_widget: QWidget или None
+        :param cache: Брать результат из кэша запросов (для справочных запросов)
+        :type cache: bool
             
         :returns: Результат запроса или None в случае ошибки
         :rtype: tuple или None
         """
+        def load():
+            # Начало измерения (только при включенной статистике)
+            start = time.perf_counter() if self.stats.enabled else None
+            # Получение соединения из пула на время запроса
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                # Выполнение SQL-запроса с параметрами
+                self.prepared.execute(conn, cursor, query, params)
+                # Получение одного результата
+                row = cursor.fetchone()
+            if start is not None:
+                self.stats.record(query, params, time.perf_counter() - start, int(row is not None), self._explain)
+            return row
+
         try:
-            # Выполнение SQL-запроса с параметрами
-            self.cursor.execute(query, params or ())
-            # Получение одного результата
-            return self.cursor.fetchone()
+            if cache:
+                return self._cached("one", query, params, load)
+            return load()
         except Exception as e:
             # Формирование сообщения об ошибке
             error_msg = f"Ошибка получения данных: {str(e)}"
@@ -162,19 +732,138 @@ class Database:
                 )
             return None 
 
+    def _cached(self, kind, query, params, load):
+        """
+        Получение результата запроса из общего кэша или из базы данных.
+
+        Если кэш выключен или параметры нельзя использовать в ключе,
+        запрос выполняется без кэша.
+
+        :param kind: Вид результата ("all" или "one")
+        :type kind: str
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :param load: Функция выполнения запроса без параметров
+        :type load: callable
+        :returns: Результат запроса
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        cache = get_query_cache()
+        key = cache.make_key(kind, query, params) if cache.enabled else None
+        if key is None:
+            return load()
+        hit, value, generation = cache.lookup(key)
+        if hit:
+            return value
+        value = load()
+        cache.store(key, read_tables(query), value, generation)
+        return value
+
+    def _explain(self, query, params):
+        """
+        План выполнения медленного запроса для журнала медленных запросов.
+
+        Запросы на чтение выполняются повторно под EXPLAIN (ANALYZE, BUFFERS),
+        для изменяющих запросов строится план без выполнения (EXPLAIN),
+        чтобы не повторять изменения и блокировки. Транзакция откатывается.
+
+        Запрос с параметрами подготавливается (PREPARE) с заполнителями $n,
+        и план строится для EXPLAIN EXECUTE в режиме общего плана
+        (plan_cache_mode = force_generic_plan): в плане остаются $1, $2, ...,
+        поэтому значения параметров (например, учетные данные auth_service)
+        не попадают в журнал. Для запросов с именованными параметрами
+        план не строится.
+
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :returns: Текст плана
+        :rtype: str
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        converted = to_server_placeholders(query) if params else None
+        if params and (converted is None or not isinstance(params, (tuple, list))):
+            return "План не получен: запрос с именованными параметрами"
+        options = "(ANALYZE, BUFFERS) " if written_tables(query) == set() else ""
+        # Получение соединения из пула на время построения плана
+        with self.pool.connection() as conn:
+            prepared = False
+            try:
+                with conn.cursor() as cursor:
+                    # Ограничение времени повторного выполнения запроса
+                    cursor.execute("SET LOCAL statement_timeout = %s", (int(self.stats.explain_timeout * 1000),))
+                    if not params:
+                        cursor.execute(f"EXPLAIN {options}{query}", ())
+                    else:
+                        # Общий план с $n вместо значений параметров
+                        cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+                        cursor.execute(f"PREPARE {EXPLAIN_STATEMENT} AS {converted[0]}")
+                        prepared = True
+                        placeholders = ", ".join(["%s"] * len(params))
+                        cursor.execute(f"EXPLAIN {options}EXECUTE {EXPLAIN_STATEMENT} ({placeholders})", params)
+                    return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                if not conn.closed:
+                    conn.rollback()
+                    if prepared:
+                        # Подготовленный запрос не удаляется откатом транзакции
+                        with conn.cursor() as cursor:
+                            cursor.execute(f"DEALLOCATE {EXPLAIN_STATEMENT}")
+                        conn.rollback()
+
+    def query_stats(self):
+        """
+        Статистика выполнения запросов, отсортированная по общему времени.
+
+        См. QueryStats.snapshot.
+
+        :rtype: list[dict]
+        """
+        return self.stats.snapshot()
+
+    def cache_stats(self):
+        """
+        Счетчики общего кэша запросов (попадания, промахи, вытеснения и др.).
+
+        Используются для подбора max_entries и ttl в секции [cache].
+
+        :rtype: dict
+        """
+        return get_query_cache().stats()
+
+    def prepared_stats(self, top=10):
+        """
+        Счетчики подготовленных запросов и оценка сэкономленного времени.
+
+        См. PreparedStatements.stats.
+
+        :param top: Количество запросов с наибольшей экономией в отчете
+        :type top: int
+        :rtype: dict
+        """
+        return self.prepared.stats(top)
+
+    def clear_cache(self):
+        """
+        Удаление всех записей общего кэша запросов.
+
+        Нужно после изменений, выполненных в обход методов Database
+        (например, из другого приложения или скрипта миграций).
+
+        :returns: None
+        """
+        invalidate_tables(None)
+
     def close(self):
         """
-        Закрытие соединения с базой данных.
-        
-        Закрывает курсор и соединение с базой данных, освобождая ресурсы.
-        
+        Освобождение ресурсов объекта.
+
+        Объект не удерживает соединений: каждый метод берет соединение
+        из общего пула только на время запроса. Метод оставлен для
+        совместимости, сам пул закрывается функцией close_pool().
+
         :returns: None
         """
-        # Проверка наличия активного соединения
-        if self.conn:
-            # Закрытие курсора
-            self.cursor.close()
-            # Закрытие соединения
-            self.conn.close()
-            # Логирование закрытия соединения
-            logging.info("Соединение с базой данных закрыто") 
\ No newline at end of file
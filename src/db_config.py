@@ -0,0 +1,173 @@
+"""
+Модуль чтения параметров подключения к базе данных из config.ini.
+
+Этот модуль содержит параметры по умолчанию и функции чтения секций
+[database], [pool], [cache], [prepare] и [stats] файла config.ini.
+Модуль не зависит от PyQt6, поэтому используется не только приложением
+(через database), но и консольными скриптами: миграциями (migrate.py)
+и измерениями производительности (benchmarks).
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт для работы с конфигурационным файлом
+import configparser
+import os
+
+# Параметры подключения по умолчанию (используются, если в config.ini нет секции [database])
+DEFAULT_DB_PARAMS = {
+    "dbname": "test_db",     # Имя базы данных
+    "user": "postgres",      # Имя пользователя
+    "password": "7773",      # Пароль
+    "host": "localhost",     # Хост
+    "port": "5432",          # Порт
+}
+
+# Параметры пула по умолчанию (используются, если в config.ini нет секции [pool])
+DEFAULT_POOL_PARAMS = {
+    "minconn": 1,              # Минимальное количество соединений
+    "maxconn": 10,             # Максимальное количество соединений
+    "idle_timeout": 300,       # Время простоя до закрытия соединения (сек)
+    "leak_timeout": 120,       # Время удержания до предупреждения об утечке (сек)
+    "checkout_timeout": 30,    # Время ожидания свободного соединения (сек)
+}
+
+# Параметры кэша запросов по умолчанию (используются, если в config.ini нет секции [cache])
+DEFAULT_CACHE_PARAMS = {
+    "max_entries": 256,        # Максимальное количество записей (0 — кэш выключен)
+    "ttl": 60.0,               # Время жизни записи (сек, 0 — кэш выключен)
+}
+
+# Параметры подготовленных запросов по умолчанию (секция [prepare] в config.ini)
+DEFAULT_PREPARE_PARAMS = {
+    "threshold": 5,            # Выполнений запроса на соединении до подготовки
+    "max_statements": 100,     # Подготовленных запросов на соединение (0 — выключено)
+}
+
+# Параметры статистики запросов по умолчанию (секция [stats] в config.ini)
+DEFAULT_STATS_PARAMS = {
+    "enabled": False,          # Учет времени выполнения запросов
+    "slow_ms": 500.0,          # Порог медленного запроса (мс)
+    "explain": True,           # Получать план медленных запросов
+    "explain_interval": 600.0, # Не чаще одного плана запроса за это время (сек)
+    "explain_timeout": 30.0,   # Ограничение времени получения плана (сек)
+    "window": 1000,            # Выполнений запроса в скользящей гистограмме
+}
+
+
+def load_config():
+    """
+    Загрузка конфигурации подключения из config.ini.
+
+    Файл ищется рядом с модулем. Отсутствующие параметры заменяются
+    значениями по умолчанию.
+
+    Пример файла::
+
+        [database]
+        dbname = test_db
+        user = postgres
+        password = 7773
+        host = localhost
+        port = 5432
+
+        [pool]
+        minconn = 2
+        maxconn = 20
+
+        [cache]
+        max_entries = 256
+        ttl = 60
+
+        [prepare]
+        threshold = 5
+        max_statements = 100
+
+        [stats]
+        enabled = true
+        slow_ms = 200
+
+    :returns: Кортеж (параметры подключения, параметры пула)
+    :rtype: tuple[dict, dict]
+    """
+    # Загрузка параметров из config.ini
+    config = _read_config()
+
+    # Параметры подключения к базе данных
+    db_params = dict(DEFAULT_DB_PARAMS)
+    if config.has_section("database"):
+        for key in db_params:
+            db_params[key] = config.get("database", key, fallback=db_params[key])
+
+    # Параметры пула соединений
+    pool_params = dict(DEFAULT_POOL_PARAMS)
+    if config.has_section("pool"):
+        for key, default in pool_params.items():
+            if isinstance(default, int):
+                pool_params[key] = config.getint("pool", key, fallback=default)
+            else:
+                pool_params[key] = config.getfloat("pool", key, fallback=default)
+
+    return db_params, pool_params
+
+
+def _read_config():
+    """
+    Чтение файла config.ini, расположенного рядом с модулем.
+
+    :rtype: configparser.ConfigParser
+    """
+    config = configparser.ConfigParser()
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+    config.read(config_path, encoding='utf-8')
+    return config
+
+
+def load_cache_config():
+    """
+    Загрузка параметров кэша запросов из секции [cache] файла config.ini.
+
+    :returns: Параметры кэша
+    :rtype: dict
+    """
+    config = _read_config()
+    cache_params = dict(DEFAULT_CACHE_PARAMS)
+    if config.has_section("cache"):
+        cache_params["max_entries"] = config.getint("cache", "max_entries", fallback=cache_params["max_entries"])
+        cache_params["ttl"] = config.getfloat("cache", "ttl", fallback=cache_params["ttl"])
+    return cache_params
+
+
+def load_prepare_config():
+    """
+    Загрузка параметров подготовленных запросов из секции [prepare] файла config.ini.
+
+    :returns: Параметры подготовленных запросов
+    :rtype: dict
+    """
+    config = _read_config()
+    prepare_params = dict(DEFAULT_PREPARE_PARAMS)
+    if config.has_section("prepare"):
+        for key, default in prepare_params.items():
+            prepare_params[key] = config.getint("prepare", key, fallback=default)
+    return prepare_params
+
+
+def load_stats_config():
+    """
+    Загрузка параметров статистики запросов из секции [stats] файла config.ini.
+
+    :returns: Параметры статистики
+    :rtype: dict
+    """
+    config = _read_config()
+    stats_params = dict(DEFAULT_STATS_PARAMS)
+    if config.has_section("stats"):
+        for key, default in stats_params.items():
+            if isinstance(default, bool):
+                stats_params[key] = config.getboolean("stats", key, fallback=default)
+            elif isinstance(default, int):
+                stats_params[key] = config.getint("stats", key, fallback=default)
+            else:
+                stats_params[key] = config.getfloat("stats", key, fallback=default)
+    return stats_params
@@ -0,0 +1,316 @@
+"""
+Модуль окна диагностики запросов.
+
+Окно показывает статистику выполнения запросов Database (время, строки,
+место вызова, гистограмму последних выполнений), журнал медленных
+запросов с планами выполнения и счетчики кэша справочных запросов и
+подготовленных запросов. Учет времени можно включить и выключить прямо
+в окне.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с датой и временем
+import datetime
+# Импорт необходимых виджетов из PyQt6
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QPushButton, QCheckBox, QSpinBox,
+                             QLabel, QTextEdit, QSplitter)
+# Импорт базовых классов PyQt6
+from PyQt6.QtCore import Qt, QTimer
+# Импорт границ интервалов гистограммы
+from query_stats import HISTOGRAM_BOUNDS_MS
+
+# Интервал автоматического обновления окна (мс)
+REFRESH_INTERVAL_MS = 2000
+
+
+def _number_item(value, digits=1):
+    """
+    Ячейка таблицы с числом, выровненным вправо.
+
+    :param value: Значение
+    :type value: int, float или None
+    :param digits: Знаков после запятой для дробных чисел
+    :type digits: int
+    :rtype: QTableWidgetItem
+    """
+    if value is None:
+        text = f"> {HISTOGRAM_BOUNDS_MS[-1]}"
+    elif isinstance(value, float):
+        text = f"{value:.{digits}f}"
+    else:
+        text = str(value)
+    item = QTableWidgetItem(text)
+    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+    return item
+
+
+class QueryDiagnosticsDialog(QDialog):
+    """
+    Немодальное окно статистики запросов и журнала медленных запросов.
+    """
+    # Столбцы таблицы запросов
+    STATEMENT_COLUMNS = ["Запрос", "Место вызова", "Выполнений", "Всего, мс", "Среднее, мс",
+                         "p95, мс", "Макс., мс", "Строк", "Медленных"]
+    # Столбцы таблицы медленных запросов
+    SLOW_COLUMNS = ["Время", "Длительность, мс", "Строк", "Место вызова", "Запрос"]
+
+    def __init__(self, db, parent=None):
+        """
+        Инициализация окна диагностики.
+
+        :param db: Объект базы данных
+        :type db: Database
+        :param parent: Родительский виджет
+        :type parent: QWidget или None
+        """
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("Диагностика запросов")
+        self.setModal(False)
+        self.resize(1000, 600)
+        # Статистика запросов, показанная в таблице
+        self._statements = []
+        # Медленные запросы, показанные в таблице
+        self._slow = []
+        self.init_ui()
+
+        # Автоматическое обновление, пока окно открыто
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_INTERVAL_MS)
+        self.refresh()
+
+    def init_ui(self):
+        """
+        Создание элементов окна.
+        """
+        layout = QVBoxLayout(self)
+
+        # Управление учетом
+        controls = QHBoxLayout()
+        self.enabled_check = QCheckBox("Учитывать время выполнения запросов")
+        self.enabled_check.setChecked(self.db.stats.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        controls.addWidget(self.enabled_check)
+        controls.addSpacing(20)
+        controls.addWidget(QLabel("Медленный запрос от, мс:"))
+        self.slow_spin = QSpinBox()
+        self.slow_spin.setRange(1, 600000)
+        self.slow_spin.setValue(int(self.db.stats.slow_ms))
+        self.slow_spin.valueChanged.connect(self.set_slow_ms)
+        controls.addWidget(self.slow_spin)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.tabs = QTabWidget(self)
+        layout.addWidget(self.tabs)
+
+        # Вкладка статистики запросов с гистограммой выбранного запроса
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.statements_table = self._create_table(self.STATEMENT_COLUMNS)
+        self.statements_table.itemSelectionChanged.connect(self.show_histogram)
+        splitter.addWidget(self.statements_table)
+        self.histogram_text = QTextEdit()
+        self.histogram_text.setReadOnly(True)
+        splitter.addWidget(self.histogram_text)
+        splitter.setSizes([400, 150])
+        self.tabs.addTab(splitter, "Запросы")
+
+        # Вкладка медленных запросов с планом выбранного запроса
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.slow_table = self._create_table(self.SLOW_COLUMNS)
+        self.slow_table.itemSelectionChanged.connect(self.show_plan)
+        splitter.addWidget(self.slow_table)
+        self.plan_text = QTextEdit()
+        self.plan_text.setReadOnly(True)
+        self.plan_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        splitter.addWidget(self.plan_text)
+        splitter.setSizes([250, 300])
+        self.tabs.addTab(splitter, "Медленные запросы")
+
+        # Вкладка счетчиков кэша и подготовленных запросов
+        self.counters_text = QTextEdit()
+        self.counters_text.setReadOnly(True)
+        self.tabs.addTab(self.counters_text, "Кэш и подготовка")
+
+        # Кнопки управления
+        buttons = QHBoxLayout()
+        self.btn_refresh = QPushButton("Обновить")
+        self.btn_refresh.clicked.connect(self.refresh)
+        buttons.addWidget(self.btn_refresh)
+        self.btn_reset = QPushButton("Сбросить статистику")
+        self.btn_reset.clicked.connect(self.reset)
+        buttons.addWidget(self.btn_reset)
+        buttons.addStretch()
+        self.btn_close = QPushButton("Закрыть")
+        self.btn_close.clicked.connect(self.hide)
+        buttons.addWidget(self.btn_close)
+        layout.addLayout(buttons)
+
+    def _create_table(self, columns):
+        """
+        Создание таблицы только для чтения с выбором строк.
+
+        :param columns: Заголовки столбцов
+        :type columns: list[str]
+        :rtype: QTableWidget
+        """
+        table = QTableWidget(0, len(columns), self)
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(columns.index("Запрос"), QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def set_enabled(self, enabled):
+        """
+        Включение или выключение учета времени запросов.
+
+        :param enabled: Включить учет
+        :type enabled: bool
+        """
+        self.db.stats.enabled = enabled
+
+    def set_slow_ms(self, value):
+        """
+        Изменение порога медленного запроса.
+
+        :param value: Порог (мс)
+        :type value: int
+        """
+        self.db.stats.slow_ms = value
+
+    def refresh(self):
+        """
+        Обновление таблиц и счетчиков.
+        """
+        if not self.isVisible():
+            return
+        self._fill_statements()
+        self._fill_slow()
+        self._fill_counters()
+
+    def reset(self):
+        """
+        Удаление накопленной статистики и журнала медленных запросов.
+        """
+        self.db.stats.reset()
+        self.refresh()
+
+    def _fill_statements(self):
+        """
+        Заполнение таблицы статистики запросов с сохранением выбранной строки.
+        """
+        selected = self._selected(self.statements_table, self._statements, "query")
+        self._statements = self.db.query_stats()
+        self.statements_table.setRowCount(len(self._statements))
+        for row, statement in enumerate(self._statements):
+            caller = statement["callers"][0][0] if statement["callers"] else ""
+            if len(statement["callers"]) > 1:
+                caller += f" (+{len(statement['callers']) - 1})"
+            self.statements_table.setItem(row, 0, QTableWidgetItem(statement["query"]))
+            self.statements_table.setItem(row, 1, QTableWidgetItem(caller))
+            self.statements_table.setItem(row, 2, _number_item(statement["calls"]))
+            self.statements_table.setItem(row, 3, _number_item(statement["total_ms"]))
+            self.statements_table.setItem(row, 4, _number_item(statement["avg_ms"], 2))
+            self.statements_table.setItem(row, 5, _number_item(statement["p95_ms"]))
+            self.statements_table.setItem(row, 6, _number_item(statement["max_ms"]))
+            self.statements_table.setItem(row, 7, _number_item(statement["rows"]))
+            self.statements_table.setItem(row, 8, _number_item(statement["slow"]))
+            if statement["query"] == selected:
+                self.statements_table.selectRow(row)
+
+    def _fill_slow(self):
+        """
+        Заполнение таблицы медленных запросов (новые сверху).
+        """
+        selected = self._selected(self.slow_table, self._slow, "timestamp")
+        self._slow = list(reversed(self.db.stats.slow_snapshot()))
+        self.slow_table.setRowCount(len(self._slow))
+        for row, entry in enumerate(self._slow):
+            moment = datetime.datetime.fromtimestamp(entry.timestamp).strftime("%H:%M:%S")
+            self.slow_table.setItem(row, 0, QTableWidgetItem(moment))
+            self.slow_table.setItem(row, 1, _number_item(entry.elapsed_ms, 0))
+            self.slow_table.setItem(row, 2, _number_item(entry.rows))
+            self.slow_table.setItem(row, 3, QTableWidgetItem(entry.caller))
+            self.slow_table.setItem(row, 4, QTableWidgetItem(entry.query))
+            if entry.timestamp == selected:
+                self.slow_table.selectRow(row)
+
+    def _fill_counters(self):
+        """
+        Заполнение счетчиков кэша и подготовленных запросов.
+        """
+        cache = self.db.cache_stats()
+        prepared = self.db.prepared_stats()
+        lines = [
+            "Кэш справочных запросов",
+            f"  записей {cache['entries']} из {cache['max_entries']}, время жизни {cache['ttl']:.0f} с",
+            f"  попаданий {cache['hits']}, промахов {cache['misses']}, доля попаданий {cache['hit_ratio']:.0%}",
+            f"  вытеснено {cache['evictions']}, устарело {cache['expirations']}, "
+            f"сброшено изменениями {cache['invalidations']}",
+            "",
+            "Подготовленные запросы",
+            f"  соединений {prepared['connections']}, подготовлено сейчас {prepared['prepared']}, "
+            f"всего подготовок {prepared['prepares']}",
+            f"  удалено {prepared['deallocations']}, без подготовки {prepared['fallbacks']}, "
+            f"сбросов на сервере {prepared['resets']}",
+            f"  оценка сэкономленного времени {prepared['saved_ms']:.1f} мс",
+        ]
+        for statement in prepared["statements"]:
+            lines.append(f"    {statement['plain_avg_ms']:.3f} -> {statement['prepared_avg_ms']:.3f} мс, "
+                         f"выполнений {statement['prepared']}: {statement['query']}")
+        self.counters_text.setPlainText("\n".join(lines))
+
+    def show_histogram(self):
+        """
+        Отображение гистограммы и мест вызова выбранного запроса.
+        """
+        row = self.statements_table.currentRow()
+        if row < 0 or row >= len(self._statements):
+            self.histogram_text.clear()
+            return
+        statement = self._statements[row]
+        window = sum(statement["histogram"])
+        lines = [statement["query"], "", f"Последние {window} выполнений:"]
+        bounds = [f"до {bound} мс" for bound in HISTOGRAM_BOUNDS_MS] + [f"более {HISTOGRAM_BOUNDS_MS[-1]} мс"]
+        for bound, count in zip(bounds, statement["histogram"]):
+            if count:
+                bar = "#" * max(1, round(count / window * 50))
+                lines.append(f"  {bound:>14} {count:>7}  {bar}")
+        lines.append("")
+        lines.append("Места вызова:")
+        for caller, count in statement["callers"]:
+            lines.append(f"  {caller}: {count}")
+        self.histogram_text.setPlainText("\n".join(lines))
+
+    def show_plan(self):
+        """
+        Отображение плана выбранного медленного запроса.
+        """
+        row = self.slow_table.currentRow()
+        if row < 0 or row >= len(self._slow):
+            self.plan_text.clear()
+            return
+        entry = self._slow[row]
+        plan = entry.plan or "План не получен (повторный медленный запрос или получение планов выключено)"
+        self.plan_text.setPlainText(f"{entry.query}\n\n{plan}")
+
+    @staticmethod
+    def _selected(table, items, field):
+        """
+        Значение поля выбранной строки таблицы (для восстановления выбора после обновления).
+
+        :rtype: object или None
+        """
+        row = table.currentRow()
+        if 0 <= row < len(items):
+            item = items[row]
+            return item[field] if isinstance(item, dict) else getattr(item, field)
+        return None
@@ -943,6 +943,7 @@ class AddOrderDialog(BaseDialog):
         selection_layout = QFormLayout()
 
         self.supplier_combo = QComboBox()
+        self.warehouse_combo = QComboBox()
         self.product_combo = QComboBox()
         self.quantity_spin = QSpinBox()
         self.quantity_spin.setMinimum(1)
@@ -954,6 +955,7 @@ class AddOrderDialog(BaseDialog):
         self.btn_add_item = QPushButton("Добавить товар в заказ")
 
         selection_layout.addRow("Поставщик:", self.supplier_combo)
+        selection_layout.addRow("Склад приемки:", self.warehouse_combo) # Куда поступит товар при доставке
         selection_layout.addRow("Товар:", self.product_combo)
         selection_layout.addRow("Цена за ед.:", self.price_spin) # Разрешить ручной ввод/переопределение
         selection_layout.addRow("Количество:", self.quantity_spin)
@@ -988,6 +990,7 @@ class AddOrderDialog(BaseDialog):
         
         # --- Загрузка данных и подключение сигналов ---
         self.load_suppliers()
+        self.load_warehouses()
         self.load_products()
         self.btn_add_item.clicked.connect(self.add_item_to_order)
         self.btn_remove_item.clicked.connect(self.remove_item_from_order)
@@ -1001,8 +1004,9 @@ class AddOrderDialog(BaseDialog):
         """
         try:
             self.supplier_combo.clear()
-            self.db.cursor.execute("SELECT supplier_id, supplier_name FROM suppliers ORDER BY supplier_name")
-            suppliers = self.db.cursor.fetchall()
+            suppliers = self.db.fetch_rows(
+                "SELECT supplier_id, supplier_name FROM suppliers ORDER BY supplier_name", cache=True
+            )
             if not suppliers:
                 self.supplier_combo.addItem("Нет доступных поставщиков", -1)
                 self.supplier_combo.setEnabled(False)
@@ -1014,6 +1018,25 @@ class AddOrderDialog(BaseDialog):
             logging.error(f"Ошибка загрузки поставщиков для диалога: {e}")
             QMessageBox.critical(self, "Ошибка БД", "Не удалось загрузить список поставщиков.")
 
+    def load_warehouses(self):
+        """
+        Загружает список складов для выбора склада приемки заказа.
+        
+        Первый элемент списка — склад по умолчанию (склад с наименьшим ID),
+        который используется, если склад приемки не выбран.
+        """
+        try:
+            self.warehouse_combo.clear()
+            self.warehouse_combo.addItem("По умолчанию", None)
+            warehouses = self.db.fetch_rows(
+                "SELECT warehouse_id, warehouse_name FROM warehouses ORDER BY warehouse_name", cache=True
+            )
+            for warehouse_id, name in warehouses:
+                self.warehouse_combo.addItem(name, warehouse_id)
+        except Exception as e:
+            logging.error(f"Ошибка загрузки складов для диалога: {e}")
+            QMessageBox.critical(self, "Ошибка БД", "Не удалось загрузить список складов.")
+
     def load_products(self):
         """
         Загружает список товаров из базы данных и заполняет выпадающий список.
@@ -1024,8 +1047,9 @@ class AddOrderDialog(BaseDialog):
         try:
             self.product_combo.clear()
             # Сохраняем цену вместе с ID и названием
-            self.db.cursor.execute("SELECT product_id, product_name, unit_price FROM products ORDER BY product_name")
-            products = self.db.cursor.fetchall()
+            products = self.db.fetch_rows(
+                "SELECT product_id, product_name, unit_price FROM products ORDER BY product_name", cache=True
+            )
             if not products:
                 self.product_combo.addItem("Нет доступных товаров", -1)
                 self.product_combo.setEnabled(False)
@@ -1177,6 +1201,7 @@ class AddOrderDialog(BaseDialog):
 
         return {
             "supplier_id": supplier_id,
+            "warehouse_id": self.warehouse_combo.currentData(),
             "items": items,
             "total_amount": total_order_amount
         }
@@ -1591,12 +1616,13 @@ class EmailDialog(QDialog):
             "message": self.message_input.toPlainText()
         }
     
-class CreatePurchaseOrderDialog(BaseDialog):
+class CreatePurchaseOrderDialog(AddOrderDialog):
     """
     Диалоговое окно для создания нового заказа поставщику.
     
-    Предоставляет интерфейс для выбора поставщика, добавления товаров,
-    указания количества и цены, а также формирования общего заказа.
+    Предоставляет интерфейс для выбора поставщика и склада приемки,
+    добавления товаров, указания количества и цены, а также формирования
+    общего заказа. Интерфейс и загрузка данных общие с AddOrderDialog.
     
     :param db: Объект базы данных для получения информации о поставщиках и товарах
     :type db: Database
@@ -1604,61 +1630,5 @@ class CreatePurchaseOrderDialog(BaseDialog):
     :type parent: QWidget или None
     """
     def __init__(self, db, parent=None):
-        super().__init__("Создать заказ поставщику", parent)
-        self.db = db
-        self.setMinimumSize(600, 500)
-
-        # --- Верхняя секция: Выбор поставщика и товара ---
-        selection_layout = QFormLayout()
-
-        self.supplier_combo = QComboBox()
-        self.product_combo = QComboBox()
-        self.quantity_spin = QSpinBox()
-        self.quantity_spin.setMinimum(1)
-        self.quantity_spin.setMaximum(9999)
-        self.price_spin = QDoubleSpinBox() # Цена может быть получена или введена
-        self.price_spin.setDecimals(2)
-        self.price_spin.setMinimum(0.01)
-        self.price_spin.setMaximum(99999.99)
-        self.btn_add_item = QPushButton("Добавить товар в заказ")
-
-        selection_layout.addRow("Поставщик:", self.supplier_combo)
-        selection_layout.addRow("Товар:", self.product_combo)
-        selection_layout.addRow("Цена за ед.:", self.price_spin) # Разрешить ручной ввод/переопределение
-        selection_layout.addRow("Количество:", self.quantity_spin)
-        selection_layout.addRow("", self.btn_add_item)
-
-        self.layout.insertLayout(0, selection_layout) # Вставка перед панелью кнопок
-
-        # --- Средняя секция: Таблица товаров заказа ---
-        self.order_items_table = QTableWidget()
-        self.order_items_table.setColumnCount(5) # ID товара, Название, Количество, Цена, Итого
-        self.order_items_table.setHorizontalHeaderLabels(["ID Товара", "Название", "Кол-во", "Цена", "Итого"])
-        self.order_items_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.order_items_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        # self.order_items_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        # растягивает все столбцы таблицы равномерно по ширине
-        self.order_items_table.verticalHeader().setVisible(False)
-        self.layout.insertWidget(1, self.order_items_table)
-
-        # Добавляем кнопку удаления товара
-        remove_button_layout = QHBoxLayout()
-        self.btn_remove_item = QPushButton("Удалить выбранный товар")
-        self.btn_remove_item.setStyleSheet("background-color: #d32f2f; color: white;")
-        remove_button_layout.addStretch()
-        remove_button_layout.addWidget(self.btn_remove_item)
-        self.layout.insertLayout(2, remove_button_layout)
-
-        # --- Нижняя секция: Общая сумма и кнопки ---
-        total_layout = QHBoxLayout()
-        self.total_label = QLabel("Общая сумма заказа: 0.00")
-        total_layout.addStretch()
-        total_layout.addWidget(self.total_label)
-        self.layout.insertLayout(3, total_layout)
-        
-        # --- Загрузка данных и подключение сигналов ---
-        self.load_suppliers()
-        self.load_products()
-        self.btn_add_item.clicked.connect(self.add_item_to_order)
-        self.btn_remove_item.clicked.connect(self.remove_item_from_order)
-        self.product_combo.currentIndexChanged.connect(self.update_price_from_product) # Автозаполнение цены
\ No newline at end of file
+        super().__init__(parent, db)
+        self.setWindowTitle("Создать заказ поставщику")
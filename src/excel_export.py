@@ -0,0 +1,97 @@
+"""
+Модуль потоковой записи Excel файлов.
+
+Строки записываются в книгу openpyxl в режиме write-only: каждая строка
+сразу сериализуется во временный файл листа и не хранится в памяти,
+поэтому расход памяти не зависит от объема выгрузки. Источником строк
+служит генератор порций (например, Database.iter_batches, читающий
+результат запроса серверным курсором).
+
+Лист Excel вмещает не более EXCEL_MAX_ROWS строк. При превышении запись
+продолжается на новом листе с тем же заголовком: «Данные», «Данные (2)»
+и так далее.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт книги openpyxl
+from openpyxl import Workbook
+
+# Максимальное количество строк на листе Excel (включая строку заголовков)
+EXCEL_MAX_ROWS = 1048576
+# Максимальная длина имени листа Excel
+SHEET_TITLE_LENGTH = 31
+# Символы, недопустимые в имени листа Excel
+SHEET_TITLE_FORBIDDEN = '[]:*?/\\'
+
+
+def sheet_title(base, index):
+    """
+    Имя листа с учетом номера и ограничений Excel.
+
+    :param base: Имя первого листа
+    :type base: str
+    :param index: Номер листа (начиная с 1)
+    :type index: int
+    :returns: Имя листа не длиннее SHEET_TITLE_LENGTH символов
+    :rtype: str
+    """
+    # Удаление недопустимых символов
+    base = "".join(ch for ch in base if ch not in SHEET_TITLE_FORBIDDEN) or "Data"
+    if index == 1:
+        return base[:SHEET_TITLE_LENGTH]
+    suffix = f" ({index})"
+    return base[:SHEET_TITLE_LENGTH - len(suffix)] + suffix
+
+
+def write_xlsx(batches, filename, sheet_name="Data", headers=None, progress=None,
+               max_rows=EXCEL_MAX_ROWS):
+    """
+    Потоковая запись строк в Excel файл.
+
+    :param batches: Итератор порций строк (списков кортежей)
+    :type batches: iterable
+    :param filename: Имя файла
+    :type filename: str
+    :param sheet_name: Имя первого листа
+    :type sheet_name: str
+    :param headers: Заголовки столбцов (повторяются на каждом листе)
+    :type headers: list или None
+    :param progress: Ход выполнения задачи экспорта (методы report и check)
+    :type progress: ExportProgress или None
+    :param max_rows: Максимальное количество строк на листе
+    :type max_rows: int
+    :returns: Количество записанных строк данных
+    :rtype: int
+    """
+    # Строк данных на одном листе
+    rows_per_sheet = max_rows - (1 if headers else 0)
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheets = 0
+    sheet_rows = 0
+    total = 0
+    for batch in batches:
+        for row in batch:
+            # Переход на новый лист при заполнении текущего
+            if sheet is None or sheet_rows >= rows_per_sheet:
+                sheets += 1
+                sheet = workbook.create_sheet(sheet_title(sheet_name, sheets))
+                if headers:
+                    sheet.append(headers)
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+        total += len(batch)
+        if progress is not None:
+            progress.report(rows=total)
+            progress.check()
+
+    # Книга без листов не сохраняется
+    if sheet is None:
+        sheet = workbook.create_sheet(sheet_title(sheet_name, 1))
+        if headers:
+            sheet.append(headers)
+    workbook.save(filename)
+    return total
@@ -0,0 +1,577 @@
+"""
+Модуль потокового импорта Excel файлов порциями.
+
+Книга открывается openpyxl в режиме read-only: строки листа читаются
+последовательно из XML без построения всей книги в памяти. Строки
+собираются в порции по EXCEL_IMPORT_CHUNK_ROWS и проверяются
+по столбцам векторными операциями pandas:
+
+- обязательные поля и формат значений (как в bulk_import.validation_rules);
+- ограничения CHECK таблиц (как bulk_import.CHECK_RULES);
+- правила форм ввода validators.Validator (длина текста, телефон, email);
+- внешние ключи и уникальность — одним запросом на порцию для каждого ключа.
+
+Прошедшие проверку строки порции добавляются одной командой INSERT
+(execute_values со всей порцией на странице). Импорт выполняется
+в одной транзакции; отклоненные строки с номером строки листа и причиной
+сохраняются в отчет рядом с файлом, как при импорте CSV.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для измерения времени
+import time
+# Импорт модуля для логирования
+import logging
+# Импорт библиотеки для работы с массивами
+import numpy as np
+# Импорт библиотеки для работы с данными
+import pandas as pd
+# Импорт чтения книги Excel
+from openpyxl import load_workbook
+# Импорт транзакции на соединении
+from database import transaction
+# Импорт описаний столбцов и ограничений таблиц импорта
+from bulk_import import (
+    IMPORT_COLUMNS, FOREIGN_KEYS, MERGE_KEYS, TYPE_NAMES, TYPE_PATTERNS,
+    PRODUCT_CATEGORIES, ORDER_STATUSES, ImportResult,
+    rejected_report_path, write_rejected_report, sync_sequence, unique_keys, upsert_clause,
+    import_columns,
+)
+
+# Строк листа в одной порции проверки и вставки
+EXCEL_IMPORT_CHUNK_ROWS = 5000
+# Максимальная длина текстового поля (Validator.validate_text)
+TEXT_MAX_LENGTH = 255
+# Формат даты в текстовых ячейках
+DATE_FORMAT = "%Y-%m-%d"
+# Диапазон значений типа integer
+INTEGER_MIN = -2147483648
+INTEGER_MAX = 2147483647
+# Формат email (Validator.validate_email и ограничение suppliers_email_check)
+EMAIL_PATTERN = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
+# Расширения, которые читаются в режиме read-only
+READ_ONLY_EXTENSIONS = (".xlsx", ".xlsm")
+
+# Проверки значений, повторяющие ограничения CHECK: таблица -> [(столбец, условие, причина)]
+# Условие получает приведенный к типу столбец без NULL и возвращает маску допустимых значений
+VALUE_CHECKS = {
+    "products": [
+        ("unit_price", lambda v: v > 0, "Цена должна быть больше нуля"),
+        ("category", lambda v: v.isin(PRODUCT_CATEGORIES), "Недопустимая категория"),
+    ],
+    "stock": [
+        ("quantity", lambda v: v >= 0, "Количество не может быть отрицательным"),
+    ],
+    "orders": [
+        ("total_amount", lambda v: v > 0, "Сумма заказа должна быть больше нуля"),
+        ("status", lambda v: v.isin(ORDER_STATUSES), "Недопустимый статус заказа"),
+    ],
+    "suppliers": [
+        ("phone_number", lambda v: v.str.fullmatch(r"\d{11}"), "Номер телефона должен содержать 11 цифр"),
+        ("email", lambda v: v.str.fullmatch(EMAIL_PATTERN), "Неверный формат email"),
+    ],
+    "warehouses": [
+        ("capacity", lambda v: v > 0, "Вместимость должна быть больше нуля"),
+    ],
+}
+
+# Столбцы телефонов: как в Validator.validate_phone, учитываются только цифры
+PHONE_COLUMNS = {"phone_number"}
+
+
+def iter_sheet_rows(filename, sheet_name=0):
+    """
+    Последовательное чтение строк данных листов книги.
+
+    Первая строка каждого листа считается строкой заголовков и
+    пропускается. Файлы .xlsx читаются в режиме read-only; прочие
+    форматы (.xls) читаются pandas целиком.
+
+    :param filename: Имя файла Excel
+    :type filename: str
+    :param sheet_name: Имя или индекс листа (None — все листы по порядку)
+    :type sheet_name: str, int или None
+    :returns: Генератор пар (номер строки листа, значения ячеек)
+    :rtype: generator
+    """
+    if os.path.splitext(filename)[1].lower() not in READ_ONLY_EXTENSIONS:
+        frames = pd.read_excel(filename, sheet_name=sheet_name, header=None, dtype=object)
+        for frame in (frames.values() if sheet_name is None else [frames]):
+            frame = frame.astype(object).where(frame.notna(), None)
+            for index, row in enumerate(frame.itertuples(index=False, name=None)):
+                if index:
+                    yield index + 1, row
+        return
+
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            sheets = workbook.worksheets
+        elif isinstance(sheet_name, int):
+            sheets = [workbook.worksheets[sheet_name]]
+        else:
+            sheets = [workbook[sheet_name]]
+        for sheet in sheets:
+            for line_no, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+                yield line_no, row
+    finally:
+        # Книга в режиме read-only держит файл открытым до закрытия
+        workbook.close()
+
+
+def iter_chunks(rows, columns_count, rejected, chunk_rows=EXCEL_IMPORT_CHUNK_ROWS):
+    """
+    Сборка строк листа в порции DataFrame.
+
+    Пустые строки пропускаются; строки с заполненными ячейками за
+    пределами columns_count столбцов отклоняются.
+
+    :param rows: Пары (номер строки, значения ячеек)
+    :type rows: iterable
+    :param columns_count: Количество столбцов импорта
+    :type columns_count: int
+    :param rejected: Список отклоненных строк (пополняется)
+    :type rejected: list
+    :param chunk_rows: Строк в порции
+    :type chunk_rows: int
+    :returns: Генератор пар (номера строк порции, значения строк порции)
+    :rtype: generator
+    """
+    line_numbers = []
+    records = []
+    for line_no, row in rows:
+        # Пустые строки листа пропускаются
+        if all(value is None or value == "" for value in row):
+            continue
+        values = list(row[:columns_count])
+        if any(value is not None and value != "" for value in row[columns_count:]):
+            # Количество полей — до последней заполненной ячейки
+            used = max(i for i, value in enumerate(row) if value is not None and value != "") + 1
+            rejected.append((
+                line_no,
+                f"Ожидается полей: {columns_count}, в строке: {used}",
+                list(row[:used])
+            ))
+        else:
+            line_numbers.append(line_no)
+            records.append(values + [None] * (columns_count - len(values)))
+        if len(records) >= chunk_rows:
+            yield line_numbers, records
+            line_numbers, records = [], []
+    if records:
+        yield line_numbers, records
+
+
+def _text(series):
+    """
+    Приведение значений ячеек к тексту без пробелов по краям (пустые — NULL).
+
+    :param series: Значения столбца
+    :type series: pandas.Series
+    :rtype: pandas.Series
+    """
+    text = series.astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def _text_mask(series):
+    """
+    Маска текстовых значений ячеек.
+
+    Для столбца, целиком состоящего из строк (например, прочитанного
+    из CSV), проверка выполняется без обхода значений в Python.
+
+    :param series: Значения ячеек столбца
+    :type series: pandas.Series
+    :rtype: pandas.Series
+    """
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind in ("string", "empty"):
+        return pd.Series(kind == "string", index=series.index) & series.notna()
+    if kind != "mixed":
+        return pd.Series(False, index=series.index)
+    return series.map(lambda value: isinstance(value, str))
+
+
+def remember_keys(seen, key, values):
+    """
+    Добавление значений ключа к значениям из предыдущих порций.
+
+    :param seen: Значения ключей из предыдущих порций: ключ -> MultiIndex
+    :type seen: dict
+    :param key: Столбцы ключа
+    :type key: tuple[str]
+    :param values: Новые значения ключа
+    :type values: pandas.MultiIndex
+    """
+    seen[key] = seen[key].append(values) if key in seen else values
+
+
+def seen_mask(seen, key, values):
+    """
+    Маска значений ключа, встречавшихся в предыдущих порциях.
+
+    :param seen: Значения ключей из предыдущих порций: ключ -> MultiIndex
+    :type seen: dict
+    :param key: Столбцы ключа
+    :type key: tuple[str]
+    :param values: Проверяемые значения ключа
+    :type values: pandas.MultiIndex
+    :rtype: numpy.ndarray
+    """
+    if key not in seen:
+        return np.zeros(len(values), dtype=bool)
+    return values.isin(seen[key])
+
+
+def parse_column(series, column, form_rules=True):
+    """
+    Приведение значений столбца к типу импорта.
+
+    :param series: Значения ячеек столбца
+    :type series: pandas.Series
+    :param column: Столбец импорта
+    :type column: ImportColumn
+    :param form_rules: Нормализовать значения как формы ввода (телефон — только цифры)
+    :type form_rules: bool
+    :returns: Приведенные значения (NULL для пустых и неверных) и маска неверного формата
+    :rtype: tuple[pandas.Series, pandas.Series]
+    """
+    text = _text(series)
+    if column.type == "text":
+        if form_rules and column.name in PHONE_COLUMNS:
+            # Как в Validator.validate_phone: учитываются только цифры номера
+            text = text.str.replace(r"\D", "", regex=True)
+            text = text.mask(text == "")
+        return text, pd.Series(False, index=series.index)
+
+    if column.type == "date":
+        # Ячейки с датами приводятся напрямую, текст — только в формате ГГГГ-ММ-ДД
+        is_text = _text_mask(series)
+        values = pd.to_datetime(series.where(~is_text & text.notna()), errors="coerce")
+        # Текст проверяется шаблоном импорта CSV: to_datetime принимает и "2024-1-5"
+        is_date = text.str.fullmatch(TYPE_PATTERNS["date"]).fillna(False).astype(bool)
+        values = values.fillna(pd.to_datetime(text.where(is_text & is_date), errors="coerce", format=DATE_FORMAT))
+        return values, text.notna() & values.isna()
+
+    # Числа: ячейки с числами и текст с десятичной точкой или запятой
+    numbers = pd.to_numeric(text.str.replace(",", ".", regex=False), errors="coerce")
+    invalid = text.notna() & numbers.isna()
+    # Текст проверяется тем же шаблоном, что и при импорте CSV (без экспоненты, inf и т. п.)
+    is_text = _text_mask(series)
+    if is_text.any():
+        invalid = invalid | (is_text & text.notna() & ~text.str.fullmatch(TYPE_PATTERNS[column.type]).fillna(False))
+    if column.type == "integer":
+        fractional = numbers.notna() & (numbers % 1 != 0)
+        out_of_range = numbers.notna() & ((numbers < INTEGER_MIN) | (numbers > INTEGER_MAX))
+        invalid = invalid | fractional | out_of_range
+        numbers = numbers.mask(invalid).astype("Int64")
+    return numbers, invalid.fillna(False)
+
+
+def validate_chunk(frame, table_name, form_rules=True, merge=False):
+    """
+    Векторная проверка порции строк.
+
+    Правила применяются по очереди; строка получает причину первого
+    нарушенного правила. Порядок и формулировки причин совпадают
+    с импортом CSV (bulk_import.validation_rules).
+
+    :param frame: Порция строк (столбцы IMPORT_COLUMNS, индекс — номер строки)
+    :type frame: pandas.DataFrame
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param form_rules: Применять правила форм ввода Validator (длина текста,
+        телефон по цифрам); False — только правила импорта CSV
+    :type form_rules: bool
+    :param merge: Режим обновления: столбец, значения которого назначает
+        последовательность, не проверяется и не переносится (bulk_import.import_columns)
+    :type merge: bool
+    :returns: Приведенные значения и причины отклонения (NULL для прошедших проверку)
+    :rtype: tuple[pandas.DataFrame, pandas.Series]
+    """
+    reasons = pd.Series(None, index=frame.index, dtype=object)
+
+    def reject(mask, reason):
+        mask = mask.fillna(False).astype(bool) & reasons.isna()
+        reasons[mask] = reason
+
+    values = {}
+    for column in import_columns(table_name, merge):
+        parsed, invalid = parse_column(frame[column.name], column, form_rules)
+        values[column.name] = parsed
+        if column.required:
+            reject(parsed.isna() & ~invalid, f"Не заполнено поле {column.name}")
+        if column.type == "text":
+            # Ограничение длины текстовых полей форм ввода (Validator.validate_text)
+            if form_rules:
+                reject(parsed.str.len() > TEXT_MAX_LENGTH,
+                       f"Поле {column.name}: Максимальная длина поля - {TEXT_MAX_LENGTH} символов")
+        else:
+            reject(invalid, f"Поле {column.name}: ожидается {TYPE_NAMES[column.type]}")
+    typed = pd.DataFrame(values, index=frame.index)
+
+    # Ограничения CHECK (NULL, как и в PostgreSQL, проходит проверку)
+    for name, condition, reason in VALUE_CHECKS.get(table_name, []):
+        present = typed[name].notna()
+        valid = pd.Series(True, index=frame.index)
+        valid[present] = condition(typed.loc[present, name])
+        reject(~valid, f"Поле {name}: {reason}")
+    return typed, reasons
+
+
+def _python_values(series):
+    """
+    Значения столбца в виде объектов Python для psycopg2.
+
+    :param series: Приведенные значения столбца
+    :type series: pandas.Series
+    :rtype: list
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.date
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def check_keys(cursor, typed, reasons, table_name, seen, merge=False):
+    """
+    Проверка внешних ключей и уникальности порции одним запросом на ключ.
+
+    В режиме обновления наличие естественного ключа в таблице не ошибка,
+    а значение другого ключа отклоняется, только если оно принадлежит
+    записи с другим естественным ключом (как bulk_import.key_rules).
+
+    :param cursor: Курсор базы данных
+    :param typed: Приведенные значения порции
+    :type typed: pandas.DataFrame
+    :param reasons: Причины отклонения (дополняются)
+    :type reasons: pandas.Series
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param seen: Значения ключей, принятые в предыдущих порциях: ключ -> MultiIndex
+    :type seen: dict
+    :param merge: Режим обновления
+    :type merge: bool
+    """
+    def reject(mask, reason):
+        mask = mask.astype(bool) & reasons.isna()
+        reasons[mask] = reason
+
+    # Внешние ключи: значения, отсутствующие в таблице ссылки
+    for name, ref_table, ref_column in FOREIGN_KEYS.get(table_name, []):
+        candidates = typed[name].notna() & reasons.isna()
+        if not candidates.any():
+            continue
+        cursor.execute(
+            f"SELECT {ref_column} FROM {ref_table} WHERE {ref_column} = ANY(%s)",
+            (_python_values(typed.loc[candidates, name].drop_duplicates()),)
+        )
+        found = [row[0] for row in cursor.fetchall()]
+        reject(candidates & ~typed[name].isin(found), f"Поле {name}: нет записи в таблице {ref_table}")
+
+    # Уникальность: значение уже есть в таблице или повторяется в файле
+    merge_key = MERGE_KEYS[table_name] if merge else None
+    keys = unique_keys(table_name, merge)
+    for key in keys:
+        label = ", ".join(key)
+        # Столбцы записи: ключ и естественный ключ, с которым он сравнивается
+        owner = list(key) + [name for name in merge_key or () if name not in key]
+        candidates = reasons.isna() & typed[owner].notna().all(axis=1)
+        if not candidates.any():
+            continue
+        subset = typed.loc[candidates, owner]
+        values = pd.MultiIndex.from_frame(subset[list(key)])
+        existing = np.zeros(len(subset), dtype=bool)
+        if key != merge_key:
+            cursor.execute(
+                f"SELECT {', '.join(owner)} FROM {table_name} WHERE ({label}) IN "
+                f"(SELECT * FROM unnest({', '.join(['%s'] * len(key))}))",
+                [_python_values(subset[name]) for name in key]
+            )
+            found = cursor.fetchall()
+            existing = values.isin([row[:len(key)] for row in found])
+            if merge_key:
+                # Ключ той же записи, которая будет обновлена, не ошибка
+                existing &= ~pd.MultiIndex.from_frame(subset).isin(found)
+            reject(_mask(existing, subset, reasons), f"Значение ({label}) уже есть в таблице {table_name}")
+        duplicated = (values.duplicated() | seen_mask(seen, key, values)) & ~existing
+        reject(_mask(duplicated, subset, reasons), f"Значение ({label}) повторяется в файле")
+
+    # Ключи принятых строк учитываются при проверке следующих порций
+    accepted = typed[reasons.isna()]
+    for key in keys:
+        remember_keys(seen, key, pd.MultiIndex.from_frame(accepted[list(key)]))
+
+
+def _mask(values, subset, reasons):
+    """
+    Маска строк порции по маске строк подмножества.
+
+    :param values: Маска строк подмножества
+    :type values: numpy.ndarray
+    :param subset: Подмножество строк порции
+    :type subset: pandas.DataFrame
+    :param reasons: Причины отклонения (индекс порции)
+    :type reasons: pandas.Series
+    :rtype: pandas.Series
+    """
+    return pd.Series(values, index=subset.index).reindex(reasons.index, fill_value=False)
+
+
+def insert_chunk(tx, table_name, typed, reasons):
+    """
+    Добавление прошедших проверку строк порции одной командой INSERT.
+
+    :param tx: Транзакция импорта
+    :type tx: database.Transaction
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param typed: Приведенные значения порции
+    :type typed: pandas.DataFrame
+    :param reasons: Причины отклонения
+    :type reasons: pandas.Series
+    :returns: Количество добавленных строк
+    :rtype: int
+    """
+    accepted = typed[reasons.isna()]
+    if accepted.empty:
+        return 0
+    columns = [_python_values(accepted[name]) for name in accepted.columns]
+    rows = list(zip(*columns))
+    return tx.execute_many_values(
+        f"INSERT INTO {table_name} ({', '.join(accepted.columns)}) VALUES %s",
+        rows,
+        page_size=len(rows)
+    )
+
+
+def upsert_chunk(tx, table_name, typed, reasons):
+    """
+    Добавление или обновление прошедших проверку строк порции по естественному ключу.
+
+    Строки, совпадающие с записью таблицы, не обновляются (см.
+    bulk_import.upsert_clause).
+
+    :param tx: Транзакция импорта
+    :type tx: database.Transaction
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param typed: Приведенные значения порции
+    :type typed: pandas.DataFrame
+    :param reasons: Причины отклонения
+    :type reasons: pandas.Series
+    :returns: Количество добавленных, обновленных и неизмененных строк
+    :rtype: tuple[int, int, int]
+    """
+    accepted = typed[reasons.isna()]
+    if accepted.empty:
+        return 0, 0, 0
+    columns = [_python_values(accepted[name]) for name in accepted.columns]
+    rows = list(zip(*columns))
+    # xmax новой версии строки равен нулю для добавленных и не равен для обновленных строк
+    result = tx.execute_many_values(
+        f"INSERT INTO {table_name} AS t ({', '.join(accepted.columns)}) VALUES %s "
+        f"{upsert_clause(table_name)} RETURNING xmax = 0",
+        rows,
+        page_size=len(rows),
+        fetch=True
+    )
+    imported = sum(1 for row in result if row[0])
+    updated = len(result) - imported
+    return imported, updated, len(rows) - imported - updated
+
+
+def import_excel_with_connection(conn, table_name, filename, sheet_name=0, merge=False):
+    """
+    Потоковый импорт Excel файла в таблицу через указанное соединение.
+
+    Первая строка листа считается строкой заголовков и пропускается;
+    порядок столбцов задается IMPORT_COLUMNS. Транзакция соединения
+    фиксируется при успехе и откатывается при ошибке.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла Excel
+    :type filename: str
+    :param sheet_name: Имя или индекс листа (None — все листы по порядку)
+    :type sheet_name: str, int или None
+    :param merge: Обновлять записи с тем же естественным ключом (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    :raises: ValueError для неподдерживаемой таблицы, psycopg2.Error при ошибке базы данных
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+    columns = IMPORT_COLUMNS[table_name]
+    names = [column.name for column in columns]
+    start = time.perf_counter()
+
+    malformed = []
+    rejected = []
+    total = 0
+    imported = 0
+    updated = 0
+    unchanged = 0
+    seen = {}
+    # Импорт фиксируется одной транзакцией и откатывается целиком при ошибке
+    with transaction(conn) as tx:
+        rows = iter_sheet_rows(filename, sheet_name)
+        for line_numbers, records in iter_chunks(rows, len(columns), malformed):
+            frame = pd.DataFrame.from_records(records, columns=names, index=line_numbers)
+            total += len(frame)
+            typed, reasons = validate_chunk(frame, table_name, merge=merge)
+            check_keys(tx.cursor, typed, reasons, table_name, seen, merge)
+            if merge:
+                added, changed, same = upsert_chunk(tx, table_name, typed, reasons)
+                imported += added
+                updated += changed
+                unchanged += same
+            else:
+                imported += insert_chunk(tx, table_name, typed, reasons)
+            # Отклоненные строки сохраняются с исходными значениями ячеек
+            for line_no, reason, record in zip(line_numbers, reasons, records):
+                if pd.notna(reason):
+                    rejected.append((line_no, reason, record))
+        if imported:
+            sync_sequence(tx.cursor, table_name)
+    total += len(malformed)
+    rejected = malformed + rejected
+
+    report_path = None
+    if rejected:
+        report_path = rejected_report_path(filename)
+        write_rejected_report(report_path, columns, rejected)
+
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"Импорт {filename} в {table_name}: строк {total}, добавлено {imported}, "
+        f"обновлено {updated}, без изменений {unchanged}, отклонено {len(rejected)}, {elapsed:.2f} с"
+    )
+    return ImportResult(total, imported, len(rejected), report_path, elapsed, updated, unchanged)
+
+
+def import_excel(db, table_name, filename, sheet_name=0, merge=False):
+    """
+    Потоковый импорт Excel файла в таблицу через соединение из пула.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла Excel
+    :type filename: str
+    :param sheet_name: Имя или индекс листа (None — все листы по порядку)
+    :type sheet_name: str, int или None
+    :param merge: Обновлять записи с тем же естественным ключом (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :returns: Результат импорта
+    :rtype: ImportResult
+    """
+    with db.pool.connection() as conn:
+        return import_excel_with_connection(conn, table_name, filename, sheet_name, merge)
@@ -0,0 +1,734 @@
+"""
+Модуль фоновых задач экспорта.
+
+Экспорт в CSV, Excel и PDF выполняется в отдельном пуле потоков, чтобы
+интерфейс не блокировался на время выгрузки. Задачи ставятся в очередь
+менеджером ExportJobManager: одновременно выполняется не более
+MAX_PARALLEL_EXPORTS задач, остальные ждут свободного потока. Ход
+выполнения (выгружено строк, сформировано страниц) и отмена доступны
+в немодальном окне ExportJobsDialog.
+
+Задача экспорта — функция task(progress), которая пишет файл и
+возвращает количество выгруженных строк. Она периодически сообщает
+о ходе работы через progress.report() и проверяет отмену через
+progress.check(). Выполняющийся на сервере запрос отменяется через
+pg_cancel_backend, как и в AsyncQueryRunner.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для измерения времени
+import time
+# Импорт необходимых компонентов из PyQt6
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QProgressBar, QPushButton, QMessageBox)
+# Импорт ошибки отмены запроса
+from psycopg2.extensions import QueryCanceledError
+# Импорт фоновой отправки отмены запроса
+from async_query import get_cancel_pool, send_cancel
+
+# Максимальное количество одновременно выполняемых задач экспорта
+MAX_PARALLEL_EXPORTS = 2
+# Минимальный интервал между сообщениями о ходе выполнения (сек)
+PROGRESS_INTERVAL = 0.2
+
+# Состояния задачи экспорта
+STATE_QUEUED = "В очереди"
+STATE_RUNNING = "Выполняется"
+STATE_CANCELLING = "Отменяется"
+STATE_DONE = "Готово"
+STATE_EMPTY = "Нет данных"
+STATE_CANCELLED = "Отменено"
+STATE_FAILED = "Ошибка"
+
+# Состояния завершенной задачи
+FINAL_STATES = (STATE_DONE, STATE_EMPTY, STATE_CANCELLED, STATE_FAILED)
+
+# Общий для процесса менеджер задач экспорта
+_manager = None
+
+
+class ExportCancelled(Exception):
+    """
+    Исключение, прерывающее задачу экспорта после отмены пользователем.
+    """
+
+
+class _JobSignals(QObject):
+    """
+    Сигналы задачи экспорта.
+
+    QRunnable не является QObject, поэтому сигналы вынесены в отдельный объект.
+    """
+    # Задача начала выполняться (ID задачи)
+    started = pyqtSignal(int)
+    # Ход выполнения (ID задачи, строк, страниц)
+    progress = pyqtSignal(int, int, int)
+    # Успешное завершение (ID задачи, количество строк)
+    finished = pyqtSignal(int, int)
+    # Ошибка выполнения (ID задачи, текст ошибки)
+    failed = pyqtSignal(int, str)
+    # Задача отменена (ID задачи)
+    cancelled = pyqtSignal(int)
+
+
+class ExportProgress:
+    """
+    Ход выполнения задачи экспорта.
+
+    Передается в функцию задачи. Служит также объектом отслеживания
+    соединения (методы attach и detach) для Database.copy_to и
+    Database.iter_batches, что позволяет отменить выполняющийся запрос.
+    """
+
+    def __init__(self, db, job_id, signals):
+        """
+        Инициализация хода выполнения.
+
+        :param db: Объект базы данных (для отправки отмены запроса)
+        :type db: Database
+        :param job_id: Идентификатор задачи
+        :type job_id: int
+        :param signals: Сигналы задачи
+        :type signals: _JobSignals
+        """
+        self.db = db
+        self.job_id = job_id
+        self.signals = signals
+        # Выгружено строк и сформировано страниц
+        self.rows = 0
+        self.pages = 0
+        # Блокировка для согласования выполнения запроса и отмены
+        self._lock = threading.Lock()
+        # Идентификатор серверного процесса во время выполнения запроса
+        self._backend_pid = None
+        # Признак отмены задачи и событие для прерывания ожидания
+        self._cancelled = False
+        self._cancel_event = threading.Event()
+        # Время последнего сообщения о ходе выполнения
+        self._last_report = 0.0
+
+    def attach(self, conn):
+        """
+        Регистрация соединения, на котором выполняется запрос.
+
+        :param conn: Соединение с базой данных
+        :type conn: psycopg2.extensions.connection
+        """
+        with self._lock:
+            self._backend_pid = conn.get_backend_pid()
+
+    def detach(self):
+        """
+        Снятие регистрации соединения после выполнения запроса.
+        """
+        with self._lock:
+            self._backend_pid = None
+
+    def cancel(self):
+        """
+        Отмена задачи.
+
+        Если задача выполняет запрос, серверу отправляется pg_cancel_backend.
+        Вызывать метод следует из фонового потока (см. send_cancel).
+        """
+        with self._lock:
+            self._cancelled = True
+            self._cancel_event.set()
+            if self._backend_pid is None:
+                return
+            # Отмена запроса на сервере через отдельное соединение из пула
+            self.db.fetch_one("SELECT pg_cancel_backend(%s)", (self._backend_pid,))
+            logging.debug(f"Отправлена отмена экспорта {self.job_id} (pid {self._backend_pid})")
+
+    @property
+    def is_cancelled(self):
+        """
+        Признак отмены задачи.
+
+        :rtype: bool
+        """
+        return self._cancelled
+
+    def report(self, rows=None, pages=None, force=False):
+        """
+        Сообщение о ходе выполнения.
+
+        Сигнал отправляется не чаще одного раза в PROGRESS_INTERVAL секунд,
+        чтобы не перегружать очередь событий интерфейса.
+
+        :param rows: Выгружено строк (если None — не изменилось)
+        :type rows: int или None
+        :param pages: Сформировано страниц (если None — не изменилось)
+        :type pages: int или None
+        :param force: Отправить сигнал без учета интервала
+        :type force: bool
+        """
+        if rows is not None:
+            self.rows = rows
+        if pages is not None:
+            self.pages = pages
+        now = time.monotonic()
+        if force or now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self.signals.progress.emit(self.job_id, self.rows, self.pages)
+
+    def check(self):
+        """
+        Проверка отмены задачи.
+
+        :raises: ExportCancelled, если задача отменена
+        """
+        if self._cancelled:
+            raise ExportCancelled()
+
+    def wait(self, seconds):
+        """
+        Пауза в задаче (например, перед повторной попыткой), прерываемая отменой.
+
+        :param seconds: Длительность паузы (сек)
+        :type seconds: float
+        :raises: ExportCancelled, если задача отменена до или во время паузы
+        """
+        if self._cancel_event.wait(seconds):
+            raise ExportCancelled()
+
+
+class ExportJob(QRunnable):
+    """
+    Задача экспорта, выполняемая в пуле потоков.
+
+    Недописанный файл удаляется при ошибке, отмене и при отсутствии данных,
+    если задача не читает существующий файл (keep_file, например импорт).
+    """
+
+    def __init__(self, db, job_id, filename, task, keep_file=False):
+        """
+        Инициализация задачи экспорта.
+
+        :param db: Объект базы данных
+        :type db: Database
+        :param job_id: Идентификатор задачи
+        :type job_id: int
+        :param filename: Имя создаваемого файла
+        :type filename: str
+        :param task: Функция task(progress), возвращающая количество строк
+        :type task: callable
+        :param keep_file: Не удалять файл при ошибке и отмене
+        :type keep_file: bool
+        """
+        super().__init__()
+        # Объект задачи удаляется менеджером, а не пулом потоков
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.filename = filename
+        self.task = task
+        self.keep_file = keep_file
+        # Объект с сигналами для передачи результата
+        self.signals = _JobSignals()
+        # Ход выполнения и отмена
+        self.progress = ExportProgress(db, job_id, self.signals)
+
+    def run(self):
+        """
+        Выполнение задачи в рабочем потоке.
+
+        Результат, ошибка или факт отмены передаются сигналами.
+        """
+        # Задача отменена до начала выполнения
+        if self.progress.is_cancelled:
+            self.signals.cancelled.emit(self.job_id)
+            return
+
+        self.signals.started.emit(self.job_id)
+        try:
+            rows = self.task(self.progress)
+        except (ExportCancelled, QueryCanceledError) as e:
+            self._remove_file()
+            if self.progress.is_cancelled:
+                self.signals.cancelled.emit(self.job_id)
+            else:
+                # Запрос прерван сервером (например, по statement_timeout)
+                logging.error(f"Ошибка фонового экспорта в {self.filename}: {str(e)}")
+                self.signals.failed.emit(self.job_id, str(e))
+        except Exception as e:
+            self._remove_file()
+            # Логирование ошибки экспорта
+            logging.error(f"Ошибка фонового экспорта в {self.filename}: {str(e)}")
+            self.signals.failed.emit(self.job_id, str(e))
+        else:
+            if not rows:
+                self._remove_file()
+            self.progress.report(rows=rows or 0, force=True)
+            self.signals.finished.emit(self.job_id, rows or 0)
+
+    def _remove_file(self):
+        """
+        Удаление недописанного файла.
+
+        Папка (пакетное формирование документов) не удаляется: записанные
+        в нее документы завершены.
+        """
+        if self.keep_file:
+            return
+        try:
+            if os.path.isfile(self.filename):
+                os.remove(self.filename)
+        except OSError as e:
+            logging.error(f"Не удалось удалить файл {self.filename}: {str(e)}")
+
+
+class ExportJobInfo:
+    """
+    Сведения о задаче экспорта для отображения в окне задач.
+    """
+
+    def __init__(self, job, title, on_done):
+        """
+        Инициализация сведений о задаче.
+
+        :param job: Задача экспорта
+        :type job: ExportJob
+        :param title: Описание задачи
+        :type title: str
+        :param on_done: Обработчик успешного завершения, принимает количество строк
+        :type on_done: callable или None
+        """
+        self.job = job
+        self.title = title
+        self.on_done = on_done
+        self.state = STATE_QUEUED
+        self.rows = 0
+        self.pages = 0
+        self.error = ""
+        self.started_at = None
+        self.elapsed = None
+
+    @property
+    def job_id(self):
+        """
+        Идентификатор задачи.
+
+        :rtype: int
+        """
+        return self.job.job_id
+
+    @property
+    def filename(self):
+        """
+        Имя создаваемого файла.
+
+        :rtype: str
+        """
+        return self.job.filename
+
+    @property
+    def is_finished(self):
+        """
+        Признак завершения задачи.
+
+        :rtype: bool
+        """
+        return self.state in FINAL_STATES
+
+    def describe(self):
+        """
+        Текстовое описание состояния задачи.
+
+        :returns: Состояние с количеством строк и страниц
+        :rtype: str
+        """
+        parts = [self.state]
+        if self.rows:
+            parts.append(f"строк: {self.rows:,}".replace(",", " "))
+        if self.pages:
+            parts.append(f"страниц: {self.pages}")
+        if self.elapsed is not None and self.state == STATE_DONE:
+            parts.append(f"{self.elapsed:.1f} с")
+        if self.error:
+            parts.append(self.error)
+        return ", ".join(parts)
+
+
+class ExportJobManager(QObject):
+    """
+    Очередь фоновых задач экспорта.
+
+    Объект живет в потоке интерфейса: результаты задач обрабатываются
+    в нем, поэтому обработчики могут показывать сообщения и менять виджеты.
+    """
+    # Задача добавлена (ID задачи)
+    job_added = pyqtSignal(int)
+    # Состояние задачи изменилось (ID задачи)
+    job_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        """
+        Инициализация менеджера задач.
+
+        :param parent: Родительский объект
+        :type parent: QObject или None
+        """
+        super().__init__(parent)
+        # Отдельный пул потоков, чтобы экспорт не занимал потоки фоновых запросов
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(MAX_PARALLEL_EXPORTS)
+        # Задачи в порядке добавления: ID -> ExportJobInfo
+        self.jobs = {}
+        self._next_job_id = 0
+        # Окно задач (создается при первом показе)
+        self._dialog = None
+
+    def submit(self, db, title, filename, task, on_done=None, parent_widget=None, keep_file=False):
+        """
+        Постановка задачи экспорта в очередь.
+
+        :param db: Объект базы данных
+        :type db: Database
+        :param title: Описание задачи для окна задач
+        :type title: str
+        :param filename: Имя создаваемого файла
+        :type filename: str
+        :param task: Функция task(progress), возвращающая количество строк
+        :type task: callable
+        :param on_done: Обработчик успешного завершения, принимает количество строк
+        :type on_done: callable или None
+        :param parent_widget: Виджет, рядом с которым показывается окно задач
+        :type parent_widget: QWidget или None
+        :param keep_file: Не удалять файл при ошибке и отмене (файл читается задачей)
+        :type keep_file: bool
+        :returns: Идентификатор задачи
+        :rtype: int
+        """
+        self._next_job_id += 1
+        job = ExportJob(db, self._next_job_id, filename, task, keep_file)
+        job.signals.started.connect(self._on_started)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.cancelled.connect(self._on_cancelled)
+        self.jobs[job.job_id] = ExportJobInfo(job, title, on_done)
+
+        # Запуск задачи (или постановка в очередь пула потоков)
+        self.thread_pool.start(job)
+        self.job_added.emit(job.job_id)
+        self.show_dialog(parent_widget)
+        return job.job_id
+
+    def cancel(self, job_id):
+        """
+        Отмена задачи экспорта.
+
+        Задача из очереди снимается сразу, у выполняющейся задачи
+        отменяется запрос на сервере.
+
+        :param job_id: Идентификатор задачи
+        :type job_id: int
+        """
+        info = self.jobs.get(job_id)
+        if info is None or info.is_finished or info.state == STATE_CANCELLING:
+            return
+        if self.thread_pool.tryTake(info.job):
+            # Задача еще не начала выполняться
+            self._set_final(info, STATE_CANCELLED)
+            return
+        info.state = STATE_CANCELLING
+        self.job_changed.emit(job_id)
+        # Отправка отмены в отдельном пуле: потоки экспорта могут быть заняты
+        send_cancel(info.job.progress)
+
+    def cancel_all(self):
+        """
+        Отмена всех незавершенных задач.
+        """
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def shutdown(self, timeout_ms=5000):
+        """
+        Отмена задач и ожидание их завершения при выходе из приложения.
+
+        :param timeout_ms: Максимальное время ожидания (мс)
+        :type timeout_ms: int
+        """
+        self.cancel_all()
+        get_cancel_pool().waitForDone(timeout_ms)
+        self.thread_pool.waitForDone(timeout_ms)
+
+    def clear_finished(self):
+        """
+        Удаление завершенных задач из списка.
+        """
+        for job_id in [job_id for job_id, info in self.jobs.items() if info.is_finished]:
+            del self.jobs[job_id]
+
+    def active_count(self):
+        """
+        Количество незавершенных задач.
+
+        :rtype: int
+        """
+        return sum(1 for info in self.jobs.values() if not info.is_finished)
+
+    def show_dialog(self, parent_widget=None):
+        """
+        Показ окна задач экспорта.
+
+        :param parent_widget: Виджет, рядом с которым показывается окно
+        :type parent_widget: QWidget или None
+        """
+        if self._dialog is None:
+            self._dialog = ExportJobsDialog(self, parent_widget)
+        self._dialog.show()
+        self._dialog.raise_()
+
+    def _set_final(self, info, state):
+        """
+        Перевод задачи в завершенное состояние.
+
+        :param info: Сведения о задаче
+        :type info: ExportJobInfo
+        :param state: Итоговое состояние
+        :type state: str
+        """
+        info.state = state
+        if info.started_at is not None:
+            info.elapsed = time.monotonic() - info.started_at
+        self.job_changed.emit(info.job_id)
+
+    @pyqtSlot(int)
+    def _on_started(self, job_id):
+        """
+        Обработка начала выполнения задачи.
+        """
+        info = self.jobs.get(job_id)
+        if info is None:
+            return
+        info.started_at = time.monotonic()
+        if info.state == STATE_QUEUED:
+            info.state = STATE_RUNNING
+        self.job_changed.emit(job_id)
+
+    @pyqtSlot(int, int, int)
+    def _on_progress(self, job_id, rows, pages):
+        """
+        Обработка сообщения о ходе выполнения.
+        """
+        info = self.jobs.get(job_id)
+        if info is None or info.is_finished:
+            return
+        info.rows = rows
+        info.pages = pages
+        self.job_changed.emit(job_id)
+
+    @pyqtSlot(int, int)
+    def _on_finished(self, job_id, rows):
+        """
+        Обработка успешного завершения задачи.
+        """
+        info = self.jobs.get(job_id)
+        if info is None:
+            return
+        info.rows = rows
+        if not rows:
+            self._set_final(info, STATE_EMPTY)
+            QMessageBox.warning(QApplication.activeWindow(), "Экспорт данных", "Нет данных для экспорта")
+            return
+        self._set_final(info, STATE_DONE)
+        if info.on_done:
+            try:
+                info.on_done(rows)
+            except Exception as e:
+                # Необработанное исключение в слоте PyQt6 завершает приложение
+                logging.error(f"Ошибка обработки результата экспорта: {str(e)}")
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, job_id, error):
+        """
+        Обработка ошибки выполнения задачи.
+        """
+        info = self.jobs.get(job_id)
+        if info is None:
+            return
+        info.error = error
+        self._set_final(info, STATE_FAILED)
+        QMessageBox.critical(QApplication.activeWindow(), "Ошибка экспорта",
+                             f"{info.title}: {error}")
+
+    @pyqtSlot(int)
+    def _on_cancelled(self, job_id):
+        """
+        Обработка отмены задачи.
+        """
+        info = self.jobs.get(job_id)
+        if info is None:
+            return
+        self._set_final(info, STATE_CANCELLED)
+
+
+class ExportJobsDialog(QDialog):
+    """
+    Немодальное окно со списком задач экспорта.
+
+    Показывает состояние и ход выполнения каждой задачи и позволяет
+    отменить задачу, не дожидаясь ее завершения.
+    """
+    # Столбцы таблицы задач
+    COLUMNS = ["Задача", "Файл", "Состояние", "Ход выполнения", ""]
+
+    def __init__(self, manager, parent=None):
+        """
+        Инициализация окна задач.
+
+        :param manager: Менеджер задач экспорта
+        :type manager: ExportJobManager
+        :param parent: Родительский виджет
+        :type parent: QWidget или None
+        """
+        super().__init__(parent)
+        self.manager = manager
+        self.setWindowTitle("Фоновые задачи экспорта")
+        self.setModal(False)
+        self.resize(760, 300)
+        # Строки таблицы: ID задачи -> номер строки
+        self._rows = {}
+        self.init_ui()
+
+        # Обновление таблицы при изменении задач
+        manager.job_added.connect(self.add_job)
+        manager.job_changed.connect(self.update_job)
+        for job_id in manager.jobs:
+            self.add_job(job_id)
+
+    def init_ui(self):
+        """
+        Создание элементов окна.
+        """
+        layout = QVBoxLayout(self)
+
+        # Таблица задач
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table)
+
+        # Кнопки управления
+        buttons = QHBoxLayout()
+        self.btn_clear = QPushButton("Очистить завершенные")
+        self.btn_clear.clicked.connect(self.clear_finished)
+        buttons.addWidget(self.btn_clear)
+        buttons.addStretch()
+        self.btn_close = QPushButton("Закрыть")
+        self.btn_close.clicked.connect(self.hide)
+        buttons.addWidget(self.btn_close)
+        layout.addLayout(buttons)
+
+    @pyqtSlot(int)
+    def add_job(self, job_id):
+        """
+        Добавление строки задачи в таблицу.
+
+        :param job_id: Идентификатор задачи
+        :type job_id: int
+        """
+        info = self.manager.jobs.get(job_id)
+        if info is None or job_id in self._rows:
+            return
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self._rows[job_id] = row
+        self.table.setItem(row, 0, QTableWidgetItem(info.title))
+        self.table.setItem(row, 1, QTableWidgetItem(os.path.basename(info.filename)))
+        self.table.item(row, 1).setToolTip(info.filename)
+        self.table.setItem(row, 2, QTableWidgetItem())
+
+        # Индикатор хода выполнения
+        progress_bar = QProgressBar()
+        progress_bar.setTextVisible(False)
+        self.table.setCellWidget(row, 3, progress_bar)
+
+        # Кнопка отмены задачи
+        btn_cancel = QPushButton("Отменить")
+        btn_cancel.clicked.connect(lambda checked=False, j=job_id: self.manager.cancel(j))
+        self.table.setCellWidget(row, 4, btn_cancel)
+
+        self.update_job(job_id)
+
+    @pyqtSlot(int)
+    def update_job(self, job_id):
+        """
+        Обновление строки задачи.
+
+        Количество строк и страниц заранее неизвестно, поэтому во время
+        выполнения индикатор работает в режиме ожидания, а ход выполнения
+        выводится текстом в столбце состояния.
+
+        :param job_id: Идентификатор задачи
+        :type job_id: int
+        """
+        info = self.manager.jobs.get(job_id)
+        row = self._rows.get(job_id)
+        if info is None or row is None:
+            return
+        self.table.item(row, 2).setText(info.describe())
+
+        progress_bar = self.table.cellWidget(row, 3)
+        if info.state in (STATE_RUNNING, STATE_CANCELLING):
+            # Режим ожидания
+            progress_bar.setRange(0, 0)
+        else:
+            progress_bar.setRange(0, 1)
+            progress_bar.setValue(1 if info.state == STATE_DONE else 0)
+
+        self.table.cellWidget(row, 4).setEnabled(
+            not info.is_finished and info.state != STATE_CANCELLING)
+
+    def clear_finished(self):
+        """
+        Удаление завершенных задач из списка и таблицы.
+        """
+        self.manager.clear_finished()
+        self.table.setRowCount(0)
+        self._rows.clear()
+        for job_id in self.manager.jobs:
+            self.add_job(job_id)
+
+
+def get_export_manager():
+    """
+    Получение общего менеджера задач экспорта.
+
+    Менеджер создается при первом обращении и должен использоваться
+    только из потока интерфейса.
+
+    :returns: Менеджер задач экспорта
+    :rtype: ExportJobManager
+    """
+    global _manager
+    if _manager is None:
+        _manager = ExportJobManager(QApplication.instance())
+    return _manager
+
+
+def shutdown_exports():
+    """
+    Отмена задач экспорта при выходе из приложения.
+
+    Вызывается до закрытия пула соединений.
+
+    :returns: None
+    """
+    if _manager is not None:
+        _manager.shutdown()
@@ -0,0 +1,446 @@
+"""
+Модуль предварительной проверки файлов импорта (пробный запуск).
+
+Файл CSV или Excel разбирается локально целиком и проверяется без
+записи в базу данных теми же правилами, что и при импорте:
+
+- обязательные поля, формат значений, допустимые категории и статусы,
+  диапазоны чисел (excel_import.validate_chunk);
+- внешние ключи — по множествам идентификаторов таблиц ссылок
+  (products, warehouses, suppliers), загруженным одним запросом
+  на таблицу перед проверкой;
+- уникальность — по ключам целевой таблицы, загруженным так же,
+  и по повторам внутри файла; в режиме обновления (merge=True) наличие
+  естественного ключа в таблице не считается ошибкой.
+
+Строки проверяются порциями по PREFLIGHT_CHUNK_ROWS векторными
+операциями pandas, поэтому файл в 1 000 000 строк проверяется за
+секунды. Результат — сводка PreflightReport: количество строк,
+количество ошибок по каждому правилу и первые строки с каждой ошибкой.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с CSV файлами
+import csv
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для измерения времени
+import time
+# Импорт модуля для логирования
+import logging
+# Импорт библиотеки для работы с массивами
+import numpy as np
+# Импорт библиотеки для работы с данными
+import pandas as pd
+# Импорт описаний столбцов и ключей таблиц импорта
+from bulk_import import IMPORT_COLUMNS, FOREIGN_KEYS, MERGE_KEYS, unique_keys
+# Импорт чтения листов Excel и векторной проверки порций
+from excel_import import iter_sheet_rows, iter_chunks, validate_chunk, remember_keys, seen_mask
+
+# Строк в одной порции проверки
+PREFLIGHT_CHUNK_ROWS = 100000
+# Количество сохраняемых примеров строк для каждого правила
+PREFLIGHT_SAMPLES = 10
+# Расширения файлов CSV
+CSV_EXTENSIONS = (".csv", ".txt")
+
+
+class PreflightReport:
+    """
+    Сводка предварительной проверки файла импорта.
+
+    Для каждого нарушенного правила (причины отклонения) хранится
+    количество строк и первые строки файла с этой ошибкой. Правила
+    перечисляются в порядке первого появления.
+    """
+
+    def __init__(self, table_name, filename, samples=PREFLIGHT_SAMPLES):
+        """
+        Инициализация сводки.
+
+        :param table_name: Имя целевой таблицы
+        :type table_name: str
+        :param filename: Имя проверяемого файла
+        :type filename: str
+        :param samples: Количество сохраняемых примеров строк для правила
+        :type samples: int
+        """
+        self.table_name = table_name
+        self.filename = filename
+        self.samples_limit = samples
+        # Количество строк данных в файле
+        self.total = 0
+        # Количество строк по правилам: причина -> количество
+        self.errors = {}
+        # Примеры строк по правилам: причина -> [(номер строки, значения)]
+        self.samples = {}
+        # Время проверки (с)
+        self.elapsed = 0.0
+
+    @property
+    def rejected(self):
+        """
+        Количество строк с ошибками.
+
+        :rtype: int
+        """
+        return sum(self.errors.values())
+
+    @property
+    def valid(self):
+        """
+        Количество строк без ошибок.
+
+        :rtype: int
+        """
+        return self.total - self.rejected
+
+    def add(self, line_no, reason, values):
+        """
+        Учет одной строки с ошибкой.
+
+        :param line_no: Номер строки файла
+        :type line_no: int
+        :param reason: Причина отклонения
+        :type reason: str
+        :param values: Значения полей строки
+        :type values: list
+        """
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+        samples = self.samples.setdefault(reason, [])
+        if len(samples) < self.samples_limit:
+            samples.append((line_no, values))
+
+    def add_chunk(self, line_numbers, records, reasons):
+        """
+        Учет результатов проверки порции.
+
+        :param line_numbers: Номера строк порции
+        :type line_numbers: list[int]
+        :param records: Значения строк порции
+        :type records: list[list]
+        :param reasons: Причины отклонения (NULL для прошедших проверку)
+        :type reasons: pandas.Series
+        """
+        self.total += len(records)
+        failed = reasons.notna().to_numpy()
+        if not failed.any():
+            return
+        for reason, count in reasons[failed].value_counts(sort=False).items():
+            self.errors[reason] = self.errors.get(reason, 0) + int(count)
+            samples = self.samples.setdefault(reason, [])
+            need = self.samples_limit - len(samples)
+            if need > 0:
+                # Примеры выбираются только для правил, по которым их еще недостаточно
+                positions = (reasons.to_numpy() == reason).nonzero()[0][:need]
+                samples.extend((line_numbers[p], records[p]) for p in positions)
+
+    def summary(self, samples=None):
+        """
+        Текст сводки для пользователя.
+
+        :param samples: Количество примеров строк на правило (если None — все сохраненные)
+        :type samples: int или None
+        :rtype: str
+        """
+        lines = [
+            f"Файл: {self.filename}",
+            f"Таблица: {self.table_name}",
+            f"Строк: {self.total}, без ошибок: {self.valid}, с ошибками: {self.rejected}",
+            f"Проверка заняла {self.elapsed:.1f} с",
+        ]
+        for reason, count in sorted(self.errors.items(), key=lambda item: -item[1]):
+            lines.append("")
+            lines.append(f"{reason}: {count}")
+            for line_no, values in self.samples[reason][:samples]:
+                shown = "; ".join("" if value is None else str(value) for value in values)
+                lines.append(f"  строка {line_no}: {shown}")
+        return "\n".join(lines)
+
+
+def load_references(db, table_name, merge=False):
+    """
+    Загрузка идентификаторов таблиц ссылок и ключей целевой таблицы.
+
+    В режиме обновления для каждого ключа загружается и естественный
+    ключ записи, а значения самого естественного ключа не загружаются.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param merge: Режим обновления
+    :type merge: bool
+    :returns: Идентификаторы по столбцам внешних ключей и существующие
+        значения ключей уникальности целевой таблицы: ключ -> (значения
+        ключа, значения ключа с естественным ключом записи или None)
+    :rtype: tuple[dict, dict]
+    """
+    foreign = {}
+    for name, ref_table, ref_column in FOREIGN_KEYS.get(table_name, []):
+        rows = db.fetch_rows(f"SELECT {ref_column} FROM {ref_table}")
+        foreign[name] = pd.Index([row[0] for row in rows])
+
+    unique = {}
+    merge_key = MERGE_KEYS[table_name] if merge else None
+    for key in unique_keys(table_name, merge):
+        if key == merge_key:
+            continue
+        owner = key + tuple(name for name in merge_key or () if name not in key)
+        rows = db.fetch_rows(f"SELECT {', '.join(owner)} FROM {table_name}")
+        if not rows:
+            unique[key] = (None, None)
+            continue
+        values = pd.MultiIndex.from_tuples([row[:len(key)] for row in rows], names=key)
+        unique[key] = (values, pd.MultiIndex.from_tuples(rows, names=owner) if merge_key else None)
+    return foreign, unique
+
+
+def check_cached_keys(typed, reasons, table_name, foreign, unique, seen, merge=False):
+    """
+    Проверка внешних ключей и уникальности порции по загруженным ключам.
+
+    :param typed: Приведенные значения порции
+    :type typed: pandas.DataFrame
+    :param reasons: Причины отклонения (дополняются)
+    :type reasons: pandas.Series
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param foreign: Идентификаторы таблиц ссылок по столбцам (см. load_references)
+    :type foreign: dict
+    :param unique: Существующие значения ключей целевой таблицы (см. load_references)
+    :type unique: dict
+    :param seen: Значения ключей строк без ошибок из предыдущих порций: ключ -> MultiIndex
+    :type seen: dict
+    :param merge: Режим обновления (см. excel_import.check_keys)
+    :type merge: bool
+    """
+    def reject(mask, reason):
+        mask = pd.Series(mask, index=reasons.index).astype(bool) & reasons.isna()
+        reasons[mask] = reason
+
+    for name, ref_table, _ in FOREIGN_KEYS.get(table_name, []):
+        values = typed[name]
+        reject(values.notna() & ~values.isin(foreign[name]), f"Поле {name}: нет записи в таблице {ref_table}")
+
+    keys = unique_keys(table_name, merge)
+    for key in keys:
+        label = ", ".join(key)
+        present = typed[list(key)].notna().all(axis=1).to_numpy()
+        values = pd.MultiIndex.from_frame(typed[list(key)])
+        existing = np.zeros_like(present)
+        if key in unique and unique[key][0] is not None:
+            table_values, table_owners = unique[key]
+            existing = present & values.isin(table_values)
+            if table_owners is not None:
+                # Ключ той же записи, которая будет обновлена, не ошибка
+                owner = list(table_owners.names)
+                existing &= ~pd.MultiIndex.from_frame(typed[owner]).isin(table_owners)
+        reject(existing, f"Значение ({label}) уже есть в таблице {table_name}")
+        # Повторы ищутся только среди строк без ошибок; первая из повторяющихся принимается
+        accepted = present & reasons.isna().to_numpy()
+        duplicated = np.zeros(len(typed), dtype=bool)
+        candidates = values[accepted]
+        duplicated[accepted] = candidates.duplicated() | seen_mask(seen, key, candidates)
+        reject(duplicated, f"Значение ({label}) повторяется в файле")
+
+    # Ключи строк без ошибок учитываются при проверке следующих порций
+    accepted = reasons.isna().to_numpy()
+    for key in keys:
+        remember_keys(seen, key, pd.MultiIndex.from_frame(typed.loc[accepted, list(key)]))
+
+
+def iter_csv_chunks(csvfile, delimiter, columns_count, rejected, chunk_rows=PREFLIGHT_CHUNK_ROWS):
+    """
+    Чтение строк CSV файла порциями.
+
+    Правила разбора совпадают с bulk_import.CsvCopySource: первая строка
+    (заголовки) и пустые строки пропускаются, строки с другим количеством
+    полей отклоняются.
+
+    :param csvfile: Открытый файл CSV
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param columns_count: Ожидаемое количество полей в строке
+    :type columns_count: int
+    :param rejected: Отклоненные строки (пополняется парами (номер строки, причина, поля))
+    :type rejected: list
+    :param chunk_rows: Строк в порции
+    :type chunk_rows: int
+    :returns: Генератор пар (номера строк порции, значения строк порции)
+    :rtype: generator
+    """
+    reader = csv.reader(csvfile, delimiter=delimiter)
+    next(reader, None)
+    line_numbers = []
+    records = []
+    for row in reader:
+        # Пустые строки файла пропускаются
+        if not row or row == [""]:
+            continue
+        if len(row) != columns_count:
+            rejected.append((
+                reader.line_num,
+                f"Ожидается полей: {columns_count}, в строке: {len(row)}",
+                row
+            ))
+            continue
+        line_numbers.append(reader.line_num)
+        records.append(row)
+        if len(records) >= chunk_rows:
+            yield line_numbers, records
+            line_numbers, records = [], []
+    if records:
+        yield line_numbers, records
+
+
+def _run(db, table_name, filename, chunks, rejected, form_rules, samples, merge, progress=None):
+    """
+    Проверка порций строк файла.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя проверяемого файла
+    :type filename: str
+    :param chunks: Генератор порций (номера строк, значения строк)
+    :param rejected: Отклоненные при разборе строки (заполняется генератором порций)
+    :type rejected: list
+    :param form_rules: Применять правила форм ввода Validator (как импорт Excel)
+    :type form_rules: bool
+    :param samples: Количество примеров строк для каждого правила
+    :type samples: int
+    :param merge: Режим обновления
+    :type merge: bool
+    :param progress: Ход выполнения фоновой задачи (сообщение о проверенных
+        строках и проверка отмены между порциями)
+    :type progress: ExportProgress или None
+    :returns: Сводка проверки
+    :rtype: PreflightReport
+    :raises: ExportCancelled при отмене задачи
+    """
+    start = time.perf_counter()
+    report = PreflightReport(table_name, filename, samples)
+    names = [column.name for column in IMPORT_COLUMNS[table_name]]
+    foreign, unique = load_references(db, table_name, merge)
+    seen = {}
+    for line_numbers, records in chunks:
+        if progress is not None:
+            progress.report(rows=report.total)
+            progress.check()
+        frame = pd.DataFrame.from_records(records, columns=names, index=line_numbers)
+        typed, reasons = validate_chunk(frame, table_name, form_rules, merge)
+        check_cached_keys(typed, reasons, table_name, foreign, unique, seen, merge)
+        report.add_chunk(line_numbers, records, reasons)
+    # Строки, отклоненные при разборе (неверное количество полей)
+    for line_no, reason, values in rejected:
+        report.total += 1
+        report.add(line_no, reason, values)
+    report.elapsed = time.perf_counter() - start
+    logging.info(
+        f"Проверка {filename} для {table_name}: строк {report.total}, "
+        f"с ошибками {report.rejected}, {report.elapsed:.2f} с"
+    )
+    return report
+
+
+def preflight_csv(db, table_name, filename, delimiter=",", samples=PREFLIGHT_SAMPLES, merge=False,
+                  progress=None):
+    """
+    Предварительная проверка CSV файла без записи в базу данных.
+
+    Применяются правила импорта CSV (bulk_import): значения проверяются
+    в том виде, в котором они записаны в файле.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла CSV
+    :type filename: str
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param samples: Количество примеров строк для каждого правила
+    :type samples: int
+    :param merge: Проверка для импорта с обновлением (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :param progress: Ход выполнения фоновой задачи (сообщение о проверенных
+        строках и проверка отмены между порциями)
+    :type progress: ExportProgress или None
+    :returns: Сводка проверки
+    :rtype: PreflightReport
+    :raises: ValueError для неподдерживаемой таблицы
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+    rejected = []
+    with open(filename, "r", encoding="utf-8-sig", newline="") as csvfile:
+        chunks = iter_csv_chunks(csvfile, delimiter, len(IMPORT_COLUMNS[table_name]), rejected)
+        return _run(db, table_name, filename, chunks, rejected, False, samples, merge, progress)
+
+
+def preflight_excel(db, table_name, filename, sheet_name=0, samples=PREFLIGHT_SAMPLES, merge=False,
+                    progress=None):
+    """
+    Предварительная проверка Excel файла без записи в базу данных.
+
+    Применяются правила импорта Excel (excel_import), включая правила
+    форм ввода Validator.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла Excel
+    :type filename: str
+    :param sheet_name: Имя или индекс листа (None — все листы по порядку)
+    :type sheet_name: str, int или None
+    :param samples: Количество примеров строк для каждого правила
+    :type samples: int
+    :param merge: Проверка для импорта с обновлением (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :param progress: Ход выполнения фоновой задачи (сообщение о проверенных
+        строках и проверка отмены между порциями)
+    :type progress: ExportProgress или None
+    :returns: Сводка проверки
+    :rtype: PreflightReport
+    :raises: ValueError для неподдерживаемой таблицы
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+    rejected = []
+    rows = iter_sheet_rows(filename, sheet_name)
+    chunks = iter_chunks(rows, len(IMPORT_COLUMNS[table_name]), rejected, PREFLIGHT_CHUNK_ROWS)
+    return _run(db, table_name, filename, chunks, rejected, True, samples, merge, progress)
+
+
+def preflight_file(db, table_name, filename, delimiter=",", sheet_name=0, samples=PREFLIGHT_SAMPLES,
+                   merge=False, progress=None):
+    """
+    Предварительная проверка файла CSV или Excel (формат — по расширению).
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    :param delimiter: Разделитель (для CSV)
+    :type delimiter: str
+    :param sheet_name: Имя или индекс листа (для Excel)
+    :type sheet_name: str, int или None
+    :param samples: Количество примеров строк для каждого правила
+    :type samples: int
+    :param merge: Проверка для импорта с обновлением (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :param progress: Ход выполнения фоновой задачи (сообщение о проверенных
+        строках и проверка отмены между порциями)
+    :type progress: ExportProgress или None
+    :returns: Сводка проверки
+    :rtype: PreflightReport
+    """
+    if os.path.splitext(filename)[1].lower() in CSV_EXTENSIONS:
+        return preflight_csv(db, table_name, filename, delimiter, samples, merge, progress)
+    return preflight_excel(db, table_name, filename, sheet_name, samples, merge, progress)
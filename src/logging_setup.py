@@ -0,0 +1,314 @@
+"""
+Модуль настройки журнала приложения.
+
+Записи журнала из потока интерфейса и фоновых потоков помещаются в
+очередь (QueueHandler) и записываются в файл отдельным потоком
+(QueueListener), поэтому вызов logging.info и т. п. не ждет дисковой
+операции. Файл журнала ограничивается по размеру с ротацией
+(RotatingFileHandler), каждая запись сохраняется отдельной строкой JSON.
+Уровни журнала задаются для всего приложения и отдельно для модулей
+в секциях [logging] и [logging.levels] файла config.ini.
+
+Пример настройки::
+
+    [logging]
+    level = INFO
+    max_bytes = 10485760
+    backup_count = 5
+
+    [logging.levels]
+    stock_tab = DEBUG
+    slow_queries = WARNING
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для логирования
+import logging
+# Импорт обработчиков очереди и ротации файла
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+# Импорт модуля для работы с JSON
+import json
+# Импорт модуля для работы с очередями
+import queue
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для работы с конфигурационным файлом
+import configparser
+# Импорт модуля для работы с путями
+import os
+# Импорт модуля для работы с датой и временем
+import datetime
+# Импорт модуля для копирования записи журнала
+import copy
+# Импорт функции регистрации действий при завершении процесса
+import atexit
+
+# Параметры журнала по умолчанию (используются, если в config.ini нет секции [logging])
+DEFAULT_LOGGING_PARAMS = {
+    "level": "DEBUG",            # Уровень журнала приложения
+    "max_bytes": 10485760,       # Размер файла журнала до ротации (байт)
+    "backup_count": 5,           # Количество сохраняемых старых файлов
+    "queue_size": 10000,         # Записей в очереди до отбрасывания новых
+}
+
+# Поток записи журнала и обработчик очереди текущей настройки
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Форматирование записи журнала в одну строку JSON.
+
+    Поля: время (ISO 8601), уровень, имя журнала, модуль, функция, строка,
+    поток, сообщение и, при наличии, текст исключения.
+    """
+
+    def format(self, record):
+        """
+        Преобразование записи в строку JSON.
+
+        :param record: Запись журнала
+        :type record: logging.LogRecord
+        :rtype: str
+        """
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "func": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Уровни журнала для отдельных модулей.
+
+    Приложение пишет в корневой журнал (logging.info и т. п.), поэтому
+    уровень ищется по имени журнала, а затем по имени модуля, из которого
+    сделана запись (например, stock_tab).
+    """
+
+    def __init__(self, level, levels=None):
+        """
+        Инициализация фильтра.
+
+        :param level: Уровень по умолчанию
+        :type level: int
+        :param levels: Уровни по именам журналов и модулей
+        :type levels: dict или None
+        """
+        super().__init__()
+        self.level = level
+        self.levels = levels or {}
+
+    def filter(self, record):
+        """
+        Пропускать ли запись.
+
+        :param record: Запись журнала
+        :type record: logging.LogRecord
+        :rtype: bool
+        """
+        if self.levels:
+            level = self.levels.get(record.name)
+            if level is None:
+                level = self.levels.get(record.module, self.level)
+        else:
+            level = self.level
+        return record.levelno >= level
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Обработчик, помещающий записи в очередь без ожидания.
+
+    В вызывающем потоке выполняется только подстановка аргументов
+    сообщения; исключение форматируется потоком записи. Если очередь
+    переполнена (диск не успевает), запись отбрасывается и учитывается
+    в счетчике dropped, а вызывающий поток не блокируется.
+    """
+
+    def __init__(self, log_queue):
+        """
+        Инициализация обработчика.
+
+        :param log_queue: Очередь записей
+        :type log_queue: queue.Queue
+        """
+        super().__init__(log_queue)
+        # Количество отброшенных записей
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Подготовка записи к передаче в поток записи.
+
+        :param record: Запись журнала
+        :type record: logging.LogRecord
+        :rtype: logging.LogRecord
+        """
+        record = copy.copy(record)
+        # Аргументы подставляются сразу: объекты могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        """
+        Помещение записи в очередь без ожидания.
+
+        :param record: Подготовленная запись
+        :type record: logging.LogRecord
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    """
+    Поток записи журнала, дожидающийся места в очереди для сигнала остановки.
+    """
+
+    def enqueue_sentinel(self):
+        """
+        Помещение сигнала остановки в очередь (с ожиданием, если очередь заполнена).
+        """
+        self.queue.put(self._sentinel)
+
+
+def load_logging_config():
+    """
+    Загрузка параметров журнала из config.ini.
+
+    :returns: Кортеж (параметры журнала, уровни по модулям)
+    :rtype: tuple[dict, dict]
+    """
+    config = configparser.ConfigParser()
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+    config.read(config_path, encoding='utf-8')
+
+    params = dict(DEFAULT_LOGGING_PARAMS)
+    if config.has_section("logging"):
+        for key, default in params.items():
+            if isinstance(default, int):
+                params[key] = config.getint("logging", key, fallback=default)
+            else:
+                params[key] = config.get("logging", key, fallback=default)
+
+    levels = {}
+    if config.has_section("logging.levels"):
+        for name, level in config.items("logging.levels"):
+            levels[name] = level
+    return params, levels
+
+
+def _level_number(level):
+    """
+    Числовой уровень журнала по имени или числу.
+
+    :param level: Уровень (например, "INFO" или 20)
+    :type level: str или int
+    :rtype: int
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Неизвестный уровень журнала: {level}")
+    return value
+
+
+def setup_logging(log_path, level=None, levels=None, max_bytes=None, backup_count=None, queue_size=None):
+    """
+    Настройка асинхронного журнала приложения.
+
+    Заменяет обработчики корневого журнала обработчиком очереди и
+    запускает поток записи в файл с ротацией. Не указанные параметры
+    берутся из config.ini. Повторный вызов останавливает прежний поток
+    записи.
+
+    :param log_path: Путь к файлу журнала
+    :type log_path: str
+    :param level: Уровень журнала приложения
+    :type level: str, int или None
+    :param levels: Уровни по именам журналов и модулей
+    :type levels: dict или None
+    :param max_bytes: Размер файла до ротации (байт)
+    :type max_bytes: int или None
+    :param backup_count: Количество сохраняемых старых файлов
+    :type backup_count: int или None
+    :param queue_size: Записей в очереди до отбрасывания новых
+    :type queue_size: int или None
+    :returns: Обработчик очереди (счетчик отброшенных записей — dropped)
+    :rtype: NonBlockingQueueHandler
+    """
+    global _listener, _queue_handler
+    params, config_levels = load_logging_config()
+    level = _level_number(level if level is not None else params["level"])
+    levels = {name: _level_number(value) for name, value in (levels if levels is not None else config_levels).items()}
+    max_bytes = max_bytes if max_bytes is not None else params["max_bytes"]
+    backup_count = backup_count if backup_count is not None else params["backup_count"]
+    queue_size = queue_size if queue_size is not None else params["queue_size"]
+
+    with _lock:
+        shutdown_logging()
+
+        # Запись в файл с ротацией по размеру в отдельном потоке
+        file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding="utf-8", delay=True)
+        file_handler.setFormatter(JsonLinesFormatter())
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(ModuleLevelFilter(level, levels))
+        _listener = _Listener(log_queue, file_handler)
+        _listener.start()
+
+        # Корневой журнал пропускает записи самого подробного из уровней,
+        # окончательное решение принимает фильтр по модулям
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(min([level, *levels.values()]))
+    return _queue_handler
+
+
+def shutdown_logging():
+    """
+    Остановка потока записи журнала с записью оставшихся в очереди сообщений.
+
+    Вызывается при завершении приложения (а также автоматически при
+    завершении процесса).
+
+    :returns: None
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        listener, handler = _listener, _queue_handler
+        _listener = None
+        _queue_handler = None
+        logging.getLogger().removeHandler(handler)
+        listener.stop()
+        for file_handler in listener.handlers:
+            file_handler.close()
+        if handler.dropped:
+            logging.warning(f"Отброшено записей журнала при переполнении очереди: {handler.dropped}")
+
+
+atexit.register(shutdown_logging)
@@ -9,6 +9,8 @@
 """
 # Импорт системного модуля
 import sys
+# Импорт модуля для создания процессов
+import multiprocessing
 # Импорт модуля для работы с операционной системой
 import os
 
@@ -23,19 +25,15 @@ from PyQt6.QtWidgets import QApplication
 from main_window import WarehouseApp
 # Импорт окна авторизации
 from login_window import LoginWindow
-# Импорт модуля для логирования
-import logging
+# Импорт функции закрытия общего пула соединений
+from database import close_pool
+# Импорт функции отмены фоновых задач экспорта
+from export_jobs import shutdown_exports
+# Импорт настройки асинхронного журнала
+from logging_setup import setup_logging, shutdown_logging
 
-# Настройка логирования
+# Путь к файлу журнала
 log_path = os.path.join(os.path.dirname(current_dir), 'app.log')
-logging.basicConfig(
-    # Указание файла для записи логов
-    filename=log_path,
-    # Установка уровня логирования
-    level=logging.DEBUG,
-    # Формат записи логов
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 
 def main():
     """
@@ -46,8 +44,16 @@ def main():
     
     :returns: None
     """
+    # Настройка журнала: записи передаются в файл фоновым потоком через очередь
+    # (в главном процессе, а не в процессах пакетного формирования PDF)
+    setup_logging(log_path)
     # Создание экземпляра приложения
     app = QApplication(sys.argv)
+    # Отмена фоновых задач экспорта и закрытие пула соединений при выходе из приложения
+    app.aboutToQuit.connect(shutdown_exports)
+    app.aboutToQuit.connect(close_pool)
+    # Запись оставшихся в очереди сообщений журнала последней
+    app.aboutToQuit.connect(shutdown_logging)
 
     # Создание окон авторизации и основного приложения
     login_window = LoginWindow()
@@ -80,4 +86,6 @@ def main():
 
 # Точка входа в приложение
 if __name__ == "__main__":
+    # Поддержка пула процессов в собранном exe (пакетное формирование PDF)
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -8,7 +8,7 @@
 :version: 1.0
 """
 # Импорт необходимых виджетов из PyQt6
-from PyQt6.QtWidgets import QMainWindow, QTabWidget, QStatusBar, QMenuBar, QMenu, QMessageBox
+from PyQt6.QtWidgets import QMainWindow, QTabWidget, QStatusBar, QMenuBar, QMenu, QMessageBox, QInputDialog
 # Импорт класса для управления основным циклом приложения
 from PyQt6.QtCore import QCoreApplication
 # Импорт класса для работы с базой данных
@@ -23,6 +23,18 @@ from tabs.warehouses_tab import WarehousesTab
 from styles import APP_STYLESHEET
 from visualization import InventoryAnalysisDialog, OrdersReportDialog
 from data_export import DataExporter, DataImporter
+from export_jobs import get_export_manager
+from diagnostics import QueryDiagnosticsDialog
+
+# Таблицы для выгрузки полных снимков в Parquet: название -> (таблица, порядок строк)
+SNAPSHOT_TABLES = {
+    "Запасы (stock)": ("stock", "stock_id"),
+    "Заказы (orders)": ("orders", "order_id"),
+    "Позиции заказов (order_items)": ("order_items", "order_item_id"),
+    "Товары (products)": ("products", "product_id"),
+    "Поставщики (suppliers)": ("suppliers", "supplier_id"),
+    "Склады (warehouses)": ("warehouses", "warehouse_id"),
+}
 
 # Основной класс приложения, наследующий от QMainWindow
 class WarehouseApp(QMainWindow):
@@ -45,6 +57,8 @@ class WarehouseApp(QMainWindow):
         super().__init__()
         # Создание объекта базы данных
         self.db = Database()
+        # Окно диагностики запросов (создается при первом открытии)
+        self.diagnostics_dialog = None
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Применение стилей к интерфейсу
@@ -114,6 +128,17 @@ class WarehouseApp(QMainWindow):
         import_excel_action = import_export_menu.addAction("Импорт из Excel")
         import_excel_action.triggered.connect(self.import_from_excel)
         
+        import_parquet_action = import_export_menu.addAction("Импорт из Parquet")
+        import_parquet_action.triggered.connect(self.import_from_parquet)
+        
+        # Пробный запуск: проверка файлов CSV и Excel без записи перед импортом
+        self.preflight_action = import_export_menu.addAction("Проверять файл перед импортом")
+        self.preflight_action.setCheckable(True)
+        
+        # Импорт с обновлением: записи с тем же естественным ключом обновляются
+        self.merge_action = import_export_menu.addAction("Обновлять существующие записи")
+        self.merge_action.setCheckable(True)
+        
         # Разделитель
         import_export_menu.addSeparator()
         
@@ -124,6 +149,14 @@ class WarehouseApp(QMainWindow):
         export_excel_action = import_export_menu.addAction("Экспорт в Excel")
         export_excel_action.triggered.connect(self.export_to_excel)
         
+        # Полный снимок таблицы в столбцовом формате для аналитики
+        export_parquet_action = import_export_menu.addAction("Снимок таблицы в Parquet")
+        export_parquet_action.triggered.connect(self.export_snapshot_to_parquet)
+        
+        # Окно фоновых задач экспорта
+        export_jobs_action = import_export_menu.addAction("Фоновые задачи экспорта")
+        export_jobs_action.triggered.connect(self.show_export_jobs)
+        
         # Разделитель в основном меню
         file_menu.addSeparator()
         
@@ -144,6 +177,10 @@ class WarehouseApp(QMainWindow):
         # Меню "Справка"
         help_menu = menu_bar.addMenu("Справка")
         
+        # Окно статистики запросов и журнала медленных запросов
+        diagnostics_action = help_menu.addAction("Диагностика запросов")
+        diagnostics_action.triggered.connect(self.show_query_diagnostics)
+        
         # Действие "О программе"
         about_action = help_menu.addAction("О программе")
         about_action.triggered.connect(self.show_about_dialog)
@@ -269,7 +306,12 @@ class WarehouseApp(QMainWindow):
         
         if table_name:
             importer = DataImporter(self)
-            importer.import_from_csv(table_name)
+            importer.import_from_csv(
+                table_name,
+                dry_run=self.preflight_action.isChecked(),
+                merge=self.merge_action.isChecked(),
+                on_done=self.refresh_current_tab
+            )
             
             # Обновляем данные на текущей вкладке
             self.refresh_current_tab()
@@ -302,7 +344,41 @@ class WarehouseApp(QMainWindow):
         
         if table_name:
             importer = DataImporter(self)
-            importer.import_from_excel(table_name)
+            importer.import_from_excel(
+                table_name,
+                dry_run=self.preflight_action.isChecked(),
+                merge=self.merge_action.isChecked(),
+                on_done=self.refresh_current_tab
+            )
+            
+            # Обновляем данные на текущей вкладке
+            self.refresh_current_tab()
+        else:
+            QMessageBox.warning(self, "Импорт данных", "Импорт данных не поддерживается для этой вкладки")
+    
+    def import_from_parquet(self):
+        """
+        Импорт данных из файла Parquet или Arrow IPC.
+        
+        Определяет текущую активную вкладку и вызывает
+        соответствующий метод импорта данных.
+        
+        :returns: None
+        """
+        current_tab_index = self.tabs.currentIndex()
+        table_name = ""
+        
+        # Определяем таблицу на основе текущей вкладки
+        if current_tab_index == 0:  # Товары
+            table_name = "products"
+        elif current_tab_index == 3:  # Поставщики
+            table_name = "suppliers"
+        elif current_tab_index == 4:  # Склады
+            table_name = "warehouses"
+        
+        if table_name:
+            importer = DataImporter(self)
+            importer.import_from_parquet(table_name, merge=self.merge_action.isChecked())
             
             # Обновляем данные на текущей вкладке
             self.refresh_current_tab()
@@ -470,6 +546,53 @@ class WarehouseApp(QMainWindow):
             # Показать сообщение об ошибке, если не удалось определить данные для экспорта
             QMessageBox.warning(self, "Экспорт данных", "Не удалось определить данные для экспорта")
     
+    def export_snapshot_to_parquet(self):
+        """
+        Экспорт полного снимка таблицы в файл Parquet.
+        
+        Таблица выбирается из SNAPSHOT_TABLES; столбцы файла получают имена
+        и типы столбцов таблицы базы данных.
+        
+        :returns: None
+        """
+        # Выбор таблицы для снимка
+        title, ok = QInputDialog.getItem(
+            self, "Снимок таблицы в Parquet", "Таблица:", list(SNAPSHOT_TABLES), 0, False
+        )
+        if not ok:
+            return
+        table_name, order_by = SNAPSHOT_TABLES[title]
+        
+        # Создание объекта для экспорта данных и постановка выгрузки в очередь
+        exporter = DataExporter(self)
+        exporter.export_to_parquet(f"SELECT * FROM {table_name} ORDER BY {order_by}")
+    
+    def show_export_jobs(self):
+        """
+        Отображение окна фоновых задач экспорта.
+        
+        В окне показываются выполняющиеся и завершенные задачи экспорта
+        с ходом выполнения и кнопками отмены.
+        
+        :returns: None
+        """
+        get_export_manager().show_dialog(self)
+    
+    def show_query_diagnostics(self):
+        """
+        Отображение окна диагностики запросов.
+        
+        В окне показываются время выполнения запросов по местам вызова,
+        журнал медленных запросов с планами и счетчики кэша.
+        
+        :returns: None
+        """
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = QueryDiagnosticsDialog(self.db, self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+        self.diagnostics_dialog.refresh()
+    
     def show_inventory_analysis(self):
         """
         Показать диалог анализа запасов.
@@ -0,0 +1,229 @@
+"""
+Модуль пакетного формирования PDF документов заказов.
+
+Данные заказов получаются двумя запросами на весь набор (заголовки
+заказов и все их позиции), после чего документы строятся параллельно
+в пуле процессов ProcessPoolExecutor: построение PDF в reportlab
+выполняется на Python и упирается в процессор, поэтому потоки здесь не
+дают ускорения из-за GIL. Процессы получают заказы порциями по
+ORDERS_PER_TASK и возвращают готовые документы в виде байтов; запись
+в папку или ZIP архив выполняет основной процесс.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для измерения времени
+import time
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с ZIP архивами
+import zipfile
+# Импорт модуля для работы с буферами в памяти
+import io
+# Импорт модуля для создания процессов
+import multiprocessing
+# Импорт именованных кортежей
+from collections import namedtuple
+# Импорт пула процессов
+from concurrent.futures import ProcessPoolExecutor, as_completed
+# Импорт построения PDF документа заказа
+from pdf_report import build_order_pdf
+
+# Заказов в одной задаче процесса (меньше накладных расходов на передачу данных)
+ORDERS_PER_TASK = 20
+# Меньше этого количества заказов документы строятся в текущем процессе
+MIN_PARALLEL_ORDERS = 2 * ORDERS_PER_TASK
+
+# Заголовки заказов (столбцы как в OrdersTab.view_order_details)
+ORDER_HEADERS_QUERY = """
+    SELECT o.order_id, o.order_date, s.supplier_name, o.total_amount, o.status, o.created_at, o.updated_at
+    FROM orders o
+    JOIN suppliers s ON o.supplier_id = s.supplier_id
+    WHERE 1=1
+"""
+# Позиции всех выбранных заказов одним запросом
+ORDER_ITEMS_QUERY = """
+    SELECT oi.order_id, oi.order_item_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.product_id
+    WHERE oi.order_id = ANY(%s)
+    ORDER BY oi.order_id, oi.order_item_id
+"""
+
+# Заказ для построения документа: ID, детали заказа, позиции
+OrderDocument = namedtuple("OrderDocument", "order_id details items")
+# Итог пакетного формирования
+BatchResult = namedtuple("BatchResult", "orders target elapsed workers")
+
+
+def order_pdf_name(order_id):
+    """
+    Имя файла PDF документа заказа.
+
+    :param order_id: Идентификатор заказа
+    :type order_id: int
+    :rtype: str
+    """
+    return f"Заказ_{order_id}.pdf"
+
+
+def fetch_orders(db, order_ids=None, condition="", params=(), tracker=None):
+    """
+    Получение заголовков и позиций заказов двумя запросами на весь набор.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param order_ids: Идентификаторы заказов (если None — по условию condition)
+    :type order_ids: list[int] или None
+    :param condition: SQL-фрагмент условия по таблицам orders o и suppliers s
+        (как OrdersTab.orders_filter), начинающийся с AND
+    :type condition: str
+    :param params: Параметры условия
+    :type params: tuple или list
+    :param tracker: Объект с методами attach(conn) и detach() (для отмены)
+    :type tracker: object или None
+    :returns: Заказы в порядке ID
+    :rtype: list[OrderDocument]
+    :raises: psycopg2.Error при ошибке выполнения запроса
+    """
+    query = ORDER_HEADERS_QUERY + condition
+    params = list(params)
+    if order_ids is not None:
+        query += " AND o.order_id = ANY(%s)"
+        params.append(list(order_ids))
+    query += " ORDER BY o.order_id"
+    headers = db.fetch_rows(query, tuple(params), tracker=tracker)
+    if not headers:
+        return []
+
+    # Группировка позиций по заказам
+    items = {}
+    rows = db.fetch_rows(ORDER_ITEMS_QUERY, ([row[0] for row in headers],), tracker=tracker)
+    for row in rows:
+        items.setdefault(row[0], []).append(tuple(row[1:]))
+    return [OrderDocument(row[0], tuple(row), items.get(row[0], [])) for row in headers]
+
+
+def render_orders(orders):
+    """
+    Построение PDF документов для порции заказов.
+
+    Выполняется в процессе пула, поэтому функция объявлена на уровне модуля
+    и работает только с переданными данными.
+
+    :param orders: Заказы
+    :type orders: list[OrderDocument]
+    :returns: Пары (имя файла, содержимое PDF)
+    :rtype: list[tuple[str, bytes]]
+    """
+    documents = []
+    for order in orders:
+        buffer = io.BytesIO()
+        build_order_pdf(buffer, order.order_id, order.details, order.items)
+        documents.append((order_pdf_name(order.order_id), buffer.getvalue()))
+    return documents
+
+
+class _DocumentSink:
+    """
+    Запись готовых документов в папку или ZIP архив.
+    """
+
+    def __init__(self, target, as_zip):
+        """
+        :param target: Папка или имя ZIP архива
+        :type target: str
+        :param as_zip: Записывать в ZIP архив
+        :type as_zip: bool
+        """
+        self.target = target
+        self.archive = None
+        if as_zip:
+            # PDF уже сжат, поэтому документы сохраняются без повторного сжатия
+            self.archive = zipfile.ZipFile(target, "w", zipfile.ZIP_STORED)
+        else:
+            os.makedirs(target, exist_ok=True)
+
+    def write(self, name, data):
+        """
+        Запись одного документа.
+
+        :param name: Имя файла
+        :type name: str
+        :param data: Содержимое PDF
+        :type data: bytes
+        """
+        if self.archive is not None:
+            self.archive.writestr(name, data)
+        else:
+            with open(os.path.join(self.target, name), "wb") as f:
+                f.write(data)
+
+    def close(self):
+        """
+        Завершение записи (закрытие архива).
+        """
+        if self.archive is not None:
+            self.archive.close()
+
+
+def export_orders_pdf(orders, target, as_zip=False, workers=None, progress=None):
+    """
+    Пакетное формирование PDF документов заказов.
+
+    :param orders: Заказы (см. fetch_orders)
+    :type orders: list[OrderDocument]
+    :param target: Папка для документов или имя ZIP архива
+    :type target: str
+    :param as_zip: Записывать документы в ZIP архив
+    :type as_zip: bool
+    :param workers: Количество процессов (если None — по числу ядер процессора)
+    :type workers: int или None
+    :param progress: Ход выполнения задачи экспорта (методы report и check)
+    :type progress: ExportProgress или None
+    :returns: Итог формирования
+    :rtype: BatchResult
+    :raises: ExportCancelled при отмене задачи
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    chunks = [orders[i:i + ORDERS_PER_TASK] for i in range(0, len(orders), ORDERS_PER_TASK)]
+    done = 0
+
+    sink = _DocumentSink(target, as_zip)
+    try:
+        if workers == 1 or len(orders) < MIN_PARALLEL_ORDERS:
+            # Небольшой пакет: запуск процессов дороже построения документов
+            workers = 1
+            for chunk in chunks:
+                for name, data in render_orders(chunk):
+                    sink.write(name, data)
+                done += len(chunk)
+                if progress is not None:
+                    progress.report(rows=done)
+                    progress.check()
+        else:
+            # Процессы запускаются методом spawn: fork процесса с потоками Qt небезопасен
+            executor = ProcessPoolExecutor(max_workers=workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+            try:
+                futures = {executor.submit(render_orders, chunk): len(chunk) for chunk in chunks}
+                for future in as_completed(futures):
+                    for name, data in future.result():
+                        sink.write(name, data)
+                    done += futures[future]
+                    if progress is not None:
+                        progress.report(rows=done)
+                        progress.check()
+            finally:
+                # При ошибке или отмене задачи из очереди пула снимаются
+                executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"Сформировано {done} PDF документов заказов за {elapsed:.1f} с "
+                 f"({done / max(elapsed, 0.001):.1f} в секунду, процессов: {workers})")
+    return BatchResult(done, target, elapsed, workers)
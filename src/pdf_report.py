@@ -0,0 +1,495 @@
+"""
+Модуль построения табличных PDF отчетов.
+
+Отчет строится из порций строк (например, Database.iter_batches) без
+загрузки всех данных в память:
+
+- шрифт с поддержкой кириллицы регистрируется один раз за процесс;
+- строки разбиваются на сегменты LongTable по PDF_CHUNK_ROWS строк,
+  которые создаются по мере того, как reportlab размещает предыдущие,
+  поэтому в памяти находится только текущая порция строк;
+- строка заголовков рисуется шаблоном страницы на каждой странице, так
+  что границы сегментов не видны и заголовок повторяется без повторного
+  разбиения таблицы;
+- значения, которые помещаются в ширину столбца, передаются строками;
+  Paragraph (с переносом) создается только для длинных значений.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с потоками
+import threading
+# Импорт функции экранирования разметки
+from xml.sax.saxutils import escape
+# Импорт модулей для работы с PDF
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import (BaseDocTemplate, SimpleDocTemplate, PageTemplate, Frame, NextPageTemplate,
+                                Table, LongTable, TableStyle, Paragraph, Spacer)
+# Импорт для поддержки кириллицы
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Строк в одном сегменте таблицы (примерно одна страница A4)
+PDF_CHUNK_ROWS = 40
+# Размер шрифта ячеек таблицы
+CELL_FONT_SIZE = 9
+# Межстрочный интервал ячеек таблицы
+CELL_LEADING = 12
+# Внутренний отступ ячеек таблицы
+CELL_PADDING = 6
+# Внутренний отступ рамки страницы (как у Frame по умолчанию)
+FRAME_PADDING = 6
+# Отступ от краев страницы
+PAGE_MARGIN = 2 * cm
+# Заголовки таблицы товаров (для особой ширины столбцов)
+PRODUCT_PDF_HEADERS = ["Название", "Описание", "Категория", "Цена"]
+
+# Результат регистрации шрифта и блокировка для ее однократного выполнения
+_font = None
+_font_lock = threading.Lock()
+
+
+def register_cyrillic_font():
+    """
+    Регистрация шрифта с поддержкой кириллицы для reportlab.
+
+    Шрифт регистрируется при первом вызове, последующие вызовы возвращают
+    сохраненный результат. Функция не показывает сообщений, поэтому может
+    вызываться из фонового потока или процесса; предупреждение записывается
+    в журнал один раз и возвращается вызывающему коду.
+
+    :returns: Кортеж (имя шрифта, текст предупреждения или None)
+    :rtype: tuple[str, str или None]
+    """
+    global _font
+    with _font_lock:
+        if _font is None:
+            _font = _register_font()
+            if _font[1]:
+                logging.warning(_font[1])
+        return _font
+
+
+def _register_font():
+    """
+    Поиск и регистрация шрифта с поддержкой кириллицы.
+
+    :returns: Кортеж (имя шрифта, текст предупреждения или None)
+    :rtype: tuple[str, str или None]
+    """
+    font_name = 'Helvetica'  # Шрифт по умолчанию (без кириллицы)
+    try:
+        font_paths = [
+            os.path.join('src', 'fonts', 'DejaVuSans.ttf'),  # Ищем в папке src/fonts
+            'DejaVuSans.ttf',                               # Ищем в корне проекта
+            os.path.join(os.path.dirname(__file__), 'fonts', 'DejaVuSans.ttf'),  # Ищем относительно текущего файла
+        ]
+
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+                return 'DejaVuSans', None
+
+        # Arial из папки fonts рядом с модулем или из путей поиска reportlab
+        arial_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts', 'arial.ttf')
+        try:
+            pdfmetrics.registerFont(TTFont('Arial', arial_path if os.path.exists(arial_path) else 'arial.ttf'))
+            return 'Arial', None
+        except Exception:
+            return font_name, ("Не найден шрифт с поддержкой кириллицы. "
+                               "Возможны проблемы с отображением русских символов.")
+    except Exception as e:
+        logging.error(f"Ошибка при регистрации шрифта: {str(e)}")
+        return font_name, ("Не удалось зарегистрировать шрифт с поддержкой кириллицы. "
+                           "Возможны проблемы с отображением русских символов.")
+
+
+def column_widths(headers, num_columns, available_width):
+    """
+    Ширина столбцов таблицы отчета.
+
+    Для таблицы товаров описанию отводится больше места, для остальных
+    таблиц ширина распределяется равномерно.
+
+    :param headers: Заголовки столбцов
+    :type headers: list или None
+    :param num_columns: Количество столбцов
+    :type num_columns: int
+    :param available_width: Доступная ширина
+    :type available_width: float
+    :returns: Ширина каждого столбца
+    :rtype: list[float]
+    """
+    if headers and num_columns == 4 and all(h in headers for h in PRODUCT_PDF_HEADERS):
+        # Оптимальное распределение для товаров: 25% для названия, 45% для описания, 15% для категории, 15% для цены
+        return [
+            available_width * 0.25,  # Название
+            available_width * 0.45,  # Описание
+            available_width * 0.15,  # Категория
+            available_width * 0.15   # Цена
+        ]
+    # Равномерное распределение для других таблиц
+    return [available_width / num_columns] * num_columns
+
+
+class _LazyStory(list):
+    """
+    Список элементов документа, пополняемый по мере размещения.
+
+    BaseDocTemplate.build проверяет len(flowables) перед размещением
+    каждого элемента; когда список пуст, в него добавляется следующий
+    сегмент таблицы из генератора.
+    """
+
+    def __init__(self, head, segments):
+        """
+        :param head: Начальные элементы документа
+        :type head: list
+        :param segments: Генератор последующих элементов
+        :type segments: iterator
+        """
+        super().__init__(head)
+        self._segments = segments
+
+    def __len__(self):
+        """
+        Количество элементов с пополнением пустого списка следующим сегментом.
+
+        :rtype: int
+        """
+        if not list.__len__(self):
+            segment = next(self._segments, None)
+            if segment is not None:
+                self.append(segment)
+        return list.__len__(self)
+
+
+class TablePdfReport:
+    """
+    Табличный PDF отчет с заголовком документа и строкой заголовков
+    столбцов на каждой странице.
+    """
+
+    def __init__(self, filename, title, headers=None, font_name=None, col_widths=None):
+        """
+        Инициализация отчета.
+
+        :param filename: Имя файла
+        :type filename: str
+        :param title: Заголовок документа
+        :type title: str
+        :param headers: Заголовки столбцов
+        :type headers: list или None
+        :param font_name: Имя шрифта (если None — шрифт с кириллицей)
+        :type font_name: str или None
+        :param col_widths: Ширина столбцов (если None — по column_widths)
+        :type col_widths: list[float] или None
+        """
+        self.filename = filename
+        self.title = title
+        self.headers = headers
+        if font_name is None:
+            font_name, _ = register_cyrillic_font()
+        self.font_name = font_name
+        self.col_widths = col_widths
+        # Количество размещенных строк и страниц
+        self.rows = 0
+        self.pages = 0
+
+        # Стиль текста ячеек, которым требуется перенос
+        self.cell_style = ParagraphStyle(
+            'CellStyle',
+            fontName=font_name,
+            fontSize=CELL_FONT_SIZE,
+            leading=CELL_LEADING,  # Межстрочный интервал
+        )
+        # Стиль сегментов таблицы
+        self.body_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), CELL_FONT_SIZE),
+            ('LEADING', (0, 0), (-1, -1), CELL_LEADING),
+            ('TOPPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ])
+        # Стиль строки заголовков
+        self.header_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+    def cell(self, value, width):
+        """
+        Значение ячейки таблицы.
+
+        Строка, которая помещается в ширину столбца, передается как есть;
+        для более длинной создается Paragraph с переносом.
+
+        :param value: Значение из результата запроса
+        :param width: Ширина столбца
+        :type width: float
+        :returns: Строка или Paragraph
+        :rtype: str или Paragraph
+        """
+        text = str(value) if value is not None else ""
+        available = width - 2 * CELL_PADDING
+        # Ни один символ не шире кегля, поэтому короткие строки не измеряются
+        if len(text) * CELL_FONT_SIZE <= available and "\n" not in text:
+            return text
+        if pdfmetrics.stringWidth(text, self.font_name, CELL_FONT_SIZE) <= available and "\n" not in text:
+            return text
+        return Paragraph(escape(text).replace("\n", "<br/>"), self.cell_style)
+
+    def header_table(self):
+        """
+        Таблица из одной строки заголовков столбцов.
+
+        :rtype: Table
+        """
+        style = ParagraphStyle('HeaderStyle', parent=self.cell_style,
+                               textColor=colors.whitesmoke, alignment=1)
+        header_cells = [Paragraph(f"<b>{escape(str(header))}</b>", style) for header in self.headers]
+        table = Table([header_cells], colWidths=self.col_widths)
+        table.setStyle(self.header_style)
+        return table
+
+    def segments(self, batches, progress=None):
+        """
+        Генератор сегментов таблицы из порций строк.
+
+        :param batches: Итератор порций строк
+        :type batches: iterable
+        :param progress: Ход выполнения задачи экспорта (методы report и check)
+        :type progress: ExportProgress или None
+        :returns: Генератор LongTable
+        :rtype: generator
+        """
+        for batch in batches:
+            for start in range(0, len(batch), PDF_CHUNK_ROWS):
+                chunk = batch[start:start + PDF_CHUNK_ROWS]
+                data = [[self.cell(value, width) for value, width in zip(row, self.col_widths)]
+                        for row in chunk]
+                table = LongTable(data, colWidths=self.col_widths)
+                table.setStyle(self.body_style)
+                self.rows += len(chunk)
+                yield table
+            if progress is not None:
+                progress.report(rows=self.rows)
+                progress.check()
+
+    def build(self, batches, progress=None):
+        """
+        Построение документа.
+
+        :param batches: Итератор порций строк (списков кортежей)
+        :type batches: iterable
+        :param progress: Ход выполнения задачи экспорта (методы report и check)
+        :type progress: ExportProgress или None
+        :returns: Количество строк в отчете
+        :rtype: int
+        """
+        batches = iter(batches)
+        first = next(batches, None)
+        if not first:
+            return 0
+
+        doc = BaseDocTemplate(
+            self.filename,
+            pagesize=A4,
+            leftMargin=PAGE_MARGIN,
+            rightMargin=PAGE_MARGIN,
+            topMargin=PAGE_MARGIN,
+            bottomMargin=PAGE_MARGIN,
+            title=self.title,
+        )
+        available_width = doc.width - 2 * FRAME_PADDING
+        if self.col_widths is None:
+            self.col_widths = column_widths(self.headers, len(first[0]), available_width)
+
+        # Строка заголовков: высота нужна для рамки последующих страниц
+        header = self.header_table() if self.headers else None
+        header_height = header.wrap(available_width, doc.height)[1] if header else 0
+
+        def on_page(canvas, doc):
+            self.pages = doc.page
+            if progress is not None:
+                progress.report(pages=doc.page)
+                progress.check()
+
+        def on_later_page(canvas, doc):
+            # Строка заголовков над таблицей на каждой следующей странице
+            if header is not None:
+                header.drawOn(canvas, doc.leftMargin + FRAME_PADDING,
+                              doc.bottomMargin + doc.height - FRAME_PADDING - header_height)
+            on_page(canvas, doc)
+
+        doc.addPageTemplates([
+            PageTemplate(id='First', onPage=on_page, frames=[
+                Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='first')]),
+            PageTemplate(id='Later', onPage=on_later_page, frames=[
+                Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height - header_height, id='later')]),
+        ])
+
+        # Заголовок документа и строка заголовков первой страницы
+        heading_style = ParagraphStyle('ReportTitle', parent=getSampleStyleSheet()['Heading1'],
+                                       fontName=self.font_name)
+        head = [Paragraph(escape(self.title), heading_style), Spacer(1, 0.5 * cm)]
+        if header is not None:
+            head.append(header)
+        head.append(NextPageTemplate('Later'))
+
+        # Сегменты таблицы создаются по мере размещения предыдущих
+        segments = self.segments(_chain_first(first, batches), progress)
+        doc.build(_LazyStory(head, segments))
+        return self.rows
+
+
+def _chain_first(first, batches):
+    """
+    Генератор порций, начинающийся с уже прочитанной первой порции.
+
+    :param first: Первая порция строк
+    :type first: list
+    :param batches: Итератор остальных порций
+    :type batches: iterator
+    :returns: Генератор порций
+    :rtype: generator
+    """
+    yield first
+    yield from batches
+
+
+def build_order_pdf(output, order_id, order_details, order_items, on_page=None):
+    """
+    Построение PDF документа с деталями заказа.
+
+    Функция не обращается к базе данных и интерфейсу, поэтому может
+    выполняться в отдельном процессе (см. order_pdf_batch).
+
+    :param output: Имя файла или файловый объект для записи
+    :type output: str или file
+    :param order_id: Идентификатор заказа
+    :type order_id: int
+    :param order_details: Детали заказа (ID, дата, поставщик, сумма, статус, создан, обновлен)
+    :type order_details: tuple
+    :param order_items: Позиции заказа (ID, товар, количество, цена, итого)
+    :type order_items: list[tuple]
+    :param on_page: Обработчик начала страницы (canvas, doc)
+    :type on_page: callable или None
+    """
+    # Регистрация шрифта с поддержкой кириллицы (один раз за процесс)
+    font_name, _ = register_cyrillic_font()
+
+    # Создаем PDF документ с отступами
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        leftMargin=2*cm,
+        rightMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm
+    )
+
+    # Создаем элементы документа
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Настраиваем стили с указанием шрифта с поддержкой кириллицы
+    title_style = styles['Heading1']
+    title_style.fontName = font_name
+    normal_style = styles['Normal']
+    normal_style.fontName = font_name
+    heading2_style = styles['Heading2']
+    heading2_style.fontName = font_name
+
+    # Добавляем заголовок
+    elements.append(Paragraph(f"Заказ №{order_id}", title_style))
+    elements.append(Spacer(1, 0.5*cm))
+
+    # Информация о заказе
+    elements.append(Paragraph(f"<b>Дата заказа:</b> {order_details[1]}", normal_style))
+    elements.append(Paragraph(f"<b>Поставщик:</b> {escape(str(order_details[2]))}", normal_style))
+    elements.append(Paragraph(f"<b>Статус:</b> {order_details[4]}", normal_style))
+    elements.append(Paragraph(f"<b>Общая сумма:</b> {order_details[3]}", normal_style))
+    elements.append(Spacer(1, 0.3*cm))
+    elements.append(Paragraph(f"<i>Создан: {order_details[5]} | Обновлен: {order_details[6]}</i>", normal_style))
+    elements.append(Spacer(1, 0.5*cm))
+
+    # Заголовок таблицы
+    elements.append(Paragraph("Позиции заказа:", heading2_style))
+    elements.append(Spacer(1, 0.3*cm))
+
+    # Определяем заголовки для таблицы позиций
+    headers = ["ID", "Товар", "Количество", "Цена за ед.", "Итого"]
+
+    # Создаем таблицу с позициями заказа
+    table_data = [headers]
+    for item in order_items:
+        table_data.append([str(x) for x in item])
+
+    # Настраиваем ширину столбцов
+    col_widths = [1*cm, 8*cm, 2*cm, 3*cm, 3*cm]
+    table = Table(table_data, colWidths=col_widths, repeatRows=1)
+
+    # Определяем стиль таблицы
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ALIGN', (2, 1), (4, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+
+    # Применяем стиль к таблице
+    table.setStyle(table_style)
+    elements.append(table)
+
+    # Генерируем PDF файл
+    if on_page is None:
+        doc.build(elements)
+    else:
+        doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)
+
+
+def build_table_pdf(filename, title, headers, batches, progress=None):
+    """
+    Построение табличного PDF отчета из порций строк.
+
+    :param filename: Имя файла
+    :type filename: str
+    :param title: Заголовок документа
+    :type title: str
+    :param headers: Заголовки столбцов
+    :type headers: list или None
+    :param batches: Итератор порций строк (списков кортежей)
+    :type batches: iterable
+    :param progress: Ход выполнения задачи экспорта (методы report и check)
+    :type progress: ExportProgress или None
+    :returns: Количество строк в отчете (0 — данных нет, файл не создан)
+    :rtype: int
+    """
+    return TablePdfReport(filename, title, headers).build(batches, progress)
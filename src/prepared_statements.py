@@ -0,0 +1,387 @@
+"""
+Модуль подготовленных запросов PostgreSQL.
+
+psycopg2 подставляет параметры в текст запроса на стороне клиента, поэтому
+сервер разбирает и планирует запрос при каждом выполнении. Этот модуль
+предоставляет класс PreparedStatements, который для часто выполняемых
+запросов с параметрами создает на соединении подготовленный запрос
+(PREPARE) и дальше выполняет его командой EXECUTE. Подготовленные
+запросы каждого соединения хранятся в очереди LRU ограниченного размера;
+вытесненные удаляются командой DEALLOCATE.
+
+Для каждого запроса измеряется среднее время выполнения без подготовки
+и с подготовкой, по которым оценивается сэкономленное на разборе и
+планировании время.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с PostgreSQL
+import psycopg2
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с регулярными выражениями
+import re
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для работы со временем
+import time
+# Импорт счетчика для имен подготовленных запросов
+import itertools
+# Импорт словаря со слабыми ссылками на соединения
+import weakref
+# Импорт упорядоченного словаря для очереди вытеснения
+from collections import OrderedDict
+# Импорт нормализации текста запроса
+from query_cache import normalize_sql
+
+# Заполнители параметров psycopg2
+_PLACEHOLDER_RE = re.compile(r"%(.)")
+# Команды, которые можно подготовить
+_PREPARABLE_RE = re.compile(r"^(?:select|insert|update|delete|merge|values|with)\b")
+# Код ошибки SQLSTATE: подготовленный запрос не найден на сервере
+INVALID_STATEMENT_NAME = "26000"
+# Класс ошибок SQLSTATE, которые при выполнении подготовленного запроса
+# означают, что запрос нельзя подготовить (типы параметров, синтаксис)
+SYNTAX_ERROR_CLASS = "42"
+# Максимальное количество запросов, для которых хранятся измерения
+MAX_TRACKED_QUERIES = 1000
+
+
+def to_server_placeholders(query):
+    """
+    Замена заполнителей psycopg2 (%s) на параметры сервера ($1, $2, ...).
+
+    Как и psycopg2, заполнители ищутся во всем тексте запроса; ``%%``
+    заменяется на ``%``. Запросы с именованными параметрами (%(name)s)
+    не преобразуются.
+
+    :param query: SQL-запрос с заполнителями %s
+    :type query: str
+    :returns: Кортеж (запрос с $n, количество параметров) или None
+    :rtype: tuple или None
+    """
+    count = 0
+    unsupported = False
+
+    def replace(match):
+        nonlocal count, unsupported
+        if match.group(1) == "%":
+            return "%"
+        if match.group(1) != "s":
+            unsupported = True
+            return match.group(0)
+        count += 1
+        return f"${count}"
+
+    converted = _PLACEHOLDER_RE.sub(replace, query)
+    if unsupported:
+        return None
+    return converted, count
+
+
+class ConnectionStatements:
+    """
+    Подготовленные запросы одного соединения и счетчики выполнений.
+
+    Используется соединением только в одном потоке (соединение выдается
+    из пула одному владельцу), поэтому блокировка не нужна.
+    """
+
+    def __init__(self, max_statements):
+        """
+        Инициализация списка подготовленных запросов.
+
+        :param max_statements: Максимальное количество подготовленных запросов
+        :type max_statements: int
+        """
+        self.max_statements = max_statements
+        # Нормализованный запрос -> имя подготовленного запроса (в порядке использования)
+        self.prepared = OrderedDict()
+        # Нормализованный запрос -> количество выполнений без подготовки
+        self.counts = OrderedDict()
+
+    def get(self, key):
+        """
+        Имя подготовленного запроса.
+
+        :param key: Нормализованный запрос
+        :type key: str
+        :rtype: str или None
+        """
+        name = self.prepared.get(key)
+        if name is not None:
+            self.prepared.move_to_end(key)
+        return name
+
+    def count(self, key):
+        """
+        Учет выполнения без подготовки.
+
+        :param key: Нормализованный запрос
+        :type key: str
+        :returns: Количество выполнений с учетом текущего
+        :rtype: int
+        """
+        count = self.counts.pop(key, 0) + 1
+        self.counts[key] = count
+        # Счетчики редких запросов вытесняются, чтобы список не рос без ограничения
+        while len(self.counts) > self.max_statements * 4:
+            self.counts.popitem(last=False)
+        return count
+
+    def add(self, key, name):
+        """
+        Добавление подготовленного запроса.
+
+        :param key: Нормализованный запрос
+        :type key: str
+        :param name: Имя подготовленного запроса
+        :type name: str
+        :returns: Имена вытесненных подготовленных запросов
+        :rtype: list[str]
+        """
+        self.counts.pop(key, None)
+        self.prepared[key] = name
+        evicted = []
+        while len(self.prepared) > self.max_statements:
+            evicted.append(self.prepared.popitem(last=False)[1])
+        return evicted
+
+    def clear(self):
+        """
+        Сброс списка (подготовленные запросы на сервере потеряны).
+        """
+        self.prepared.clear()
+        self.counts.clear()
+
+
+class PreparedStatements:
+    """
+    Выполнение часто повторяемых запросов с параметрами через PREPARE/EXECUTE.
+
+    Запрос подготавливается на соединении, когда на нем выполнено
+    threshold выполнений этого запроса. Если подготовленный запрос пропал
+    на сервере (например, после DISCARD ALL или переподключения за
+    балансировщиком), список соединения сбрасывается и запрос выполняется
+    обычным способом. Запросы, которые не удалось подготовить, дальше
+    выполняются без подготовки.
+
+    Используется только для отдельных запросов в начале транзакции
+    (Database.execute_query, fetch_rows, fetch_one): при ошибке подготовки
+    транзакция откатывается без потери ранее выполненных команд.
+    """
+
+    def __init__(self, threshold=5, max_statements=100):
+        """
+        Инициализация.
+
+        :param threshold: Выполнений запроса на соединении до подготовки
+        :type threshold: int
+        :param max_statements: Подготовленных запросов на соединение (0 — выключено)
+        :type max_statements: int
+        """
+        self.threshold = threshold
+        self.max_statements = max_statements
+        # Подготовленные запросы по соединениям; закрытые соединения удаляются автоматически
+        self._connections = weakref.WeakKeyDictionary()
+        # Нормализованные запросы, которые не удалось подготовить
+        self._unpreparable = set()
+        # Измерения по запросам: ключ -> [выполнений без подготовки, их время,
+        # выполнений с подготовкой, их время, подготовок, время подготовок]
+        self._timings = {}
+        self._names = itertools.count(1)
+        self._lock = threading.Lock()
+        # Счетчики событий
+        self.prepares = 0
+        self.deallocations = 0
+        self.fallbacks = 0
+        self.resets = 0
+
+    @property
+    def enabled(self):
+        """
+        Включена ли подготовка запросов.
+
+        :rtype: bool
+        """
+        return self.max_statements > 0
+
+    def execute(self, conn, cursor, query, params=None):
+        """
+        Выполнение запроса на курсоре с подготовкой часто повторяемых запросов.
+
+        Результат читается из курсора как обычно (fetchall, fetchone).
+
+        :param conn: Соединение курсора (в начале транзакции)
+        :type conn: psycopg2.extensions.connection
+        :param cursor: Курсор соединения
+        :type cursor: psycopg2.extensions.cursor
+        :param query: SQL-запрос с заполнителями %s
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple, list или None
+        :raises: psycopg2.Error при ошибке выполнения запроса
+        """
+        if not self.enabled or not params or not isinstance(params, (tuple, list)):
+            cursor.execute(query, params or ())
+            return
+        key = normalize_sql(query)
+        with self._lock:
+            statements = self._connections.get(conn)
+            if statements is None:
+                statements = self._connections[conn] = ConnectionStatements(self.max_statements)
+            unpreparable = key in self._unpreparable
+        name = statements.get(key)
+        if name is None:
+            if unpreparable or statements.count(key) <= self.threshold:
+                self._execute_plain(cursor, key, query, params)
+                return
+            name = self._prepare(conn, cursor, statements, key, query)
+            if name is None:
+                self._execute_plain(cursor, key, query, params)
+                return
+
+        placeholders = ", ".join(["%s"] * len(params))
+        start = time.perf_counter()
+        try:
+            cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+        except psycopg2.Error as e:
+            if e.pgcode == INVALID_STATEMENT_NAME:
+                # Подготовленные запросы соединения потеряны на сервере
+                conn.rollback()
+                statements.clear()
+                with self._lock:
+                    self.resets += 1
+                logging.warning(f"Подготовленные запросы соединения сброшены сервером: {str(e)}")
+            elif e.pgcode and e.pgcode.startswith(SYNTAX_ERROR_CLASS):
+                # Запрос нельзя выполнять подготовленным (например, из-за типов параметров)
+                conn.rollback()
+                statements.prepared.pop(key, None)
+                cursor.execute(f"DEALLOCATE {name}")
+                self._mark_unpreparable(key, e)
+            else:
+                raise
+            self._execute_plain(cursor, key, query, params)
+            return
+        self._record(key, 2, time.perf_counter() - start)
+
+    def stats(self, top=10):
+        """
+        Счетчики и оценка сэкономленного времени.
+
+        Сэкономленное время оценивается для каждого запроса как разница
+        среднего времени выполнения без подготовки и с подготовкой,
+        умноженная на количество подготовленных выполнений, за вычетом
+        времени подготовки.
+
+        :param top: Количество запросов с наибольшей экономией в отчете
+        :type top: int
+        :returns: Словарь счетчиков и список запросов с измерениями
+        :rtype: dict
+        """
+        with self._lock:
+            statements = []
+            saved_total = 0.0
+            for key, (plain, plain_time, prepared, prepared_time, prepares, prepare_time) in self._timings.items():
+                saved = 0.0
+                if plain and prepared:
+                    saved = prepared * (plain_time / plain - prepared_time / prepared) - prepare_time
+                saved_total += saved
+                statements.append({
+                    "query": key,
+                    "plain": plain,
+                    "plain_avg_ms": plain_time / plain * 1000 if plain else 0.0,
+                    "prepared": prepared,
+                    "prepared_avg_ms": prepared_time / prepared * 1000 if prepared else 0.0,
+                    "saved_ms": saved * 1000,
+                })
+            statements.sort(key=lambda item: item["saved_ms"], reverse=True)
+            return {
+                "connections": len(self._connections),
+                "prepared": sum(len(s.prepared) for s in self._connections.values()),
+                "prepares": self.prepares,
+                "deallocations": self.deallocations,
+                "fallbacks": self.fallbacks,
+                "resets": self.resets,
+                "unpreparable": len(self._unpreparable),
+                "saved_ms": saved_total * 1000,
+                "statements": statements[:top],
+            }
+
+    def _prepare(self, conn, cursor, statements, key, query):
+        """
+        Подготовка запроса на соединении.
+
+        :returns: Имя подготовленного запроса или None, если подготовка не удалась
+        :rtype: str или None
+        """
+        converted = to_server_placeholders(query)
+        if converted is None or not _PREPARABLE_RE.match(key):
+            self._mark_unpreparable(key)
+            return None
+        name = f"ps_{next(self._names)}"
+        start = time.perf_counter()
+        try:
+            cursor.execute(f"PREPARE {name} AS {converted[0]}")
+        except psycopg2.Error as e:
+            conn.rollback()
+            self._mark_unpreparable(key, e)
+            return None
+        self._record(key, 4, time.perf_counter() - start)
+        evicted = statements.add(key, name)
+        with self._lock:
+            self.prepares += 1
+            self.deallocations += len(evicted)
+        try:
+            for old_name in evicted:
+                # Удаление вытесненного запроса на сервере (команда не отменяется откатом)
+                cursor.execute(f"DEALLOCATE {old_name}")
+        except psycopg2.Error as e:
+            # Список соединения не совпадает с сервером — начинаем заново
+            conn.rollback()
+            statements.clear()
+            with self._lock:
+                self.resets += 1
+            logging.warning(f"Подготовленные запросы соединения сброшены: {str(e)}")
+            return None
+        return name
+
+    def _execute_plain(self, cursor, key, query, params):
+        """
+        Выполнение запроса без подготовки с измерением времени.
+        """
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        self._record(key, 0, time.perf_counter() - start)
+
+    def _record(self, key, index, elapsed):
+        """
+        Учет одного измерения запроса.
+
+        :param key: Нормализованный запрос
+        :type key: str
+        :param index: Индекс счетчика (0 — без подготовки, 2 — с подготовкой, 4 — подготовка)
+        :type index: int
+        :param elapsed: Время (сек)
+        :type elapsed: float
+        """
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                if len(self._timings) >= MAX_TRACKED_QUERIES:
+                    return
+                timing = self._timings[key] = [0, 0.0, 0, 0.0, 0, 0.0]
+            timing[index] += 1
+            timing[index + 1] += elapsed
+
+    def _mark_unpreparable(self, key, error=None):
+        """
+        Отметка запроса, который выполняется только без подготовки.
+        """
+        with self._lock:
+            if len(self._unpreparable) < MAX_TRACKED_QUERIES:
+                self._unpreparable.add(key)
+            self.fallbacks += 1
+        if error is not None:
+            logging.warning(f"Запрос выполняется без подготовки: {str(error)}")
@@ -0,0 +1,329 @@
+"""
+Модуль кэша результатов запросов на чтение.
+
+Этот модуль предоставляет класс QueryCache — общий для процесса кэш
+результатов справочных запросов (списки складов, категорий, товаров),
+которые вкладки и диалоги выполняют при каждом открытии. Ключ записи —
+нормализованный текст SQL и параметры запроса. Записи устаревают через
+ttl секунд, при переполнении вытесняются давно не использованные (LRU),
+а изменяющие команды удаляют записи, прочитанные из затронутых таблиц.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с регулярными выражениями
+import re
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для работы со временем
+import time
+# Импорт упорядоченного словаря для очереди вытеснения
+from collections import OrderedDict
+
+# Лексемы SQL: строковые литералы, идентификаторы в кавычках, пробелы и прочий текст
+_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+|[^'\"\s]+|['\"]")
+# Список таблиц после FROM (до ключевого слова, скобки или конца запроса)
+_FROM_RE = re.compile(
+    r"\bfrom\s+(?!\()(.+?)(?=\b(?:where|group|order|limit|offset|having|union|except|intersect"
+    r"|join|inner|left|right|full|cross|natural|on|using|window|for|returning)\b|[();]|$)"
+)
+# Таблица после JOIN
+_JOIN_RE = re.compile(r"\bjoin\s+(?:only\s+)?([\w.\"]+)")
+# Таблицы, изменяемые командами INSERT, UPDATE, DELETE, MERGE, COPY и DDL
+_WRITE_RE = re.compile(
+    r"\b(?:insert\s+into|update(?:\s+only)?|delete\s+from(?:\s+only)?|merge\s+into|copy"
+    r"|alter\s+table(?:\s+if\s+exists)?(?:\s+only)?|drop\s+table(?:\s+if\s+exists)?)\s+([\w.\"]+)"
+)
+# Список таблиц команды TRUNCATE
+_TRUNCATE_RE = re.compile(r"\btruncate\s+(?:table\s+)?(?:only\s+)?([\w.\"\s,]+)")
+# Начало запроса, который только читает данные
+_READ_RE = re.compile(r"^\(*\s*(?:select|with|values|table|show|explain)\b")
+# Слова, которые регулярные выражения могут принять за имя таблицы
+_NOT_TABLES = {"set", "table", "only", "lateral", "if", "exists", "stdin", "stdout"}
+
+
+def normalize_sql(query):
+    """
+    Нормализация текста SQL-запроса для ключа кэша.
+
+    Пробелы и переводы строк вне литералов сворачиваются в один пробел,
+    текст вне литералов и идентификаторов в кавычках приводится к нижнему
+    регистру, завершающая точка с запятой отбрасывается. Запросы,
+    отличающиеся только оформлением, получают один ключ.
+
+    :param query: SQL-запрос
+    :type query: str
+    :returns: Нормализованный запрос
+    :rtype: str
+    """
+    parts = []
+    for token in _TOKEN_RE.findall(query):
+        if token[0] in "'\"":
+            # Литералы и идентификаторы в кавычках сохраняются без изменений
+            parts.append(token)
+        elif token.isspace():
+            parts.append(" ")
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _table_name(name):
+    """
+    Имя таблицы без схемы и кавычек.
+
+    :param name: Имя таблицы из текста запроса
+    :type name: str
+    :rtype: str или None
+    """
+    name = name.split(".")[-1].strip().strip('"').lower()
+    if not name or name in _NOT_TABLES:
+        return None
+    return name
+
+
+def read_tables(query):
+    """
+    Таблицы, из которых читает запрос (после FROM и JOIN).
+
+    Учитываются списки таблиц через запятую и подзапросы. Имена
+    возвращаются без схемы.
+
+    :param query: SQL-запрос (исходный или нормализованный)
+    :type query: str
+    :rtype: set[str]
+    """
+    query = normalize_sql(query)
+    tables = set()
+    for match in _FROM_RE.finditer(query):
+        for item in match.group(1).split(","):
+            # Первое слово элемента списка — имя таблицы, остальное — псевдоним
+            words = item.split()
+            if words:
+                tables.add(_table_name(words[0]))
+    for match in _JOIN_RE.finditer(query):
+        tables.add(_table_name(match.group(1)))
+    tables.discard(None)
+    return tables
+
+
+def written_tables(query):
+    """
+    Таблицы, которые может изменить запрос.
+
+    Для запросов на чтение (SELECT, WITH без изменяющих команд) возвращается
+    пустое множество. Если запрос изменяет данные, но таблицы определить не
+    удалось (например, вызов процедуры или блок DO), возвращается None —
+    такой запрос должен сбрасывать весь кэш.
+
+    :param query: SQL-запрос (исходный или нормализованный)
+    :type query: str
+    :rtype: set[str] или None
+    """
+    query = normalize_sql(query)
+    tables = set()
+    for match in _WRITE_RE.finditer(query):
+        tables.add(_table_name(match.group(1)))
+    for match in _TRUNCATE_RE.finditer(query):
+        for item in match.group(1).split(","):
+            words = item.split()
+            if words:
+                tables.add(_table_name(words[0]))
+    tables.discard(None)
+    if tables or _READ_RE.match(query):
+        return tables
+    return None
+
+
+class QueryCache:
+    """
+    Потокобезопасный кэш результатов запросов с TTL и вытеснением LRU.
+
+    Для каждой таблицы хранится множество ключей записей, прочитанных из
+    нее, поэтому invalidate удаляет только записи затронутых таблиц.
+    Счетчик поколений защищает от записи в кэш результата, прочитанного до
+    изменения, которое было зафиксировано во время выполнения запроса.
+    """
+
+    def __init__(self, max_entries=256, ttl=60):
+        """
+        Инициализация кэша.
+
+        :param max_entries: Максимальное количество записей (0 — кэш выключен)
+        :type max_entries: int
+        :param ttl: Время жизни записи (сек, 0 — кэш выключен)
+        :type ttl: float
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Записи: ключ -> (срок действия, таблицы, результат) в порядке использования
+        self._entries = OrderedDict()
+        # Ключи записей по таблицам
+        self._by_table = {}
+        # Поколение кэша, увеличивается при каждом сбросе записей
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Счетчики для настройки размера и времени жизни
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        """
+        Включен ли кэш.
+
+        :rtype: bool
+        """
+        return self.max_entries > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(kind, query, params=None):
+        """
+        Ключ записи кэша.
+
+        :param kind: Вид результата (например, "all" или "one")
+        :type kind: str
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple, list, dict или None
+        :returns: Ключ или None, если параметры нельзя использовать в ключе
+        :rtype: tuple или None
+        """
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(tuple(value) if isinstance(value, list) else value for value in params)
+        key = (kind, normalize_sql(query), params or ())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def lookup(self, key):
+        """
+        Поиск записи в кэше.
+
+        Поколение, возвращаемое при промахе, передается в store вместе
+        с прочитанным результатом.
+
+        :param key: Ключ записи (см. make_key)
+        :type key: tuple
+        :returns: Кортеж (найдена ли запись, результат, поколение)
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    # Запись становится последней в очереди вытеснения
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[2], self._generation
+                # Запись устарела
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return False, None, self._generation
+
+    def store(self, key, tables, value, generation):
+        """
+        Сохранение результата запроса.
+
+        Результат не сохраняется, если после lookup кэш сбрасывался: запрос
+        мог прочитать данные до зафиксированного изменения.
+
+        :param key: Ключ записи
+        :type key: tuple
+        :param tables: Таблицы, из которых прочитан результат
+        :type tables: set[str]
+        :param value: Результат запроса
+        :param generation: Поколение, полученное от lookup
+        :type generation: int
+        """
+        with self._lock:
+            if generation != self._generation or not self.enabled:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            # Вытеснение давно не использованных записей
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """
+        Удаление записей, прочитанных из указанных таблиц.
+
+        :param tables: Имена таблиц или None для удаления всех записей
+        :type tables: iterable или None
+        :returns: Количество удаленных записей
+        :rtype: int
+        """
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+            else:
+                keys = set()
+                for table in tables:
+                    keys.update(self._by_table.get(_table_name(table) or table, ()))
+                for key in keys:
+                    self._remove(key)
+                removed = len(keys)
+            self.invalidations += removed
+            return removed
+
+    def stats(self):
+        """
+        Счетчики кэша.
+
+        :returns: Словарь с количеством записей, попаданий, промахов,
+            вытеснений, устаревших и сброшенных записей и долей попаданий
+        :rtype: dict
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def reset_stats(self):
+        """
+        Обнуление счетчиков (записи кэша сохраняются).
+        """
+        with self._lock:
+            self.hits = self.misses = 0
+            self.evictions = self.expirations = self.invalidations = 0
+
+    def _remove(self, key):
+        """
+        Удаление записи и ее ключа из индекса таблиц (вызывается под блокировкой).
+
+        :param key: Ключ записи
+        :type key: tuple
+        """
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
@@ -0,0 +1,349 @@
+"""
+Модуль статистики выполнения запросов.
+
+Этот модуль предоставляет класс QueryStats, который учитывает время
+выполнения и количество строк запросов Database.execute_query,
+execute_returning, fetch_all, fetch_rows и fetch_one по нормализованному
+тексту запроса, место вызова
+(вкладка или метод) и скользящую гистограмму времени последних
+выполнений. Запросы дольше порога записываются в журнал медленных
+запросов вместе с планом EXPLAIN (ANALYZE, BUFFERS), который получается
+в фоновом потоке.
+
+Выключенный учет стоит одной проверки атрибута на запрос.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для логирования
+import logging
+# Импорт модуля для работы с путями
+import os
+# Импорт модуля для доступа к стеку вызовов
+import sys
+# Импорт модуля для работы с потоками
+import threading
+# Импорт модуля для работы со временем
+import time
+# Импорт очереди ограниченной длины
+from collections import deque, namedtuple
+# Импорт контекстного менеджера
+from contextlib import contextmanager
+# Импорт пула потоков для получения планов
+from concurrent.futures import ThreadPoolExecutor
+# Импорт нормализации текста запроса
+from query_cache import normalize_sql
+
+# Верхние границы интервалов гистограммы (мс); последний интервал — все, что дольше
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Максимальное количество запросов, для которых хранится статистика
+MAX_STATEMENTS = 500
+# Максимальное количество мест вызова одного запроса
+MAX_CALLERS = 20
+# Модули, кадры которых пропускаются при определении места вызова
+_INTERNAL_MODULES = {
+    "database.py", "query_stats.py", "query_cache.py", "prepared_statements.py",
+    "async_query.py", "contextlib.py", "threading.py",
+}
+
+# Журнал медленных запросов
+slow_log = logging.getLogger("slow_queries")
+
+# Запись журнала медленных запросов
+SlowQuery = namedtuple("SlowQuery", "timestamp query caller elapsed_ms rows plan")
+
+
+def _bucket(elapsed_ms):
+    """
+    Номер интервала гистограммы для времени выполнения.
+
+    :param elapsed_ms: Время выполнения (мс)
+    :type elapsed_ms: float
+    :rtype: int
+    """
+    for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if elapsed_ms <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+class StatementStats:
+    """
+    Статистика одного нормализованного запроса.
+
+    Общие счетчики накапливаются с момента включения учета, а гистограмма
+    строится по последним window выполнениям.
+    """
+
+    def __init__(self, query, window):
+        """
+        Инициализация статистики запроса.
+
+        :param query: Нормализованный запрос
+        :type query: str
+        :param window: Количество последних выполнений в гистограмме
+        :type window: int
+        """
+        self.query = query
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.rows = 0
+        self.slow = 0
+        # Места вызова: название -> количество выполнений
+        self.callers = {}
+        # Интервалы последних выполнений и их количество в каждом интервале
+        self._window = deque(maxlen=window)
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, caller):
+        """
+        Учет одного выполнения.
+
+        :param elapsed_ms: Время выполнения (мс)
+        :type elapsed_ms: float
+        :param rows: Количество строк результата или измененных строк
+        :type rows: int
+        :param caller: Место вызова
+        :type caller: str
+        """
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+        if rows > 0:
+            self.rows += rows
+        if caller in self.callers or len(self.callers) < MAX_CALLERS:
+            self.callers[caller] = self.callers.get(caller, 0) + 1
+        # Скользящее окно: самое старое выполнение уходит из гистограммы
+        if len(self._window) == self._window.maxlen:
+            self.histogram[self._window[0]] -= 1
+        bucket = _bucket(elapsed_ms)
+        self._window.append(bucket)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction):
+        """
+        Оценка перцентиля времени по гистограмме (верхняя граница интервала).
+
+        :param fraction: Доля (например, 0.95)
+        :type fraction: float
+        :returns: Время (мс) или None для последнего интервала
+        :rtype: float или None
+        """
+        target = fraction * len(self._window)
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else None
+        return 0.0
+
+    def as_dict(self):
+        """
+        Статистика запроса в виде словаря.
+
+        :rtype: dict
+        """
+        callers = sorted(self.callers.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "query": self.query,
+            "calls": self.calls,
+            "total_ms": self.total_ms,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms,
+            "rows": self.rows,
+            "slow": self.slow,
+            "callers": callers,
+            "histogram": list(self.histogram),
+        }
+
+
+class QueryStats:
+    """
+    Потокобезопасный учет выполнения запросов и журнал медленных запросов.
+
+    Пример::
+
+        stats = QueryStats(enabled=True, slow_ms=200)
+        start = time.perf_counter() if stats.enabled else None
+        ...
+        if start is not None:
+            stats.record(query, params, time.perf_counter() - start, rows, explain)
+    """
+
+    def __init__(self, enabled=False, slow_ms=500, explain=True, explain_interval=600,
+                 explain_timeout=30, window=1000):
+        """
+        Инициализация учета.
+
+        :param enabled: Включен ли учет
+        :type enabled: bool
+        :param slow_ms: Порог медленного запроса (мс)
+        :type slow_ms: float
+        :param explain: Получать план медленных запросов
+        :type explain: bool
+        :param explain_interval: Не чаще одного плана запроса за это время (сек)
+        :type explain_interval: float
+        :param explain_timeout: Ограничение времени получения плана (сек)
+        :type explain_timeout: float
+        :param window: Количество последних выполнений в гистограмме
+        :type window: int
+        """
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout = explain_timeout
+        self.window = window
+        # Статистика по нормализованным запросам
+        self._statements = {}
+        # Последние медленные запросы
+        self.slow_queries = deque(maxlen=100)
+        # Время последнего плана по запросам
+        self._explained = {}
+        self._executor = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def record(self, query, params, elapsed, rows, explain=None):
+        """
+        Учет выполнения запроса.
+
+        :param query: SQL-запрос
+        :type query: str
+        :param params: Параметры запроса
+        :type params: tuple или None
+        :param elapsed: Время выполнения (сек)
+        :type elapsed: float
+        :param rows: Количество строк результата или измененных строк
+        :type rows: int
+        :param explain: Функция получения плана explain(query, params),
+            вызывается в фоновом потоке для медленных запросов
+        :type explain: callable или None
+        """
+        key = normalize_sql(query)
+        elapsed_ms = elapsed * 1000
+        caller = self.caller()
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is None and len(self._statements) < MAX_STATEMENTS:
+                statement = self._statements[key] = StatementStats(key, self.window)
+            # Сверх MAX_STATEMENTS статистика не хранится, но медленный запрос записывается в журнал
+            if statement is not None:
+                statement.add(elapsed_ms, rows, caller)
+            if elapsed_ms < self.slow_ms:
+                return
+            if statement is not None:
+                statement.slow += 1
+            # План запроса получается не чаще раза в explain_interval секунд
+            now = time.monotonic()
+            need_plan = (self.explain and explain is not None
+                         and now - self._explained.get(key, -self.explain_interval) >= self.explain_interval)
+            if need_plan:
+                self._explained[key] = now
+        if need_plan:
+            self._explain_later(key, query, params, caller, elapsed_ms, rows, explain)
+        else:
+            self._log_slow(SlowQuery(time.time(), key, caller, elapsed_ms, rows, None))
+
+    def caller(self):
+        """
+        Место вызова запроса: класс и метод (или модуль и функция).
+
+        Кадры Database и вспомогательных модулей пропускаются. Для фоновых
+        потоков место вызова задается методом calling.
+
+        :rtype: str
+        """
+        override = getattr(self._local, "caller", None)
+        if override is not None:
+            return override
+        frame = sys._getframe(1)
+        while frame is not None:
+            filename = os.path.basename(frame.f_code.co_filename)
+            if filename not in _INTERNAL_MODULES:
+                owner = frame.f_locals.get("self")
+                if owner is not None:
+                    return f"{type(owner).__name__}.{frame.f_code.co_name}"
+                return f"{os.path.splitext(filename)[0]}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        return "?"
+
+    @contextmanager
+    def calling(self, caller):
+        """
+        Место вызова для запросов текущего потока внутри блока.
+
+        :param caller: Место вызова (None — определять по стеку)
+        :type caller: str или None
+        """
+        previous = getattr(self._local, "caller", None)
+        self._local.caller = caller
+        try:
+            yield
+        finally:
+            self._local.caller = previous
+
+    def snapshot(self):
+        """
+        Статистика всех запросов, отсортированная по общему времени.
+
+        :rtype: list[dict]
+        """
+        with self._lock:
+            statements = [statement.as_dict() for statement in self._statements.values()]
+        statements.sort(key=lambda item: item["total_ms"], reverse=True)
+        return statements
+
+    def slow_snapshot(self):
+        """
+        Последние медленные запросы (новые в конце).
+
+        :rtype: list[SlowQuery]
+        """
+        with self._lock:
+            return list(self.slow_queries)
+
+    def reset(self):
+        """
+        Удаление накопленной статистики и журнала медленных запросов.
+        """
+        with self._lock:
+            self._statements.clear()
+            self._explained.clear()
+            self.slow_queries.clear()
+
+    def _explain_later(self, key, query, params, caller, elapsed_ms, rows, explain):
+        """
+        Получение плана медленного запроса в фоновом потоке и запись в журнал.
+        """
+        def run():
+            try:
+                plan = explain(query, params)
+            except Exception as e:
+                plan = f"План не получен: {str(e)}"
+            self._log_slow(SlowQuery(time.time(), key, caller, elapsed_ms, rows, plan))
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._executor.submit(run)
+
+    def _log_slow(self, entry):
+        """
+        Запись медленного запроса в журнал.
+
+        :param entry: Запись журнала
+        :type entry: SlowQuery
+        """
+        with self._lock:
+            self.slow_queries.append(entry)
+        message = f"Медленный запрос {entry.elapsed_ms:.0f} мс, строк {entry.rows}, {entry.caller}: {entry.query}"
+        if entry.plan:
+            message += f"\n{entry.plan}"
+        slow_log.warning(message)
@@ -0,0 +1,399 @@
+"""
+Модуль импорта больших CSV файлов по частям с контрольными точками.
+
+Файл загружается частями по CHECKPOINT_BATCH_ROWS строк; каждая часть
+проходит тот же путь, что и обычный импорт (COPY в промежуточную
+таблицу, проверка, перенос — bulk_import.load_source), и фиксируется
+отдельной транзакцией вместе с контрольной точкой в таблице
+import_checkpoints: позицией в файле (в байтах), номером части, номером
+строки и накопленными счетчиками. Поскольку часть и контрольная точка
+фиксируются одной транзакцией, после обрыва соединения импорт
+продолжается с первой незафиксированной части, и строки не добавляются
+повторно.
+
+Обрыв соединения во время импорта приводит к повторной попытке
+с новым соединением из пула (до IMPORT_RETRIES раз). Импорт выполняется
+фоновой задачей (export_jobs): ход выполнения сообщается после каждой
+части, отмена проверяется между частями и прерывает паузу перед
+повторной попыткой, а выполняющаяся часть отменяется на сервере. Если импорт
+все же прерван, при следующем импорте того же файла в ту же таблицу
+он продолжается с контрольной точки. Контрольная точка не используется,
+если размер или время изменения файла изменились.
+
+Отчет об отклоненных строках дополняется после каждой части; его размер
+сохраняется в контрольной точке, и при продолжении импорта записи
+незафиксированной части из отчета удаляются.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с операционной системой
+import os
+# Импорт модуля для измерения времени
+import time
+# Импорт модуля для логирования
+import logging
+# Импорт именованных кортежей
+from collections import namedtuple
+# Импорт модуля для работы с PostgreSQL
+import psycopg2
+# Импорт ошибки отмены запроса
+from psycopg2.extensions import QueryCanceledError
+# Импорт транзакции на соединении
+from database import transaction
+# Импорт общего пути массового импорта
+from bulk_import import (
+    IMPORT_COLUMNS, ImportResult, CsvCopySource,
+    load_source, rejected_report_path, append_rejected_report,
+)
+
+# Строк файла в одной части (одной транзакции)
+CHECKPOINT_BATCH_ROWS = 100000
+# Размер файла, начиная с которого импорт выполняется по частям (байт)
+RESUMABLE_MIN_BYTES = 64 * 1024 * 1024
+# Количество повторных попыток после обрыва соединения
+IMPORT_RETRIES = 5
+# Пауза перед повторной попыткой (с), увеличивается с каждой попыткой
+RETRY_DELAY = 5
+# Таблица контрольных точек (миграция 0007)
+CHECKPOINT_TABLE = "import_checkpoints"
+# Метка порядка байтов UTF-8 в начале файла
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# Контрольная точка: позиция в файле, номер части, номер строки и накопленные счетчики
+Checkpoint = namedtuple(
+    "Checkpoint",
+    "byte_offset batch_no line_no total imported updated unchanged rejected report_size"
+)
+
+
+def file_identity(filename):
+    """
+    Признаки файла для сопоставления с контрольной точкой.
+
+    :param filename: Имя файла
+    :type filename: str
+    :returns: Полное имя файла, размер (байт) и время изменения (нс)
+    :rtype: tuple[str, int, int]
+    """
+    stat = os.stat(filename)
+    return os.path.abspath(filename), stat.st_size, stat.st_mtime_ns
+
+
+def load_checkpoint(cursor, table_name, filename):
+    """
+    Чтение контрольной точки импорта файла.
+
+    Контрольная точка файла, который после нее был изменен, удаляется.
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    :returns: Контрольная точка или None
+    :rtype: Checkpoint или None
+    """
+    name, size, mtime = file_identity(filename)
+    cursor.execute(
+        f"SELECT file_size, file_mtime, byte_offset, batch_no, line_no, total_rows, imported_rows, "
+        f"updated_rows, unchanged_rows, rejected_rows, report_size "
+        f"FROM {CHECKPOINT_TABLE} WHERE table_name = %s AND file_name = %s",
+        (table_name, name)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    if (row[0], row[1]) != (size, mtime):
+        # Файл заменен после прерванного импорта — начать заново
+        logging.warning(f"Файл {name} изменен после прерванного импорта, контрольная точка удалена")
+        delete_checkpoint(cursor, table_name, filename)
+        return None
+    return Checkpoint(*row[2:])
+
+
+def save_checkpoint(cursor, table_name, filename, checkpoint):
+    """
+    Запись контрольной точки импорта файла (в текущей транзакции).
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    :param checkpoint: Контрольная точка
+    :type checkpoint: Checkpoint
+    """
+    name, size, mtime = file_identity(filename)
+    cursor.execute(
+        f"INSERT INTO {CHECKPOINT_TABLE} (table_name, file_name, file_size, file_mtime, byte_offset, "
+        f"batch_no, line_no, total_rows, imported_rows, updated_rows, unchanged_rows, rejected_rows, "
+        f"report_size) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+        f"ON CONFLICT (table_name, file_name) DO UPDATE SET file_size = EXCLUDED.file_size, "
+        f"file_mtime = EXCLUDED.file_mtime, byte_offset = EXCLUDED.byte_offset, "
+        f"batch_no = EXCLUDED.batch_no, line_no = EXCLUDED.line_no, total_rows = EXCLUDED.total_rows, "
+        f"imported_rows = EXCLUDED.imported_rows, updated_rows = EXCLUDED.updated_rows, "
+        f"unchanged_rows = EXCLUDED.unchanged_rows, rejected_rows = EXCLUDED.rejected_rows, "
+        f"report_size = EXCLUDED.report_size, updated_at = CURRENT_TIMESTAMP",
+        (table_name, name, size, mtime) + tuple(checkpoint)
+    )
+
+
+def delete_checkpoint(cursor, table_name, filename):
+    """
+    Удаление контрольной точки импорта файла (в текущей транзакции).
+
+    :param cursor: Курсор базы данных
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    """
+    cursor.execute(
+        f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = %s AND file_name = %s",
+        (table_name, os.path.abspath(filename))
+    )
+
+
+class OffsetLines:
+    """
+    Итератор строк файла, открытого в двоичном режиме, с учетом позиции в байтах.
+
+    csv.reader запрашивает строки по одной и только по мере разбора
+    записи, поэтому после чтения записи позиция offset указывает на
+    начало следующей записи и может быть сохранена в контрольной точке.
+    """
+
+    def __init__(self, binary_file, encoding="utf-8"):
+        """
+        Инициализация итератора с текущей позиции файла.
+
+        :param binary_file: Файл, открытый в режиме "rb"
+        :param encoding: Кодировка файла
+        :type encoding: str
+        """
+        self.file = binary_file
+        self.encoding = encoding
+        # Позиция начала следующей непрочитанной строки
+        self.offset = binary_file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        if self.offset == 0 and line.startswith(UTF8_BOM):
+            # Метка порядка байтов в начале файла не входит в первое поле
+            self.offset += len(UTF8_BOM)
+            line = line[len(UTF8_BOM):]
+        self.offset += len(line)
+        return line.decode(self.encoding)
+
+
+def find_checkpoint(db, table_name, filename):
+    """
+    Контрольная точка прерванного импорта файла в таблицу.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    :returns: Контрольная точка или None
+    :rtype: Checkpoint или None
+    """
+    with db.transaction() as tx:
+        return load_checkpoint(tx.cursor, table_name, filename)
+
+
+def clear_checkpoint(db, table_name, filename):
+    """
+    Отказ от продолжения прерванного импорта: удаление контрольной точки.
+
+    Строки уже зафиксированных частей остаются в таблице.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла
+    :type filename: str
+    """
+    with db.transaction() as tx:
+        delete_checkpoint(tx.cursor, table_name, filename)
+
+
+def import_csv_checkpointed_with_connection(conn, table_name, filename, delimiter=",", merge=False,
+                                            batch_rows=CHECKPOINT_BATCH_ROWS, progress=None):
+    """
+    Импорт CSV файла частями с контрольными точками через указанное соединение.
+
+    Если для файла есть контрольная точка, импорт продолжается с нее.
+    Каждая часть фиксируется отдельной транзакцией вместе с контрольной
+    точкой; после последней части контрольная точка удаляется.
+
+    :param conn: Соединение с базой данных
+    :type conn: psycopg2.extensions.connection
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла CSV
+    :type filename: str
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param merge: Обновлять записи с тем же естественным ключом (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :param batch_rows: Строк файла в одной части
+    :type batch_rows: int
+    :param progress: Ход выполнения фоновой задачи (сообщение о загруженных
+        строках и проверка отмены между частями)
+    :type progress: ExportProgress или None
+    :returns: Результат импорта (счетчики — с учетом частей, загруженных до прерывания)
+    :rtype: ImportResult
+    :raises: ValueError для неподдерживаемой таблицы, psycopg2.Error при ошибке базы данных,
+        ExportCancelled при отмене задачи
+    """
+    if table_name not in IMPORT_COLUMNS:
+        raise ValueError(f"Импорт в таблицу {table_name} не поддерживается")
+    columns = IMPORT_COLUMNS[table_name]
+    report_path = rejected_report_path(filename)
+    start = time.perf_counter()
+
+    with transaction(conn) as tx:
+        checkpoint = load_checkpoint(tx.cursor, table_name, filename)
+
+    if checkpoint is None:
+        # Новый импорт: отчет предыдущего импорта этого файла удаляется
+        checkpoint = Checkpoint(0, 0, 0, 0, 0, 0, 0, 0, 0)
+        if os.path.exists(report_path):
+            os.remove(report_path)
+    else:
+        logging.info(
+            f"Продолжение импорта {filename} в {table_name} с части {checkpoint.batch_no + 1} "
+            f"(строка {checkpoint.line_no + 1})"
+        )
+        if os.path.exists(report_path):
+            # Записи отчета незафиксированной части удаляются
+            with open(report_path, "r+b") as report:
+                report.truncate(checkpoint.report_size)
+
+    with open(filename, "rb") as csvfile:
+        csvfile.seek(checkpoint.byte_offset)
+        lines = OffsetLines(csvfile)
+        while True:
+            if progress is not None:
+                # Отмена между частями: зафиксированные части остаются, импорт можно продолжить
+                progress.report(rows=checkpoint.total)
+                progress.check()
+            source = CsvCopySource(
+                lines, delimiter, len(columns),
+                skip_header=checkpoint.byte_offset == 0,
+                first_line=checkpoint.line_no,
+                max_rows=batch_rows
+            )
+            # Часть и контрольная точка фиксируются одной транзакцией; при ошибке
+            # откатывается только незафиксированная часть
+            with transaction(conn) as tx:
+                imported, updated, unchanged, rejected = load_source(tx.cursor, table_name, source, merge)
+                # Сброс записей кэша запросов, прочитанных из таблицы, после фиксации
+                tx.touch(table_name)
+                report_size = checkpoint.report_size
+                if rejected:
+                    report_size = append_rejected_report(report_path, columns, rejected)
+                checkpoint = Checkpoint(
+                    lines.offset, checkpoint.batch_no + 1, source.line_num,
+                    checkpoint.total + source.rows, checkpoint.imported + imported,
+                    checkpoint.updated + updated, checkpoint.unchanged + unchanged,
+                    checkpoint.rejected + len(rejected), report_size
+                )
+                if source.exhausted:
+                    # Файл загружен полностью — контрольная точка больше не нужна
+                    delete_checkpoint(tx.cursor, table_name, filename)
+                else:
+                    save_checkpoint(tx.cursor, table_name, filename, checkpoint)
+            logging.info(
+                f"Импорт {filename} в {table_name}: часть {checkpoint.batch_no} зафиксирована, "
+                f"строк {checkpoint.total}, позиция {checkpoint.byte_offset} байт"
+            )
+            if source.exhausted:
+                break
+
+    if progress is not None:
+        progress.report(rows=checkpoint.total, force=True)
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"Импорт {filename} в {table_name} по частям: строк {checkpoint.total}, "
+        f"добавлено {checkpoint.imported}, обновлено {checkpoint.updated}, "
+        f"без изменений {checkpoint.unchanged}, отклонено {checkpoint.rejected}, {elapsed:.2f} с"
+    )
+    return ImportResult(
+        checkpoint.total, checkpoint.imported, checkpoint.rejected,
+        report_path if checkpoint.rejected else None, elapsed,
+        checkpoint.updated, checkpoint.unchanged
+    )
+
+
+def import_csv_resumable(db, table_name, filename, delimiter=",", merge=False,
+                         batch_rows=CHECKPOINT_BATCH_ROWS, retries=IMPORT_RETRIES, progress=None):
+    """
+    Импорт CSV файла частями через соединение из пула с повтором после обрыва связи.
+
+    После ошибки связи с сервером соединение закрывается пулом, а импорт
+    продолжается с последней контрольной точки через новое соединение.
+    Функция выполняется в фоновом потоке (см. DataImporter.import_from_csv):
+    пауза перед повторной попыткой прерывается отменой задачи.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param table_name: Имя целевой таблицы
+    :type table_name: str
+    :param filename: Имя файла CSV
+    :type filename: str
+    :param delimiter: Разделитель в CSV файле
+    :type delimiter: str
+    :param merge: Обновлять записи с тем же естественным ключом (bulk_import.MERGE_KEYS)
+    :type merge: bool
+    :param batch_rows: Строк файла в одной части
+    :type batch_rows: int
+    :param retries: Количество повторных попыток после обрыва соединения
+    :type retries: int
+    :param progress: Ход выполнения фоновой задачи (отслеживание соединения
+        для отмены, сообщение о ходе и проверка отмены)
+    :type progress: ExportProgress или None
+    :returns: Результат импорта
+    :rtype: ImportResult
+    :raises: psycopg2.OperationalError, если связь не восстановлена за retries попыток,
+        ExportCancelled при отмене задачи
+    """
+    attempt = 0
+    while True:
+        try:
+            with db.pool.connection() as conn:
+                if progress is not None:
+                    # Регистрация соединения, чтобы отмена прерывала выполняющуюся часть
+                    progress.attach(conn)
+                try:
+                    return import_csv_checkpointed_with_connection(
+                        conn, table_name, filename, delimiter, merge, batch_rows, progress
+                    )
+                finally:
+                    if progress is not None:
+                        progress.detach()
+        except QueryCanceledError:
+            # Отмена запроса не является обрывом связи
+            raise
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            logging.warning(
+                f"Обрыв соединения при импорте {filename}: {str(e)}. "
+                f"Повтор {attempt} из {retries} через {RETRY_DELAY * attempt} с"
+            )
+            if progress is not None:
+                # Ожидание без блокировки отмены задачи
+                progress.wait(RETRY_DELAY * attempt)
+            else:
+                time.sleep(RETRY_DELAY * attempt)
@@ -0,0 +1,254 @@
+"""
+Модуль поиска с задержкой ввода для вкладок приложения.
+
+Этот модуль предоставляет классы:
+
+- SearchDebouncer — запускает поиск только после паузы в наборе текста
+- SearchController — дополнительно выполняет поисковый запрос в фоновом
+  потоке (см. async_query), отменяет устаревший запрос, отбрасывает
+  результаты, пришедшие не по порядку, и уточняет поиск по ранее
+  полученным строкам без обращения к базе данных
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для логирования
+import logging
+# Импорт упорядоченного словаря для кэша результатов
+from collections import OrderedDict
+# Импорт необходимых классов из PyQt6
+from PyQt6.QtCore import QObject, QTimer
+
+# Задержка (мс) после последнего нажатия клавиши перед выполнением поиска
+SEARCH_DELAY_MS = 300
+# Количество запоминаемых результатов поиска
+RESULT_CACHE_SIZE = 8
+
+
+class SearchDebouncer(QObject):
+    """
+    Запуск поиска после паузы в наборе текста.
+
+    Каждое изменение текста перезапускает таймер; обработчик вызывается
+    один раз, когда пользователь перестал печатать на delay_ms миллисекунд.
+    """
+
+    def __init__(self, line_edit, on_search, delay_ms=SEARCH_DELAY_MS, parent=None):
+        """
+        Инициализация поиска с задержкой.
+
+        :param line_edit: Поле ввода текста поиска
+        :type line_edit: QLineEdit
+        :param on_search: Обработчик поиска, принимает текст поиска
+        :type on_search: callable
+        :param delay_ms: Задержка перед поиском (мс)
+        :type delay_ms: int
+        :param parent: Родительский объект Qt
+        :type parent: QObject или None
+        """
+        super().__init__(parent)
+        # Сохранение поля ввода и обработчика
+        self.line_edit = line_edit
+        self.on_search = on_search
+        # Однократный таймер задержки
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.search_now)
+        # Перезапуск таймера при каждом изменении текста
+        self.line_edit.textChanged.connect(lambda text: self._timer.start())
+
+    def search_now(self):
+        """
+        Немедленный поиск по текущему тексту (без ожидания таймера).
+        """
+        self._timer.stop()
+        self.on_search(self.line_edit.text())
+
+
+class SearchController(SearchDebouncer):
+    """
+    Поиск с задержкой, выполняемый в фоновом потоке.
+
+    Поисковый запрос отправляется через AsyncQueryRunner с постоянным ключом,
+    поэтому новый запрос отменяет выполняющийся, а результат устаревшего
+    запроса не отображается.
+
+    Если новый текст содержит текст одного из предыдущих поисков (например,
+    пользователь дописал символы), результат вычисляется фильтрацией
+    сохраненных строк: условие ``столбец ILIKE '%текст%'`` для более длинного
+    текста выполняется только для строк, найденных по более короткому.
+    Шаблон поиска должен строиться через Validator.like_pattern, чтобы
+    символы ``%`` и ``_`` искались буквально, как при локальной фильтрации.
+    Для этого указываются номера столбцов результата, по которым идет поиск.
+    """
+
+    def __init__(self, line_edit, runner, key, build_query, on_result, on_error=None,
+                 match_columns=None, normalize=None, delay_ms=SEARCH_DELAY_MS, parent=None):
+        """
+        Инициализация контроллера поиска.
+
+        :param line_edit: Поле ввода текста поиска
+        :type line_edit: QLineEdit
+        :param runner: Исполнитель фоновых запросов
+        :type runner: AsyncQueryRunner
+        :param key: Ключ запросов в исполнителе
+        :type key: str
+        :param build_query: Функция (текст) -> (SQL-запрос, параметры)
+        :type build_query: callable
+        :param on_result: Обработчик результата, принимает список строк
+        :type on_result: callable
+        :param on_error: Обработчик ошибки, принимает текст ошибки
+        :type on_error: callable или None
+        :param match_columns: Номера столбцов результата, по которым ведется поиск
+            (ILIKE); None отключает локальное уточнение
+        :type match_columns: list[int] или None
+        :param normalize: Преобразование текста перед поиском (как в build_query)
+        :type normalize: callable или None
+        :param delay_ms: Задержка перед поиском (мс)
+        :type delay_ms: int
+        :param parent: Родительский объект Qt
+        :type parent: QObject или None
+        """
+        super().__init__(line_edit, self.search, delay_ms, parent)
+        # Сохранение параметров поиска
+        self.runner = runner
+        self.key = key
+        self.build_query = build_query
+        self.on_result = on_result
+        self.on_error = on_error
+        self.match_columns = match_columns
+        self.normalize = normalize
+        # Сохраненные результаты: нормализованный текст -> строки
+        self._results = OrderedDict()
+        # Текст последнего запрошенного поиска
+        self._pending = None
+        # Статистика: количество запросов к базе и локальных уточнений
+        self.queries = 0
+        self.refinements = 0
+
+    def reset(self, all_rows=None):
+        """
+        Сброс сохраненных результатов.
+
+        Вызывается при перезагрузке данных вкладки и при изменении
+        дополнительных фильтров, от которых зависит запрос.
+
+        :param all_rows: Полный список строк без условия поиска (если известен);
+            сохраняется как результат поиска по пустому тексту
+        :type all_rows: list[tuple] или None
+        """
+        self._results.clear()
+        self._pending = None
+        if all_rows is not None and self.match_columns is not None:
+            self._results[""] = all_rows
+
+    def _needle(self, text):
+        """
+        Нормализованный текст поиска для сравнения без учета регистра.
+
+        :param text: Текст поиска
+        :type text: str
+        :rtype: str
+        """
+        if self.normalize:
+            text = self.normalize(text)
+        return text.lower()
+
+    def _find_superset(self, needle):
+        """
+        Поиск сохраненного результата, из которого можно получить результат для needle.
+
+        :param needle: Нормализованный текст поиска
+        :type needle: str
+        :returns: Пара (текст, строки) с самым длинным подходящим текстом или None
+        :rtype: tuple или None
+        """
+        if self.match_columns is None:
+            return None
+        best = None
+        for cached, rows in self._results.items():
+            if cached in needle and (best is None or len(cached) > len(best[0])):
+                best = (cached, rows)
+        return best
+
+    def _remember(self, needle, rows):
+        """
+        Сохранение результата поиска с вытеснением самого старого.
+
+        :param needle: Нормализованный текст поиска
+        :type needle: str
+        :param rows: Строки результата
+        :type rows: list[tuple]
+        """
+        if self.match_columns is None:
+            return
+        self._results[needle] = rows
+        self._results.move_to_end(needle)
+        while len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    def search(self, text):
+        """
+        Выполнение поиска.
+
+        Результат вычисляется локально, если это возможно, иначе
+        запрос отправляется в базу данных в фоновом потоке.
+
+        :param text: Текст поиска
+        :type text: str
+        """
+        needle = self._needle(text)
+        self._pending = needle
+
+        superset = self._find_superset(needle)
+        if superset is not None:
+            cached, rows = superset
+            # Выполняющийся запрос больше не нужен
+            self.runner.cancel(self.key)
+            if cached != needle:
+                columns = self.match_columns
+                rows = [
+                    row for row in rows
+                    if any(row[col] is not None and needle in str(row[col]).lower() for col in columns)
+                ]
+                self._remember(needle, rows)
+            self.refinements += 1
+            self.on_result(rows)
+            return
+
+        # Запрос к базе данных
+        query, params = self.build_query(text)
+        self.queries += 1
+        self.runner.submit(
+            self.key, query, params,
+            lambda rows: self._on_rows(needle, rows),
+            self._on_error
+        )
+
+    def _on_rows(self, needle, rows):
+        """
+        Обработка результата поискового запроса.
+
+        :param needle: Нормализованный текст, для которого выполнялся запрос
+        :type needle: str
+        :param rows: Строки результата
+        :type rows: list[tuple]
+        """
+        # Результат для уже неактуального текста отбрасывается
+        if needle != self._pending:
+            return
+        self._remember(needle, rows)
+        self.on_result(rows)
+
+    def _on_error(self, error):
+        """
+        Обработка ошибки поискового запроса.
+
+        :param error: Текст ошибки
+        :type error: str
+        """
+        if self.on_error:
+            self.on_error(error)
+        else:
+            logging.error(f"Ошибка поиска: {error}")
@@ -0,0 +1,96 @@
+"""
+Модуль перемещения запасов между складами.
+
+Перемещение выполняется серверными функциями transfer_stock и
+transfer_stock_batch (migrations/0004_transfer_stock.sql) за одно
+обращение к базе данных: списание с исходного склада и поступление на
+целевой происходят в одной транзакции под блокировкой обеих записей.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт модуля для работы с PostgreSQL
+import psycopg2
+
+# Коды ошибок SQLSTATE, которыми серверные функции сообщают о недопустимом перемещении
+TRANSFER_ERROR_CODES = {
+    "23514",  # check_violation — неверное или недостаточное количество
+    "P0002",  # no_data_found — запись запаса не найдена
+    "22023",  # invalid_parameter_value — склады совпадают, разная длина массивов
+}
+
+
+class StockTransferError(Exception):
+    """
+    Недопустимое перемещение запаса (ошибка в данных, а не в работе базы).
+    """
+
+
+def _call(db, query, params):
+    """
+    Вызов серверной функции с преобразованием ошибок перемещения.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param query: SQL-запрос вызова функции
+    :type query: str
+    :param params: Параметры запроса
+    :type params: tuple
+    :returns: Значение, возвращенное функцией
+    :raises: StockTransferError при недопустимом перемещении,
+        psycopg2.Error при прочих ошибках базы данных
+    """
+    try:
+        return db.execute_returning(query, params)[0][0]
+    except psycopg2.Error as e:
+        if e.pgcode in TRANSFER_ERROR_CODES:
+            raise StockTransferError(e.diag.message_primary) from e
+        raise
+
+
+def transfer_stock(db, stock_id, target_warehouse_id, quantity):
+    """
+    Перемещение количества товара из записи запаса на другой склад.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param stock_id: ID исходной записи запаса
+    :type stock_id: int
+    :param target_warehouse_id: ID целевого склада
+    :type target_warehouse_id: int
+    :param quantity: Перемещаемое количество
+    :type quantity: int
+    :returns: ID записи запаса на целевом складе
+    :rtype: int
+    :raises: StockTransferError при недопустимом перемещении
+    """
+    return _call(
+        db,
+        "SELECT transfer_stock(%s, %s, %s)",
+        (int(stock_id), int(target_warehouse_id), int(quantity))
+    )
+
+
+def transfer_stock_batch(db, moves):
+    """
+    Выполнение набора перемещений в одной транзакции.
+
+    Используется для массового перераспределения запасов: если хотя бы
+    одно перемещение недопустимо, не выполняется ни одно.
+
+    :param db: Объект базы данных
+    :type db: Database
+    :param moves: Перемещения (ID записи запаса, ID целевого склада, количество)
+    :type moves: list[tuple[int, int, int]]
+    :returns: Количество выполненных перемещений
+    :rtype: int
+    :raises: StockTransferError при недопустимом перемещении
+    """
+    if not moves:
+        return 0
+    stock_ids, warehouse_ids, quantities = (list(map(int, column)) for column in zip(*moves))
+    return _call(
+        db,
+        "SELECT transfer_stock_batch(%s::integer[], %s::integer[], %s::integer[])",
+        (stock_ids, warehouse_ids, quantities)
+    )
@@ -0,0 +1,219 @@
+"""
+Модуль табличной модели для больших результатов запросов.
+
+Этот модуль предоставляет класс ColumnarTableModel — модель Qt
+(QAbstractTableModel), которая хранит результат запроса по столбцам
+и вычисляет отображаемый текст и цвет ячеек только при запросе
+представлением, т.е. только для видимых строк. В отличие от QTableWidget
+не создается объект на каждую ячейку.
+
+:author: Игорь Валуйсков
+:version: 1.0
+"""
+# Импорт необходимых классов из PyQt6
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """
+    Табличная модель только для чтения с хранением данных по столбцам.
+
+    Отображение настраивается функциями:
+
+    - formatters — словарь {номер столбца: функция(значение) -> str};
+      для остальных столбцов используется str(значение), None выводится
+      пустой строкой
+    - foreground — функция(модель, строка, столбец) -> цвет или None
+      для выделения ячеек цветом текста
+
+    :inherits: QAbstractTableModel
+    """
+
+    def __init__(self, headers, formatters=None, foreground=None, parent=None):
+        """
+        Инициализация модели.
+
+        :param headers: Заголовки столбцов
+        :type headers: list[str]
+        :param formatters: Функции форматирования значений по номеру столбца
+        :type formatters: dict[int, callable] или None
+        :param foreground: Функция выбора цвета текста ячейки
+        :type foreground: callable или None
+        :param parent: Родительский объект Qt
+        :type parent: QObject или None
+        """
+        super().__init__(parent)
+        # Сохранение заголовков и функций отображения
+        self._headers = list(headers)
+        self._formatters = formatters or {}
+        self._foreground = foreground
+        # Данные по столбцам и количество строк
+        self._columns = [[] for _ in self._headers]
+        self._row_count = 0
+
+    def set_rows(self, rows):
+        """
+        Замена данных модели результатом запроса.
+
+        Строки транспонируются в столбцы одним вызовом zip, поэтому
+        стоимость не зависит от количества видимых ячеек.
+
+        :param rows: Строки результата запроса
+        :type rows: list[tuple]
+        """
+        self.beginResetModel()
+        if rows:
+            self._columns = [list(column) for column in zip(*rows)]
+        else:
+            self._columns = [[] for _ in self._headers]
+        self._row_count = len(rows)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """
+        Добавление строк в конец модели (подгрузка следующей страницы).
+
+        :param rows: Строки результата запроса
+        :type rows: list[tuple]
+        """
+        if not rows:
+            return
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        """
+        Удаление всех строк модели.
+        """
+        self.set_rows([])
+
+    def column(self, col):
+        """
+        Получение всех значений столбца.
+
+        :param col: Номер столбца
+        :type col: int
+        :returns: Значения столбца (не копия — изменять нельзя)
+        :rtype: list
+        """
+        return self._columns[col]
+
+    def value(self, row, col):
+        """
+        Получение исходного значения ячейки.
+
+        :param row: Номер строки
+        :type row: int
+        :param col: Номер столбца
+        :type col: int
+        :returns: Значение из результата запроса
+        """
+        return self._columns[col][row]
+
+    def text(self, row, col):
+        """
+        Получение отображаемого текста ячейки.
+
+        :param row: Номер строки
+        :type row: int
+        :param col: Номер столбца
+        :type col: int
+        :returns: Текст ячейки в том виде, в котором он показан в таблице
+        :rtype: str
+        """
+        value = self._columns[col][row]
+        if value is None:
+            return ""
+        formatter = self._formatters.get(col)
+        return formatter(value) if formatter else str(value)
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        Количество строк модели.
+
+        :rtype: int
+        """
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        """
+        Количество столбцов модели.
+
+        :rtype: int
+        """
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        """
+        Получение данных ячейки для представления.
+
+        Вызывается представлением только для видимых ячеек.
+
+        :param index: Индекс ячейки
+        :type index: QModelIndex
+        :param role: Роль данных
+        :type role: Qt.ItemDataRole
+        """
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text(row, col)
+        if role == Qt.ItemDataRole.ForegroundRole and self._foreground:
+            return self._foreground(self, row, col)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """
+        Получение заголовков столбцов и номеров строк.
+        """
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        """
+        Флаги ячейки: выбор без редактирования.
+        """
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """
+        Сортировка строк модели по значению столбца.
+
+        Сортируется перестановка номеров строк, затем все столбцы
+        переставляются по ней. None считается меньше любого значения.
+
+        :param column: Номер столбца
+        :type column: int
+        :param order: Порядок сортировки
+        :type order: Qt.SortOrder
+        """
+        values = self._columns[column]
+        permutation = sorted(
+            range(self._row_count),
+            key=lambda row: (values[row] is not None, values[row]),
+            reverse=order == Qt.SortOrder.DescendingOrder
+        )
+        self.layoutAboutToBeChanged.emit()
+        self._columns = [[col[row] for row in permutation] for col in self._columns]
+        # Перенос выделения и текущей ячейки на новые позиции строк
+        new_rows = {old_row: new_row for new_row, old_row in enumerate(permutation)}
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.index(new_rows[index.row()], index.column()) for index in old_indexes]
+        )
+        self.layoutChanged.emit()
@@ -1,12 +1,16 @@
 from PyQt6.QtWidgets import (
-    QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QWidget, QTableWidget, QTableWidgetItem, QTableView, QVBoxLayout,
     QHBoxLayout, QPushButton, QLineEdit, QHeaderView, QMessageBox, 
     QLabel, QComboBox, QSpacerItem, QSizePolicy, QDialog, QSplitter, QMenu, QInputDialog, QFileDialog
 )
 from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QIcon
+from PyQt6.QtGui import QIcon, QColor
 import logging
 from dialogs import AddOrderDialog, ConfirmDialog, ExportDialog, CreatePurchaseOrderDialog
+from async_query import AsyncQueryRunner
+from table_model import ColumnarTableModel
+from search_controller import SearchDebouncer
+from validators import Validator
 import datetime
 
 class OrdersTab(QWidget):
@@ -15,6 +19,27 @@ class OrdersTab(QWidget):
     Наследуется от QWidget для создания пользовательского интерфейса.
     """
 
+    # Цвета текста для статусов заказа
+    STATUS_COLORS = {
+        "доставлен": QColor(Qt.GlobalColor.darkGreen),
+        "отменен": QColor(Qt.GlobalColor.red),
+        "в обработке": QColor(Qt.GlobalColor.blue),
+    }
+    # Максимальный номер заказа (тип integer в PostgreSQL)
+    MAX_ORDER_ID = 2147483647
+    # Количество заказов, загружаемых за один запрос
+    PAGE_SIZE = 200
+    # Размер таблицы, до которого общее количество заказов считается точно
+    EXACT_COUNT_LIMIT = 100000
+    # Базовый запрос списка заказов (условия добавляются в конец)
+    ORDERS_QUERY = """
+        SELECT o.order_id, o.order_date, s.supplier_name, o.total_amount, 
+               o.status, o.updated_at
+        FROM orders o
+        JOIN suppliers s ON o.supplier_id = s.supplier_id
+        WHERE 1=1
+    """
+
     def __init__(self, db):
         """
         Инициализация вкладки заказов.
@@ -25,6 +50,17 @@ class OrdersTab(QWidget):
         super().__init__()
         # Сохранение объекта базы данных
         self.db = db
+        # Исполнитель фоновых запросов
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
+        # Условия текущей выборки заказов: SQL-фрагмент и параметры
+        self.orders_filter = ("", [])
+        # Подпись счетчика ("Всего заказов" или "Найдено заказов")
+        self.count_caption = "Всего заказов"
+        # Признак того, что загружены все страницы выборки
+        self.orders_exhausted = True
+        # Общее количество заказов: (количество, признак оценки) или None
+        self.orders_total = None
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Загрузка списка заказов
@@ -82,20 +118,26 @@ class OrdersTab(QWidget):
         splitter = QSplitter(Qt.Orientation.Vertical)
 
         # Создание таблицы для отображения заказов
-        self.orders_table = QTableWidget()
-        self.orders_table.setColumnCount(6)
-        self.orders_table.setHorizontalHeaderLabels([
-            "ID", "Дата", "Поставщик", "Сумма", "Статус", "Обновлено"
-        ])
+        self.orders_table = QTableView()
+        # Модель данных: текст и цвет ячеек вычисляются только для видимых строк
+        self.orders_model = ColumnarTableModel(
+            ["ID", "Дата", "Поставщик", "Сумма", "Статус", "Обновлено"],
+            formatters={3: lambda amount: f"{amount:.2f}"},  # Форматирование денежных сумм
+            foreground=self.order_foreground,
+            parent=self
+        )
+        self.orders_table.setModel(self.orders_model)
         # Настройка автоматического изменения размера столбцов
         self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        # Настройка автоматического изменения размера строк
-        self.orders_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        # Фиксированная высота строк: подгонка по содержимому опрашивала бы все строки модели
+        self.orders_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
 
         self.orders_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.orders_table.customContextMenuRequested.connect(self.show_order_context_menu)
-        self.orders_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows) # Выбор целых строк
-        self.orders_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers) # Только для чтения
+        self.orders_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows) # Выбор целых строк
+        self.orders_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers) # Только для чтения
+        # Подгрузка следующей страницы при прокрутке к концу таблицы
+        self.orders_table.verticalScrollBar().valueChanged.connect(self.fetch_more_orders)
         self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         splitter.addWidget(self.orders_table)
         # Таблица позиций заказа
@@ -140,10 +182,15 @@ class OrdersTab(QWidget):
         # Создание кнопки экспорта
         self.btn_export = QPushButton("Экспорт")
         self.btn_export.setIcon(QIcon.fromTheme("document-save"))
+        
+        # Создание кнопки пакетного формирования PDF документов заказов
+        self.btn_export_pdf_batch = QPushButton("PDF по заказам")
+        self.btn_export_pdf_batch.setIcon(QIcon.fromTheme("document-print"))
 
         # Добавление элементов на правую панель
         right_button_panel.addWidget(self.order_count_label)
         right_button_panel.addStretch()
+        right_button_panel.addWidget(self.btn_export_pdf_batch)
         right_button_panel.addWidget(self.btn_export)
 
         # Сборка нижней панели из левой и правой частей
@@ -165,18 +212,23 @@ class OrdersTab(QWidget):
         self.btn_refresh.clicked.connect(self.load_orders)
         self.btn_details.clicked.connect(self.show_order_details)
         self.btn_export.clicked.connect(self.export_data)
-        self.search.textChanged.connect(self.handle_search)
+        self.btn_export_pdf_batch.clicked.connect(self.export_orders_pdf_batch)
+        # Поиск с задержкой ввода. Список заказов загружается постранично, поэтому
+        # уточнение по найденным строкам не применяется; устаревший запрос
+        # отменяется исполнителем запросов по ключу "orders"
+        self.search_debouncer = SearchDebouncer(self.search, lambda text: self.handle_search(), parent=self)
         self.status_filter.currentIndexChanged.connect(self.apply_filters)
         # Добавление сигнала для загрузки позиций заказа при выборе
-        self.orders_table.itemSelectionChanged.connect(self.load_order_items)
+        self.orders_table.selectionModel().selectionChanged.connect(self.load_order_items)
 
     def load_orders(self):
         """
         Загрузка заказов из базы данных и отображение в таблице.
         
-        Выполняет SQL-запрос для получения списка заказов, 
-        форматирует данные и заполняет ими таблицу.
-        Обновляет счетчик общего количества заказов.
+        Загружает первую страницу списка заказов в фоновом потоке, не блокируя
+        интерфейс; следующие страницы подгружаются при прокрутке таблицы
+        (см. fetch_more_orders). Общее количество заказов для счетчика
+        запрашивается отдельно (см. load_orders_count).
         
         :raises: Exception при ошибке загрузки данных
         """
@@ -184,58 +236,204 @@ class OrdersTab(QWidget):
             # Очистка таблицы позиций при перезагрузке заказов
             self.order_items_table.setRowCount(0)
             
-            # SQL-запрос для получения списка заказов
-            query = """
-                SELECT o.order_id, o.order_date, s.supplier_name, o.total_amount, 
-                       o.status, o.updated_at
-                FROM orders o
-                JOIN suppliers s ON o.supplier_id = s.supplier_id
-                ORDER BY o.order_date DESC
-            """
-            # Получение списка заказов из базы данных
-            orders = self.db.fetch_all(query)
-
-            # Установка количества строк в таблице
-            self.orders_table.setRowCount(len(orders))
-
-            # Заполнение таблицы данными
-            for row_idx, order in enumerate(orders):
-                for col_idx, data in enumerate(order):
-                    # Создание элемента таблицы
-                    item = QTableWidgetItem(str(data))
-                    # Запрет редактирования ячеек
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    
-                    # Цветовое кодирование столбца статуса
-                    if col_idx == 4:  # Столбец статуса
-                        if data == "доставлен":
-                            item.setForeground(Qt.GlobalColor.darkGreen)
-                        elif data == "отменен":
-                            item.setForeground(Qt.GlobalColor.red)
-                        elif data == "в обработке":
-                            item.setForeground(Qt.GlobalColor.blue)
-                    
-                    # Форматирование денежных сумм
-                    if col_idx == 3:  # Столбец с суммой
-                        item = QTableWidgetItem(f"{data:.2f}")
-                    
-                    # Установка элемента в таблицу
-                    self.orders_table.setItem(row_idx, col_idx, item)
+            # Выборка всех заказов без условий
+            self.orders_filter = ("", [])
+            self.count_caption = "Всего заказов"
+            # Загрузка первой страницы заказов
+            self.fetch_orders_page(first_page=True)
+            # Загрузка общего количества заказов
+            self.load_orders_count()
+            
+        except Exception as e:
+            # Логирование ошибки
+            logging.error(f"Ошибка загрузки заказов: {str(e)}")
+            # Отображение сообщения об ошибке
+            QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о заказах")
+
+    def fetch_orders_page(self, first_page=False):
+        """
+        Загрузка страницы заказов с постраничной навигацией по ключу.
+        
+        Заказы упорядочены по (order_date, order_id) по убыванию. Следующая
+        страница начинается после последней загруженной строки, поэтому
+        стоимость запроса не зависит от того, сколько страниц уже загружено
+        (в отличие от OFFSET).
+        
+        :param first_page: Загрузить первую страницу с заменой данных таблицы
+        :type first_page: bool
+        """
+        # Условия текущей выборки
+        condition, params = self.orders_filter
+        query = self.ORDERS_QUERY + condition
+        params = list(params)
+        
+        # Продолжение после последней загруженной строки
+        last_row = self.orders_model.rowCount() - 1
+        if not first_page and last_row >= 0:
+            query += " AND (o.order_date, o.order_id) < (%s, %s)"
+            params.extend([
+                self.orders_model.value(last_row, 1),
+                self.orders_model.value(last_row, 0)
+            ])
+        
+        # Сортировка по ключу постраничной навигации
+        query += " ORDER BY o.order_date DESC, o.order_id DESC LIMIT %s"
+        params.append(self.PAGE_SIZE)
+        
+        # Получение страницы заказов в фоновом потоке
+        self.query_runner.submit(
+            "orders", query, tuple(params),
+            lambda orders: self.show_orders(orders, first_page),
+            self.show_load_error
+        )
+
+    def fetch_more_orders(self, *args):
+        """
+        Подгрузка следующей страницы заказов при прокрутке к концу таблицы.
+        
+        Вызывается при прокрутке таблицы заказов и после отображения страницы:
+        если таблица не заполняет видимую область, загружается следующая страница.
+        """
+        # Все страницы загружены или загрузка уже выполняется
+        if self.orders_exhausted or self.query_runner.is_loading("orders"):
+            return
+        scroll_bar = self.orders_table.verticalScrollBar()
+        # Загрузка, когда до конца таблицы осталось меньше одного экрана
+        if scroll_bar.maximum() - scroll_bar.value() <= scroll_bar.pageStep():
+            self.fetch_orders_page()
+
+    def load_orders_count(self):
+        """
+        Загрузка общего количества заказов для счетчика.
+        
+        Для небольшой таблицы выполняется точный подсчет; для большой
+        используется оценка планировщика (pg_class.reltuples), которая
+        не требует чтения всей таблицы.
+        """
+        query = """
+            SELECT CASE WHEN reltuples < %s THEN (SELECT count(*) FROM orders)
+                        ELSE reltuples::bigint END,
+                   reltuples >= %s
+            FROM pg_class
+            WHERE oid = 'orders'::regclass
+        """
+        self.query_runner.submit(
+            "orders_count", query, (self.EXACT_COUNT_LIMIT, self.EXACT_COUNT_LIMIT),
+            self.show_orders_count,
+            lambda error: logging.error(f"Ошибка подсчета заказов: {error}")
+        )
+
+    def show_orders_count(self, rows):
+        """
+        Сохранение общего количества заказов и обновление счетчика.
+        
+        :param rows: Результат запроса: [(количество, признак оценки)]
+        :type rows: list[tuple]
+        """
+        if rows:
+            self.orders_total = (int(rows[0][0]), bool(rows[0][1]))
+        self.update_order_count_label()
+
+    def update_order_count_label(self):
+        """
+        Обновление счетчика заказов.
+        
+        Для полного списка выводится общее количество заказов (с пометкой "~"
+        для оценки), для результатов поиска — количество загруженных заказов
+        с пометкой "+", если загружены не все страницы.
+        """
+        if self.count_caption == "Всего заказов" and self.orders_total is not None:
+            count, estimated = self.orders_total
+            text = f"~{count}" if estimated else str(count)
+        else:
+            text = str(self.orders_model.rowCount())
+            if not self.orders_exhausted:
+                text += "+"
+        self.order_count_label.setText(f"{self.count_caption}: {text}")
+
+    def show_orders(self, orders, first_page):
+        """
+        Отображение страницы заказов в таблице.
+        
+        Первая страница заменяет данные таблицы, следующие добавляются в конец.
+        Форматирование сумм и цвета статусов задаются моделью таблицы.
+        
+        :param orders: Строки результата запроса заказов
+        :type orders: list[tuple]
+        :param first_page: Первая страница выборки
+        :type first_page: bool
+        """
+        try:
+            # Передача данных в модель таблицы
+            if first_page:
+                self.orders_model.set_rows(orders)
+            else:
+                self.orders_model.append_rows(orders)
+            # Неполная страница означает, что загружены все заказы выборки
+            self.orders_exhausted = len(orders) < self.PAGE_SIZE
             
             # Обновление счетчика заказов
-            self.order_count_label.setText(f"Всего заказов: {len(orders)}")
+            self.update_order_count_label()
+            # Подгрузка следующей страницы, если таблица не заполнила экран
+            self.fetch_more_orders()
             
         except Exception as e:
             # Логирование ошибки
-            logging.error(f"Ошибка загрузки заказов: {str(e)}")
+            logging.error(f"Ошибка отображения заказов: {str(e)}")
             # Отображение сообщения об ошибке
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о заказах")
 
+    def order_foreground(self, model, row, col):
+        """
+        Цвет текста ячейки таблицы заказов.
+        
+        Выполняет цветовое кодирование столбца статуса.
+        
+        :param model: Модель таблицы заказов
+        :type model: ColumnarTableModel
+        :param row: Номер строки
+        :type row: int
+        :param col: Номер столбца
+        :type col: int
+        :returns: Цвет текста или None
+        """
+        if col == 4:  # Столбец статуса
+            return self.STATUS_COLORS.get(model.value(row, 4))
+        return None
+
+    def show_load_error(self, error):
+        """
+        Обработка ошибки фоновой загрузки заказов.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка загрузки заказов: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о заказах")
+
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных.
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором; текст метки — только при пустой таблице,
+            # чтобы счетчик не мигал при подгрузке страниц
+            self.setCursor(Qt.CursorShape.BusyCursor)
+            if self.orders_model.rowCount() == 0:
+                self.order_count_label.setText("Загрузка...")
+        else:
+            self.unsetCursor()
+
     def handle_search(self):
         """
         Обработка изменений в поиске и фильтрах.
         
-        Вызывается при вводе текста в поле поиска.
+        Вызывается после паузы во вводе текста в поле поиска (см. SearchDebouncer).
         Запускает метод apply_filters для фильтрации таблицы заказов.
         """
         self.apply_filters()
@@ -246,10 +444,12 @@ class OrdersTab(QWidget):
         
         Фильтрует таблицу заказов на основе:
         
-        - Текста из поля поиска (по ID заказа или названию поставщика)
+        - Текста из поля поиска (номер заказа или название поставщика,
+          см. build_search_condition)
         - Выбранного статуса заказа из выпадающего списка
         
-        Обновляет счетчик найденных заказов.
+        Запрос выполняется в фоновом потоке; незавершенный запрос
+        с предыдущими условиями отменяется. Обновляет счетчик найденных заказов.
         
         :raises: Exception при ошибке фильтрации данных
         """
@@ -262,94 +462,76 @@ class OrdersTab(QWidget):
             # Получение выбранного статуса
             status_filter = self.status_filter.currentData()
             
-            # Базовый SQL-запрос
-            query = """
-                SELECT o.order_id, o.order_date, s.supplier_name, o.total_amount, 
-                       o.status, o.updated_at
-                FROM orders o
-                JOIN suppliers s ON o.supplier_id = s.supplier_id
-                WHERE 1=1
-            """
+            # Условия выборки
+            condition = ""
             params = []
             
             # Добавление фильтра по статусу
             if status_filter:
-                query += " AND o.status = %s"
+                condition += " AND o.status = %s"
                 params.append(status_filter)
             
             # Добавление фильтра поиска
             if search_text:
-                query += """ AND (
-                    o.order_id::text LIKE %s
-                    OR s.supplier_name ILIKE %s
-                )"""
-                search_param = f"%{search_text}%"
-                params.extend([search_param, search_param])
-            
-            # Добавление сортировки
-            query += " ORDER BY o.order_date DESC"
-            
-            # Выполнение запроса
-            orders = self.db.fetch_all(query, tuple(params))
-            
-            # Обновление таблицы
-            self.orders_table.setRowCount(len(orders))
+                search_condition, search_params = self.build_search_condition(search_text)
+                condition += search_condition
+                params.extend(search_params)
             
-            # Заполнение таблицы отфильтрованными данными
-            for row_idx, order in enumerate(orders):
-                for col_idx, data in enumerate(order):
-                    item = QTableWidgetItem(str(data))
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    
-                    # Цветовое кодирование столбца статуса
-                    if col_idx == 4:  # Столбец статуса
-                        if data == "доставлен":
-                            item.setForeground(Qt.GlobalColor.darkGreen)
-                        elif data == "отменен":
-                            item.setForeground(Qt.GlobalColor.red)
-                        elif data == "в обработке":
-                            item.setForeground(Qt.GlobalColor.blue)
-                    
-                    # Форматирование денежных сумм
-                    if col_idx == 3:  # Столбец с суммой
-                        item = QTableWidgetItem(f"{data:.2f}")
-                    
-                    self.orders_table.setItem(row_idx, col_idx, item)
-            
-            # Обновление счетчика заказов
-            self.order_count_label.setText(f"Найдено заказов: {len(orders)}")
+            # Загрузка первой страницы отфильтрованных заказов
+            self.orders_filter = (condition, params)
+            self.count_caption = "Найдено заказов"
+            self.fetch_orders_page(first_page=True)
             
         except Exception as e:
             # Логирование ошибки
             logging.error(f"Ошибка фильтрации заказов: {str(e)}")
     
+    def build_search_condition(self, search_text):
+        """
+        Формирование условия поиска заказов.
+        
+        Если введены только цифры, ищется заказ с таким номером (точное
+        совпадение по первичному ключу). Иначе выполняется поиск по названию
+        поставщика (ILIKE, использует триграммный индекс idx_suppliers_name_trgm).
+        
+        :param search_text: Текст поиска
+        :type search_text: str
+        :returns: SQL-фрагмент условия и его параметры
+        :rtype: tuple[str, list]
+        """
+        search_text = search_text.strip()
+        if search_text.isascii() and search_text.isdigit():
+            order_id = int(search_text)
+            # Номер вне диапазона integer не может совпасть ни с одним заказом
+            if order_id > self.MAX_ORDER_ID:
+                return " AND FALSE", []
+            return " AND o.order_id = %s", [order_id]
+        return " AND s.supplier_name ILIKE %s", [Validator.like_pattern(search_text)]
+
     def load_order_items(self):
         """
         Загружает позиции для выбранного заказа в нижнюю таблицу.
         
         Вызывается при выборе заказа в верхней таблице.
         Выполняет SQL-запрос для получения позиций выбранного заказа
-        и отображает их в нижней таблице.
+        в фоновом потоке; запрос для предыдущего выбора отменяется.
+        Позиции отображаются методом show_order_items.
         
         :raises: Exception при ошибке загрузки позиций заказа
         """
+        order_id = None
         try:
             # Получение выбранных строк
             selected_rows = self.orders_table.selectionModel().selectedRows()
             if not selected_rows:
-                # Очистка таблицы товаров, если заказ не выбран
+                # Отмена загрузки и очистка таблицы товаров, если заказ не выбран
+                self.query_runner.cancel("order_items")
                 self.order_items_table.setRowCount(0)
                 return
 
             # Получение индекса выбранной строки и ID заказа
             selected_row_index = selected_rows[0].row()
-            order_id_item = self.orders_table.item(selected_row_index, 0)
-
-            if not order_id_item:
-                self.order_items_table.setRowCount(0)
-                return
-
-            order_id = int(order_id_item.text())
+            order_id = self.orders_model.value(selected_row_index, 0)
 
             # Запрос позиций заказа с названиями товаров
             query = """
@@ -359,32 +541,55 @@ class OrdersTab(QWidget):
                 WHERE oi.order_id = %s
                 ORDER BY oi.order_item_id
             """
-            items = self.db.fetch_all(query, (order_id,))
-
-            # Обновление заголовков таблицы позиций
-            self.order_items_table.setHorizontalHeaderLabels([
-                "ID", "Товар", "Количество", "Цена за ед.", "Итого"
-            ])
-
-            # Заполнение таблицы позиций заказа
-            self.order_items_table.setRowCount(len(items))
-            for row_idx, item_data in enumerate(items):
-                for col_idx, data in enumerate(item_data):
-                    # Создание элемента таблицы
-                    if col_idx in [3, 4]:  # Форматирование денежных значений
-                        table_item = QTableWidgetItem(f"{data:.2f}")
-                    else:
-                        table_item = QTableWidgetItem(str(data))
-                        
-                    # Запрет редактирования ячеек
-                    table_item.setFlags(table_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.order_items_table.setItem(row_idx, col_idx, table_item)
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "order_items", query, (order_id,), self.show_order_items,
+                lambda error: self.show_order_items_error(order_id, error)
+            )
 
         except Exception as e:
             # Логирование ошибки и отображение сообщения
-            logging.error(f"Ошибка загрузки позиций заказа {order_id}: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить позиции заказа {order_id}")
-            self.order_items_table.setRowCount(0)
+            self.show_order_items_error(order_id, str(e))
+
+    def show_order_items(self, items):
+        """
+        Отображение позиций выбранного заказа в нижней таблице.
+        
+        :param items: Строки позиций заказа
+        :type items: list[tuple]
+        """
+        # Обновление заголовков таблицы позиций
+        self.order_items_table.setHorizontalHeaderLabels([
+            "ID", "Товар", "Количество", "Цена за ед.", "Итого"
+        ])
+
+        # Заполнение таблицы позиций заказа
+        self.order_items_table.setRowCount(len(items))
+        for row_idx, item_data in enumerate(items):
+            for col_idx, data in enumerate(item_data):
+                # Создание элемента таблицы
+                if col_idx in [3, 4]:  # Форматирование денежных значений
+                    table_item = QTableWidgetItem(f"{data:.2f}")
+                else:
+                    table_item = QTableWidgetItem(str(data))
+                    
+                # Запрет редактирования ячеек
+                table_item.setFlags(table_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                self.order_items_table.setItem(row_idx, col_idx, table_item)
+
+    def show_order_items_error(self, order_id, error):
+        """
+        Обработка ошибки загрузки позиций заказа.
+        
+        :param order_id: ID заказа
+        :type order_id: int или None
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки и отображение сообщения
+        logging.error(f"Ошибка загрузки позиций заказа {order_id}: {error}")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить позиции заказа {order_id}")
+        self.order_items_table.setRowCount(0)
 
     def edit_order(self):
         """
@@ -397,12 +602,13 @@ class OrdersTab(QWidget):
         - Количество и цены товаров
         
         Проверяет возможность редактирования заказа на основе его текущего статуса.
-        Завершенные и отмененные заказы редактировать нельзя.
+        Завершенные и отмененные заказы редактировать нельзя. Данные заказа
+        загружаются в фоновом потоке, диалог открывает метод open_edit_order_dialog.
         
         :raises: Exception при ошибке редактирования заказа
         """
         # Получение выбранных строк
-        selected_rows = self.orders_table.selectedItems()
+        selected_rows = self.orders_table.selectionModel().selectedRows()
         if not selected_rows:
             # Отображение предупреждения, если заказ не выбран
             QMessageBox.warning(self, "Внимание", "Выберите заказ для редактирования")
@@ -410,9 +616,9 @@ class OrdersTab(QWidget):
             
         # Получение номера строки и ID заказа
         row = selected_rows[0].row()
-        order_id = self.orders_table.item(row, 0).text()
+        order_id = self.orders_model.text(row, 0)
         # Получение статуса заказа
-        status = self.orders_table.item(row, 4).text()
+        status = self.orders_model.text(row, 4)
         
         # Проверка возможности редактирования
         if status == "доставлен" or status == "отменен":
@@ -420,115 +626,157 @@ class OrdersTab(QWidget):
             return
             
         try:
-           # Получаем текущие данные заказа
-           query_order = """
-               SELECT o.supplier_id, o.total_amount, o.status
-               FROM orders o
-               WHERE o.order_id = %s
-           """
-           self.db.cursor.execute(query_order, (order_id,))
-           order_data = self.db.cursor.fetchone()
-           
-           if not order_data:
-               QMessageBox.critical(self, "Ошибка", f"Информация о заказе ID {order_id} не найдена.")
-               return
-                   
-           # Получаем позиции заказа
-           query_items = """
-               SELECT oi.order_item_id, oi.product_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
-               FROM order_items oi
-               JOIN products p ON oi.product_id = p.product_id
-               WHERE oi.order_id = %s
-               ORDER BY oi.order_item_id
-           """
-           self.db.cursor.execute(query_items, (order_id,))
-           order_items = self.db.cursor.fetchall()
-           
-           # Создаем диалог редактирования заказа
-           edit_dialog = AddOrderDialog(self, self.db)
-           edit_dialog.setWindowTitle("Редактировать заказ")
-           
-           # Заполняем диалог текущими данными
-           # Устанавливаем поставщика
-           supplier_idx = edit_dialog.supplier_combo.findData(order_data[0])
-           if supplier_idx >= 0:
-               edit_dialog.supplier_combo.setCurrentIndex(supplier_idx)
-           
-           # Заполняем таблицу товаров
-           for item in order_items:
-               row = edit_dialog.order_items_table.rowCount()
-               edit_dialog.order_items_table.insertRow(row)
-               
-               edit_dialog.order_items_table.setItem(row, 0, QTableWidgetItem(str(item[1])))  # product_id
-               edit_dialog.order_items_table.setItem(row, 1, QTableWidgetItem(item[2]))       # product_name
-               edit_dialog.order_items_table.setItem(row, 2, QTableWidgetItem(str(item[3])))  # quantity
-               edit_dialog.order_items_table.setItem(row, 3, QTableWidgetItem(f"{item[4]:.2f}"))  # unit_price
-               edit_dialog.order_items_table.setItem(row, 4, QTableWidgetItem(f"{item[5]:.2f}"))  # total_price
-           
-           edit_dialog.update_total_amount()
-           
-           # Если пользователь подтвердил изменения
-           if edit_dialog.exec():
-               # Получаем обновленные данные
-               updated_data = edit_dialog.get_data()
-               if not updated_data:
-                   return
-               
-               # Начинаем транзакцию
-               try:
-                   # Обновляем основную информацию о заказе
-                   update_query = """
-                       UPDATE orders 
-                       SET supplier_id = %s, 
-                           total_amount = %s,
-                           updated_at = CURRENT_TIMESTAMP
-                       WHERE order_id = %s
-                   """
-                   update_params = (
-                       updated_data["supplier_id"],
-                       updated_data["total_amount"],
-                       order_id
-                   )
-                   self.db.cursor.execute(update_query, update_params)
-                   
-                   # Удаляем старые позиции заказа
-                   delete_items_query = "DELETE FROM order_items WHERE order_id = %s"
-                   self.db.cursor.execute(delete_items_query, (order_id,))
-                   
-                   # Добавляем новые позиции заказа
-                   for item in updated_data["items"]:
-                       insert_item_query = """
-                           INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                           VALUES (%s, %s, %s, %s, %s)
-                       """
-                       item_params = (
-                           order_id,
-                           item["product_id"],
-                           item["quantity"],
-                           item["unit_price"],
-                           item["total_price"]
-                       )
-                       # Выполнение запроса
-                       self.db.cursor.execute(insert_item_query, item_params)
-                   
-                   # Фиксируем транзакцию
-                   self.db.conn.commit()
-                   # Обновление списка заказов
-                   self.load_orders()
-                   # Отображение сообщения об успехе
-                   QMessageBox.information(self, "Успех", "Заказ успешно обновлен")
-               except Exception as tx_error:
-                   # Откатываем изменения при ошибке
-                   self.db.conn.rollback()
-                   # Логирование ошибки
-                   logging.error(f"Ошибка транзакции в редактировании заказа: {str(tx_error)}")
-                   # Отображение сообщения об ошибке
-                   QMessageBox.critical(self, "Ошибка транзакции", f"Не удалось обновить заказ: {str(tx_error)}")
+            # Получаем текущие данные заказа
+            query_order = """
+                SELECT o.supplier_id, o.total_amount, o.status, o.warehouse_id
+                FROM orders o
+                WHERE o.order_id = %s
+            """
+            # Выполнение запроса в фоновом потоке; позиции загружает load_edit_order_items
+            self.query_runner.submit(
+                "edit_order", query_order, (order_id,),
+                lambda rows: self.load_edit_order_items(order_id, rows),
+                self.show_edit_order_error
+            )
         except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка редактирования заказа: {str(e)}")
-            # Отображение сообщения об ошибке
-            QMessageBox.critical(self, "Ошибка", f"Не удалось редактировать заказ: {str(e)}")
+            self.show_edit_order_error(str(e))
+
+    def load_edit_order_items(self, order_id, rows):
+        """
+        Загрузка позиций редактируемого заказа в фоновом потоке.
+        
+        :param order_id: ID заказа
+        :type order_id: str
+        :param rows: Строки с данными заказа (поставщик, сумма, статус, склад)
+        :type rows: list[tuple]
+        """
+        order_data = rows[0] if rows else None
+        if not order_data:
+            QMessageBox.critical(self, "Ошибка", f"Информация о заказе ID {order_id} не найдена.")
+            return
+        
+        # Получаем позиции заказа
+        query_items = """
+            SELECT oi.order_item_id, oi.product_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
+            FROM order_items oi
+            JOIN products p ON oi.product_id = p.product_id
+            WHERE oi.order_id = %s
+            ORDER BY oi.order_item_id
+        """
+        # Диалог открывается после получения позиций методом open_edit_order_dialog
+        self.query_runner.submit(
+            "edit_order", query_items, (order_id,),
+            lambda order_items: self.open_edit_order_dialog(order_id, order_data, order_items),
+            self.show_edit_order_error
+        )
+
+    def open_edit_order_dialog(self, order_id, order_data, order_items):
+        """
+        Открытие диалога редактирования заказа и сохранение изменений.
+        
+        :param order_id: ID заказа
+        :type order_id: str
+        :param order_data: Данные заказа (поставщик, сумма, статус, склад)
+        :type order_data: tuple
+        :param order_items: Позиции заказа
+        :type order_items: list[tuple]
+        :raises: Exception при ошибке редактирования заказа
+        """
+        try:
+            # Создаем диалог редактирования заказа
+            edit_dialog = AddOrderDialog(self, self.db)
+            edit_dialog.setWindowTitle("Редактировать заказ")
+
+            # Заполняем диалог текущими данными
+            # Устанавливаем поставщика
+            supplier_idx = edit_dialog.supplier_combo.findData(order_data[0])
+            if supplier_idx >= 0:
+                edit_dialog.supplier_combo.setCurrentIndex(supplier_idx)
+            # Устанавливаем склад приемки
+            warehouse_idx = edit_dialog.warehouse_combo.findData(order_data[3])
+            if warehouse_idx >= 0:
+                edit_dialog.warehouse_combo.setCurrentIndex(warehouse_idx)
+
+            # Заполняем таблицу товаров
+            for item in order_items:
+                row = edit_dialog.order_items_table.rowCount()
+                edit_dialog.order_items_table.insertRow(row)
+
+                edit_dialog.order_items_table.setItem(row, 0, QTableWidgetItem(str(item[1])))  # product_id
+                edit_dialog.order_items_table.setItem(row, 1, QTableWidgetItem(item[2]))       # product_name
+                edit_dialog.order_items_table.setItem(row, 2, QTableWidgetItem(str(item[3])))  # quantity
+                edit_dialog.order_items_table.setItem(row, 3, QTableWidgetItem(f"{item[4]:.2f}"))  # unit_price
+                edit_dialog.order_items_table.setItem(row, 4, QTableWidgetItem(f"{item[5]:.2f}"))  # total_price
+
+            edit_dialog.update_total_amount()
+
+            # Если пользователь подтвердил изменения
+            if edit_dialog.exec():
+                # Получаем обновленные данные
+                updated_data = edit_dialog.get_data()
+                if not updated_data:
+                    return
+
+                # Начинаем транзакцию
+                try:
+                    # Изменения фиксируются вместе при выходе из блока или откатываются при ошибке
+                    with self.db.transaction() as tx:
+                        # Обновляем основную информацию о заказе
+                        update_query = """
+                            UPDATE orders 
+                            SET supplier_id = %s, 
+                                warehouse_id = %s,
+                                total_amount = %s,
+                                updated_at = CURRENT_TIMESTAMP
+                            WHERE order_id = %s
+                        """
+                        update_params = (
+                            updated_data["supplier_id"],
+                            updated_data["warehouse_id"],
+                            updated_data["total_amount"],
+                            order_id
+                        )
+                        tx.execute(update_query, update_params)
+
+                        # Удаляем старые позиции заказа
+                        delete_items_query = "DELETE FROM order_items WHERE order_id = %s"
+                        tx.execute(delete_items_query, (order_id,))
+
+                        # Добавляем новые позиции заказа одной командой
+                        insert_item_query = """
+                            INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
+                            VALUES %s
+                        """
+                        item_rows = [
+                            (order_id, item["product_id"], item["quantity"], item["unit_price"], item["total_price"])
+                            for item in updated_data["items"]
+                        ]
+                        tx.execute_many_values(insert_item_query, item_rows)
+
+                    # Обновление списка заказов
+                    self.load_orders()
+                    # Отображение сообщения об успехе
+                    QMessageBox.information(self, "Успех", "Заказ успешно обновлен")
+                except Exception as tx_error:
+                    # Транзакция уже откатана
+                    # Логирование ошибки
+                    logging.error(f"Ошибка транзакции в редактировании заказа: {str(tx_error)}")
+                    # Отображение сообщения об ошибке
+                    QMessageBox.critical(self, "Ошибка транзакции", f"Не удалось обновить заказ: {str(tx_error)}")
+        except Exception as e:
+            self.show_edit_order_error(str(e))
+
+    def show_edit_order_error(self, error):
+        """
+        Обработка ошибки редактирования заказа.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка редактирования заказа: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", f"Не удалось редактировать заказ: {error}")
 
     def cancel_order(self):
         """
@@ -541,7 +789,7 @@ class OrdersTab(QWidget):
         :raises: Exception при ошибке отмены заказа
         """
         # Получение выбранных строк
-        selected_rows = self.orders_table.selectedItems()
+        selected_rows = self.orders_table.selectionModel().selectedRows()
         if not selected_rows:
             # Отображение предупреждения, если заказ не выбран
             QMessageBox.warning(self, "Внимание", "Выберите заказ для отмены")
@@ -549,9 +797,9 @@ class OrdersTab(QWidget):
             
         # Получение номера строки и ID заказа
         row = selected_rows[0].row()
-        order_id = self.orders_table.item(row, 0).text()
+        order_id = self.orders_model.text(row, 0)
         # Получение статуса заказа
-        status = self.orders_table.item(row, 4).text()
+        status = self.orders_model.text(row, 4)
         
         # Проверка возможности отмены
         if status == "доставлен" or status == "отменен":
@@ -606,7 +854,7 @@ class OrdersTab(QWidget):
         :raises: Exception при ошибке загрузки деталей заказа
         """
         # Получение выбранных строк
-        selected_rows = self.orders_table.selectedItems()
+        selected_rows = self.orders_table.selectionModel().selectedRows()
         if not selected_rows:
             # Отображение предупреждения, если заказ не выбран
             QMessageBox.warning(self, "Внимание", "Выберите заказ для просмотра деталей")
@@ -614,7 +862,10 @@ class OrdersTab(QWidget):
             
         # Получение номера строки и ID заказа
         row = selected_rows[0].row()
-        order_id = self.orders_table.item(row, 0).text()
+        order_id = self.orders_model.text(row, 0)
+        
+        # Общая сумма заказа на момент запроса
+        total_amount = self.orders_model.text(row, 3)
         
         try:
             # Получение товаров в заказе
@@ -624,34 +875,59 @@ class OrdersTab(QWidget):
                 JOIN products p ON oi.product_id = p.product_id
                 WHERE oi.order_id = %s
             """
-            items = self.db.fetch_all(query, (order_id,))
-            
-            # Форматирование текста деталей
-            details_text = f"Детали заказа #{order_id}:\n\n"
+            # Выполнение запроса в фоновом потоке; результат показывает show_order_details_text
+            self.query_runner.submit(
+                "order_details", query, (order_id,),
+                lambda items: self.show_order_details_text(order_id, total_amount, items),
+                self.show_order_details_error
+            )
             
-            if items:
-                details_text += "Товары в заказе:\n"
-                details_text += "--------------------------------\n"
-                details_text += "Товар | Кол-во | Цена | Сумма\n"
-                details_text += "--------------------------------\n"
-                
-                # Добавление информации о каждом товаре
-                for item in items:
-                    details_text += f"{item[0]} | {item[1]} | {item[2]}₽ | {item[3]}₽\n"
-                
-                details_text += "--------------------------------\n"
-                details_text += f"Общая сумма: {self.orders_table.item(row, 3).text()}₽"
-            else:
-                details_text += "В этом заказе нет товаров"
+        except Exception as e:
+            self.show_order_details_error(str(e))
+
+    def show_order_details_text(self, order_id, total_amount, items):
+        """
+        Отображение товаров заказа в информационном окне.
+        
+        :param order_id: ID заказа
+        :type order_id: str
+        :param total_amount: Общая сумма заказа
+        :type total_amount: str
+        :param items: Строки (товар, количество, цена, сумма)
+        :type items: list[tuple]
+        """
+        # Форматирование текста деталей
+        details_text = f"Детали заказа #{order_id}:\n\n"
+        
+        if items:
+            details_text += "Товары в заказе:\n"
+            details_text += "--------------------------------\n"
+            details_text += "Товар | Кол-во | Цена | Сумма\n"
+            details_text += "--------------------------------\n"
             
-            # Отображение деталей заказа
-            QMessageBox.information(self, "Детали заказа", details_text)
+            # Добавление информации о каждом товаре
+            for item in items:
+                details_text += f"{item[0]} | {item[1]} | {item[2]}₽ | {item[3]}₽\n"
             
-        except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка отображения деталей заказа: {str(e)}")
-            # Отображение сообщения об ошибке
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить детали заказа: {str(e)}")
+            details_text += "--------------------------------\n"
+            details_text += f"Общая сумма: {total_amount}₽"
+        else:
+            details_text += "В этом заказе нет товаров"
+        
+        # Отображение деталей заказа
+        QMessageBox.information(self, "Детали заказа", details_text)
+
+    def show_order_details_error(self, error):
+        """
+        Обработка ошибки загрузки деталей заказа.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка отображения деталей заказа: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить детали заказа: {error}")
 
     def export_data(self):
         """
@@ -702,12 +978,9 @@ class OrdersTab(QWidget):
                 
                 # Добавление фильтра поиска
                 if search_text:
-                    query += """ AND (
-                        o.order_id::text LIKE %s
-                        OR s.supplier_name ILIKE %s
-                    )"""
-                    search_param = f"%{search_text}%"
-                    params.extend([search_param, search_param])
+                    search_condition, search_params = self.build_search_condition(search_text)
+                    query += search_condition
+                    params.extend(search_params)
                 
                 # Добавление сортировки
                 query += " ORDER BY o.order_date DESC"
@@ -764,7 +1037,7 @@ class OrdersTab(QWidget):
          
          Открывает диалог создания заказа, где пользователь может:
          
-         - Выбрать поставщика
+         - Выбрать поставщика и склад приемки
          - Добавить товары
          - Указать количество и цены
          
@@ -782,46 +1055,42 @@ class OrdersTab(QWidget):
                      return
 
                  supplier_id = data['supplier_id']
+                 warehouse_id = data['warehouse_id']
                  items_data = data['items']
                  total_amount = data['total_amount']
 
                  # Используем транзакцию для добавления заказа и его позиций
                  order_id = None
                  try:
-                     # 1. Создаем запись заказа
-                     order_query = """
-                         INSERT INTO orders (order_date, supplier_id, total_amount, status)
-                         VALUES (CURRENT_DATE, %s, %s, 'в обработке')
-                         RETURNING order_id
-                     """
-                     # Используем execute_query, который обрабатывает commit/rollback самостоятельно для одиночного запроса
-                     # Здесь нам нужен ручной контроль для транзакции
-                     self.db.cursor.execute(order_query, (supplier_id, total_amount))
-                     result = self.db.cursor.fetchone()
-                     if not result:
-                         raise Exception("Не удалось получить ID созданного заказа.")
-                     order_id = result[0]
-
-                     # 2. Создаем записи позиций заказа
-                     item_query = """
-                         INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                         VALUES (%s, %s, %s, %s, %s)
-                     """
-                     items_to_insert = [
-                         (order_id, item['product_id'], item['quantity'], item['unit_price'], item['total_price'])
-                         for item in items_data
-                     ]
-                     # executemany не возвращает ничего полезного здесь
-                     self.db.cursor.executemany(item_query, items_to_insert)
-
-                     # Если все вставки успешны, фиксируем транзакцию
-                     self.db.conn.commit()
+                     # Заказ и позиции фиксируются вместе; при ошибке транзакция откатывается
+                     with self.db.transaction() as tx:
+                         # 1. Создаем запись заказа
+                         order_query = """
+                             INSERT INTO orders (order_date, supplier_id, warehouse_id, total_amount, status)
+                             VALUES (CURRENT_DATE, %s, %s, %s, 'в обработке')
+                             RETURNING order_id
+                         """
+                         result = tx.fetch_one(order_query, (supplier_id, warehouse_id, total_amount))
+                         if not result:
+                             raise Exception("Не удалось получить ID созданного заказа.")
+                         order_id = result[0]
+
+                         # 2. Создаем записи позиций заказа одной командой
+                         item_query = """
+                             INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
+                             VALUES %s
+                         """
+                         items_to_insert = [
+                             (order_id, item['product_id'], item['quantity'], item['unit_price'], item['total_price'])
+                             for item in items_data
+                         ]
+                         tx.execute_many_values(item_query, items_to_insert)
+
                      self.load_orders() # Обновляем список заказов
                      QMessageBox.information(self, "Успех", f"Заказ ID {order_id} успешно создан!")
 
                  except Exception as transaction_error:
-                     # Откатываем транзакцию при любой ошибке во время вставки
-                     self.db.conn.rollback()
+                     # Транзакция уже откатана
                      logging.error(f"Ошибка транзакции при создании заказа: {transaction_error}")
                      QMessageBox.critical(self, "Ошибка транзакции", f"Не удалось создать заказ (ID заказа={order_id}): {transaction_error}")
 
@@ -839,23 +1108,20 @@ class OrdersTab(QWidget):
         - Таблица позиций заказа
         - Метаданные (даты создания и обновления)
         
-        Позволяет экспортировать детали заказа в PDF.
+        Позволяет экспортировать детали заказа в PDF. Данные заказа и его
+        позиции загружаются в фоновом потоке, диалог открывает метод
+        open_order_details_dialog.
         
         :raises: Exception при ошибке загрузки или отображения данных
         """
         try:
-            selected_row = self.orders_table.currentRow()
+            selected_row = self.orders_table.currentIndex().row()
             if selected_row == -1:
                 QMessageBox.warning(self, "Внимание", "Выберите заказ для просмотра деталей.")
                 return
 
             # Получаем ID заказа
-            order_id_item = self.orders_table.item(selected_row, 0)
-            if not order_id_item:
-                QMessageBox.warning(self, "Ошибка", "Не удалось получить ID заказа.")
-                return
-                
-            order_id = int(order_id_item.text())
+            order_id = self.orders_model.value(selected_row, 0)
             
             # Запрашиваем полную информацию о заказе с присоединением имени поставщика
             query_order = """
@@ -864,24 +1130,58 @@ class OrdersTab(QWidget):
                 JOIN suppliers s ON o.supplier_id = s.supplier_id
                 WHERE o.order_id = %s
             """
-            self.db.cursor.execute(query_order, (order_id,))
-            order_details = self.db.cursor.fetchone()
-            
-            if not order_details:
-                QMessageBox.critical(self, "Ошибка", f"Информация о заказе ID {order_id} не найдена.")
-                return
-                
-            # Запрашиваем позиции заказа с названиями товаров
-            query_items = """
-                SELECT oi.order_item_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.product_id
-                WHERE oi.order_id = %s
-                ORDER BY oi.order_item_id
-            """
-            self.db.cursor.execute(query_items, (order_id,))
-            order_items = self.db.cursor.fetchall()
+            # Выполнение запроса в фоновом потоке; позиции загружает load_order_details_items
+            self.query_runner.submit(
+                "view_order", query_order, (order_id,),
+                lambda rows: self.load_order_details_items(order_id, rows),
+                self.show_order_details_dialog_error
+            )
             
+        except Exception as e:
+            self.show_order_details_dialog_error(str(e))
+
+    def load_order_details_items(self, order_id, rows):
+        """
+        Загрузка позиций заказа для диалога деталей в фоновом потоке.
+        
+        :param order_id: ID заказа
+        :type order_id: int
+        :param rows: Строки с основной информацией о заказе
+        :type rows: list[tuple]
+        """
+        order_details = rows[0] if rows else None
+        if not order_details:
+            QMessageBox.critical(self, "Ошибка", f"Информация о заказе ID {order_id} не найдена.")
+            return
+        
+        # Запрашиваем позиции заказа с названиями товаров
+        query_items = """
+            SELECT oi.order_item_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
+            FROM order_items oi
+            JOIN products p ON oi.product_id = p.product_id
+            WHERE oi.order_id = %s
+            ORDER BY oi.order_item_id
+        """
+        # Диалог открывается после получения позиций методом open_order_details_dialog
+        self.query_runner.submit(
+            "view_order", query_items, (order_id,),
+            lambda order_items: self.open_order_details_dialog(order_id, order_details, order_items),
+            self.show_order_details_dialog_error
+        )
+
+    def open_order_details_dialog(self, order_id, order_details, order_items):
+        """
+        Отображение диалога с детальной информацией о заказе.
+        
+        :param order_id: ID заказа
+        :type order_id: int
+        :param order_details: Основная информация о заказе (ID, дата, поставщик и т.д.)
+        :type order_details: tuple
+        :param order_items: Позиции заказа
+        :type order_items: list[tuple]
+        :raises: Exception при ошибке отображения данных
+        """
+        try:
             # Создаем диалог для отображения деталей
             details_dialog = QDialog(self)
             details_dialog.setWindowTitle(f"Детали заказа №{order_id}")
@@ -950,8 +1250,17 @@ class OrdersTab(QWidget):
             details_dialog.exec()
             
         except Exception as e:
-            logging.error(f"Ошибка отображения деталей заказа: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось отобразить детали заказа: {str(e)}")
+            self.show_order_details_dialog_error(str(e))
+
+    def show_order_details_dialog_error(self, error):
+        """
+        Обработка ошибки загрузки или отображения деталей заказа.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        logging.error(f"Ошибка отображения деталей заказа: {error}")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось отобразить детали заказа: {error}")
 
     def export_order_details_to_pdf(self, order_id, order_details, order_items):
         """
@@ -982,6 +1291,51 @@ class OrdersTab(QWidget):
             logging.error(f"Ошибка при экспорте деталей заказа в PDF: {str(e)}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать детали заказа: {str(e)}")
 
+    def export_orders_pdf_batch(self):
+        """
+        Пакетное формирование PDF документов заказов.
+        
+        Если выбрано несколько заказов, документы формируются для них, иначе —
+        для всех заказов, подходящих под текущие фильтры (в том числе еще не
+        загруженных в таблицу). Документы сохраняются в папку или ZIP архив;
+        формирование выполняется фоновой задачей в пуле процессов
+        (см. DataExporter.export_orders_to_pdf).
+        """
+        try:
+            selected_rows = self.orders_table.selectionModel().selectedRows()
+            order_ids = None
+            if len(selected_rows) > 1:
+                order_ids = [self.orders_model.value(index.row(), 0) for index in selected_rows]
+                scope = f"выбранных заказов ({len(order_ids)})"
+            else:
+                scope = "всех заказов текущего списка"
+            
+            # Выбор места сохранения документов
+            items = ["Папка", "ZIP архив"]
+            choice, ok = QInputDialog.getItem(
+                self, "PDF по заказам", f"Сохранить документы {scope}:", items, 0, False
+            )
+            if not ok:
+                return
+            as_zip = choice == items[1]
+            if as_zip:
+                default_name = f"Заказы_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+                target, _ = QFileDialog.getSaveFileName(self, "Сохранить ZIP архив", default_name, "ZIP (*.zip)")
+            else:
+                target = QFileDialog.getExistingDirectory(self, "Папка для PDF документов")
+            if not target:
+                return
+            
+            # Постановка задачи в очередь
+            from data_export import DataExporter
+            exporter = DataExporter(self)
+            condition, params = self.orders_filter
+            exporter.export_orders_to_pdf(target, as_zip, order_ids, condition, params)
+            
+        except Exception as e:
+            logging.error(f"Ошибка пакетного экспорта заказов в PDF: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сформировать PDF документы: {str(e)}")
+
     def show_order_context_menu(self, position):
         """
         Показывает контекстное меню для строки заказа.
@@ -991,6 +1345,7 @@ class OrdersTab(QWidget):
         
         - Изменить статус
         - Просмотр деталей
+        - PDF по выбранным заказам
         
         :param position: Позиция курсора для отображения меню
         :type position: QPoint
@@ -1008,6 +1363,10 @@ class OrdersTab(QWidget):
             view_details_action = menu.addAction("Просмотр деталей")
             view_details_action.triggered.connect(self.view_order_details)
             
+            # Пакетное формирование PDF документов выбранных заказов
+            export_pdf_action = menu.addAction("PDF по выбранным заказам")
+            export_pdf_action.triggered.connect(self.export_orders_pdf_batch)
+            
             menu.exec(self.orders_table.viewport().mapToGlobal(position))
         except Exception as e:
             logging.error(f"Ошибка контекстного меню заказа: {str(e)}")
@@ -1028,21 +1387,14 @@ class OrdersTab(QWidget):
         :raises: Exception при ошибке изменения статуса
         """
         try:
-            selected_row = self.orders_table.currentRow()
+            selected_row = self.orders_table.currentIndex().row()
             if selected_row == -1:
                 QMessageBox.warning(self, "Внимание", "Выберите заказ для изменения статуса.")
                 return
 
             # Получаем ID заказа и текущий статус
-            order_id_item = self.orders_table.item(selected_row, 0)
-            current_status_item = self.orders_table.item(selected_row, 4)
-
-            if not order_id_item or not current_status_item:
-                QMessageBox.warning(self, "Ошибка", "Не удалось получить данные заказа.")
-                return
-
-            order_id = int(order_id_item.text())
-            current_status = current_status_item.text()
+            order_id = self.orders_model.value(selected_row, 0)
+            current_status = self.orders_model.value(selected_row, 4)
             
             # Логируем полученные данные
             logging.debug(f"Изменение статуса заказа ID: {order_id}, текущий статус: {current_status}")
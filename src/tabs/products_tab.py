@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import (
-    QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QWidget, QTableView, QVBoxLayout,
     QHBoxLayout, QPushButton, QLineEdit, QHeaderView, QMessageBox, 
     QLabel, QSpacerItem, QSizePolicy
 )
@@ -9,6 +9,9 @@ import logging
 from dialogs import AddProductDialog, ConfirmDialog, ExportDialog
 from data_export import DataExporter
 from validators import Validator
+from async_query import AsyncQueryRunner
+from table_model import ColumnarTableModel
+from search_controller import SearchController
 
 class ProductsTab(QWidget):
     """
@@ -28,6 +31,9 @@ class ProductsTab(QWidget):
         super().__init__()
         # Сохранение объекта базы данных
         self.db = db
+        # Исполнитель фоновых запросов
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Загрузка списка товаров
@@ -66,13 +72,16 @@ class ProductsTab(QWidget):
         top_panel.addItem(spacer)
 
         # Создание таблицы для отображения товаров
-        self.products_table = QTableWidget()
-        self.products_table.setColumnCount(5)
-        self.products_table.setHorizontalHeaderLabels(["ID", "Название", "Категория", "Цена", "Описание"])
+        self.products_table = QTableView()
+        # Модель данных: текст ячеек вычисляется только для видимых строк
+        self.products_model = ColumnarTableModel(
+            ["ID", "Название", "Категория", "Цена", "Описание"], parent=self
+        )
+        self.products_table.setModel(self.products_model)
         # Настройка автоматического изменения размера столбцов
         self.products_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        # Настройка автоматического изменения размера строк
-        self.products_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        # Фиксированная высота строк: подгонка по содержимому опрашивала бы все строки модели
+        self.products_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
 
         # Создание нижней панели с дополнительными функциями
         bottom_panel = QHBoxLayout()
@@ -93,12 +102,17 @@ class ProductsTab(QWidget):
         # left_button_panel.addWidget(self.btn_stats)
         left_button_panel.addStretch()
 
-        # Создание правой части нижней панели - кнопка экспорта
+        # Создание правой части нижней панели - кнопка экспорта и счетчик
         right_button_panel = QHBoxLayout()
+        
+        # Создание метки с количеством товаров
+        self.product_count_label = QLabel("Всего товаров: 0")
+        
         self.btn_export = QPushButton("Экспорт")
         self.btn_export.setIcon(QIcon.fromTheme("document-save"))
 
         # Добавление элементов на правую панель
+        right_button_panel.addWidget(self.product_count_label)
         right_button_panel.addStretch()
         right_button_panel.addWidget(self.btn_export)
 
@@ -121,78 +135,125 @@ class ProductsTab(QWidget):
         self.btn_refresh.clicked.connect(self.load_products)
         self.btn_stats.clicked.connect(self.show_stats)
         self.btn_export.clicked.connect(self.export_data)
-        self.search.textChanged.connect(self.handle_search)
+        # Поиск с задержкой ввода; уточнение поиска по названию, категории
+        # и описанию выполняется по уже найденным строкам
+        self.search_controller = SearchController(
+            self.search, self.query_runner, "products", self.build_search_query,
+            self.show_search_results, self.show_load_error,
+            match_columns=[1, 2, 4], parent=self
+        )
 
     def load_products(self):
         """
         Загрузка товаров из базы данных и отображение в таблице.
         
-        Выполняет SQL-запрос для получения списка товаров и заполняет
-        таблицу полученными данными.
+        Сбрасывает сохраненные результаты поиска и выполняет запрос
+        с текущим текстом поиска через контроллер поиска в фоновом потоке,
+        поэтому обновление сохраняет активный фильтр. Таблица заполняется
+        методом show_search_results.
         
         :raises: Exception при ошибке загрузки данных
         """
         try:
-            # SQL-запрос для получения списка товаров
-            query = "SELECT product_id, product_name, category, unit_price, product_description FROM products ORDER BY product_name"
-            # Получение списка товаров из базы данных
-            products = self.db.fetch_all(query)
-
-            # Установка количества строк в таблице
-            self.products_table.setRowCount(len(products))
-
-            # Заполнение таблицы данными
-            for row_idx, product in enumerate(products):
-                for col_idx, data in enumerate(product):
-                    # Создание элемента таблицы
-                    item = QTableWidgetItem(str(data))
-                    # Запрет редактирования ячеек
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    # Установка элемента в таблицу
-                    self.products_table.setItem(row_idx, col_idx, item)
+            # Сброс сохраненных результатов поиска (данные могли измениться)
+            self.search_controller.reset()
+            # Загрузка с учетом текста поиска в фоновом потоке
+            self.search_controller.search_now()
+            
         except Exception as e:
             # Логирование ошибки
             logging.error(f"Ошибка загрузки товаров: {str(e)}")
             # Отображение сообщения об ошибке
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о товарах")
 
+    def show_search_results(self, products):
+        """
+        Отображение результата загрузки или поиска товаров.
+        
+        При пустом поле поиска выводятся все товары, иначе — найденные.
+        
+        :param products: Строки результата запроса
+        :type products: list[tuple]
+        """
+        caption = "Найдено товаров" if self.search.text().strip() else "Всего товаров"
+        self.show_products(products, caption)
+
+    def show_products(self, products, count_caption):
+        """
+        Отображение списка товаров в таблице.
+        
+        :param products: Строки результата запроса товаров
+        :type products: list[tuple]
+        :param count_caption: Подпись счетчика ("Всего товаров" или "Найдено товаров")
+        :type count_caption: str
+        """
+        # Передача данных в модель таблицы
+        self.products_model.set_rows(products)
+
+        # Обновление счетчика товаров
+        self.product_count_label.setText(f"{count_caption}: {len(products)}")
+
+    def show_load_error(self, error):
+        """
+        Обработка ошибки фоновой загрузки товаров.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка загрузки товаров: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о товарах")
+
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных.
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором и текстом метки
+            self.setCursor(Qt.CursorShape.BusyCursor)
+            self.product_count_label.setText("Загрузка...")
+        else:
+            self.unsetCursor()
+
     def handle_search(self):
         """
-        Обработка поиска товаров по введенному тексту.
+        Немедленный поиск товаров по введенному тексту.
         
-        Выполняет SQL-запрос для поиска товаров по введенному пользователем тексту
-        и обновляет таблицу с результатами поиска.
+        При вводе текста поиск выполняется автоматически после паузы
+        (см. SearchController); метод позволяет запустить его без ожидания.
+        """
+        self.search_controller.search_now()
+
+    def build_search_query(self, search_text):
+        """
+        Формирование запроса поиска товаров.
         
-        :raises: Exception при ошибке выполнения поиска
+        Поиск выполняется по названию, категории и описанию товара.
+        При пустом тексте поиска возвращается запрос всех товаров.
+        
+        :param search_text: Текст поиска
+        :type search_text: str
+        :returns: SQL-запрос и параметры
+        :rtype: tuple
         """
-        try:
-            # Получение текста поиска
-            search_text = self.search.text()
-
-            # SQL-запрос для поиска товаров
-            query = """
-                SELECT product_id, product_name, category, unit_price, product_description 
-                FROM products 
-                WHERE product_name ILIKE %s 
-                   OR category ILIKE %s 
-                   OR product_description ILIKE %s
-                ORDER BY product_name
-            """
-            # Выполнение поиска
-            products = self.db.fetch_all(query, (f"%{search_text}%", f"%{search_text}%", f"%{search_text}%"))
-
-            # Установка количества строк в таблице
-            self.products_table.setRowCount(len(products))
-
-            # Заполнение таблицы результатами поиска
-            for row_idx, product in enumerate(products):
-                for col_idx, data in enumerate(product):
-                    item = QTableWidgetItem(str(data))
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.products_table.setItem(row_idx, col_idx, item)
-        except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка поиска товаров: {str(e)}")
+        if not search_text.strip():
+            # Полный список товаров
+            return "SELECT product_id, product_name, category, unit_price, product_description FROM products ORDER BY product_name", ()
+        # SQL-запрос для поиска товаров
+        query = """
+            SELECT product_id, product_name, category, unit_price, product_description 
+            FROM products 
+            WHERE product_name ILIKE %s 
+               OR category ILIKE %s 
+               OR product_description ILIKE %s
+            ORDER BY product_name
+        """
+        pattern = Validator.like_pattern(search_text)
+        return query, (pattern, pattern, pattern)
 
     def add_product(self):
         """
@@ -247,7 +308,7 @@ class ProductsTab(QWidget):
         :raises: Exception при ошибке удаления товара
         """
         # Получение выбранных строк
-        selected_rows = self.products_table.selectedItems()
+        selected_rows = self.products_table.selectedIndexes()
         if not selected_rows:
             # Отображение предупреждения, если товар не выбран
             QMessageBox.warning(self, "Внимание", "Выберите товар для удаления")
@@ -255,9 +316,9 @@ class ProductsTab(QWidget):
 
         # Получение номера строки и ID товара
         row = selected_rows[0].row()
-        product_id = self.products_table.item(row, 0).text()
+        product_id = self.products_model.text(row, 0)
         # Получение названия товара
-        product_name = self.products_table.item(row, 1).text()
+        product_name = self.products_model.text(row, 1)
 
         # Создание диалога подтверждения
         confirm_dialog = ConfirmDialog(
@@ -297,7 +358,7 @@ class ProductsTab(QWidget):
         :raises: Exception при ошибке редактирования товара
         """
         # Получение выбранных строк
-        selected_rows = self.products_table.selectedItems()
+        selected_rows = self.products_table.selectedIndexes()
         if not selected_rows:
             # Отображение предупреждения, если товар не выбран
             QMessageBox.warning(self, "Внимание", "Выберите товар для редактирования")
@@ -305,7 +366,7 @@ class ProductsTab(QWidget):
 
         # Получение номера строки и ID товара
         row = selected_rows[0].row()
-        product_id = self.products_table.item(row, 0).text()
+        product_id = self.products_model.text(row, 0)
 
         try:
             # Получение данных товара
@@ -404,7 +465,7 @@ class ProductsTab(QWidget):
                     # Очистка ввода для поиска
                     search_text = Validator.sanitize_input(search_text)
                     query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s OR p.product_description ILIKE %s)"
-                    params.extend([f"%{search_text}%", f"%{search_text}%", f"%{search_text}%"])
+                    params.extend([Validator.like_pattern(search_text), Validator.like_pattern(search_text), Validator.like_pattern(search_text)])
                 
                 # Добавление сортировки
                 query += " ORDER BY p.product_name"
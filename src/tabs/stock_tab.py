@@ -1,16 +1,20 @@
 from PyQt6.QtWidgets import (
-    QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QWidget, QTableView, QVBoxLayout,
     QHBoxLayout, QPushButton, QLineEdit, QHeaderView, QMessageBox, 
     QLabel, QSpinBox, QDateEdit, QComboBox, QFormLayout,
     QDialog, QDialogButtonBox, QSpacerItem, QSizePolicy
 )
 from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QIcon
+from PyQt6.QtGui import QIcon, QColor
 import logging
 from data_export import DataExporter
 from dialogs import ExportDialog
 from validators import Validator
 from visualization import InventoryAnalysisDialog
+from async_query import AsyncQueryRunner
+from table_model import ColumnarTableModel
+from search_controller import SearchController
+from stock_transfer import transfer_stock, StockTransferError
 
 class StockTab(QWidget):
     """
@@ -22,6 +26,9 @@ class StockTab(QWidget):
     :inherits: QWidget
     """
 
+    # Порог для определения низкого запаса
+    LOW_STOCK_THRESHOLD = 10
+
     def __init__(self, db):
         """
         Инициализация вкладки запасов.
@@ -32,6 +39,9 @@ class StockTab(QWidget):
         super().__init__()
         # Сохранение объекта базы данных
         self.db = db
+        # Исполнитель фоновых запросов
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Загрузка списка запасов
@@ -91,16 +101,17 @@ class StockTab(QWidget):
         top_panel.addWidget(self.search)
 
         # Создание таблицы для отображения запасов
-        self.stock_table = QTableWidget()
-        self.stock_table.setColumnCount(7)
-        self.stock_table.setHorizontalHeaderLabels([
+        self.stock_table = QTableView()
+        # Модель данных: текст и цвет ячеек вычисляются только для видимых строк
+        self.stock_model = ColumnarTableModel([
             "ID", "Товар", "Склад", "Количество", 
             "Последнее пополнение", "Категория", "Цена за ед."
-        ])
+        ], foreground=self.stock_foreground, parent=self)
+        self.stock_table.setModel(self.stock_model)
         # Настройка автоматического изменения размера столбцов
         self.stock_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        # Настройка автоматического изменения размера строк
-        self.stock_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        # Фиксированная высота строк: подгонка по содержимому опрашивала бы все строки модели
+        self.stock_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         # Подключение обработчика клика по заголовку таблицы для сортировки
         self.stock_table.horizontalHeader().sectionClicked.connect(self.header_clicked)
 
@@ -175,7 +186,13 @@ class StockTab(QWidget):
         # self.btn_export_csv.clicked.connect(self.export_to_csv)
         # self.btn_export_excel.clicked.connect(self.export_to_excel)
         self.btn_analysis.clicked.connect(self.show_analysis)
-        self.search.textChanged.connect(self.handle_search)
+        # Поиск с задержкой ввода; уточнение поиска по названию и категории
+        # выполняется по уже найденным строкам
+        self.search_controller = SearchController(
+            self.search, self.query_runner, "stock", self.build_stock_query,
+            self.show_stock, self.show_load_error,
+            match_columns=[1, 5], normalize=Validator.sanitize_input, parent=self
+        )
         self.warehouse_filter.currentIndexChanged.connect(self.load_stock)
         self.category_filter.currentIndexChanged.connect(self.load_stock)
 
@@ -192,7 +209,7 @@ class StockTab(QWidget):
             # SQL-запрос для получения списка складов
             query = "SELECT warehouse_id, warehouse_name FROM warehouses ORDER BY warehouse_name"
             # Получение списка складов из базы данных
-            warehouses = self.db.fetch_all(query, parent_widget=self)
+            warehouses = self.db.fetch_all(query, parent_widget=self, cache=True)
             
             # Добавление складов в фильтр
             for warehouse_id, warehouse_name in warehouses:
@@ -215,7 +232,7 @@ class StockTab(QWidget):
             # SQL-запрос для получения списка категорий
             query = "SELECT DISTINCT category FROM products ORDER BY category"
             # Получение списка категорий из базы данных
-            categories = self.db.fetch_all(query, parent_widget=self)
+            categories = self.db.fetch_all(query, parent_widget=self, cache=True)
             
             # Добавление категорий в фильтр
             for category in categories:
@@ -227,77 +244,91 @@ class StockTab(QWidget):
 
     def load_stock(self):
         """
-        Загрузка данных о запасах из базы данных и отображение в таблице.
+        Загрузка данных о запасах из базы данных.
         
-        Выполняет SQL-запрос с применением текущих фильтров и отображает 
-        результаты в таблице. Подсвечивает товары с низким уровнем запасов
-        и обновляет метку с информацией о количестве таких товаров.
+        Сбрасывает сохраненные результаты поиска (данные или фильтры могли
+        измениться) и выполняет запрос с текущими фильтрами и текстом поиска
+        в фоновом потоке, не блокируя интерфейс. Предыдущий незавершенный
+        запрос отменяется. Результаты отображаются методом show_stock.
         
         :raises: Exception при проблемах с базой данных
         """
         try:
-            # Получение выбранных фильтров
-            selected_warehouse = self.warehouse_filter.currentData()
-            selected_category = self.category_filter.currentData()
-            search_text = self.search.text()
-            
-            # Базовый SQL-запрос
-            query = """
-                SELECT s.stock_id, p.product_name, w.warehouse_name, s.quantity, 
-                       s.last_restocked, p.category, p.unit_price
-                FROM stock s
-                JOIN products p ON s.product_id = p.product_id
-                JOIN warehouses w ON s.warehouse_id = w.warehouse_id
-                WHERE 1=1
-            """
-            params = []
-            
-            # Добавление фильтра по складу
-            if selected_warehouse:
-                query += " AND s.warehouse_id = %s"
-                params.append(selected_warehouse)
-            
-            # Добавление фильтра по категории
-            if selected_category:
-                query += " AND p.category = %s"
-                params.append(selected_category)
-            
-            # Добавление фильтра поиска
-            if search_text:
-                # Очистка ввода для поиска
-                search_text = Validator.sanitize_input(search_text)
-                query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s)"
-                params.extend([f"%{search_text}%", f"%{search_text}%"])
-            
-            # Добавление сортировки
-            query += " ORDER BY p.product_name"
+            # Сброс результатов, полученных при других фильтрах
+            self.search_controller.reset()
+            # Выполнение запроса в фоновом потоке
+            self.search_controller.search_now()
             
-            # Выполнение запроса
-            stock_data = self.db.fetch_all(query, params, parent_widget=self)
+        except Exception as e:
+            # Логирование ошибки
+            logging.error(f"Ошибка загрузки запасов: {str(e)}")
+            # Отображение сообщения об ошибке
+            QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о запасах")
 
-            # Установка количества строк в таблице
-            self.stock_table.setRowCount(len(stock_data))
-            
-            # Счетчик товаров с низким запасом
-            low_stock_count = 0
-            # Порог для определения низкого запаса
-            low_stock_threshold = 10
+    def build_stock_query(self, search_text):
+        """
+        Формирование запроса запасов с применением текущих фильтров.
+        
+        :param search_text: Текст поиска по названию и категории товара
+        :type search_text: str
+        :returns: SQL-запрос и параметры
+        :rtype: tuple
+        """
+        # Получение выбранных фильтров
+        selected_warehouse = self.warehouse_filter.currentData()
+        selected_category = self.category_filter.currentData()
+        
+        # Базовый SQL-запрос
+        query = """
+            SELECT s.stock_id, p.product_name, w.warehouse_name, s.quantity, 
+                   s.last_restocked, p.category, p.unit_price
+            FROM stock s
+            JOIN products p ON s.product_id = p.product_id
+            JOIN warehouses w ON s.warehouse_id = w.warehouse_id
+            WHERE 1=1
+        """
+        params = []
+        
+        # Добавление фильтра по складу
+        if selected_warehouse:
+            query += " AND s.warehouse_id = %s"
+            params.append(selected_warehouse)
+        
+        # Добавление фильтра по категории
+        if selected_category:
+            query += " AND p.category = %s"
+            params.append(selected_category)
+        
+        # Добавление фильтра поиска
+        if search_text:
+            # Очистка ввода для поиска
+            search_text = Validator.sanitize_input(search_text)
+            query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s)"
+            params.extend([Validator.like_pattern(search_text), Validator.like_pattern(search_text)])
+        
+        # Добавление сортировки
+        query += " ORDER BY p.product_name"
+        return query, params
+
+    def show_stock(self, stock_data):
+        """
+        Отображение данных о запасах в таблице.
+        
+        Подсвечивает товары с низким уровнем запасов и обновляет метку
+        с информацией о количестве таких товаров.
+        
+        :param stock_data: Строки результата запроса запасов
+        :type stock_data: list[tuple]
+        """
+        try:
+            # Передача данных в модель таблицы
+            self.stock_model.set_rows(stock_data)
             
-            # Заполнение таблицы данными
-            for row_idx, stock_item in enumerate(stock_data):
-                for col_idx, data in enumerate(stock_item):
-                    # Создание элемента таблицы
-                    item = QTableWidgetItem(str(data))
-                    # Запрет редактирования ячеек
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    
-                    # Подсветка товаров с низким запасом
-                    if col_idx == 3 and int(data) < low_stock_threshold:
-                        item.setForeground(Qt.GlobalColor.red)
-                        low_stock_count += 1
-                        
-                    # Установка элемента в таблицу
-                    self.stock_table.setItem(row_idx, col_idx, item)
+            # Подсчет товаров с низким запасом по столбцу количества
+            low_stock_count = sum(
+                1 for quantity in self.stock_model.column(3)
+                if quantity < self.LOW_STOCK_THRESHOLD
+            )
             
             # Обновление метки с количеством товаров с низким запасом
             self.low_stock_label.setText(f"Товары с низким запасом: {low_stock_count}")
@@ -314,22 +345,68 @@ class StockTab(QWidget):
             # Отображение сообщения об ошибке
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о запасах")
 
+    def stock_foreground(self, model, row, col):
+        """
+        Цвет текста ячейки таблицы запасов.
+        
+        Товары с низким запасом выделяются красным в столбце количества.
+        
+        :param model: Модель таблицы запасов
+        :type model: ColumnarTableModel
+        :param row: Номер строки
+        :type row: int
+        :param col: Номер столбца
+        :type col: int
+        :returns: Цвет текста или None
+        """
+        if col == 3 and model.value(row, 3) < self.LOW_STOCK_THRESHOLD:
+            return QColor(Qt.GlobalColor.red)
+        return None
+
+    def show_load_error(self, error):
+        """
+        Обработка ошибки фоновой загрузки запасов.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка загрузки запасов: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о запасах")
+
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных.
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором и текстом метки (метку обновляет
+            # только загрузка запасов, проверка низкого запаса ее не меняет)
+            self.setCursor(Qt.CursorShape.BusyCursor)
+            if self.query_runner.is_loading("stock"):
+                self.low_stock_label.setText("Загрузка...")
+        else:
+            self.unsetCursor()
+
     def handle_search(self):
         """
         Обработка поиска запасов.
         
-        Вызывается при изменении текста в поле поиска.
-        Перезагружает список запасов с применением фильтра поиска.
+        При вводе текста поиск выполняется автоматически после паузы
+        (см. SearchController); метод позволяет запустить его без ожидания.
         """
-        self.load_stock()
+        self.search_controller.search_now()
 
     def check_low_stock_alert(self):
         """
         Проверка наличия товаров с критически низким запасом и отображение предупреждения.
         
-        Выполняет запрос к базе данных для поиска товаров с количеством ниже
-        критического порога (5 единиц) и отображает предупреждение с 
-        перечислением таких товаров.
+        Выполняет в фоновом потоке запрос к базе данных для поиска товаров
+        с количеством ниже критического порога (5 единиц). Предупреждение
+        с перечислением таких товаров показывает метод show_low_stock_alert.
         
         :raises: Exception при проблемах с базой данных
         """
@@ -347,25 +424,52 @@ class StockTab(QWidget):
                 ORDER BY s.quantity
             """
             
-            # Получение списка товаров с критически низким запасом
-            critical_items = self.db.fetch_all(query, (critical_threshold,), parent_widget=self)
-            
-            if critical_items:
-                # Формирование сообщения с предупреждением
-                alert_message = "Внимание! Критически низкий уровень запасов:\n\n"
-                
-                # Добавление информации о каждом товаре
-                for item in critical_items:
-                    product_name, warehouse_name, quantity = item
-                    alert_message += f"• {product_name} ({warehouse_name}): {quantity} шт.\n"
-                
-                # Отображение предупреждения
-                QMessageBox.warning(self, "Низкий уровень запасов", alert_message)
+            # Получение списка товаров с критически низким запасом в фоновом потоке;
+            # незавершенная проверка при повторном показе вкладки отменяется
+            self.query_runner.submit(
+                "low_stock", query, (critical_threshold,),
+                self.show_low_stock_alert, self.show_low_stock_error
+            )
         
         except Exception as e:
             # Логирование ошибки
             logging.error(f"Ошибка проверки низкого запаса: {str(e)}")
 
+    def show_low_stock_alert(self, critical_items):
+        """
+        Отображение предупреждения о товарах с критически низким запасом.
+        
+        :param critical_items: Строки (товар, склад, количество)
+        :type critical_items: list[tuple]
+        """
+        if critical_items:
+            # Формирование сообщения с предупреждением
+            alert_message = "Внимание! Критически низкий уровень запасов:\n\n"
+            
+            # Добавление информации о каждом товаре
+            for item in critical_items:
+                product_name, warehouse_name, quantity = item
+                alert_message += f"• {product_name} ({warehouse_name}): {quantity} шт.\n"
+            
+            # Отображение предупреждения
+            QMessageBox.warning(self, "Низкий уровень запасов", alert_message)
+
+    def show_low_stock_error(self, error):
+        """
+        Обработка ошибки фоновой проверки низкого запаса.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка проверки низкого запаса: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(
+            self,
+            "Ошибка базы данных",
+            f"Произошла ошибка при получении данных:\nОшибка получения данных: {error}"
+        )
+
     def add_stock(self):
         """
         Открытие диалога добавления нового запаса.
@@ -390,13 +494,13 @@ class StockTab(QWidget):
         :raises: Exception при проблемах с базой данных или если товар не выбран
         """
         # Получение выбранной строки
-        selected_row = self.stock_table.currentRow()
+        selected_row = self.stock_table.currentIndex().row()
         
         if selected_row >= 0:
             # Получение данных о выбранном запасе
-            stock_id = self.stock_table.item(selected_row, 0).text()
-            product_name = self.stock_table.item(selected_row, 1).text()
-            current_quantity = int(self.stock_table.item(selected_row, 3).text())
+            stock_id = self.stock_model.text(selected_row, 0)
+            product_name = self.stock_model.text(selected_row, 1)
+            current_quantity = self.stock_model.value(selected_row, 3)
             
             # Создание диалога обновления запаса
             dialog = UpdateStockDialog(self, product_name, current_quantity)
@@ -435,20 +539,21 @@ class StockTab(QWidget):
         Перемещение запаса с одного склада на другой.
         
         Создает и отображает диалог для перемещения товара между складами.
-        После выбора целевого склада и количества для перемещения выполняет
-        соответствующие SQL-запросы для обновления запасов на обоих складах.
+        После выбора целевого склада и количества для перемещения вызывает
+        серверную функцию transfer_stock, которая обновляет запасы на обоих
+        складах в одной транзакции.
         
         :raises: Exception при проблемах с базой данных или если товар не выбран
         """
         # Получение выбранной строки
-        selected_row = self.stock_table.currentRow()
+        selected_row = self.stock_table.currentIndex().row()
         
         if selected_row >= 0:
             # Получение данных о выбранном запасе
-            stock_id = self.stock_table.item(selected_row, 0).text()
-            product_name = self.stock_table.item(selected_row, 1).text()
-            source_warehouse = self.stock_table.item(selected_row, 2).text()
-            current_quantity = int(self.stock_table.item(selected_row, 3).text())
+            stock_id = self.stock_model.text(selected_row, 0)
+            product_name = self.stock_model.text(selected_row, 1)
+            source_warehouse = self.stock_model.text(selected_row, 2)
+            current_quantity = self.stock_model.value(selected_row, 3)
             
             # Создание диалога перемещения запаса
             dialog = MoveStockDialog(self, self.db, product_name, source_warehouse, current_quantity)
@@ -459,53 +564,26 @@ class StockTab(QWidget):
                 quantity_to_move = move_data["quantity"]
 
                 # Проверка возможности перемещения
+                if target_warehouse_id is None:
+                    QMessageBox.warning(self, "Предупреждение", "Нет другого склада для перемещения")
+                    return
                 if quantity_to_move > current_quantity:
                     QMessageBox.warning(self, "Предупреждение", "Нельзя переместить больше товара, чем имеется на складе")
                     return
                 
                 try:
-                    # Получение ID товара
-                    query = "SELECT product_id FROM stock WHERE stock_id = %s"
-                    product_id = self.db.fetch_one(query, (stock_id,), parent_widget=self)[0]
-                    
-                    # Обновление количества на исходном складе
-                    query = """
-                        UPDATE stock 
-                        SET quantity = quantity - %s
-                        WHERE stock_id = %s
-                    """
-                    self.db.execute_query(query, (quantity_to_move, stock_id), parent_widget=self)
-                    
-                    # Проверка наличия товара на целевом складе
-                    query = """
-                        SELECT stock_id, quantity 
-                        FROM stock 
-                        WHERE product_id = %s AND warehouse_id = %s
-                    """
-                    target_stock = self.db.fetch_one(query, (product_id, target_warehouse_id), parent_widget=self)
-                    
-                    if target_stock:
-                        # Обновление количества на целевом складе
-                        target_stock_id, target_quantity = target_stock
-                        query = """
-                            UPDATE stock 
-                            SET quantity = quantity + %s
-                            WHERE stock_id = %s
-                        """
-                        self.db.execute_query(query, (quantity_to_move, target_stock_id), parent_widget=self)
-                    else:
-                        # Создание новой записи на целевом складе
-                        query = """
-                            INSERT INTO stock (product_id, warehouse_id, quantity, last_restocked)
-                            VALUES (%s, %s, %s, CURRENT_DATE)
-                        """
-                        self.db.execute_query(query, (product_id, target_warehouse_id, quantity_to_move), parent_widget=self)
+                    # Списание и поступление выполняются сервером в одной транзакции
+                    transfer_stock(self.db, stock_id, target_warehouse_id, quantity_to_move)
                     
                     # Обновление списка запасов
                     self.load_stock()
                     # Отображение сообщения об успехе
                     QMessageBox.information(self, "Успех", f"Товар успешно перемещен ({quantity_to_move} шт.)")
                 
+                except StockTransferError as e:
+                    # Остаток изменился после загрузки таблицы или данные неверны
+                    QMessageBox.warning(self, "Предупреждение", str(e))
+                    self.load_stock()
                 except Exception as e:
                     # Логирование ошибки
                     logging.error(f"Ошибка перемещения запаса: {str(e)}")
@@ -526,6 +604,10 @@ class StockTab(QWidget):
         - Распределение товаров по категориям
         - Количество товаров с низким уровнем запасов
         
+        Данные отчета получаются одним запросом в фоновом потоке (итоги
+        вычисляются оконными функциями по строкам категорий), отчет
+        показывает метод show_report.
+        
         :raises: Exception при проблемах с базой данных
         """
         try:
@@ -533,79 +615,82 @@ class StockTab(QWidget):
             selected_warehouse = self.warehouse_filter.currentData()
             selected_category = self.category_filter.currentData()
             
-            # Заголовок и начало сообщения отчета
-            title = "Отчет по запасам"
-            message = "Сводная информация по запасам:\n\n"
-            
-            # SQL-запрос для получения общей стоимости запасов
-            value_query = """
-                SELECT SUM(p.unit_price * s.quantity) as total_value
+            # SQL-запрос запасов по категориям с общей стоимостью запасов
+            # и количеством товаров с низким запасом по всем категориям
+            report_query = """
+                SELECT p.category, SUM(s.quantity) as total_quantity,
+                       SUM(SUM(p.unit_price * s.quantity)) OVER () as total_value,
+                       SUM(COUNT(*) FILTER (WHERE s.quantity < 10)) OVER () as low_stock_count
                 FROM stock s
                 JOIN products p ON s.product_id = p.product_id
                 WHERE 1=1
             """
             
-            # SQL-запрос для получения запасов по категориям
-            category_query = """
-                SELECT p.category, SUM(s.quantity) as total_quantity
-                FROM stock s
-                JOIN products p ON s.product_id = p.product_id
-                WHERE 1=1
-            """
-            
-            # SQL-запрос для получения количества товаров с низким запасом
-            low_stock_query = """
-                SELECT COUNT(*) 
-                FROM stock s
-                JOIN products p ON s.product_id = p.product_id
-                WHERE s.quantity < 10
-            """
-            
             params = []
             
             # Добавление фильтра по складу
             if selected_warehouse:
-                value_query += " AND s.warehouse_id = %s"
-                category_query += " AND s.warehouse_id = %s"
-                low_stock_query += " AND s.warehouse_id = %s"
+                report_query += " AND s.warehouse_id = %s"
                 params.append(selected_warehouse)
             
             # Добавление фильтра по категории
             if selected_category:
-                value_query += " AND p.category = %s"
-                category_query += " AND p.category = %s"
-                low_stock_query += " AND p.category = %s"
+                report_query += " AND p.category = %s"
                 params.append(selected_category)
             
-            # Добавление группировки и сортировки для запроса по категориям
-            category_query += " GROUP BY p.category ORDER BY total_quantity DESC"
-            
-            # Получение общей стоимости запасов
-            total_value = self.db.fetch_one(value_query, params, parent_widget=self)
-            if total_value and total_value[0]:
-                message += f"Общая стоимость запасов: {total_value[0]:.2f} руб.\n\n"
-            
-            # Получение запасов по категориям
-            categories = self.db.fetch_all(category_query, params, parent_widget=self)
-            if categories:
-                message += "Распределение по категориям:\n"
-                for category, quantity in categories:
-                    message += f"• {category}: {quantity} шт.\n"
-                message += "\n"
+            # Добавление группировки и сортировки по категориям
+            report_query += " GROUP BY p.category ORDER BY total_quantity DESC"
             
-            # Получение количества товаров с низким запасом
-            low_stock_count = self.db.fetch_one(low_stock_query, params, parent_widget=self)
-            if low_stock_count:
-                message += f"Товаров с низким запасом: {low_stock_count[0]}\n"
-            
-            # Отображение отчета
-            QMessageBox.information(self, title, message)
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "report", report_query, params,
+                self.show_report, self.show_report_error
+            )
             
         except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка генерации отчета: {str(e)}")
-            # Отображение сообщения об ошибке
-            QMessageBox.critical(self, "Ошибка", "Не удалось сформировать отчет")
+            self.show_report_error(str(e))
+
+    def show_report(self, categories):
+        """
+        Отображение отчета по запасам.
+        
+        :param categories: Строки (категория, количество, общая стоимость,
+            количество товаров с низким запасом)
+        :type categories: list[tuple]
+        """
+        # Заголовок и начало сообщения отчета
+        title = "Отчет по запасам"
+        message = "Сводная информация по запасам:\n\n"
+        
+        # Общая стоимость запасов (одинакова во всех строках)
+        if categories and categories[0][2]:
+            message += f"Общая стоимость запасов: {categories[0][2]:.2f} руб.\n\n"
+        
+        # Распределение запасов по категориям
+        if categories:
+            message += "Распределение по категориям:\n"
+            for category, quantity, _, _ in categories:
+                message += f"• {category}: {quantity} шт.\n"
+            message += "\n"
+        
+        # Количество товаров с низким запасом
+        low_stock_count = categories[0][3] if categories else 0
+        message += f"Товаров с низким запасом: {low_stock_count}\n"
+        
+        # Отображение отчета
+        QMessageBox.information(self, title, message)
+
+    def show_report_error(self, error):
+        """
+        Обработка ошибки формирования отчета по запасам.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка генерации отчета: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось сформировать отчет")
 
     def export_data(self):
         """
@@ -663,7 +748,7 @@ class StockTab(QWidget):
                     # Очистка ввода для поиска
                     search_text = Validator.sanitize_input(search_text)
                     query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s)"
-                    params.extend([f"%{search_text}%", f"%{search_text}%"])
+                    params.extend([Validator.like_pattern(search_text), Validator.like_pattern(search_text)])
                 
                 # Добавление сортировки
                 query += " ORDER BY p.product_name"
@@ -756,7 +841,7 @@ class StockTab(QWidget):
                 # Очистка ввода для поиска
                 search_text = Validator.sanitize_input(search_text)
                 query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s)"
-                params.extend([f"%{search_text}%", f"%{search_text}%"])
+                params.extend([Validator.like_pattern(search_text), Validator.like_pattern(search_text)])
             
             # Добавление сортировки
             query += " ORDER BY p.product_name"
@@ -817,7 +902,7 @@ class StockTab(QWidget):
                 # Очистка ввода для поиска
                 search_text = Validator.sanitize_input(search_text)
                 query += " AND (p.product_name ILIKE %s OR p.category ILIKE %s)"
-                params.extend([f"%{search_text}%", f"%{search_text}%"])
+                params.extend([Validator.like_pattern(search_text), Validator.like_pattern(search_text)])
             
             # Добавление сортировки
             query += " ORDER BY p.product_name"
@@ -880,32 +965,8 @@ class StockTab(QWidget):
         """
         # Сортировка по количеству (индекс столбца 3)
         if logical_index == 3:  # Колонка "Количество"
-            # Получение текущих данных из таблицы
-            data = []
-            for row in range(self.stock_table.rowCount()):
-                row_data = []
-                for col in range(self.stock_table.columnCount()):
-                    item = self.stock_table.item(row, col)
-                    if item:
-                        row_data.append(item.text())
-                    else:
-                        row_data.append("")
-                data.append(row_data)
-            
-            # Сортировка данных по количеству (в обратном порядке)
-            data.sort(key=lambda x: int(x[3]), reverse=False)
-            
-            # Обновление таблицы отсортированными данными
-            for row, row_data in enumerate(data):
-                for col, cell_data in enumerate(row_data):
-                    item = QTableWidgetItem(cell_data)
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    
-                    # Подсветка товаров с низким запасом
-                    if col == 3 and int(cell_data) < 10:
-                        item.setForeground(Qt.GlobalColor.red)
-                        
-                    self.stock_table.setItem(row, col, item)
+            # Сортировка строк модели по количеству (по возрастанию)
+            self.stock_model.sort(3, Qt.SortOrder.AscendingOrder)
 
 
 class AddStockDialog(QDialog):
@@ -956,11 +1017,11 @@ class AddStockDialog(QDialog):
         try:
             # Загрузка списка товаров
             product_query = "SELECT product_id, product_name FROM products ORDER BY product_name"
-            self.products = self.db.fetch_all(product_query)
+            self.products = self.db.fetch_all(product_query, cache=True)
             
             # Загрузка списка складов
             warehouse_query = "SELECT warehouse_id, warehouse_name FROM warehouses ORDER BY warehouse_name"
-            self.warehouses = self.db.fetch_all(warehouse_query)
+            self.warehouses = self.db.fetch_all(warehouse_query, cache=True)
         except Exception as e:
             # Логирование ошибки
             logging.error(f"Ошибка загрузки данных для диалога запасов: {str(e)}")
@@ -1230,7 +1291,7 @@ class MoveStockDialog(QDialog):
                 WHERE warehouse_name != %s
                 ORDER BY warehouse_name
             """
-            self.warehouses = self.db.fetch_all(query, (self.source_warehouse,))
+            self.warehouses = self.db.fetch_all(query, (self.source_warehouse,), cache=True)
         except Exception as e:
             # Логирование ошибки
             logging.error(f"Ошибка загрузки складов для диалога перемещения: {str(e)}")
@@ -7,6 +7,9 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon
 import logging
 from dialogs import AddSupplierDialog, ConfirmDialog, EmailDialog, ExportDialog
+from async_query import AsyncQueryRunner
+from search_controller import SearchController
+from validators import Validator
 
 class SuppliersTab(QWidget):
     """
@@ -28,6 +31,9 @@ class SuppliersTab(QWidget):
         super().__init__()
         # Сохранение объекта базы данных
         self.db = db
+        # Исполнитель фоновых запросов
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Загрузка списка поставщиков
@@ -132,43 +138,29 @@ class SuppliersTab(QWidget):
         self.btn_refresh.clicked.connect(self.load_suppliers)
         self.btn_orders.clicked.connect(self.show_supplier_orders)
         self.btn_export.clicked.connect(self.export_data)
-        self.search.textChanged.connect(self.handle_search)
+        # Поиск с задержкой ввода; уточнение по наименованию, контакту, телефону и email — по найденным строкам
+        self.search_controller = SearchController(
+            self.search, self.query_runner, "suppliers", self.build_search_query,
+            self.show_search_results, self.show_load_error,
+            match_columns=[1, 2, 3, 4], parent=self
+        )
 
     def load_suppliers(self):
         """
         Загрузка поставщиков из базы данных и отображение в таблице.
         
-        Выполняет SQL-запрос для получения списка всех поставщиков,
-        затем заполняет таблицу данными и обновляет счетчик.
-        В случае ошибки выводит сообщение пользователю.
+        Сбрасывает сохраненные результаты поиска и выполняет запрос с текущим
+        текстом поиска через контроллер поиска в фоновом потоке, поэтому
+        обновление сохраняет активный фильтр. Таблица и счетчик обновляются
+        методом show_search_results. В случае ошибки выводит сообщение пользователю.
         
         :raises: Exception при ошибке доступа к базе данных
         """
         try:
-            # SQL-запрос для получения списка поставщиков
-            query = """
-                SELECT supplier_id, supplier_name, contact_person, phone_number, email
-                FROM suppliers
-                ORDER BY supplier_name
-            """
-            # Получение списка поставщиков из базы данных
-            suppliers = self.db.fetch_all(query)
-
-            # Установка количества строк в таблице
-            self.suppliers_table.setRowCount(len(suppliers))
-
-            # Заполнение таблицы данными
-            for row_idx, supplier in enumerate(suppliers):
-                for col_idx, data in enumerate(supplier):
-                    # Создание элемента таблицы
-                    item = QTableWidgetItem(str(data) if data else "")
-                    # Запрет редактирования ячеек
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    # Установка элемента в таблицу
-                    self.suppliers_table.setItem(row_idx, col_idx, item)
-            
-            # Обновление счетчика поставщиков
-            self.supplier_count_label.setText(f"Всего поставщиков: {len(suppliers)}")
+            # Сброс сохраненных результатов поиска (данные могли измениться)
+            self.search_controller.reset()
+            # Загрузка с учетом текста поиска в фоновом потоке
+            self.search_controller.search_now()
             
         except Exception as e:
             # Логирование ошибки
@@ -176,51 +168,111 @@ class SuppliersTab(QWidget):
             # Отображение сообщения об ошибке
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о поставщиках")
 
+    def show_search_results(self, suppliers):
+        """
+        Отображение результата загрузки или поиска поставщиков.
+        
+        При пустом поле поиска выводятся все поставщики, иначе — найденные.
+        
+        :param suppliers: Строки результата запроса
+        :type suppliers: list[tuple]
+        """
+        caption = "Найдено поставщиков" if self.search.text().strip() else "Всего поставщиков"
+        self.show_suppliers(suppliers, caption)
+
+    def show_suppliers(self, suppliers, count_caption):
+        """
+        Отображение списка поставщиков в таблице.
+        
+        :param suppliers: Строки результата запроса поставщиков
+        :type suppliers: list[tuple]
+        :param count_caption: Подпись счетчика ("Всего поставщиков" или "Найдено поставщиков")
+        :type count_caption: str
+        """
+        # Установка количества строк в таблице
+        self.suppliers_table.setRowCount(len(suppliers))
+
+        # Заполнение таблицы данными
+        for row_idx, supplier in enumerate(suppliers):
+            for col_idx, data in enumerate(supplier):
+                # Создание элемента таблицы
+                item = QTableWidgetItem(str(data) if data else "")
+                # Запрет редактирования ячеек
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                # Установка элемента в таблицу
+                self.suppliers_table.setItem(row_idx, col_idx, item)
+        
+        # Обновление счетчика поставщиков
+        self.supplier_count_label.setText(f"{count_caption}: {len(suppliers)}")
+
+    def show_load_error(self, error):
+        """
+        Обработка ошибки фоновой загрузки поставщиков.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка загрузки поставщиков: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о поставщиках")
+
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных.
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором и текстом метки
+            self.setCursor(Qt.CursorShape.BusyCursor)
+            self.supplier_count_label.setText("Загрузка...")
+        else:
+            self.unsetCursor()
+
     def handle_search(self):
         """
-        Обработка поиска поставщиков.
+        Немедленный поиск поставщиков по введенному тексту.
+        
+        При вводе текста поиск выполняется автоматически после паузы
+        (см. SearchController); метод позволяет запустить его без ожидания.
+        """
+        self.search_controller.search_now()
+
+    def build_search_query(self, search_text):
+        """
+        Формирование запроса поиска поставщиков.
         
-        Выполняет SQL-запрос для поиска поставщиков по введенному тексту,
-        обновляет таблицу результатами поиска и счетчик найденных поставщиков.
         Поиск осуществляется по наименованию, контактному лицу, телефону и email.
+        При пустом тексте поиска возвращается запрос всех поставщиков.
         
-        :raises: Exception при ошибке выполнения поискового запроса
+        :param search_text: Текст поиска
+        :type search_text: str
+        :returns: SQL-запрос и параметры
+        :rtype: tuple
         """
-        try:
-            # Получение текста поиска
-            search_text = self.search.text()
-
-            # SQL-запрос для поиска поставщиков
+        if not search_text.strip():
+            # Полный список поставщиков
             query = """
                 SELECT supplier_id, supplier_name, contact_person, phone_number, email
                 FROM suppliers
-                WHERE supplier_name ILIKE %s 
-                   OR contact_person ILIKE %s 
-                   OR phone_number LIKE %s
-                   OR email ILIKE %s
                 ORDER BY supplier_name
             """
-            # Параметр поиска
-            search_param = f"%{search_text}%"
-            # Выполнение поиска
-            suppliers = self.db.fetch_all(query, (search_param, search_param, search_param, search_param))
-
-            # Установка количества строк в таблице
-            self.suppliers_table.setRowCount(len(suppliers))
-
-            # Заполнение таблицы результатами поиска
-            for row_idx, supplier in enumerate(suppliers):
-                for col_idx, data in enumerate(supplier):
-                    item = QTableWidgetItem(str(data) if data else "")
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.suppliers_table.setItem(row_idx, col_idx, item)
-                    
-            # Обновление счетчика для результатов поиска
-            self.supplier_count_label.setText(f"Найдено поставщиков: {len(suppliers)}")
-            
-        except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка поиска поставщиков: {str(e)}")
+            return query, ()
+        # SQL-запрос для поиска поставщиков
+        query = """
+            SELECT supplier_id, supplier_name, contact_person, phone_number, email
+            FROM suppliers
+            WHERE supplier_name ILIKE %s 
+               OR contact_person ILIKE %s 
+               OR phone_number LIKE %s
+               OR email ILIKE %s
+            ORDER BY supplier_name
+        """
+        # Параметр поиска
+        search_param = Validator.like_pattern(search_text)
+        return query, (search_param, search_param, search_param, search_param)
 
     def add_supplier(self):
         """
@@ -548,7 +600,7 @@ class SuppliersTab(QWidget):
                 
                 # Добавление фильтра поиска
                 if search_text:
-                    search_param = f"%{search_text}%"
+                    search_param = Validator.like_pattern(search_text)
                     query += """ AND (
                         supplier_name ILIKE %s
                         OR contact_person ILIKE %s
@@ -8,6 +8,9 @@ from PyQt6.QtGui import QIcon
 import logging
 from dialogs import AddWarehouseDialog, ConfirmDialog, ExportDialog
 from data_export import DataExporter
+from async_query import AsyncQueryRunner
+from search_controller import SearchController
+from validators import Validator
 
 class WarehousesTab(QWidget):
     """
@@ -30,6 +33,9 @@ class WarehousesTab(QWidget):
         super().__init__()
         # Сохранение объекта базы данных
         self.db = db
+        # Исполнитель фоновых запросов
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
         # Инициализация пользовательского интерфейса
         self.init_ui()
         # Загрузка списка складов
@@ -134,41 +140,29 @@ class WarehousesTab(QWidget):
         self.btn_refresh.clicked.connect(self.load_warehouses)
         self.btn_stock.clicked.connect(self.show_warehouse_stock)
         self.btn_export.clicked.connect(self.export_data)
-        self.search.textChanged.connect(self.handle_search)
+        # Поиск с задержкой ввода; уточнение поиска по названию и местоположению
+        # выполняется по уже найденным строкам
+        self.search_controller = SearchController(
+            self.search, self.query_runner, "warehouses", self.build_search_query,
+            self.show_search_results, self.show_load_error,
+            match_columns=[1, 2], parent=self
+        )
 
     def load_warehouses(self):
         """
         Загрузка складов из базы данных и отображение в таблице.
         
-        Метод выполняет запрос к базе данных для получения списка всех складов,
-        заполняет таблицу полученными данными и обновляет счетчик количества складов.
+        Метод сбрасывает сохраненные результаты поиска и выполняет запрос
+        с текущим текстом поиска через контроллер поиска в фоновом потоке,
+        поэтому обновление сохраняет активный фильтр. Таблица и счетчик
+        складов обновляются методом show_search_results.
         В случае ошибки выводит соответствующее сообщение.
         """
         try:
-            # SQL-запрос для получения списка складов
-            query = """
-                SELECT warehouse_id, warehouse_name, location, capacity
-                FROM warehouses
-                ORDER BY warehouse_name
-            """
-            # Получение списка складов из базы данных
-            warehouses = self.db.fetch_all(query)
-
-            # Установка количества строк в таблице
-            self.warehouses_table.setRowCount(len(warehouses))
-
-            # Заполнение таблицы данными
-            for row_idx, warehouse in enumerate(warehouses):
-                for col_idx, data in enumerate(warehouse):
-                    # Создание элемента таблицы
-                    item = QTableWidgetItem(str(data))
-                    # Запрет редактирования ячеек
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    # Установка элемента в таблицу
-                    self.warehouses_table.setItem(row_idx, col_idx, item)
-                    
-            # Обновление счетчика складов
-            self.warehouse_count_label.setText(f"Всего складов: {len(warehouses)}")
+            # Сброс сохраненных результатов поиска (данные могли измениться)
+            self.search_controller.reset()
+            # Загрузка с учетом текста поиска в фоновом потоке
+            self.search_controller.search_now()
             
         except Exception as e:
             # Логирование ошибки
@@ -176,46 +170,108 @@ class WarehousesTab(QWidget):
             # Отображение сообщения об ошибке
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о складах")
 
+    def show_search_results(self, warehouses):
+        """
+        Отображение результата загрузки или поиска складов.
+        
+        При пустом поле поиска выводятся все склады, иначе — найденные.
+        
+        :param warehouses: Строки результата запроса
+        :type warehouses: list[tuple]
+        """
+        caption = "Найдено складов" if self.search.text().strip() else "Всего складов"
+        self.show_warehouses(warehouses, caption)
+
+    def show_warehouses(self, warehouses, count_caption):
+        """
+        Отображение списка складов в таблице.
+        
+        :param warehouses: Строки результата запроса складов
+        :type warehouses: list[tuple]
+        :param count_caption: Подпись счетчика ("Всего складов" или "Найдено складов")
+        :type count_caption: str
+        """
+        # Установка количества строк в таблице
+        self.warehouses_table.setRowCount(len(warehouses))
+
+        # Заполнение таблицы данными
+        for row_idx, warehouse in enumerate(warehouses):
+            for col_idx, data in enumerate(warehouse):
+                # Создание элемента таблицы
+                item = QTableWidgetItem(str(data))
+                # Запрет редактирования ячеек
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                # Установка элемента в таблицу
+                self.warehouses_table.setItem(row_idx, col_idx, item)
+                
+        # Обновление счетчика складов
+        self.warehouse_count_label.setText(f"{count_caption}: {len(warehouses)}")
+
+    def show_load_error(self, error):
+        """
+        Обработка ошибки фоновой загрузки складов.
+        
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"Ошибка загрузки складов: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить данные о складах")
+
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных.
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором и текстом метки
+            self.setCursor(Qt.CursorShape.BusyCursor)
+            self.warehouse_count_label.setText("Загрузка...")
+        else:
+            self.unsetCursor()
+
     def handle_search(self):
         """
-        Обработка поиска складов.
+        Немедленный поиск складов по введенному тексту.
         
-        Метод получает текст из поля поиска, выполняет SQL-запрос для поиска складов
-        по названию или местоположению и обновляет таблицу результатами поиска.
-        В случае ошибки записывает сообщение в лог.
+        При вводе текста поиск выполняется автоматически после паузы
+        (см. SearchController); метод позволяет запустить его без ожидания.
         """
-        try:
-            # Получение текста поиска
-            search_text = self.search.text()
+        self.search_controller.search_now()
 
-            # SQL-запрос для поиска складов
+    def build_search_query(self, search_text):
+        """
+        Формирование запроса поиска складов.
+        
+        Поиск осуществляется по названию или местоположению.
+        При пустом тексте поиска возвращается запрос всех складов.
+        
+        :param search_text: Текст поиска
+        :type search_text: str
+        :returns: SQL-запрос и параметры
+        :rtype: tuple
+        """
+        if not search_text.strip():
+            # Полный список складов
             query = """
                 SELECT warehouse_id, warehouse_name, location, capacity
                 FROM warehouses
-                WHERE warehouse_name ILIKE %s OR location ILIKE %s
                 ORDER BY warehouse_name
             """
-            # Параметр поиска
-            search_param = f"%{search_text}%"
-            # Выполнение поиска
-            warehouses = self.db.fetch_all(query, (search_param, search_param))
-
-            # Установка количества строк в таблице
-            self.warehouses_table.setRowCount(len(warehouses))
-
-            # Заполнение таблицы результатами поиска
-            for row_idx, warehouse in enumerate(warehouses):
-                for col_idx, data in enumerate(warehouse):
-                    item = QTableWidgetItem(str(data))
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.warehouses_table.setItem(row_idx, col_idx, item)
-                    
-            # Обновление счетчика для результатов поиска
-            self.warehouse_count_label.setText(f"Найдено складов: {len(warehouses)}")
-            
-        except Exception as e:
-            # Логирование ошибки
-            logging.error(f"Ошибка поиска складов: {str(e)}")
+            return query, ()
+        # SQL-запрос для поиска складов
+        query = """
+            SELECT warehouse_id, warehouse_name, location, capacity
+            FROM warehouses
+            WHERE warehouse_name ILIKE %s OR location ILIKE %s
+            ORDER BY warehouse_name
+        """
+        # Параметр поиска
+        search_param = Validator.like_pattern(search_text)
+        return query, (search_param, search_param)
 
     def add_warehouse(self):
         """
@@ -510,7 +566,7 @@ class WarehousesTab(QWidget):
                 
                 # Добавление фильтра поиска
                 if search_text:
-                    search_param = f"%{search_text}%"
+                    search_param = Validator.like_pattern(search_text)
                     query += " AND (warehouse_name ILIKE %s OR location ILIKE %s)"
                     params.extend([search_param, search_param])
                 
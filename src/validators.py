@@ -151,6 +151,24 @@ class Validator:
         
         return sanitized
     
+    @staticmethod
+    def like_pattern(value: str) -> str:
+        """
+        Шаблон для поиска подстроки оператором LIKE/ILIKE.
+        
+        Экранирует специальные символы LIKE (``%``, ``_`` и ``\\``), чтобы
+        они искались буквально, и обрамляет значение символами ``%``.
+        
+        :param value: Искомая подстрока
+        :type value: str
+            
+        :returns: Шаблон вида ``%подстрока%``
+        :rtype: str
+        """
+        # Экранирование символа экранирования и подстановочных символов
+        escaped = re.sub(r"([\\%_])", r"\\\1", value)
+        return f"%{escaped}%"
+    
     @staticmethod
     def sanitize_dict(data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -23,7 +23,7 @@ import pandas as pd
 # Импорт библиотеки для работы с массивами и математическими операциями
 import numpy as np
 # Импорт необходимых компонентов из PyQt6 для создания графического интерфейса
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QHBoxLayout, QFileDialog
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QWidget, QLabel, QPushButton, QComboBox, QHBoxLayout, QFileDialog, QMessageBox
 # Импорт компонентов для работы со шрифтами
 from PyQt6.QtGui import QFont
 # Импорт базовых компонентов Qt
@@ -36,6 +36,8 @@ from matplotlib.figure import Figure
 import datetime
 # Импорт модуля для работы с базой данных
 from database import Database
+# Импорт исполнителя фоновых запросов
+from async_query import AsyncQueryRunner
 # Импорт модуля для логирования
 import logging
 
@@ -264,6 +266,10 @@ class InventoryAnalysisDialog(QDialog):
         super().__init__(parent)
         # Создание экземпляра базы данных
         self.db = Database()
+        # Исполнитель фоновых запросов; при закрытии диалога запросы отменяются
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
+        self.finished.connect(lambda _: self.query_runner.cancel_all())
         # Установка заголовка окна
         self.setWindowTitle("Анализ запасов")
         # Установка размеров окна
@@ -320,7 +326,8 @@ class InventoryAnalysisDialog(QDialog):
         try:
             categories = self.db.fetch_all(
                 "SELECT DISTINCT category FROM products ORDER BY category",
-                parent_widget=self
+                parent_widget=self,
+                cache=True
             )
             # Добавление категорий в выпадающий список
             for category in categories:
@@ -337,7 +344,8 @@ class InventoryAnalysisDialog(QDialog):
         try:
             warehouses = self.db.fetch_all(
                 "SELECT warehouse_id, warehouse_name FROM warehouses ORDER BY warehouse_name",
-                parent_widget=self
+                parent_widget=self,
+                cache=True
             )
             # Добавление складов в выпадающий список
             for warehouse_id, warehouse_name in warehouses:
@@ -369,6 +377,37 @@ class InventoryAnalysisDialog(QDialog):
         self.layout.addLayout(category_layout)
         self.layout.addLayout(warehouse_layout)
     
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных графика
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором
+            self.setCursor(Qt.CursorShape.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def show_error(self, message, error):
+        """
+        Отображение ошибки запроса данных графика
+        
+        :param message: Описание действия для журнала
+        :type message: str
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"{message}: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(
+            self,
+            "Ошибка базы данных",
+            f"Произошла ошибка при получении данных:\nОшибка получения данных: {error}"
+        )
+    
     def update_stock_by_category(self):
         """
         Обновление графика запасов по категориям
@@ -400,25 +439,30 @@ class InventoryAnalysisDialog(QDialog):
                 ORDER BY total_stock DESC
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, params, self)
-            
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Извлечение данных для графика
-            categories = [row[0] for row in result]
-            quantities = [row[1] for row in result]
+                # Извлечение данных для графика
+                categories = [row[0] for row in result]
+                quantities = [row[1] for row in result]
             
-            # Построение графика
-            self.chart_widget.plot_bar_chart(
-                categories, 
-                quantities, 
-                "Распределение запасов по категориям", 
-                "Категория", 
-                "Количество"
+                # Построение графика
+                self.chart_widget.plot_bar_chart(
+                    categories, 
+                    quantities, 
+                    "Распределение запасов по категориям", 
+                    "Категория", 
+                    "Количество"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, params, plot,
+                lambda error: self.show_error("Error updating stock by category", error)
             )
         except Exception as e:
             # Логирование ошибки при обновлении графика
@@ -456,25 +500,30 @@ class InventoryAnalysisDialog(QDialog):
                 ORDER BY total_stock DESC
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, params, self)
-            
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Извлечение данных для графика
-            warehouses = [row[0] for row in result]
-            quantities = [row[1] for row in result]
+                # Извлечение данных для графика
+                warehouses = [row[0] for row in result]
+                quantities = [row[1] for row in result]
             
-            # Построение столбчатой диаграммы
-            self.chart_widget.plot_bar_chart(
-                warehouses, 
-                quantities, 
-                "Распределение запасов по складам", 
-                "Склад", 
-                "Количество"
+                # Построение столбчатой диаграммы
+                self.chart_widget.plot_bar_chart(
+                    warehouses, 
+                    quantities, 
+                    "Распределение запасов по складам", 
+                    "Склад", 
+                    "Количество"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, params, plot,
+                lambda error: self.show_error("Error updating stock by warehouse", error)
             )
         except Exception as e:
             # Логирование ошибки при обновлении графика
@@ -497,6 +546,10 @@ class OrdersReportDialog(QDialog):
         super().__init__(parent)
         # Создание экземпляра базы данных
         self.db = Database()
+        # Исполнитель фоновых запросов; при закрытии диалога запросы отменяются
+        self.query_runner = AsyncQueryRunner(self.db, self)
+        self.query_runner.loading_changed.connect(self.set_loading)
+        self.finished.connect(lambda _: self.query_runner.cancel_all())
         # Установка заголовка окна
         self.setWindowTitle("Отчеты по заказам")
         # Установка размеров окна
@@ -570,6 +623,37 @@ class OrdersReportDialog(QDialog):
         # Добавление layout с кнопками в основной layout
         self.layout.addLayout(buttons_layout)
     
+    def set_loading(self, loading):
+        """
+        Отображение состояния загрузки данных графика
+        
+        :param loading: Выполняется ли загрузка
+        :type loading: bool
+        """
+        if loading:
+            # Индикация загрузки курсором
+            self.setCursor(Qt.CursorShape.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def show_error(self, message, error):
+        """
+        Отображение ошибки запроса данных графика
+        
+        :param message: Описание действия для журнала
+        :type message: str
+        :param error: Текст ошибки
+        :type error: str
+        """
+        # Логирование ошибки
+        logging.error(f"{message}: {error}")
+        # Отображение сообщения об ошибке
+        QMessageBox.critical(
+            self,
+            "Ошибка базы данных",
+            f"Произошла ошибка при получении данных:\nОшибка получения данных: {error}"
+        )
+    
     def show_sales_by_category(self):
         """
         Отображение заказов по категориям
@@ -590,23 +674,28 @@ class OrdersReportDialog(QDialog):
                 ORDER BY total_sales DESC
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, (), self)
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+                # Извлечение данных для графика
+                categories = [row[0] for row in result]
+                sales = [row[1] for row in result]
             
-            # Извлечение данных для графика
-            categories = [row[0] for row in result]
-            sales = [row[1] for row in result]
-            
-            # Построение круговой диаграммы
-            self.chart_widget.plot_pie_chart(
-                sales, 
-                categories, 
-                "Заказы по категориям"
+                # Построение круговой диаграммы
+                self.chart_widget.plot_pie_chart(
+                    sales, 
+                    categories, 
+                    "Заказы по категориям"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, (), plot,
+                lambda error: self.show_error("Error showing sales by category", error)
             )
         except Exception as e:
             # Логирование ошибки при отображении заказов по категориям
@@ -631,25 +720,30 @@ class OrdersReportDialog(QDialog):
                 ORDER BY month
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, (), self)
-            
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Извлечение данных для графика
-            months = [row[0] for row in result]
-            sales = [row[1] for row in result]
+                # Извлечение данных для графика
+                months = [row[0] for row in result]
+                sales = [row[1] for row in result]
             
-            # Построение линейного графика
-            self.chart_widget.plot_line_chart(
-                months, 
-                sales, 
-                "Динамика заказов по месяцам", 
-                "Месяц", 
-                "Сумма заказов"
+                # Построение линейного графика
+                self.chart_widget.plot_line_chart(
+                    months, 
+                    sales, 
+                    "Динамика заказов по месяцам", 
+                    "Месяц", 
+                    "Сумма заказов"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, (), plot,
+                lambda error: self.show_error("Error showing sales by month", error)
             )
         except Exception as e:
             # Логирование ошибки при отображении заказов по месяцам
@@ -675,25 +769,30 @@ class OrdersReportDialog(QDialog):
                 ORDER BY total_orders DESC
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, (), self)
-            
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Извлечение данных для графика
-            suppliers = [row[0] for row in result]
-            orders = [row[1] for row in result]
+                # Извлечение данных для графика
+                suppliers = [row[0] for row in result]
+                orders = [row[1] for row in result]
             
-            # Построение столбчатой диаграммы
-            self.chart_widget.plot_bar_chart(
-                suppliers, 
-                orders, 
-                "Поставки по поставщикам", 
-                "Поставщик", 
-                "Сумма заказов"
+                # Построение столбчатой диаграммы
+                self.chart_widget.plot_bar_chart(
+                    suppliers, 
+                    orders, 
+                    "Поставки по поставщикам", 
+                    "Поставщик", 
+                    "Сумма заказов"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, (), plot,
+                lambda error: self.show_error("Error showing sales by supplier", error)
             )
         except Exception as e:
             # Логирование ошибки при отображении поставок по поставщикам
@@ -726,25 +825,30 @@ class OrdersReportDialog(QDialog):
                 LIMIT %s
             """
             
-            # Выполнение запроса
-            result = self.db.fetch_all(query, (limit,), self)
+            # Построение графика по результату запроса
+            def plot(result):
+                # Проверка наличия результатов
+                if not result:
+                    self.chart_widget.clear_plot()
+                    return
             
-            # Проверка наличия результатов
-            if not result:
-                self.chart_widget.clear_plot()
-                return
+                # Извлечение данных для графика
+                products = [row[0] for row in result]
+                quantities = [row[1] for row in result]
             
-            # Извлечение данных для графика
-            products = [row[0] for row in result]
-            quantities = [row[1] for row in result]
-            
-            # Построение столбчатой диаграммы
-            self.chart_widget.plot_bar_chart(
-                products, 
-                quantities, 
-                f"Топ-{limit} заказываемых товаров", 
-                "Товар", 
-                "Количество"
+                # Построение столбчатой диаграммы
+                self.chart_widget.plot_bar_chart(
+                    products, 
+                    quantities, 
+                    f"Топ-{limit} заказываемых товаров", 
+                    "Товар", 
+                    "Количество"
+                )
+
+            # Выполнение запроса в фоновом потоке
+            self.query_runner.submit(
+                "chart", query, (limit,), plot,
+                lambda error: self.show_error("Error showing top products", error)
             )
         except Exception as e:
             # Логирование ошибки при отображении топ-продуктов